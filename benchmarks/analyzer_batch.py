@@ -0,0 +1,61 @@
+"""
+Пропускная способность Analyzer: check_entry по символу vs check_entry_batch.
+
+    python benchmarks/analyzer_batch.py [--window 20] [--repeat 5]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import numpy as np
+
+from services.analyzer import Analyzer, AnalyzerConfig
+
+
+def make_prices(symbols: int, window: int, seed: int = 0) -> np.ndarray:
+    """Случайные блуждания со скачками порядка порога."""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 0.004, (symbols, window))
+    return 100 * np.cumprod(1 + steps, axis=1)
+
+
+def best_of(repeat: int, fn) -> float:
+    """Лучшее время из repeat запусков (с)."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--window", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    analyzer = Analyzer(AnalyzerConfig(spike_percent=0.3, spikes_to_enter=2))
+
+    print(f"{'symbols':>8} {'scalar, ms':>12} {'batch, ms':>11} {'batch sym/s':>14} {'speedup':>8}")
+    for symbols in (1_000, 10_000):
+        prices = make_prices(symbols, args.window)
+        labels = [f"S{i}USDT" for i in range(symbols)]
+        rows = prices.tolist()
+
+        scalar = best_of(args.repeat, lambda: [
+            analyzer.check_entry(row, label) for row, label in zip(rows, labels)
+        ])
+        batch = best_of(args.repeat, lambda: analyzer.check_entry_batch(prices, labels))
+
+        print(
+            f"{symbols:>8} {scalar * 1000:>12.2f} {batch * 1000:>11.3f} "
+            f"{symbols / batch:>14,.0f} {scalar / batch:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Фейковая биржа для бенчмарков: готовые ответы без сети и без логики.
+"""
+from decimal import Decimal
+
+from core.exchange import ExchangeClient, PriceCallback, Subscription
+from core.models import CandleFrame, Instrument, Order, Position, Ticker
+
+
+def make_kline_rows(count: int, start_ms: int = 1_700_000_000_000, step_ms: int = 60_000) -> list[list[str]]:
+    """Строки get_kline в формате Bybit (строки, от новых к старым)."""
+    rows = []
+    for i in range(count):
+        price = 100 + (i % 50) * 0.1
+        rows.append([
+            str(start_ms + i * step_ms),
+            f"{price:.2f}", f"{price + 0.5:.2f}", f"{price - 0.5:.2f}", f"{price + 0.1:.2f}",
+            "1234.5", "123456.7",
+        ])
+    rows.reverse()
+    return rows
+
+
+class FakeSession:
+    """Вместо pybit HTTP: get_kline отдаёт заранее собранный ответ."""
+
+    def __init__(self, rows: list[list[str]]):
+        self._response = {"retCode": 0, "result": {"list": rows}}
+
+    def get_kline(self, **params) -> dict:
+        return self._response
+
+
+class FakeClient(ExchangeClient):
+    """ExchangeClient с постоянными ответами (цена, инструмент, ордер)."""
+
+    def __init__(self, price: float = 100.0):
+        self.price = price
+        self._ticker = Ticker("BTCUSDT", price, price, price, 0.0)
+        self._instrument = Instrument("BTCUSDT", Decimal("0.001"), Decimal("0.001"), Decimal("0.1"), 100.0)
+        self._klines = CandleFrame.from_bybit(make_kline_rows(100))
+
+    def connect(self) -> None:
+        pass
+
+    def get_ticker(self, symbol: str) -> Ticker:
+        return self._ticker
+
+    def get_tickers(self) -> list[Ticker]:
+        return [self._ticker]
+
+    def get_klines(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int = 100,
+        start: int | None = None,
+        end: int | None = None,
+    ) -> CandleFrame:
+        return self._klines
+
+    def get_instruments(self) -> list[Instrument]:
+        return [self._instrument]
+
+    def subscribe_prices(
+        self,
+        symbols: list[str],
+        callback: PriceCallback,
+        channel: str = "tickers",
+    ) -> Subscription:
+        raise NotImplementedError("Поток цен в бенчмарках не нужен")
+
+    def set_leverage(self, symbol: str, leverage: int) -> None:
+        pass
+
+    def buy(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> Order:
+        return Order("fake", symbol, "Buy", qty, "created")
+
+    def sell(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> Order:
+        return Order("fake", symbol, "Sell", qty, "created")
+
+    def get_positions(self, symbol: str) -> list[Position]:
+        return []
+
+    def close_position(self, symbol: str, qty: str | None = None, side: str | None = None) -> Order | None:
+        return None
+
+    def set_take_profit(self, symbol: str, price: float | str) -> None:
+        pass
+
+    def set_stop_loss(self, symbol: str, price: float | str) -> None:
+        pass
+
+    def set_trailing_stop(
+        self,
+        symbol: str,
+        distance: float | str,
+        active_price: float | str | None = None,
+        stop_loss: float | str | None = None,
+    ) -> None:
+        pass
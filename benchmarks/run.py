@@ -0,0 +1,289 @@
+"""
+Бенчмарки горячих путей бота с проверкой регрессий против baseline.json.
+
+    python benchmarks/run.py                  # прогнать и сравнить с baseline
+    python benchmarks/run.py --update         # записать текущие результаты в baseline
+    python benchmarks/run.py -k strategy      # только бенчмарки с "strategy" в имени
+
+Код завершения 1, если какой-то путь медленнее baseline больше чем на свой порог
+(--threshold для бенчмарков без собственного). Время нормируется на калибровочный
+цикл чистого Python (calibration), чтобы baseline, снятый на другой машине,
+оставался сравнимым; --raw — сравнивать наносекунды как есть.
+
+Все бенчмарки меряются --rounds раундами, calibration — в каждом раунде; итог —
+медиана по раундам, так что одиночный шумный замер гейт не роняет.
+Тот же гейт для pytest: python -m pytest benchmarks.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+from statistics import median
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from core.exchange import BybitClient
+from core.models import Candle, CandleFrame
+from services import Analyzer, AnalyzerConfig, Fetcher, Strategy, StrategyConfig, Trader
+
+from fakes import FakeClient, FakeSession, make_kline_rows
+
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+CALIBRATION = "calibration"
+DEFAULT_THRESHOLD = 0.25
+
+# Бенчмарк: setup() → (fn, ops) — fn выполняет ops операций за вызов
+Benchmark = Callable[[], tuple[Callable[[], object], int]]
+BENCHMARKS: dict[str, Benchmark] = {}
+THRESHOLDS: dict[str, float] = {}      # Собственные пороги (иначе --threshold)
+
+
+def bench(name: str, threshold: float | None = None):
+    def register(setup: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = setup
+        if threshold is not None:
+            THRESHOLDS[name] = threshold
+        return setup
+    return register
+
+
+def make_strategy(client: FakeClient, dry_run: bool = True) -> Strategy:
+    config = StrategyConfig(entry_spike_percent=0.3, spikes_to_enter=2, dry_run=dry_run)
+    return Strategy(Trader(client), Fetcher(client), config)
+
+
+def open_long(strategy: Strategy, price: float) -> None:
+    """Поставить стратегию в long по price (без входа через биржу)."""
+    state = strategy.state
+    state.in_position = True
+    state.side = "long"
+    state.entry_price = price
+    state.max_price = price
+    state.current_sl = price * (1 - strategy.config.initial_sl_percent / 100)
+
+
+# === Бенчмарки ===
+
+@bench(CALIBRATION)
+def calibration():
+    def fn():
+        total = 0
+        for i in range(1000):
+            total += i * i
+        return total
+    return fn, 1000
+
+
+@bench("analyzer.check_entry")
+def analyzer_check_entry():
+    analyzer = Analyzer(AnalyzerConfig(spike_percent=0.3, spikes_to_enter=2))
+    prices = [100 + (i % 7) * 0.2 for i in range(20)]
+    return lambda: analyzer.check_entry(prices, "BTCUSDT"), 1
+
+
+@bench("strategy.on_price.flat")
+def strategy_on_price_flat():
+    """Нет позиции, нет сигнала — самый частый тик."""
+    strategy = make_strategy(FakeClient())
+    prices = [100 + (i % 2) * 0.01 for i in range(1000)]
+
+    def fn():
+        on_price = strategy.on_price
+        for price in prices:
+            on_price(price, 0.0)
+    return fn, len(prices)
+
+
+@bench("strategy.tick")
+def strategy_tick():
+    """Старый API: цена через Fetcher (фейковый REST) + строка details."""
+    strategy = make_strategy(FakeClient())
+    return strategy.tick, 1
+
+
+@bench("strategy.manage_position.hold")
+def strategy_manage_hold():
+    strategy = make_strategy(FakeClient())
+    open_long(strategy, 100.0)
+    prices = [100 + (i % 5) * 0.01 for i in range(1000)]
+
+    def fn():
+        manage = strategy._manage_position
+        for price in prices:
+            manage(price, 0.0)
+    return fn, len(prices)
+
+
+@bench("strategy.manage_position.trailing")
+def strategy_manage_trailing():
+    """Цена растёт — SL двигается на каждом тике (с запросом к фейковой бирже)."""
+    strategy = make_strategy(FakeClient(), dry_run=False)
+    prices = [100 * (1 + 0.0005 * i) for i in range(1, 1001)]
+
+    def fn():
+        open_long(strategy, 100.0)
+        manage = strategy._manage_position
+        for price in prices:
+            manage(price, 0.0)
+    return fn, len(prices)
+
+
+@bench("strategy.calc_trailing_sl")
+def strategy_calc_trailing_sl():
+    strategy = make_strategy(FakeClient())
+    open_long(strategy, 100.0)
+    strategy.state.max_price = 104.0
+    return lambda: strategy._calc_trailing_sl(3.5), 1
+
+
+# Пути, где основное время в datetime/numpy (C-код): калибровка чистого Python
+# их не нормирует, разброс между прогонами выше — порог свободнее
+
+@bench("candle.from_bybit", threshold=0.5)
+def candle_from_bybit():
+    row = make_kline_rows(1)[0]
+    return lambda: Candle.from_bybit(row), 1
+
+
+@bench("candle_frame.from_bybit.1000", threshold=0.5)
+def candle_frame_from_bybit():
+    rows = make_kline_rows(1000)
+    return lambda: CandleFrame.from_bybit(rows), 1
+
+
+@bench("bybit.get_klines.200", threshold=0.5)
+def bybit_get_klines():
+    """Разбор ответа get_kline целиком (сессия pybit заменена фейковой)."""
+    client = BybitClient("key", "secret")
+    client._session = FakeSession(make_kline_rows(200))
+    return lambda: client.get_klines("BTCUSDT", "1", 200), 1
+
+
+@bench("trader.enter_long")
+def trader_enter_long():
+    """Вход по известной цене: плечо из кэша, округление qty и SL, ордер."""
+    trader = Trader(FakeClient())
+    trader.enter_long("BTCUSDT", 100.0, leverage=5, price=100.0, stop_loss=99.7)
+    return lambda: trader.enter_long("BTCUSDT", 100.0, leverage=5, price=100.0, stop_loss=99.7), 1
+
+
+# === Запуск ===
+
+def measure(setup: Benchmark, repeat: int, min_time: float) -> float:
+    """Лучшее время одной операции (ns) из repeat замеров по >= min_time с."""
+    fn, ops = setup()
+
+    # Подбираем число вызовов на замер
+    loops = 1
+    while (elapsed := timed(fn, loops)) < min_time:
+        loops = loops * 10 if elapsed < min_time / 10 else int(loops * min_time / elapsed) + 1
+
+    best = min([elapsed] + [timed(fn, loops) for _ in range(repeat - 1)])
+    return best / (loops * ops) * 1e9
+
+
+def timed(fn: Callable[[], object], loops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(loops):
+        fn()
+    return time.perf_counter() - start
+
+
+def collect(names: list[str], rounds: int, repeat: int, min_time: float, raw: bool = False) -> dict[str, float]:
+    """
+    Медиана ns/op по rounds раундам для каждого бенчмарка.
+
+    Калибровка меряется в начале каждого раунда; без raw замер раунда
+    пересчитывается к медианной калибровке — дрейф частоты/нагрузки между
+    раундами сокращается, единицы остаются наносекундами.
+    """
+    names = [CALIBRATION] + [name for name in names if name != CALIBRATION]
+    samples: dict[str, list[float]] = {name: [] for name in names}
+    for _ in range(rounds):
+        for name in names:
+            samples[name].append(measure(BENCHMARKS[name], repeat, min_time))
+
+    calibration = samples[CALIBRATION]
+    reference = median(calibration)
+    results = {}
+    for name, values in samples.items():
+        if not raw and name != CALIBRATION:
+            values = [value * reference / cal for value, cal in zip(values, calibration)]
+        results[name] = median(values)
+    return results
+
+
+def changes(results: dict[str, float], baseline: dict[str, float], raw: bool) -> dict[str, float]:
+    """Относительное изменение каждого бенчмарка против baseline (+0.1 = на 10% медленнее)."""
+    scale = 1.0
+    if not raw and CALIBRATION in results and CALIBRATION in baseline:
+        scale = baseline[CALIBRATION] / results[CALIBRATION]
+    return {
+        name: value * scale / baseline[name] - 1
+        for name, value in results.items()
+        if name != CALIBRATION and name in baseline
+    }
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], threshold: float, raw: bool) -> list[str]:
+    """Имена бенчмарков, ставших медленнее baseline больше чем на свой порог."""
+    delta = changes(results, baseline, raw)
+
+    print(f"{'benchmark':<36} {'ns/op':>12} {'baseline':>12} {'change':>9} {'limit':>6}")
+    regressions = []
+    for name, value in results.items():
+        base = baseline.get(name)
+        if name not in delta:
+            base = f"{base:,.1f}" if base is not None else "-"
+            print(f"{name:<36} {value:>12,.1f} {base:>12}")
+            continue
+        limit = THRESHOLDS.get(name, threshold)
+        mark = ""
+        if delta[name] > limit:
+            regressions.append(name)
+            mark = "  REGRESSION"
+        print(f"{name:<36} {value:>12,.1f} {base:>12,.1f} {delta[name]:>+8.1%} {limit:>6.0%}{mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-k", "--filter", default="", help="Подстрока имени бенчмарка")
+    parser.add_argument("--rounds", type=int, default=5, help="Раундов (итог — медиана)")
+    parser.add_argument("--repeat", type=int, default=3, help="Замеров в раунде (берётся лучший)")
+    parser.add_argument("--min-time", type=float, default=0.05, help="Секунд на замер")
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="Допустимое замедление для бенчмарков без своего порога (0.25 = 25%%)",
+    )
+    parser.add_argument("--raw", action="store_true", help="Без нормировки на calibration")
+    parser.add_argument("--update", action="store_true", help="Записать результаты в baseline")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    results = collect(names, args.rounds, args.repeat, args.min_time, args.raw)
+
+    stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+
+    if args.update:
+        merged = {**stored.get("results", {}), **results}
+        args.baseline.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": {name: round(value, 2) for name, value in merged.items()},
+        }, indent=2) + "\n")
+        print(f"Baseline записан: {args.baseline}")
+
+    regressions = compare(results, stored.get("results", {}), args.threshold, args.raw)
+    if regressions and not args.update:
+        print(f"\nРегрессии: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
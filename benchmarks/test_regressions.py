@@ -0,0 +1,29 @@
+"""
+Гейт регрессий run.py в виде тестов pytest (по тесту на бенчмарк).
+
+    python -m pytest benchmarks
+
+Замер всех бенчмарков — один на модуль (~15 с); без baseline.json тесты пропускаются.
+"""
+import json
+
+import pytest
+
+from run import BASELINE, BENCHMARKS, CALIBRATION, DEFAULT_THRESHOLD, THRESHOLDS, changes, collect
+
+
+pytestmark = pytest.mark.skipif(not BASELINE.exists(), reason="нет baseline.json")
+
+
+@pytest.fixture(scope="module")
+def delta() -> dict[str, float]:
+    baseline = json.loads(BASELINE.read_text())["results"]
+    return changes(collect(list(BENCHMARKS), rounds=5, repeat=3, min_time=0.05), baseline, raw=False)
+
+
+@pytest.mark.parametrize("name", [name for name in BENCHMARKS if name != CALIBRATION])
+def test_no_regression(name, delta):
+    if name not in delta:
+        pytest.skip("нет в baseline")
+    limit = THRESHOLDS.get(name, DEFAULT_THRESHOLD)
+    assert delta[name] <= limit, f"{name}: {delta[name]:+.1%} при пороге {limit:.0%}"
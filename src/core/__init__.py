@@ -1,4 +1,9 @@
 from .config import settings
-from .exchange import ExchangeClient, BybitClient, BinanceClient
-from .models import Candle, Ticker, Order, Signal, SignalType, Position
+from .exchange import ExchangeClient, AsyncExchangeClient, BybitClient, AsyncBybitClient, BinanceClient, InstrumentedClient, RateLimitedClient, SimulatedMarket, SimulatedExchange
+from .models import Candle, CandleFrame, Ticker, Order, Signal, SignalType, Position, Instrument, BookUpdate
 from .logger import logger
+from .metrics import metrics
+from .buffers import RingBuffer
+from .orderbook import OrderBook
+from .indicators import EMA, ATR, RollingStd, VWAP
+from .scheduler import TickScheduler
@@ -0,0 +1,77 @@
+class RingBuffer:
+    """
+    Кольцевой буфер фиксированной ёмкости.
+
+    append() — O(1) без сдвига элементов (в отличие от list.pop(0)).
+    Индексация как у списка: [0] — самый старый, [-1] — самый новый.
+    """
+
+    __slots__ = ("_data", "_capacity", "_start", "_size")
+
+    def __init__(self, capacity: int, items: "list[float] | None" = None):
+        if capacity <= 0:
+            raise ValueError("capacity должна быть > 0")
+        self._data: list[float] = [0.0] * capacity
+        self._capacity = capacity
+        self._start = 0
+        self._size = 0
+        for item in items or ():
+            self.append(item)
+
+    @property
+    def capacity(self) -> int:
+        """Максимальное кол-во элементов."""
+        return self._capacity
+
+    def append(self, value: float) -> None:
+        """Добавить элемент (самый старый вытесняется при заполнении)."""
+        if self._size < self._capacity:
+            self._data[(self._start + self._size) % self._capacity] = value
+            self._size += 1
+        else:
+            self._data[self._start] = value
+            self._start = (self._start + 1) % self._capacity
+
+    def last(self) -> float:
+        """Последний добавленный элемент."""
+        if not self._size:
+            raise IndexError("буфер пуст")
+        return self._data[(self._start + self._size - 1) % self._capacity]
+
+    def clear(self) -> None:
+        """Очистить буфер."""
+        self._start = 0
+        self._size = 0
+
+    def to_list(self) -> list[float]:
+        """Копия содержимого от старых к новым."""
+        end = self._start + self._size
+        if end <= self._capacity:
+            return self._data[self._start:end]
+        return self._data[self._start:] + self._data[:end - self._capacity]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.to_list()[index]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("индекс вне буфера")
+        return self._data[(self._start + index) % self._capacity]
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self._data[(self._start + i) % self._capacity]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, RingBuffer):
+            return self.to_list() == other.to_list()
+        if isinstance(other, list):
+            return self.to_list() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"RingBuffer({self._capacity}, {self.to_list()!r})"
@@ -1,5 +1,35 @@
-from .base import ExchangeClient
+from .base import ExchangeClient, PriceCallback, Subscription, TradeCallback
+from .async_base import AsyncExchangeClient
 from .bybit import BybitClient
+from .bybit_async import AsyncBybitClient
 from .binance import BinanceClient
+from .stream import BybitStream
+from .instrumented import InstrumentedClient
+from .recording import RecordingClient, ReplayExchangeClient, ReplayError
+from .simulated import Fill, SimulatedExchange, SimulatedMarket, SimulatedOrderError, SimulationConfig
+from .rate_limit import Priority, RateLimiter, RateLimitedClient, TokenBucket
 
-__all__ = ["ExchangeClient", "BybitClient", "BinanceClient"]
+__all__ = [
+    "ExchangeClient",
+    "AsyncExchangeClient",
+    "PriceCallback",
+    "TradeCallback",
+    "Subscription",
+    "BybitClient",
+    "AsyncBybitClient",
+    "BinanceClient",
+    "BybitStream",
+    "InstrumentedClient",
+    "RecordingClient",
+    "ReplayExchangeClient",
+    "ReplayError",
+    "SimulatedMarket",
+    "SimulatedExchange",
+    "SimulationConfig",
+    "SimulatedOrderError",
+    "Fill",
+    "Priority",
+    "RateLimiter",
+    "RateLimitedClient",
+    "TokenBucket",
+]
@@ -0,0 +1,112 @@
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core.models import CandleFrame, Instrument, Ticker, Order, Position
+
+
+class AsyncExchangeClient(ABC):
+    """
+    Асинхронный вариант ExchangeClient.
+
+    Те же тупые ручки к API, но корутинами: независимые запросы
+    можно выполнять одновременно (asyncio.gather) на одном event loop.
+    """
+
+    @abstractmethod
+    async def connect(self) -> None:
+        """Подготовить соединения с биржей."""
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Закрыть соединения."""
+        pass
+
+    # === Market Data ===
+
+    @abstractmethod
+    async def get_ticker(self, symbol: str) -> "Ticker":
+        """Получить текущую цену."""
+        pass
+
+    @abstractmethod
+    async def get_tickers(self) -> list["Ticker"]:
+        """Тикеры всех инструментов одним запросом."""
+        pass
+
+    @abstractmethod
+    async def get_klines(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int = 100,
+        start: int | None = None,
+        end: int | None = None,
+    ) -> "CandleFrame":
+        """Получить свечи (от старых к новым)."""
+        pass
+
+    @abstractmethod
+    async def get_instruments(self) -> list["Instrument"]:
+        """Параметры всех торгуемых инструментов."""
+        pass
+
+    # === Leverage ===
+
+    @abstractmethod
+    async def set_leverage(self, symbol: str, leverage: int) -> None:
+        """Установить плечо для символа."""
+        pass
+
+    # === Trading ===
+
+    @abstractmethod
+    async def buy(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> "Order":
+        """Купить (long); stop_loss ставится тем же запросом."""
+        pass
+
+    @abstractmethod
+    async def sell(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> "Order":
+        """Продать (short); stop_loss ставится тем же запросом."""
+        pass
+
+    # === Positions ===
+
+    @abstractmethod
+    async def get_positions(self, symbol: str) -> list["Position"]:
+        """Получить открытые позиции."""
+        pass
+
+    @abstractmethod
+    async def close_position(
+        self,
+        symbol: str,
+        qty: str | None = None,
+        side: str | None = None,
+    ) -> "Order | None":
+        """Закрыть позицию (qty=None — всю; side известна — без запроса позиций)."""
+        pass
+
+    # === TP/SL ===
+
+    @abstractmethod
+    async def set_take_profit(self, symbol: str, price: float | str) -> None:
+        """Установить тейк-профит для позиции."""
+        pass
+
+    @abstractmethod
+    async def set_stop_loss(self, symbol: str, price: float | str) -> None:
+        """Установить стоп-лосс для позиции."""
+        pass
+
+    @abstractmethod
+    async def set_trailing_stop(
+        self,
+        symbol: str,
+        distance: float | str,
+        active_price: float | str | None = None,
+        stop_loss: float | str | None = None,
+    ) -> None:
+        """Трейлинг-стоп на бирже (distance "0" — снять, active_price — отложенное включение)."""
+        pass
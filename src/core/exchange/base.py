@@ -1,8 +1,23 @@
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable, Protocol
 
 if TYPE_CHECKING:
-    from core.models import Candle, Ticker, Order, Position
+    from core.models import CandleFrame, Instrument, Ticker, Order, Position
+
+
+# callback(symbol, price, ts_ms)
+PriceCallback = Callable[[str, float, int], None]
+
+# callback(symbol, price, ts_ms, qty) — сделка с объёмом
+TradeCallback = Callable[[str, float, int, float], None]
+
+
+class Subscription(Protocol):
+    """Активная подписка на поток данных."""
+
+    def stop(self) -> None:
+        """Отписаться и закрыть поток."""
+        ...
 
 
 class ExchangeClient(ABC):
@@ -25,8 +40,51 @@ class ExchangeClient(ABC):
         pass
     
     @abstractmethod
-    def get_klines(self, symbol: str, interval: str, limit: int = 100) -> list["Candle"]:
-        """Получить свечи."""
+    def get_tickers(self) -> list["Ticker"]:
+        """Тикеры всех инструментов одним запросом."""
+        pass
+    
+    @abstractmethod
+    def get_klines(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int = 100,
+        start: int | None = None,
+        end: int | None = None,
+    ) -> "CandleFrame":
+        """
+        Получить свечи (от старых к новым).
+        
+        Args:
+            symbol: Торговая пара
+            interval: Интервал ("1", "5", "15", "60", "240", "D")
+            limit: Макс. кол-во свечей (самые новые в диапазоне)
+            start: Начало диапазона (ms, включительно)
+            end: Конец диапазона (ms, включительно)
+        """
+        pass
+    
+    @abstractmethod
+    def get_instruments(self) -> list["Instrument"]:
+        """Параметры всех торгуемых инструментов (шаги qty/цены, плечо)."""
+        pass
+    
+    @abstractmethod
+    def subscribe_prices(
+        self,
+        symbols: list[str],
+        callback: PriceCallback,
+        channel: str = "tickers",
+    ) -> Subscription:
+        """
+        Подписаться на поток цен.
+        
+        Args:
+            symbols: Торговые пары
+            callback: Вызывается на каждую новую цену: (symbol, price, ts_ms)
+            channel: "tickers" (последняя цена) или "trades" (каждая сделка)
+        """
         pass
     
     # === Leverage ===
@@ -39,24 +97,26 @@ class ExchangeClient(ABC):
     # === Trading ===
     
     @abstractmethod
-    def buy(self, symbol: str, qty: str) -> "Order":
+    def buy(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> "Order":
         """
         Купить (long).
         
         Args:
             symbol: Торговая пара
             qty: Количество в монетах (например "0.001" BTC)
+            stop_loss: Начальный SL — ставится тем же запросом, что и ордер
         """
         pass
     
     @abstractmethod
-    def sell(self, symbol: str, qty: str) -> "Order":
+    def sell(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> "Order":
         """
         Продать (short).
         
         Args:
             symbol: Торговая пара
             qty: Количество в монетах
+            stop_loss: Начальный SL — ставится тем же запросом, что и ордер
         """
         pass
     
@@ -68,24 +128,50 @@ class ExchangeClient(ABC):
         pass
     
     @abstractmethod
-    def close_position(self, symbol: str, qty: str | None = None) -> "Order | None":
+    def close_position(
+        self,
+        symbol: str,
+        qty: str | None = None,
+        side: str | None = None,
+    ) -> "Order | None":
         """
         Закрыть позицию.
         
         Args:
             symbol: Торговая пара
             qty: Количество (None = закрыть всю)
+            side: Сторона позиции ("Buy"/"Sell"), если уже известна
+                (кэш позиций) — тогда без запроса позиций, одним ордером
         """
         pass
     
     # === TP/SL ===
     
     @abstractmethod
-    def set_take_profit(self, symbol: str, price: float) -> None:
+    def set_take_profit(self, symbol: str, price: float | str) -> None:
         """Установить тейк-профит для позиции."""
         pass
     
     @abstractmethod
-    def set_stop_loss(self, symbol: str, price: float) -> None:
+    def set_stop_loss(self, symbol: str, price: float | str) -> None:
         """Установить стоп-лосс для позиции."""
         pass
+    
+    @abstractmethod
+    def set_trailing_stop(
+        self,
+        symbol: str,
+        distance: float | str,
+        active_price: float | str | None = None,
+        stop_loss: float | str | None = None,
+    ) -> None:
+        """
+        Трейлинг-стоп на стороне биржи: SL идёт за ценой на расстоянии distance.
+        
+        Args:
+            symbol: Торговая пара
+            distance: Расстояние от пика в единицах цены ("0" — снять трейлинг)
+            active_price: Включить, когда цена дойдёт сюда (None — сразу)
+            stop_loss: Заодно выставить фиксированный SL (тем же запросом)
+        """
+        pass
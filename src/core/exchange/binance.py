@@ -1,5 +1,5 @@
-from .base import ExchangeClient
-from ..models import Candle, Ticker, Order, Position
+from .base import ExchangeClient, PriceCallback, Subscription
+from ..models import CandleFrame, Instrument, Ticker, Order, Position
 
 
 class BinanceClient(ExchangeClient):
@@ -20,26 +20,56 @@ class BinanceClient(ExchangeClient):
     def get_ticker(self, symbol: str) -> Ticker:
         raise NotImplementedError("Binance client not implemented")
     
-    def get_klines(self, symbol: str, interval: str, limit: int = 100) -> list[Candle]:
+    def get_tickers(self) -> list[Ticker]:
+        raise NotImplementedError("Binance client not implemented")
+    
+    def get_instruments(self) -> list[Instrument]:
+        raise NotImplementedError("Binance client not implemented")
+    
+    def get_klines(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int = 100,
+        start: int | None = None,
+        end: int | None = None,
+    ) -> CandleFrame:
+        raise NotImplementedError("Binance client not implemented")
+    
+    def subscribe_prices(
+        self,
+        symbols: list[str],
+        callback: PriceCallback,
+        channel: str = "tickers",
+    ) -> Subscription:
         raise NotImplementedError("Binance client not implemented")
     
     def set_leverage(self, symbol: str, leverage: int) -> None:
         raise NotImplementedError("Binance client not implemented")
     
-    def buy(self, symbol: str, qty: str) -> Order:
+    def buy(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> Order:
         raise NotImplementedError("Binance client not implemented")
     
-    def sell(self, symbol: str, qty: str) -> Order:
+    def sell(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> Order:
         raise NotImplementedError("Binance client not implemented")
     
     def get_positions(self, symbol: str) -> list[Position]:
         raise NotImplementedError("Binance client not implemented")
     
-    def close_position(self, symbol: str, qty: str | None = None) -> Order | None:
+    def close_position(self, symbol: str, qty: str | None = None, side: str | None = None) -> Order | None:
+        raise NotImplementedError("Binance client not implemented")
+    
+    def set_take_profit(self, symbol: str, price: float | str) -> None:
         raise NotImplementedError("Binance client not implemented")
     
-    def set_take_profit(self, symbol: str, price: float) -> None:
+    def set_stop_loss(self, symbol: str, price: float | str) -> None:
         raise NotImplementedError("Binance client not implemented")
     
-    def set_stop_loss(self, symbol: str, price: float) -> None:
+    def set_trailing_stop(
+        self,
+        symbol: str,
+        distance: float | str,
+        active_price: float | str | None = None,
+        stop_loss: float | str | None = None,
+    ) -> None:
         raise NotImplementedError("Binance client not implemented")
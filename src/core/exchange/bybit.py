@@ -1,7 +1,53 @@
+import hashlib
+import hmac
+import time
+import uuid
+from typing import Callable, Mapping
+from urllib.parse import urlsplit
+
+from pybit.exceptions import FailedRequestError, InvalidRequestError
 from pybit.unified_trading import HTTP
 
-from .base import ExchangeClient
-from ..models import Candle, Ticker, Order, Position
+from .base import ExchangeClient, PriceCallback, TradeCallback
+from .stream import BybitStream
+from ..logger import logger
+from ..models import BookUpdate, CandleFrame, Execution, Instrument, Ticker, Order, Position
+
+
+PUBLIC_WS_URL = "wss://stream.bybit.com/v5/public/linear"
+PUBLIC_WS_URL_TESTNET = "wss://stream-testnet.bybit.com/v5/public/linear"
+PRIVATE_WS_URL = "wss://stream.bybit.com/v5/private"
+PRIVATE_WS_URL_TESTNET = "wss://stream-testnet.bybit.com/v5/private"
+
+# Глубина стакана в потоке по умолчанию (linear: 1, 50, 200, 500)
+BOOK_DEPTH = 50
+
+# Срок действия подписи auth приватного WebSocket
+WS_AUTH_TTL_MS = 10_000
+
+# retCode "leverage not modified" — плечо уже такое, это не ошибка
+LEVERAGE_NOT_MODIFIED = 110043
+
+# retCode reduce-only ордера без позиции — закрывать уже нечего
+POSITION_IS_ZERO = 110017
+
+# retCode повторного orderLinkId — ордер уже принят (дошла прошлая попытка)
+DUPLICATE_ORDER = 110072
+
+# Коды, которые pybit повторяет сам. Без 10006 (лимит запросов):
+# pybit на нём засыпает, блокируя поток, — лимитами занимается RateLimitedClient
+RETRY_CODES = {10002, 30034, 30035, 130035, 130150}
+
+# callback(path, headers) на каждый HTTP-ответ
+ResponseListener = Callable[[str, Mapping[str, str]], None]
+
+# Обработчики приватного потока: пачка обновлений из одного сообщения
+PositionHandler = Callable[[list[Position]], None]
+OrderHandler = Callable[[list[Order]], None]
+ExecutionHandler = Callable[[list[Execution]], None]
+
+# Обработчик стакана: False — стакан разошёлся, нужен новый snapshot
+BookHandler = Callable[[BookUpdate], bool | None]
 
 
 class BybitClient(ExchangeClient):
@@ -11,11 +57,25 @@ class BybitClient(ExchangeClient):
     Тупые ручки к API — никакой бизнес-логики.
     """
     
-    def __init__(self, api_key: str, api_secret: str, testnet: bool = True):
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        testnet: bool = True,
+        public_ws_url: str | None = None,
+        private_ws_url: str | None = None,
+    ):
         self._api_key = api_key
         self._api_secret = api_secret
         self._testnet = testnet
         self._session: HTTP | None = None
+        self._response_listeners: list[ResponseListener] = []
+        self._public_ws_url = public_ws_url or (
+            PUBLIC_WS_URL_TESTNET if testnet else PUBLIC_WS_URL
+        )
+        self._private_ws_url = private_ws_url or (
+            PRIVATE_WS_URL_TESTNET if testnet else PRIVATE_WS_URL
+        )
     
     def connect(self) -> None:
         """Установить соединение с Bybit."""
@@ -23,7 +83,21 @@ class BybitClient(ExchangeClient):
             api_key=self._api_key,
             api_secret=self._api_secret,
             testnet=self._testnet,
+            retry_codes=RETRY_CODES,
         )
+        self._session.client.hooks["response"].append(self._on_response)
+    
+    def add_response_listener(self, listener: ResponseListener) -> None:
+        """Получать заголовки каждого ответа (лимиты X-Bapi-Limit*)."""
+        self._response_listeners.append(listener)
+    
+    def _on_response(self, response, *args, **kwargs):
+        """Hook requests: раздать заголовки ответа слушателям."""
+        if self._response_listeners:
+            path = urlsplit(response.url).path
+            for listener in self._response_listeners:
+                listener(path, response.headers)
+        return response
     
     @property
     def session(self) -> HTTP:
@@ -41,59 +115,249 @@ class BybitClient(ExchangeClient):
             symbol=symbol,
         )
         tickers = response.get("result", {}).get("list", [])
-        raw = tickers[0] if tickers else {}
-        
-        return Ticker(
-            symbol=symbol,
-            last_price=float(raw.get("lastPrice", 0)),
-            bid=float(raw.get("bid1Price", 0)),
-            ask=float(raw.get("ask1Price", 0)),
-            volume_24h=float(raw.get("volume24h", 0)),
-        )
+        return parse_ticker(tickers[0] if tickers else {}, symbol)
+    
+    def get_tickers(self) -> list[Ticker]:
+        """Тикеры всех linear-инструментов одним запросом."""
+        response = self.session.get_tickers(category="linear")
+        tickers = response.get("result", {}).get("list", [])
+        return [parse_ticker(raw, raw["symbol"]) for raw in tickers]
     
-    def get_klines(self, symbol: str, interval: str, limit: int = 100) -> list[Candle]:
-        """Получить свечи."""
+    def get_klines(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int = 100,
+        start: int | None = None,
+        end: int | None = None,
+    ) -> CandleFrame:
+        """Получить свечи (Bybit отдаёт максимум 1000 за запрос)."""
+        params = {}
+        if start is not None:
+            params["start"] = start
+        if end is not None:
+            params["end"] = end
+        
         response = self.session.get_kline(
             category="linear",
             symbol=symbol,
             interval=interval,
             limit=limit,
+            **params,
         )
         raw_klines = response.get("result", {}).get("list", [])
         
-        candles = [Candle.from_bybit(k) for k in raw_klines]
-        return list(reversed(candles))
+        return CandleFrame.from_bybit(raw_klines)
+    
+    def get_instruments(self) -> list[Instrument]:
+        """Параметры всех linear-инструментов (постранично)."""
+        instruments = []
+        cursor = ""
+        
+        while True:
+            response = self.session.get_instruments_info(
+                category="linear",
+                limit=1000,
+                cursor=cursor,
+            )
+            result = response.get("result", {})
+            instruments.extend(Instrument.from_bybit(item) for item in result.get("list", []))
+            cursor = result.get("nextPageCursor", "")
+            if not cursor:
+                return instruments
+    
+    def subscribe_prices(
+        self,
+        symbols: list[str],
+        callback: PriceCallback,
+        channel: str = "tickers",
+    ) -> BybitStream:
+        """
+        Подписаться на поток цен (public WebSocket, linear).
+        
+        Args:
+            symbols: Торговые пары
+            callback: (symbol, price, ts_ms) на каждое обновление
+            channel: "tickers" — последняя цена, "trades" — каждая сделка
+        """
+        stream = BybitStream(self._public_ws_url, name=f"prices-{channel}")
+        
+        for symbol in symbols:
+            if channel == "tickers":
+                stream.subscribe(f"tickers.{symbol}", self._ticker_handler(callback))
+            elif channel == "trades":
+                stream.subscribe(f"publicTrade.{symbol}", self._trade_handler(callback))
+            else:
+                raise ValueError(f"Неизвестный канал: {channel}")
+        
+        return stream.start()
+    
+    def subscribe_trades(self, symbols: list[str], callback: TradeCallback) -> BybitStream:
+        """
+        Подписаться на сделки с объёмом (public WebSocket, linear).
+        
+        Args:
+            symbols: Торговые пары
+            callback: (symbol, price, ts_ms, qty) на каждую сделку
+        """
+        stream = BybitStream(self._public_ws_url, name="trades")
+        for symbol in symbols:
+            stream.subscribe(f"publicTrade.{symbol}", self._trade_qty_handler(callback))
+        return stream.start()
+    
+    def subscribe_orderbook(
+        self,
+        symbols: list[str],
+        on_update: BookHandler,
+        depth: int = BOOK_DEPTH,
+        on_connect: Callable[[], None] | None = None,
+    ) -> BybitStream:
+        """
+        Подписаться на стакан (public WebSocket, linear): snapshot, затем delta.
+        
+        Args:
+            symbols: Торговые пары
+            on_update: Каждое сообщение стакана; вернул False (пропуск
+                update_id) — клиент переподписывается, и биржа шлёт snapshot
+            depth: Глубина стакана
+            on_connect: После каждого (пере)подключения — до нового snapshot
+                стаканам верить нельзя
+        """
+        stream = BybitStream(self._public_ws_url, name="orderbook", on_connect=on_connect)
+        for symbol in symbols:
+            topic = f"orderbook.{depth}.{symbol}"
+            stream.subscribe(topic, self._book_handler(stream, topic, on_update))
+        return stream.start()
+    
+    def subscribe_account(
+        self,
+        on_position: PositionHandler,
+        on_order: OrderHandler | None = None,
+        on_execution: ExecutionHandler | None = None,
+        on_connect: Callable[[], None] | None = None,
+    ) -> BybitStream:
+        """
+        Подписаться на приватный поток счёта (позиции, ордера, исполнения; linear).
+        
+        Args:
+            on_position: Изменения позиций (size=0 — позиция закрыта)
+            on_order: Изменения ордеров (статус, исполненный объём, средняя цена)
+            on_execution: Исполнения с реальной ценой и комиссией
+            on_connect: После каждого (пере)подключения — что пришло
+                за время обрыва, потеряно
+        """
+        stream = BybitStream(
+            self._private_ws_url,
+            name="account",
+            auth=lambda: ws_auth_message(self._api_key, self._api_secret),
+            on_connect=on_connect,
+        )
+        stream.subscribe("position", _linear_handler(parse_position_update, on_position))
+        if on_order is not None:
+            stream.subscribe("order", _linear_handler(parse_order, on_order))
+        if on_execution is not None:
+            stream.subscribe("execution", _linear_handler(parse_execution, on_execution))
+        return stream.start()
+    
+    @staticmethod
+    def _ticker_handler(callback: PriceCallback):
+        """Обработчик топика tickers.*"""
+        def handle(message: dict) -> None:
+            data = message.get("data", {})
+            # В delta-сообщениях lastPrice есть только если он изменился
+            last_price = data.get("lastPrice")
+            if last_price:
+                callback(data["symbol"], float(last_price), int(message.get("ts", 0)))
+        return handle
+    
+    @staticmethod
+    def _trade_handler(callback: PriceCallback):
+        """Обработчик топика publicTrade.*"""
+        def handle(message: dict) -> None:
+            for trade in message.get("data", []):
+                callback(trade["s"], float(trade["p"]), int(trade["T"]))
+        return handle
+    
+    @staticmethod
+    def _trade_qty_handler(callback: TradeCallback):
+        """Обработчик топика publicTrade.* с объёмом сделки."""
+        def handle(message: dict) -> None:
+            for trade in message.get("data", []):
+                callback(trade["s"], float(trade["p"]), int(trade["T"]), float(trade["v"]))
+        return handle
+    
+    @staticmethod
+    def _book_handler(stream: BybitStream, topic: str, on_update: BookHandler):
+        """Обработчик топика orderbook.*"""
+        def handle(message: dict) -> None:
+            if on_update(parse_book_update(message)) is False:
+                stream.resubscribe(topic)
+        return handle
     
     # === Leverage ===
     
     def set_leverage(self, symbol: str, leverage: int) -> None:
         """Установить плечо."""
-        self.session.set_leverage(
-            category="linear",
-            symbol=symbol,
-            buyLeverage=str(leverage),
-            sellLeverage=str(leverage),
-        )
+        try:
+            self.session.set_leverage(
+                category="linear",
+                symbol=symbol,
+                buyLeverage=str(leverage),
+                sellLeverage=str(leverage),
+            )
+        except InvalidRequestError as e:
+            if e.status_code != LEVERAGE_NOT_MODIFIED:
+                raise
     
     # === Trading ===
     
-    def buy(self, symbol: str, qty: str) -> Order:
+    def buy(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> Order:
         """Купить (long)."""
-        return self._place_order(symbol, "Buy", qty)
+        return self._place_order(symbol, "Buy", qty, stop_loss)
     
-    def sell(self, symbol: str, qty: str) -> Order:
+    def sell(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> Order:
         """Продать (short)."""
-        return self._place_order(symbol, "Sell", qty)
+        return self._place_order(symbol, "Sell", qty, stop_loss)
     
-    def _place_order(self, symbol: str, side: str, qty: str) -> Order:
-        """Разместить ордер."""
-        response = self.session.place_order(
-            category="linear",
-            symbol=symbol,
-            side=side,
-            orderType="Market",
-            qty=qty,
-        )
+    def _place_order(
+        self,
+        symbol: str,
+        side: str,
+        qty: str,
+        stop_loss: float | str | None = None,
+        reduce_only: bool = False,
+    ) -> Order:
+        """
+        Разместить ордер (с SL — одним запросом).
+        
+        pybit повторяет запрос после сетевой ошибки; с orderLinkId повтор
+        уже принятого ордера биржа отклоняет, а не исполняет второй раз —
+        тогда возвращаем принятый ордер, найденный по orderLinkId
+        (не нашли — order_id пуст, status "duplicate").
+        """
+        link_id = order_link_id()
+        try:
+            response = self.session.place_order(
+                category="linear",
+                symbol=symbol,
+                side=side,
+                orderType="Market",
+                qty=qty,
+                orderLinkId=link_id,
+                **order_stop_loss(stop_loss),
+                **(order_reduce_only(qty) if reduce_only else {}),
+            )
+        except InvalidRequestError as e:
+            if e.status_code != DUPLICATE_ORDER:
+                raise
+            return self._find_order(symbol, link_id) or Order(
+                order_id="",
+                symbol=symbol,
+                side=side,
+                qty=qty,
+                status="duplicate",
+                link_id=link_id,
+            )
         
         result = response.get("result", {})
         return Order(
@@ -102,8 +366,22 @@ class BybitClient(ExchangeClient):
             side=side,
             qty=qty,
             status="created",
+            link_id=link_id,
         )
     
+    def _find_order(self, symbol: str, link_id: str) -> Order | None:
+        """Ордер по orderLinkId: сначала открытые и недавние, затем история."""
+        for query in (self.session.get_open_orders, self.session.get_order_history):
+            try:
+                response = query(category="linear", symbol=symbol, orderLinkId=link_id)
+            except (InvalidRequestError, FailedRequestError) as e:
+                logger.warning(f"Bybit: ордер {link_id} не найден: {e}")
+                return None
+            orders = response.get("result", {}).get("list", [])
+            if orders:
+                return parse_order(orders[0])
+        return None
+    
     # === Positions ===
     
     def get_positions(self, symbol: str) -> list[Position]:
@@ -113,40 +391,33 @@ class BybitClient(ExchangeClient):
             symbol=symbol,
         )
         raw_positions = response.get("result", {}).get("list", [])
-        
-        positions = []
-        for pos in raw_positions:
-            size = float(pos.get("size", 0))
-            if size > 0:
-                positions.append(Position(
-                    symbol=symbol,
-                    side=pos.get("side", ""),
-                    size=size,
-                    entry_price=float(pos.get("avgPrice", 0)),
-                    unrealized_pnl=float(pos.get("unrealisedPnl", 0)),
-                    leverage=int(pos.get("leverage", 1)),
-                    take_profit=float(pos.get("takeProfit", 0)) or None,
-                    stop_loss=float(pos.get("stopLoss", 0)) or None,
-                ))
-        
-        return positions
+        return parse_positions(raw_positions, symbol)
     
-    def close_position(self, symbol: str, qty: str | None = None) -> Order | None:
-        """Закрыть позицию."""
-        positions = self.get_positions(symbol)
-        
-        if not positions:
-            return None
+    def close_position(self, symbol: str, qty: str | None = None, side: str | None = None) -> Order | None:
+        """
+        Закрыть позицию reduce-only ордером.
         
-        position = positions[0]
-        close_side = "Sell" if position.side == "Buy" else "Buy"
-        close_qty = qty if qty else str(position.size)
+        С side — один запрос (без qty Bybit закрывает позицию целиком),
+        без него — сначала get_positions.
+        """
+        if side is None:
+            positions = self.get_positions(symbol)
+            if not positions:
+                return None
+            side = positions[0].side
+            qty = qty or str(positions[0].size)
         
-        return self._place_order(symbol, close_side, close_qty)
+        close_side = "Sell" if side == "Buy" else "Buy"
+        try:
+            return self._place_order(symbol, close_side, qty or "0", reduce_only=True)
+        except InvalidRequestError as e:
+            if e.status_code != POSITION_IS_ZERO:
+                raise
+            return None
     
     # === TP/SL ===
     
-    def set_take_profit(self, symbol: str, price: float) -> None:
+    def set_take_profit(self, symbol: str, price: float | str) -> None:
         """Установить тейк-профит."""
         self.session.set_trading_stop(
             category="linear",
@@ -154,10 +425,152 @@ class BybitClient(ExchangeClient):
             takeProfit=str(price),
         )
     
-    def set_stop_loss(self, symbol: str, price: float) -> None:
+    def set_stop_loss(self, symbol: str, price: float | str) -> None:
         """Установить стоп-лосс."""
         self.session.set_trading_stop(
             category="linear",
             symbol=symbol,
             stopLoss=str(price),
         )
+    
+    def set_trailing_stop(
+        self,
+        symbol: str,
+        distance: float | str,
+        active_price: float | str | None = None,
+        stop_loss: float | str | None = None,
+    ) -> None:
+        """Трейлинг-стоп Bybit (trailingStop / activePrice), SL — тем же запросом."""
+        params = {"trailingStop": str(distance)}
+        if active_price is not None:
+            params["activePrice"] = str(active_price)
+        if stop_loss is not None:
+            params["stopLoss"] = str(stop_loss)
+        self.session.set_trading_stop(category="linear", symbol=symbol, **params)
+
+
+# === Разбор ответов (общий для sync и async клиентов) ===
+
+def parse_ticker(raw: dict, symbol: str) -> Ticker:
+    """Тикер из элемента result.list get_tickers."""
+    return Ticker(
+        symbol=symbol,
+        last_price=float(raw.get("lastPrice", 0)),
+        bid=float(raw.get("bid1Price", 0)),
+        ask=float(raw.get("ask1Price", 0)),
+        volume_24h=float(raw.get("volume24h", 0)),
+    )
+
+
+def parse_book_update(message: dict) -> BookUpdate:
+    """Сообщение потока orderbook.* (u=1 — биржа перезапустила стакан: это snapshot)."""
+    data = message.get("data", {})
+    update_id = int(data.get("u", 0))
+    return BookUpdate(
+        symbol=data.get("s", ""),
+        bids=[(float(price), float(size)) for price, size in data.get("b", [])],
+        asks=[(float(price), float(size)) for price, size in data.get("a", [])],
+        update_id=update_id,
+        snapshot=message.get("type") == "snapshot" or update_id == 1,
+        ts_ms=int(message.get("ts", 0)),
+    )
+
+
+def parse_positions(raw_positions: list[dict], symbol: str) -> list[Position]:
+    """Открытые позиции из result.list get_positions."""
+    positions = []
+    for pos in raw_positions:
+        size = float(pos.get("size", 0))
+        if size > 0:
+            positions.append(Position(
+                symbol=symbol,
+                side=pos.get("side", ""),
+                size=size,
+                entry_price=float(pos.get("avgPrice", 0)),
+                unrealized_pnl=float(pos.get("unrealisedPnl", 0)),
+                leverage=int(pos.get("leverage", 1)),
+                take_profit=float(pos.get("takeProfit", 0)) or None,
+                stop_loss=float(pos.get("stopLoss", 0)) or None,
+            ))
+    
+    return positions
+
+
+def parse_position_update(raw: dict) -> Position:
+    """Позиция из сообщения потока position (size=0 — закрыта)."""
+    return Position(
+        symbol=raw["symbol"],
+        side=raw.get("side", ""),
+        size=float(raw.get("size") or 0),
+        entry_price=float(raw.get("entryPrice") or raw.get("avgPrice") or 0),
+        unrealized_pnl=float(raw.get("unrealisedPnl") or 0),
+        leverage=int(float(raw.get("leverage") or 1)),
+        take_profit=float(raw.get("takeProfit") or 0) or None,
+        stop_loss=float(raw.get("stopLoss") or 0) or None,
+    )
+
+
+def parse_order(raw: dict) -> Order:
+    """Ордер из сообщения потока order."""
+    return Order(
+        order_id=raw["orderId"],
+        symbol=raw["symbol"],
+        side=raw.get("side", ""),
+        qty=raw.get("qty", ""),
+        status=raw.get("orderStatus", ""),
+        avg_price=float(raw.get("avgPrice") or 0),
+        filled_qty=float(raw.get("cumExecQty") or 0),
+        link_id=raw.get("orderLinkId", ""),
+    )
+
+
+def parse_execution(raw: dict) -> Execution:
+    """Исполнение из сообщения потока execution."""
+    return Execution(
+        exec_id=raw.get("execId", ""),
+        order_id=raw.get("orderId", ""),
+        symbol=raw["symbol"],
+        side=raw.get("side", ""),
+        price=float(raw.get("execPrice") or 0),
+        qty=float(raw.get("execQty") or 0),
+        fee=float(raw.get("execFee") or 0),
+        ts_ms=int(raw.get("execTime") or 0),
+    )
+
+
+def ws_auth_message(api_key: str, api_secret: str, expires_ms: int | None = None) -> dict:
+    """auth приватного WebSocket: HMAC-SHA256 от "GET/realtime{expires}"."""
+    if expires_ms is None:
+        expires_ms = int(time.time() * 1000) + WS_AUTH_TTL_MS
+    signature = hmac.new(
+        api_secret.encode(), f"GET/realtime{expires_ms}".encode(), hashlib.sha256,
+    ).hexdigest()
+    return {"op": "auth", "args": [api_key, expires_ms, signature]}
+
+
+def _linear_handler(parse: Callable[[dict], object], handler: Callable[[list], None]):
+    """Обработчик приватного топика: разобрать linear-записи и отдать пачкой."""
+    def handle(message: dict) -> None:
+        items = [parse(raw) for raw in message.get("data", []) if raw.get("category", "linear") == "linear"]
+        if items:
+            handler(items)
+    return handle
+
+
+def order_link_id() -> str:
+    """Клиентский id ордера (orderLinkId): биржа не примет два ордера с одним id."""
+    return uuid.uuid4().hex
+
+
+def order_stop_loss(stop_loss: float | str | None) -> dict:
+    """Параметры place_order для SL на всю позицию (пусто, если SL не задан)."""
+    if stop_loss is None:
+        return {}
+    return {"stopLoss": str(stop_loss), "tpslMode": "Full"}
+
+
+def order_reduce_only(qty: str) -> dict:
+    """Параметры place_order для закрывающего ордера (qty "0" — вся позиция)."""
+    if qty == "0":
+        return {"reduceOnly": True, "closeOnTrigger": True}
+    return {"reduceOnly": True}
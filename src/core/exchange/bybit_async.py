@@ -0,0 +1,298 @@
+import hashlib
+import hmac
+import json
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from pybit.exceptions import FailedRequestError, InvalidRequestError
+
+from .async_base import AsyncExchangeClient
+from .bybit import (
+    LEVERAGE_NOT_MODIFIED, POSITION_IS_ZERO, order_link_id, order_reduce_only, order_stop_loss, parse_positions,
+    parse_ticker,
+)
+from .http import AsyncHTTPPool, HTTPResponse
+from ..models import CandleFrame, Instrument, Ticker, Order, Position
+
+
+REST_URL = "https://api.bybit.com"
+REST_URL_TESTNET = "https://api-testnet.bybit.com"
+
+IGNORED_CODES = {LEVERAGE_NOT_MODIFIED}
+
+
+class AsyncBybitClient(AsyncExchangeClient):
+    """
+    Асинхронный клиент Bybit v5.
+
+    - пул keep-alive соединений (AsyncHTTPPool)
+    - запросы подписываются локально (HMAC-SHA256), без pybit
+    - ошибки — те же исключения pybit, что и у BybitClient
+    """
+
+    RECV_WINDOW = 5000
+
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        testnet: bool = True,
+        base_url: str | None = None,
+        max_connections: int = 10,
+        timeout: float = 10.0,
+    ):
+        self._api_key = api_key
+        self._api_secret = api_secret.encode()
+        self._base_url = base_url or (REST_URL_TESTNET if testnet else REST_URL)
+        self._max_connections = max_connections
+        self._timeout = timeout
+        self._pool: AsyncHTTPPool | None = None
+
+    async def connect(self) -> None:
+        """Создать пул (соединения открываются по мере надобности)."""
+        if self._pool is None:
+            self._pool = AsyncHTTPPool(self._base_url, self._max_connections, self._timeout)
+
+    async def close(self) -> None:
+        """Закрыть пул."""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def __aenter__(self) -> "AsyncBybitClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    # === Market Data ===
+
+    async def get_ticker(self, symbol: str) -> Ticker:
+        """Получить текущую цену."""
+        result = await self._get("/v5/market/tickers", {"category": "linear", "symbol": symbol})
+        tickers = result.get("list", [])
+        return parse_ticker(tickers[0] if tickers else {}, symbol)
+
+    async def get_tickers(self) -> list[Ticker]:
+        """Тикеры всех linear-инструментов одним запросом."""
+        result = await self._get("/v5/market/tickers", {"category": "linear"})
+        return [parse_ticker(raw, raw["symbol"]) for raw in result.get("list", [])]
+
+    async def get_klines(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int = 100,
+        start: int | None = None,
+        end: int | None = None,
+    ) -> CandleFrame:
+        """Получить свечи."""
+        params = {"category": "linear", "symbol": symbol, "interval": interval, "limit": limit}
+        if start is not None:
+            params["start"] = start
+        if end is not None:
+            params["end"] = end
+
+        result = await self._get("/v5/market/kline", params)
+        return CandleFrame.from_bybit(result.get("list", []))
+
+    async def get_instruments(self) -> list[Instrument]:
+        """Параметры всех linear-инструментов (постранично)."""
+        instruments = []
+        cursor = ""
+
+        while True:
+            params = {"category": "linear", "limit": 1000}
+            if cursor:
+                params["cursor"] = cursor
+            result = await self._get("/v5/market/instruments-info", params)
+            instruments.extend(Instrument.from_bybit(item) for item in result.get("list", []))
+            cursor = result.get("nextPageCursor", "")
+            if not cursor:
+                return instruments
+
+    # === Leverage ===
+
+    async def set_leverage(self, symbol: str, leverage: int) -> None:
+        """Установить плечо."""
+        await self._post("/v5/position/set-leverage", {
+            "category": "linear",
+            "symbol": symbol,
+            "buyLeverage": str(leverage),
+            "sellLeverage": str(leverage),
+        })
+
+    # === Trading ===
+
+    async def buy(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> Order:
+        """Купить (long)."""
+        return await self._place_order(symbol, "Buy", qty, stop_loss)
+
+    async def sell(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> Order:
+        """Продать (short)."""
+        return await self._place_order(symbol, "Sell", qty, stop_loss)
+
+    async def _place_order(
+        self,
+        symbol: str,
+        side: str,
+        qty: str,
+        stop_loss: float | str | None = None,
+        reduce_only: bool = False,
+    ) -> Order:
+        """
+        Разместить ордер (с SL — одним запросом).
+        
+        Пул не повторяет POST после обрыва; orderLinkId защищает и от
+        повторов выше: второй ордер с тем же id биржа не примет.
+        """
+        link_id = order_link_id()
+        result = await self._post("/v5/order/create", {
+            "category": "linear",
+            "symbol": symbol,
+            "side": side,
+            "orderType": "Market",
+            "qty": qty,
+            "orderLinkId": link_id,
+            **order_stop_loss(stop_loss),
+            **(order_reduce_only(qty) if reduce_only else {}),
+        })
+        return Order(
+            order_id=result.get("orderId", ""),
+            symbol=symbol,
+            side=side,
+            qty=qty,
+            status="created",
+            link_id=link_id,
+        )
+
+    # === Positions ===
+
+    async def get_positions(self, symbol: str) -> list[Position]:
+        """Получить открытые позиции."""
+        result = await self._get("/v5/position/list", {"category": "linear", "symbol": symbol}, auth=True)
+        return parse_positions(result.get("list", []), symbol)
+
+    async def close_position(self, symbol: str, qty: str | None = None, side: str | None = None) -> Order | None:
+        """Закрыть позицию reduce-only ордером (с side — одним запросом)."""
+        if side is None:
+            positions = await self.get_positions(symbol)
+            if not positions:
+                return None
+            side = positions[0].side
+            qty = qty or str(positions[0].size)
+
+        close_side = "Sell" if side == "Buy" else "Buy"
+        try:
+            return await self._place_order(symbol, close_side, qty or "0", reduce_only=True)
+        except InvalidRequestError as e:
+            if e.status_code != POSITION_IS_ZERO:
+                raise
+            return None
+
+    # === TP/SL ===
+
+    async def set_take_profit(self, symbol: str, price: float | str) -> None:
+        """Установить тейк-профит."""
+        await self._post("/v5/position/trading-stop", {
+            "category": "linear",
+            "symbol": symbol,
+            "takeProfit": str(price),
+            "positionIdx": 0,
+        })
+
+    async def set_stop_loss(self, symbol: str, price: float | str) -> None:
+        """Установить стоп-лосс."""
+        await self._post("/v5/position/trading-stop", {
+            "category": "linear",
+            "symbol": symbol,
+            "stopLoss": str(price),
+            "positionIdx": 0,
+        })
+
+    async def set_trailing_stop(
+        self,
+        symbol: str,
+        distance: float | str,
+        active_price: float | str | None = None,
+        stop_loss: float | str | None = None,
+    ) -> None:
+        """Трейлинг-стоп Bybit (trailingStop / activePrice), SL — тем же запросом."""
+        body = {
+            "category": "linear",
+            "symbol": symbol,
+            "trailingStop": str(distance),
+            "positionIdx": 0,
+        }
+        if active_price is not None:
+            body["activePrice"] = str(active_price)
+        if stop_loss is not None:
+            body["stopLoss"] = str(stop_loss)
+        await self._post("/v5/position/trading-stop", body)
+
+    # === HTTP ===
+
+    @property
+    def pool(self) -> AsyncHTTPPool:
+        """Пул соединений, создаётся автоматически."""
+        if self._pool is None:
+            self._pool = AsyncHTTPPool(self._base_url, self._max_connections, self._timeout)
+        return self._pool
+
+    async def _get(self, path: str, params: dict, auth: bool = False) -> dict:
+        query = urlencode(params)
+        headers = self._sign(query) if auth else {}
+        response = await self.pool.request("GET", f"{path}?{query}", headers=headers)
+        return self._result(response, "GET", path, query)
+
+    async def _post(self, path: str, params: dict) -> dict:
+        body = json.dumps(params, separators=(",", ":"))
+        headers = self._sign(body)
+        headers["Content-Type"] = "application/json"
+        response = await self.pool.request("POST", path, body.encode(), headers)
+        return self._result(response, "POST", path, body)
+
+    def _sign(self, payload: str) -> dict[str, str]:
+        """Заголовки подписи Bybit v5: HMAC(timestamp + key + recv_window + payload)."""
+        timestamp = str(int(time.time() * 1000))
+        recv_window = str(self.RECV_WINDOW)
+        message = f"{timestamp}{self._api_key}{recv_window}{payload}".encode()
+        signature = hmac.new(self._api_secret, message, hashlib.sha256).hexdigest()
+
+        return {
+            "X-BAPI-API-KEY": self._api_key,
+            "X-BAPI-SIGN": signature,
+            "X-BAPI-SIGN-TYPE": "2",
+            "X-BAPI-TIMESTAMP": timestamp,
+            "X-BAPI-RECV-WINDOW": recv_window,
+        }
+
+    @staticmethod
+    def _result(response: HTTPResponse, method: str, path: str, payload: str) -> dict:
+        """Разобрать ответ; ошибки — как у pybit."""
+        now = datetime.now(timezone.utc).strftime("%H:%M:%S")
+        request = f"{method} {path}: {payload}"
+
+        if response.status != 200:
+            raise FailedRequestError(
+                request=request,
+                message=f"HTTP status code is {response.status}",
+                status_code=response.status,
+                time=now,
+                resp_headers=response.headers,
+            )
+
+        data = json.loads(response.body)
+        code = data.get("retCode", 0)
+        if code and code not in IGNORED_CODES:
+            raise InvalidRequestError(
+                request=request,
+                message=data.get("retMsg", ""),
+                status_code=code,
+                time=now,
+                resp_headers=response.headers,
+            )
+
+        return data.get("result") or {}
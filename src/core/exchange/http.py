@@ -0,0 +1,188 @@
+import asyncio
+import ssl
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+
+# Методы, которые можно безопасно отправить повторно
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD"})
+
+
+@dataclass
+class HTTPResponse:
+    """Ответ HTTP."""
+    status: int
+    headers: dict[str, str]     # Имена в нижнем регистре
+    body: bytes
+
+
+class AsyncHTTPPool:
+    """
+    Пул keep-alive соединений HTTP/1.1 к одному хосту на asyncio.
+
+    - соединения переиспользуются между запросами (без TLS-handshake на каждый)
+    - не больше max_connections одновременных запросов
+    - простаивающие соединения, которые сервер уже закрыл, отбрасываются
+      до отправки запроса
+    - если переиспользованное соединение всё же оборвалось, идемпотентный
+      запрос (GET) один раз повторяется на новом. POST не повторяется:
+      сервер мог успеть его принять (повтор создал бы второй ордер)
+    """
+
+    def __init__(self, base_url: str, max_connections: int = 10, timeout: float = 10.0):
+        url = urlsplit(base_url)
+        self.host = url.hostname or "localhost"
+        self.secure = url.scheme == "https"
+        self.port = url.port or (443 if self.secure else 80)
+        self.timeout = timeout
+        self.max_connections = max_connections
+
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(max_connections)
+        self._ssl = ssl.create_default_context() if self.secure else None
+        self.opened = 0     # Сколько соединений открыто за всё время
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes = b"",
+        headers: dict[str, str] | None = None,
+        retry: bool | None = None,
+    ) -> HTTPResponse:
+        """
+        Выполнить запрос.
+
+        Args:
+            method: "GET" / "POST"
+            path: Путь с query string ("/v5/market/tickers?category=linear")
+            body: Тело запроса
+            headers: Дополнительные заголовки
+            retry: Повторить на новом соединении, если переиспользованное
+                оборвалось (None — только для IDEMPOTENT_METHODS)
+        """
+        head = self._build_head(method, path, body, headers or {})
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+
+        async with self._slots:
+            conn = self._take_idle()
+            reused = conn is not None
+            if conn is None:
+                conn = await self._open()
+
+            try:
+                response, keep_alive = await asyncio.wait_for(
+                    self._exchange(conn, head, body), self.timeout,
+                )
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self._close(conn)
+                if not reused or not retry:
+                    raise
+                # Сервер закрыл простаивающее соединение — пробуем на новом
+                conn = await self._open()
+                try:
+                    response, keep_alive = await asyncio.wait_for(
+                        self._exchange(conn, head, body), self.timeout,
+                    )
+                except BaseException:
+                    self._close(conn)
+                    raise
+            except BaseException:
+                self._close(conn)
+                raise
+
+            if keep_alive:
+                self._idle.append(conn)
+            else:
+                self._close(conn)
+
+        return response
+
+    async def close(self) -> None:
+        """Закрыть все простаивающие соединения."""
+        while self._idle:
+            self._close(self._idle.pop())
+
+    # === Внутреннее ===
+
+    def _take_idle(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter] | None:
+        """Живое простаивающее соединение (закрытые сервером — отбрасываются)."""
+        while self._idle:
+            conn = self._idle.pop()
+            if not conn[0].at_eof() and not conn[1].is_closing():
+                return conn
+            self._close(conn)
+        return None
+
+    async def _open(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        conn = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self._ssl),
+            self.timeout,
+        )
+        self.opened += 1
+        return conn
+
+    @staticmethod
+    def _close(conn: tuple[asyncio.StreamReader, asyncio.StreamWriter]) -> None:
+        conn[1].close()
+
+    def _build_head(self, method: str, path: str, body: bytes, headers: dict[str, str]) -> bytes:
+        lines = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}",
+            "Connection: keep-alive",
+            "Accept: application/json",
+            f"Content-Length: {len(body)}",
+        ]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+    async def _exchange(
+        self,
+        conn: tuple[asyncio.StreamReader, asyncio.StreamWriter],
+        head: bytes,
+        body: bytes,
+    ) -> tuple[HTTPResponse, bool]:
+        """Отправить запрос и прочитать ответ целиком."""
+        reader, writer = conn
+        writer.write(head + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("соединение закрыто сервером")
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            data = await self._read_chunked(reader)
+        elif "content-length" in headers:
+            data = await reader.readexactly(int(headers["content-length"]))
+        else:
+            # Ни длины, ни chunked — тело до закрытия соединения
+            data = await reader.read()
+            headers["connection"] = "close"
+
+        keep_alive = headers.get("connection", "").lower() != "close"
+        return HTTPResponse(status, headers, data), keep_alive
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                # Trailer до пустой строки
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
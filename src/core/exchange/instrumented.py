@@ -0,0 +1,136 @@
+from time import perf_counter
+from typing import Any, Callable
+
+from .base import ExchangeClient, PriceCallback, Subscription
+from ..metrics import Histogram, MetricsRegistry, metrics as default_registry
+from ..models import CandleFrame, Instrument, Ticker, Order, Position
+
+
+REQUEST_SECONDS = "exchange_request_seconds"
+REQUEST_ERRORS = "exchange_request_errors_total"
+
+# Методы ExchangeClient, которые ходят в REST
+TIMED_METHODS = (
+    "get_ticker",
+    "get_tickers",
+    "get_klines",
+    "get_instruments",
+    "set_leverage",
+    "buy",
+    "sell",
+    "get_positions",
+    "close_position",
+    "set_take_profit",
+    "set_stop_loss",
+    "set_trailing_stop",
+)
+
+
+class InstrumentedClient(ExchangeClient):
+    """
+    ExchangeClient с замером времени каждого запроса.
+
+    На каждый метод — гистограмма латентности exchange_request_seconds{method}
+    и счётчик ошибок exchange_request_errors_total{method, error}.
+    Гистограммы создаются заранее: на вызов — два perf_counter и observe().
+    """
+
+    def __init__(self, client: ExchangeClient, registry: MetricsRegistry | None = None):
+        self.client = client
+        self.registry = registry or default_registry
+        self._latency: dict[str, Histogram] = {
+            method: self.registry.histogram(
+                REQUEST_SECONDS, "Время запроса к бирже, с", method=method,
+            )
+            for method in TIMED_METHODS
+        }
+
+    def connect(self) -> None:
+        self.client.connect()
+
+    def __getattr__(self, name: str):
+        # Остальное (например add_response_listener) — от обёрнутого клиента
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    # === Market Data ===
+
+    def get_ticker(self, symbol: str) -> Ticker:
+        return self._timed("get_ticker", self.client.get_ticker, symbol)
+
+    def get_tickers(self) -> list[Ticker]:
+        return self._timed("get_tickers", self.client.get_tickers)
+
+    def get_klines(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int = 100,
+        start: int | None = None,
+        end: int | None = None,
+    ) -> CandleFrame:
+        return self._timed("get_klines", self.client.get_klines, symbol, interval, limit, start, end)
+
+    def get_instruments(self) -> list[Instrument]:
+        return self._timed("get_instruments", self.client.get_instruments)
+
+    def subscribe_prices(
+        self,
+        symbols: list[str],
+        callback: PriceCallback,
+        channel: str = "tickers",
+    ) -> Subscription:
+        return self.client.subscribe_prices(symbols, callback, channel)
+
+    # === Leverage ===
+
+    def set_leverage(self, symbol: str, leverage: int) -> None:
+        self._timed("set_leverage", self.client.set_leverage, symbol, leverage)
+
+    # === Trading ===
+
+    def buy(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> Order:
+        return self._timed("buy", self.client.buy, symbol, qty, stop_loss)
+
+    def sell(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> Order:
+        return self._timed("sell", self.client.sell, symbol, qty, stop_loss)
+
+    # === Positions ===
+
+    def get_positions(self, symbol: str) -> list[Position]:
+        return self._timed("get_positions", self.client.get_positions, symbol)
+
+    def close_position(self, symbol: str, qty: str | None = None, side: str | None = None) -> Order | None:
+        return self._timed("close_position", self.client.close_position, symbol, qty, side)
+
+    # === TP/SL ===
+
+    def set_take_profit(self, symbol: str, price: float | str) -> None:
+        self._timed("set_take_profit", self.client.set_take_profit, symbol, price)
+
+    def set_stop_loss(self, symbol: str, price: float | str) -> None:
+        self._timed("set_stop_loss", self.client.set_stop_loss, symbol, price)
+
+    def set_trailing_stop(
+        self,
+        symbol: str,
+        distance: float | str,
+        active_price: float | str | None = None,
+        stop_loss: float | str | None = None,
+    ) -> None:
+        self._timed("set_trailing_stop", self.client.set_trailing_stop, symbol, distance, active_price, stop_loss)
+
+    # === Внутреннее ===
+
+    def _timed(self, method: str, call: Callable, *args) -> Any:
+        start = perf_counter()
+        try:
+            return call(*args)
+        except Exception as e:
+            self.registry.counter(
+                REQUEST_ERRORS, "Ошибки запросов к бирже", method=method, error=type(e).__name__,
+            ).inc()
+            raise
+        finally:
+            self._latency[method].observe(perf_counter() - start)
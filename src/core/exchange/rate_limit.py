@@ -0,0 +1,342 @@
+import heapq
+import itertools
+import threading
+import time
+from enum import IntEnum
+from typing import Any, Callable, Mapping
+
+from pybit.exceptions import FailedRequestError, InvalidRequestError
+
+from .base import ExchangeClient, PriceCallback, Subscription
+from ..logger import logger
+from ..models import CandleFrame, Instrument, Ticker, Order, Position
+
+
+class Priority(IntEnum):
+    """Приоритет запроса: меньше — раньше."""
+    ORDER = 0       # Вход/выход
+    STOP = 1        # SL/TP
+    ACCOUNT = 2     # Плечо, позиции
+    MARKET = 3      # Рыночные данные
+
+
+# Лимиты Bybit по умолчанию (запросов в секунду на группу);
+# уточняются по заголовкам X-Bapi-Limit* из ответов
+DEFAULT_LIMITS = {
+    "order": 10.0,
+    "stop": 10.0,
+    "leverage": 10.0,
+    "position": 50.0,
+    "market": 50.0,
+}
+
+# Общий лимит на IP: 600 запросов за 5 секунд
+GLOBAL_LIMIT = 120.0
+
+ENDPOINT_GROUPS = {
+    "/v5/order/create": "order",
+    "/v5/position/trading-stop": "stop",
+    "/v5/position/set-leverage": "leverage",
+    "/v5/position/list": "position",
+    "/v5/market/tickers": "market",
+    "/v5/market/kline": "market",
+    "/v5/market/instruments-info": "market",
+}
+
+RATE_LIMIT_CODES = {10006}          # retCode "too many visits"
+RATE_LIMIT_STATUSES = {403, 429}    # HTTP: лимит по IP
+
+
+class TokenBucket:
+    """
+    Token bucket: rate токенов в секунду, не больше capacity.
+
+    Может быть заблокирован до момента времени (backoff после 429).
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+
+    def wait_time(self, now: float) -> float:
+        """Сколько секунд ждать до следующего токена (0 — можно сейчас)."""
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def sync(self, remaining: int, limit: int, reset_in: float, now: float, share: float = 1.0) -> None:
+        """
+        Синхронизировать с сервером.
+
+        Args:
+            remaining: Сколько запросов осталось в окне
+            limit: Размер окна (запросов в секунду)
+            reset_in: Через сколько секунд окно обновится
+            share: Доля лимита этого bucket (лимит на ключ делят несколько процессов)
+        """
+        self.rate = self.capacity = limit * share
+        self.tokens = remaining * share
+        self._updated = now
+        if remaining <= 0:
+            self.block(now + reset_in)
+
+    def block(self, until: float) -> None:
+        """Не выдавать токены до until (monotonic)."""
+        self.blocked_until = max(self.blocked_until, until)
+        self.tokens = min(self.tokens, 0.0)
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self._updated = now
+
+
+class RateLimiter:
+    """
+    Планировщик запросов.
+
+    - на каждую группу эндпоинтов — свой token bucket
+    - поверх — общий bucket на IP; его токены выдаются по приоритету:
+      ордера и стопы проходят раньше ожидающих запросов рыночных данных
+    - backoff после превышения лимита блокирует только свою группу
+
+    Если ключ (и IP) делят несколько процессов, share — доля этого: она
+    применяется и к limits, и к лимитам из заголовков (там — весь ключ).
+
+    Потокобезопасен: acquire() можно звать из разных потоков.
+    """
+
+    def __init__(
+        self,
+        limits: Mapping[str, float] | None = None,
+        global_limit: float = GLOBAL_LIMIT,
+        default_backoff: float = 1.0,
+        share: float = 1.0,
+    ):
+        if not 0 < share <= 1:
+            raise ValueError(f"share должна быть в (0, 1]: {share}")
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.default_backoff = default_backoff
+        self.share = share
+        self._buckets = {group: TokenBucket(rate * share) for group, rate in self.limits.items()}
+        self._global = TokenBucket(global_limit * share)
+        self._queue: list[tuple[int, int, str]] = []   # (priority, seq, group)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def acquire(self, group: str, priority: Priority = Priority.MARKET) -> None:
+        """Дождаться разрешения на запрос."""
+        with self._cond:
+            bucket = self._bucket(group)
+            ticket = (int(priority), next(self._seq), group)
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = bucket.wait_time(now)
+                    if wait == 0 and self._next_ready(now) == ticket:
+                        wait = self._global.wait_time(now)
+                        if wait == 0:
+                            bucket.take(now)
+                            self._global.take(now)
+                            return
+                    self._cond.wait(wait or None)
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+
+    def update(self, group: str, headers: Mapping[str, str]) -> None:
+        """Обновить bucket группы по заголовкам ответа Bybit."""
+        limit = _header(headers, "X-Bapi-Limit")
+        remaining = _header(headers, "X-Bapi-Limit-Status")
+        if limit is None or remaining is None:
+            return
+
+        with self._cond:
+            now = time.monotonic()
+            self._bucket(group).sync(int(remaining), int(limit), _reset_in(headers, 1.0), now, self.share)
+            self._cond.notify_all()
+
+    def backoff(self, group: str, headers: Mapping[str, str] | None = None) -> float:
+        """
+        Заблокировать группу после превышения лимита.
+
+        Returns:
+            На сколько секунд заблокирована
+        """
+        delay = _reset_in(headers or {}, self.default_backoff)
+        with self._cond:
+            self._bucket(group).block(time.monotonic() + delay)
+            self._cond.notify_all()
+        logger.warning(f"Rate limit: {group} — пауза {delay:.2f}с")
+        return delay
+
+    def _bucket(self, group: str) -> TokenBucket:
+        bucket = self._buckets.get(group)
+        if bucket is None:
+            rate = self.limits.get(group, DEFAULT_LIMITS["market"])
+            bucket = self._buckets[group] = TokenBucket(rate * self.share)
+        return bucket
+
+    def _next_ready(self, now: float) -> tuple[int, int, str] | None:
+        """Самый приоритетный ожидающий, у чьей группы есть токен."""
+        for ticket in sorted(self._queue):
+            if self._buckets[ticket[2]].wait_time(now) == 0:
+                return ticket
+        return None
+
+
+class RateLimitedClient(ExchangeClient):
+    """
+    ExchangeClient за планировщиком запросов.
+
+    Каждый вызов сначала получает токен своей группы (RateLimiter),
+    а при ответе "лимит превышен" ждёт сброса только этой группы
+    и повторяет запрос (до retries раз).
+    """
+
+    def __init__(
+        self,
+        client: ExchangeClient,
+        limiter: RateLimiter | None = None,
+        retries: int = 2,
+    ):
+        self.client = client
+        self.limiter = limiter or RateLimiter()
+        self.retries = retries
+
+        # Bybit присылает актуальные лимиты в заголовках ответов
+        add_listener = getattr(client, "add_response_listener", None)
+        if add_listener is not None:
+            add_listener(self._on_response)
+
+    def connect(self) -> None:
+        self.client.connect()
+
+    def __getattr__(self, name: str):
+        # Остальное (например add_response_listener) — от обёрнутого клиента
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    # === Market Data ===
+
+    def get_ticker(self, symbol: str) -> Ticker:
+        return self._call("market", Priority.MARKET, self.client.get_ticker, symbol)
+
+    def get_tickers(self) -> list[Ticker]:
+        return self._call("market", Priority.MARKET, self.client.get_tickers)
+
+    def get_klines(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int = 100,
+        start: int | None = None,
+        end: int | None = None,
+    ) -> CandleFrame:
+        return self._call("market", Priority.MARKET, self.client.get_klines, symbol, interval, limit, start, end)
+
+    def get_instruments(self) -> list[Instrument]:
+        return self._call("market", Priority.MARKET, self.client.get_instruments)
+
+    def subscribe_prices(
+        self,
+        symbols: list[str],
+        callback: PriceCallback,
+        channel: str = "tickers",
+    ) -> Subscription:
+        # WebSocket — не REST, лимиты не тратит
+        return self.client.subscribe_prices(symbols, callback, channel)
+
+    # === Leverage ===
+
+    def set_leverage(self, symbol: str, leverage: int) -> None:
+        self._call("leverage", Priority.ACCOUNT, self.client.set_leverage, symbol, leverage)
+
+    # === Trading ===
+
+    def buy(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> Order:
+        return self._call("order", Priority.ORDER, self.client.buy, symbol, qty, stop_loss)
+
+    def sell(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> Order:
+        return self._call("order", Priority.ORDER, self.client.sell, symbol, qty, stop_loss)
+
+    # === Positions ===
+
+    def get_positions(self, symbol: str) -> list[Position]:
+        return self._call("position", Priority.ACCOUNT, self.client.get_positions, symbol)
+
+    def close_position(self, symbol: str, qty: str | None = None, side: str | None = None) -> Order | None:
+        # Без side внутри — список позиций и ордер: токен нужен обеим группам
+        if side is None:
+            self.limiter.acquire("position", Priority.ORDER)
+        return self._call("order", Priority.ORDER, self.client.close_position, symbol, qty, side)
+
+    # === TP/SL ===
+
+    def set_take_profit(self, symbol: str, price: float | str) -> None:
+        self._call("stop", Priority.STOP, self.client.set_take_profit, symbol, price)
+
+    def set_stop_loss(self, symbol: str, price: float | str) -> None:
+        self._call("stop", Priority.STOP, self.client.set_stop_loss, symbol, price)
+
+    def set_trailing_stop(
+        self,
+        symbol: str,
+        distance: float | str,
+        active_price: float | str | None = None,
+        stop_loss: float | str | None = None,
+    ) -> None:
+        self._call("stop", Priority.STOP, self.client.set_trailing_stop, symbol, distance, active_price, stop_loss)
+
+    # === Внутреннее ===
+
+    def _call(self, group: str, priority: Priority, method: Callable, *args) -> Any:
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire(group, priority)
+            try:
+                return method(*args)
+            except (InvalidRequestError, FailedRequestError) as e:
+                if not is_rate_limited(e) or attempt == self.retries:
+                    raise
+                self.limiter.backoff(group, e.resp_headers)
+
+    def _on_response(self, path: str, headers: Mapping[str, str]) -> None:
+        group = ENDPOINT_GROUPS.get(path)
+        if group is not None:
+            self.limiter.update(group, headers)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Ошибка — превышение лимита запросов?"""
+    if isinstance(error, InvalidRequestError):
+        return error.status_code in RATE_LIMIT_CODES
+    if isinstance(error, FailedRequestError):
+        return error.status_code in RATE_LIMIT_STATUSES
+    return False
+
+
+def _header(headers: Mapping[str, str], name: str) -> str | None:
+    value = headers.get(name)
+    return value if value is not None else headers.get(name.lower())
+
+
+def _reset_in(headers: Mapping[str, str], default: float) -> float:
+    """Секунд до сброса окна по X-Bapi-Limit-Reset-Timestamp."""
+    reset = _header(headers, "X-Bapi-Limit-Reset-Timestamp")
+    if reset is None:
+        return default
+    return max(0.0, int(reset) / 1000 - time.time())
@@ -0,0 +1,365 @@
+import pickle
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from .base import ExchangeClient, PriceCallback, Subscription
+from ..logger import logger
+from ..models import CandleFrame, Instrument, Ticker, Order, Position
+
+
+FORMAT_VERSION = 1
+
+# Записи файла (pickle-поток, по одной на dump):
+#   ("header", version, created_ts)
+#   ("call", ts, method, args, result, error, duration)
+#   ("price", ts, symbol, price, ts_ms)
+CALL = "call"
+PRICE = "price"
+
+
+class ReplayError(RuntimeError):
+    """Запись закончилась или запрос не совпадает с записанным."""
+
+
+class RecordingClient(ExchangeClient):
+    """
+    ExchangeClient, пишущий каждый запрос и ответ в файл.
+
+    Файл — append-only поток pickle-записей со временем вызова;
+    после каждой записи — flush, так что оборванный процесс оставляет
+    читаемый префикс. Цены из подписок тоже пишутся.
+    """
+
+    def __init__(self, client: ExchangeClient, path: str | Path):
+        self.client = client
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        new = not self.path.exists() or self.path.stat().st_size == 0
+        self._file = open(self.path, "ab")
+        self._lock = threading.Lock()
+        if new:
+            self._write(("header", FORMAT_VERSION, time.time()))
+
+    def close(self) -> None:
+        """Закрыть файл записи."""
+        with self._lock:
+            self._file.close()
+
+    def connect(self) -> None:
+        self.client.connect()
+
+    def __getattr__(self, name: str):
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    # === Market Data ===
+
+    def get_ticker(self, symbol: str) -> Ticker:
+        return self._call("get_ticker", self.client.get_ticker, symbol)
+
+    def get_tickers(self) -> list[Ticker]:
+        return self._call("get_tickers", self.client.get_tickers)
+
+    def get_klines(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int = 100,
+        start: int | None = None,
+        end: int | None = None,
+    ) -> CandleFrame:
+        return self._call("get_klines", self.client.get_klines, symbol, interval, limit, start, end)
+
+    def get_instruments(self) -> list[Instrument]:
+        return self._call("get_instruments", self.client.get_instruments)
+
+    def subscribe_prices(
+        self,
+        symbols: list[str],
+        callback: PriceCallback,
+        channel: str = "tickers",
+    ) -> Subscription:
+        def recorded(symbol: str, price: float, ts_ms: int):
+            self._write((PRICE, time.time(), symbol, price, ts_ms))
+            callback(symbol, price, ts_ms)
+
+        return self.client.subscribe_prices(symbols, recorded, channel)
+
+    # === Leverage ===
+
+    def set_leverage(self, symbol: str, leverage: int) -> None:
+        self._call("set_leverage", self.client.set_leverage, symbol, leverage)
+
+    # === Trading ===
+
+    def buy(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> Order:
+        return self._call("buy", self.client.buy, symbol, qty, stop_loss)
+
+    def sell(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> Order:
+        return self._call("sell", self.client.sell, symbol, qty, stop_loss)
+
+    # === Positions ===
+
+    def get_positions(self, symbol: str) -> list[Position]:
+        return self._call("get_positions", self.client.get_positions, symbol)
+
+    def close_position(self, symbol: str, qty: str | None = None, side: str | None = None) -> Order | None:
+        return self._call("close_position", self.client.close_position, symbol, qty, side)
+
+    # === TP/SL ===
+
+    def set_take_profit(self, symbol: str, price: float | str) -> None:
+        self._call("set_take_profit", self.client.set_take_profit, symbol, price)
+
+    def set_stop_loss(self, symbol: str, price: float | str) -> None:
+        self._call("set_stop_loss", self.client.set_stop_loss, symbol, price)
+
+    def set_trailing_stop(
+        self,
+        symbol: str,
+        distance: float | str,
+        active_price: float | str | None = None,
+        stop_loss: float | str | None = None,
+    ) -> None:
+        self._call("set_trailing_stop", self.client.set_trailing_stop, symbol, distance, active_price, stop_loss)
+
+    # === Внутреннее ===
+
+    def _call(self, method: str, call: Callable, *args) -> Any:
+        ts = time.time()
+        start = time.perf_counter()
+        try:
+            result = call(*args)
+        except Exception as e:
+            self._write((CALL, ts, method, args, None, _pack_error(e), time.perf_counter() - start))
+            raise
+        self._write((CALL, ts, method, args, result, None, time.perf_counter() - start))
+        return result
+
+    def _write(self, record: tuple) -> None:
+        data = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._file.write(data)
+            self._file.flush()
+
+
+class ReplayExchangeClient(ExchangeClient):
+    """
+    ExchangeClient, отвечающий из записи RecordingClient.
+
+    Ответы выдаются по порядку отдельно для каждого метода; записанные
+    ошибки поднимаются снова тем же типом.
+
+    Args:
+        speed: None — как можно быстрее; 1.0 — в реальном времени,
+               2.0 — вдвое быстрее (паузы между записями по их времени)
+        strict: Проверять, что аргументы запроса совпадают с записанными
+    """
+
+    def __init__(self, path: str | Path, speed: float | None = None, strict: bool = False):
+        self.path = Path(path)
+        self.speed = speed
+        self.strict = strict
+
+        self._calls: dict[str, deque[tuple]] = {}
+        self._prices: list[tuple[float, str, float, int]] = []
+        self._start_ts: float | None = None
+        self._load()
+
+        self._clock_start: float | None = None  # Когда начали воспроизводить
+
+    @property
+    def prices(self) -> list[tuple[float, str, float, int]]:
+        """Записанные цены подписок: (ts записи, symbol, price, ts_ms)."""
+        return self._prices
+
+    def iter_prices(self, symbols: list[str] | None = None) -> Iterator[tuple[str, float, int]]:
+        """Цены подписок по порядку (с паузами, если задан speed)."""
+        wanted = set(symbols) if symbols else None
+        for ts, symbol, price, ts_ms in self._prices:
+            if wanted is not None and symbol not in wanted:
+                continue
+            self._pace(ts)
+            yield symbol, price, ts_ms
+
+    def remaining(self, method: str) -> int:
+        """Сколько записанных ответов method ещё не выдано."""
+        return len(self._calls.get(method, ()))
+
+    def connect(self) -> None:
+        pass
+
+    # === Market Data ===
+
+    def get_ticker(self, symbol: str) -> Ticker:
+        return self._replay("get_ticker", symbol)
+
+    def get_tickers(self) -> list[Ticker]:
+        return self._replay("get_tickers")
+
+    def get_klines(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int = 100,
+        start: int | None = None,
+        end: int | None = None,
+    ) -> CandleFrame:
+        return self._replay("get_klines", symbol, interval, limit, start, end)
+
+    def get_instruments(self) -> list[Instrument]:
+        return self._replay("get_instruments")
+
+    def subscribe_prices(
+        self,
+        symbols: list[str],
+        callback: PriceCallback,
+        channel: str = "tickers",
+    ) -> Subscription:
+        """Проиграть записанные цены в фоновом потоке."""
+        return _ReplaySubscription(self.iter_prices(symbols), callback)
+
+    # === Leverage ===
+
+    def set_leverage(self, symbol: str, leverage: int) -> None:
+        self._replay("set_leverage", symbol, leverage)
+
+    # === Trading ===
+
+    def buy(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> Order:
+        return self._replay("buy", symbol, qty, stop_loss)
+
+    def sell(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> Order:
+        return self._replay("sell", symbol, qty, stop_loss)
+
+    # === Positions ===
+
+    def get_positions(self, symbol: str) -> list[Position]:
+        return self._replay("get_positions", symbol)
+
+    def close_position(self, symbol: str, qty: str | None = None, side: str | None = None) -> Order | None:
+        return self._replay("close_position", symbol, qty, side)
+
+    # === TP/SL ===
+
+    def set_take_profit(self, symbol: str, price: float | str) -> None:
+        self._replay("set_take_profit", symbol, price)
+
+    def set_stop_loss(self, symbol: str, price: float | str) -> None:
+        self._replay("set_stop_loss", symbol, price)
+
+    def set_trailing_stop(
+        self,
+        symbol: str,
+        distance: float | str,
+        active_price: float | str | None = None,
+        stop_loss: float | str | None = None,
+    ) -> None:
+        self._replay("set_trailing_stop", symbol, distance, active_price, stop_loss)
+
+    # === Внутреннее ===
+
+    def _load(self) -> None:
+        calls = 0
+        with open(self.path, "rb") as f:
+            while True:
+                try:
+                    record = pickle.load(f)
+                except EOFError:
+                    break
+                except (pickle.UnpicklingError, ValueError):
+                    # Оборванная последняя запись
+                    logger.warning(f"Replay: {self.path} обрезан, читаем до последней целой записи")
+                    break
+
+                kind = record[0]
+                if kind == "header":
+                    if record[1] != FORMAT_VERSION:
+                        raise ReplayError(f"Неизвестная версия записи: {record[1]}")
+                    continue
+
+                if self._start_ts is None:
+                    self._start_ts = record[1]
+
+                if kind == CALL:
+                    _, ts, method, args, result, error, _ = record
+                    self._calls.setdefault(method, deque()).append((ts, args, result, error))
+                    calls += 1
+                elif kind == PRICE:
+                    self._prices.append(record[1:])
+
+        logger.debug(f"Replay: {calls} запросов, {len(self._prices)} цен из {self.path}")
+
+    def _replay(self, method: str, *args) -> Any:
+        queue = self._calls.get(method)
+        if not queue:
+            raise ReplayError(f"В записи больше нет ответов {method}")
+
+        ts, recorded_args, result, error = queue.popleft()
+        if self.strict and recorded_args != args:
+            raise ReplayError(f"{method}{args} не совпадает с записанным {method}{recorded_args}")
+
+        self._pace(ts)
+        if error is not None:
+            raise _unpack_error(error)
+        return result
+
+    def _pace(self, ts: float) -> None:
+        """В режиме speed дождаться момента записи."""
+        if self.speed is None or self._start_ts is None:
+            return
+        if self._clock_start is None:
+            self._clock_start = time.monotonic()
+
+        due = self._clock_start + (ts - self._start_ts) / self.speed
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class _ReplaySubscription:
+    """Фоновое проигрывание цен в callback."""
+
+    def __init__(self, events: Iterator[tuple[str, float, int]], callback: PriceCallback):
+        self._events = events
+        self._callback = callback
+        self._stop = threading.Event()
+        self.done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="replay-prices", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=1)
+
+    def _run(self) -> None:
+        try:
+            for symbol, price, ts_ms in self._events:
+                if self._stop.is_set():
+                    return
+                self._callback(symbol, price, ts_ms)
+        finally:
+            self.done.set()
+
+
+def _pack_error(error: Exception) -> tuple:
+    """Исключение → (класс, args, __dict__) — так восстанавливаются и pybit-ошибки."""
+    packed = type(error), error.args, dict(getattr(error, "__dict__", {}))
+    try:
+        pickle.dumps(packed)
+    except Exception:
+        return RuntimeError, (f"{type(error).__name__}: {error}",), {}
+    return packed
+
+
+def _unpack_error(packed: tuple) -> Exception:
+    cls, args, state = packed
+    error = cls.__new__(cls)
+    error.args = args
+    error.__dict__.update(state)
+    return error
@@ -0,0 +1,712 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable
+
+from .base import ExchangeClient, PriceCallback, Subscription
+from ..logger import logger
+from ..models import CandleFrame, Execution, Instrument, Ticker, Order, Position
+
+
+@dataclass
+class SimulationConfig:
+    """Модель исполнения симулятора."""
+    spread_percent: float = 0.02        # Полный спред, % от цены: bid/ask = last ∓ половина
+    latency_ms: float = 0.0             # Задержка рыночного ордера (время симуляции)
+    latency_jitter_ms: float = 0.0      # + равномерно 0..jitter
+    fee_percent: float = 0.055          # Тейкер-комиссия за сторону, % от объёма
+    balance: float = 10_000.0           # Начальный баланс счёта, USDT
+    seed: int | None = None             # Для воспроизводимого разброса задержки
+
+
+@dataclass
+class Fill:
+    """Исполнение ордера на симулированной бирже."""
+    order_id: str
+    symbol: str
+    side: str                   # "Buy" / "Sell"
+    qty: float
+    price: float
+    fee: float                  # USDT
+    realized_pnl: float         # USDT, без комиссии
+    ts_ms: int
+    reason: str                 # "market" / "stop_loss" / "take_profit"
+
+
+class SimulatedOrderError(RuntimeError):
+    """Симулированная биржа отклонила запрос."""
+
+
+@dataclass(slots=True)
+class _SimPosition:
+    side: str                   # "Buy" / "Sell"
+    size: float
+    entry_price: float
+    leverage: int
+    stop_loss: float | None = None
+    take_profit: float | None = None
+    version: int = 0            # Меняется при смене SL/TP — старые триггеры недействительны
+    armed: int = 0              # Сколько действительных триггеров в кучах
+    trailing: float = 0.0       # Трейлинг-стоп: расстояние от пика (0 — нет)
+    trail_active: float | None = None   # Цена включения трейлинга (None — включён)
+    trail_peak: float = 0.0     # Пик с момента включения
+
+
+@dataclass(slots=True)
+class _PendingOrder:
+    order_id: str
+    account: "SimulatedExchange"
+    symbol: str
+    side: str
+    qty: float
+    stop_loss: float | None
+    reduce_only: bool
+
+
+@dataclass
+class _SymbolBook:
+    """Цена и очереди одного символа."""
+    symbol: str
+    price: float = 0.0
+    ts_ms: int = 0
+    pending: list = field(default_factory=list)     # heap (due_ms, seq, _PendingOrder)
+    # Триггеры SL/TP — (ключ, seq, account, position, version, reason):
+    # below срабатывает, когда цена опустилась до уровня (SL long, TP short),
+    # ключ -уровень; above — когда поднялась (TP long, SL short), ключ уровень
+    below: list = field(default_factory=list)
+    above: list = field(default_factory=list)
+    live: int = 0               # Действительных триггеров (оценка, для чистки)
+    trailing: list = field(default_factory=list)    # (account, position) с трейлинг-стопом
+    subscribers: list = field(default_factory=list)
+
+
+# Чистить кучу триггеров, когда в ней столько записей и вчетверо больше действительных
+COMPACT_AT = 1024
+
+
+class SimulatedMarket:
+    """
+    Локальная биржа: матчинг рыночных ордеров и серверные стопы поверх потока цен.
+
+    Цены приходят в on_price(symbol, price, ts_ms) — из BybitStream (follow),
+    записи (ReplayExchangeClient.iter_prices) или синтетики (feed). На каждую цену:
+    1. исполняются рыночные ордера, чья задержка истекла — по ask/bid
+       (last ± половина спреда), т.е. с проскальзыванием за время задержки
+    2. трейлинг-стопы подтягивают SL за ценой
+    3. срабатывают SL/TP позиций — по цене этого тика ∓ половина спреда
+    4. цена раздаётся подписчикам (стратегиям)
+
+    Счета (account) — отдельные ExchangeClient со своим балансом и позициями;
+    сотни стратегий в одном процессе делят один рынок. Проверка стопов на
+    тике — вершины двух куч на символ, без обхода позиций.
+
+    Время симуляции — ts_ms последней цены. Рыночные данные, которых у рынка
+    нет (свечи, инструменты), берутся у source.
+    """
+
+    def __init__(
+        self,
+        config: SimulationConfig | None = None,
+        instruments: list[Instrument] | None = None,
+        source: ExchangeClient | None = None,
+    ):
+        self.config = config or SimulationConfig()
+        self.instruments = {instrument.symbol: instrument for instrument in instruments or ()}
+        self.source = source
+        self.accounts: dict[str, SimulatedExchange] = {}
+
+        self._books: dict[str, _SymbolBook] = {}
+        self._followed: set[str] = set()
+        self._now_ms = 0
+        self._half_spread = self.config.spread_percent / 200
+        self._random = random.Random(self.config.seed)
+        self._seq = itertools.count()
+        self._order_ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def account(self, name: str | None = None, balance: float | None = None) -> "SimulatedExchange":
+        """Новый счёт (ExchangeClient) на этом рынке."""
+        name = name or f"sim-{len(self.accounts) + 1}"
+        if name in self.accounts:
+            raise ValueError(f"Счёт {name} уже есть")
+        account = SimulatedExchange(self, name, self.config.balance if balance is None else balance)
+        self.accounts[name] = account
+        return account
+
+    # === Поток цен ===
+
+    def on_price(self, symbol: str, price: float, ts_ms: int) -> None:
+        """Новая цена: исполнить ордера, проверить стопы, раздать подписчикам."""
+        with self._lock:
+            book = self._book(symbol)
+            book.price = price
+            book.ts_ms = ts_ms
+            if ts_ms > self._now_ms:
+                self._now_ms = ts_ms
+
+            if book.pending and book.pending[0][0] <= ts_ms:
+                self._fill_due(book, symbol, ts_ms)
+            if book.trailing:
+                self._trail(book, price)
+            if book.below and -book.below[0][0] >= price:
+                self._trigger(book, book.below, symbol, price, ts_ms, lambda key: -key >= price)
+            if book.above and book.above[0][0] <= price:
+                self._trigger(book, book.above, symbol, price, ts_ms, lambda key: key <= price)
+
+            subscribers = book.subscribers
+        for callback in subscribers:
+            # Ошибка одной стратегии не должна лишать цены остальных (как в BybitStream)
+            try:
+                callback(symbol, price, ts_ms)
+            except Exception as e:
+                logger.error(f"SimulatedMarket: ошибка обработки {symbol}: {e}")
+
+    def feed(self, prices: Iterable[tuple[str, float, int]]) -> int:
+        """Прогнать поток (symbol, price, ts_ms) — например, iter_prices() записи."""
+        count = 0
+        on_price = self.on_price
+        for symbol, price, ts_ms in prices:
+            on_price(symbol, price, ts_ms)
+            count += 1
+        return count
+
+    def follow(self, symbols: list[str], channel: str = "tickers") -> Subscription:
+        """Брать живые цены у source (подписка на его поток)."""
+        if self.source is None:
+            raise ValueError("У рынка нет source")
+        self._followed.update(symbols)
+        return self.source.subscribe_prices(symbols, self.on_price, channel)
+
+    def subscribe(self, symbols: list[str], callback: PriceCallback) -> Subscription:
+        """Получать цены после матчинга (так их видят стратегии)."""
+        with self._lock:
+            for symbol in symbols:
+                book = self._book(symbol)
+                book.subscribers = book.subscribers + [callback]
+        return _SimSubscription(self, symbols, callback)
+
+    def unsubscribe(self, symbols: list[str], callback: PriceCallback) -> None:
+        with self._lock:
+            for symbol in symbols:
+                book = self._book(symbol)
+                book.subscribers = [cb for cb in book.subscribers if cb is not callback]
+
+    # === Рыночные данные ===
+
+    def last_price(self, symbol: str) -> float:
+        """Последняя цена; без потока — запросить у source и принять как тик."""
+        book = self._books.get(symbol)
+        if book is not None and book.price and (self.source is None or symbol in self._followed):
+            return book.price
+        if self.source is None:
+            raise SimulatedOrderError(f"Нет цены {symbol}")
+        price = self.source.get_ticker(symbol).last_price
+        self.on_price(symbol, price, int(time.time() * 1000))
+        return price
+
+    def ticker(self, symbol: str) -> Ticker:
+        price = self.last_price(symbol)
+        return Ticker(
+            symbol=symbol,
+            last_price=price,
+            bid=price * (1 - self._half_spread),
+            ask=price * (1 + self._half_spread),
+            volume_24h=0.0,
+        )
+
+    def tickers(self) -> list[Ticker]:
+        return [self.ticker(symbol) for symbol, book in self._books.items() if book.price]
+
+    def get_instruments(self) -> list[Instrument]:
+        if self.instruments:
+            return list(self.instruments.values())
+        if self.source is None:
+            return []
+        return self.source.get_instruments()
+
+    # === Ордера (вызываются счетами под блокировкой) ===
+
+    def submit(
+        self,
+        account: "SimulatedExchange",
+        symbol: str,
+        side: str,
+        qty: float,
+        stop_loss: float | None = None,
+        reduce_only: bool = False,
+    ) -> Order:
+        """Принять рыночный ордер: исполнить сразу или через задержку."""
+        if qty <= 0:
+            raise SimulatedOrderError(f"Неверный qty: {qty}")
+        instrument = self.instruments.get(symbol)
+        if instrument is not None and qty < float(instrument.min_qty):
+            raise SimulatedOrderError(f"{symbol}: qty {qty} меньше минимального {instrument.min_qty}")
+
+        price = self.last_price(symbol)
+        if stop_loss is not None:
+            _check_stop(side, stop_loss, price)
+        if not reduce_only:
+            account._check_margin(symbol, side, qty, price)
+
+        order = _PendingOrder(
+            f"sim-{next(self._order_ids)}", account, symbol, side, qty, stop_loss, reduce_only,
+        )
+        delay = self.config.latency_ms
+        if self.config.latency_jitter_ms:
+            delay += self._random.uniform(0, self.config.latency_jitter_ms)
+
+        book = self._book(symbol)
+        if delay <= 0:
+            self._fill(book, order, book.ts_ms or self._now_ms)
+            status = "Filled"
+        else:
+            due = book.ts_ms + delay
+            heapq.heappush(book.pending, (due, next(self._seq), order))
+            status = "created"
+        return Order(order_id=order.order_id, symbol=symbol, side=side, qty=_fmt_qty(qty), status=status)
+
+    def arm(self, account: "SimulatedExchange", symbol: str, position: _SimPosition) -> None:
+        """Поставить SL/TP позиции в кучи триггеров (прежние записи устаревают)."""
+        book = self._book(symbol)
+        self.disarm(book, position)
+        long = position.side == "Buy"
+
+        if position.stop_loss is not None:
+            if long:
+                self._push(book, book.below, -position.stop_loss, account, position, "stop_loss")
+            else:
+                self._push(book, book.above, position.stop_loss, account, position, "stop_loss")
+        if position.take_profit is not None:
+            if long:
+                self._push(book, book.above, position.take_profit, account, position, "take_profit")
+            else:
+                self._push(book, book.below, -position.take_profit, account, position, "take_profit")
+
+    def trail(self, account: "SimulatedExchange", symbol: str, position: _SimPosition) -> None:
+        """Вести SL позиции за ценой (position.trailing уже задан)."""
+        book = self._book(symbol)
+        if not any(entry[1] is position for entry in book.trailing):
+            book.trailing.append((account, position))
+        if position.trail_active is None:
+            position.trail_peak = book.price
+            self._trail_position(book, account, position, book.price)
+
+    def disarm(self, book: _SymbolBook, position: _SimPosition) -> None:
+        """Сделать триггеры позиции недействительными (удаляются лениво)."""
+        position.version += 1
+        book.live = max(0, book.live - position.armed)
+        position.armed = 0
+
+    # === Внутреннее ===
+
+    def _book(self, symbol: str) -> _SymbolBook:
+        book = self._books.get(symbol)
+        if book is None:
+            book = self._books[symbol] = _SymbolBook(symbol)
+        return book
+
+    def _fill_due(self, book: _SymbolBook, symbol: str, ts_ms: int) -> None:
+        pending = book.pending
+        while pending and pending[0][0] <= ts_ms:
+            _, _, order = heapq.heappop(pending)
+            try:
+                self._fill(book, order, ts_ms)
+            except SimulatedOrderError:
+                # Позиция ушла, пока ордер «летел» (reduce-only) — ордер отменён
+                order.account._publish(symbol, Order(
+                    order.order_id, symbol, order.side, _fmt_qty(order.qty), "Cancelled",
+                ))
+
+    def _fill(self, book: _SymbolBook, order: _PendingOrder, ts_ms: int, reason: str = "market") -> None:
+        if order.side == "Buy":
+            price = book.price * (1 + self._half_spread)
+        else:
+            price = book.price * (1 - self._half_spread)
+        order.account._apply(order, price, ts_ms, reason)
+
+    def _trigger(self, book: _SymbolBook, heap: list, symbol: str, price: float, ts_ms: int, hit) -> None:
+        while heap and hit(heap[0][0]):
+            _, _, account, position, version, reason = heapq.heappop(heap)
+            if account.positions.get(symbol) is not position or position.version != version:
+                continue    # Устаревший триггер
+            close_side = "Sell" if position.side == "Buy" else "Buy"
+            order = _PendingOrder(
+                f"sim-{next(self._order_ids)}", account, symbol, close_side, position.size, None, True,
+            )
+            self._fill(book, order, ts_ms, reason)
+
+    def _trail(self, book: _SymbolBook, price: float) -> None:
+        stale = False
+        for account, position in book.trailing:
+            if account.positions.get(book.symbol) is not position or not position.trailing:
+                stale = True
+                continue
+            long = position.side == "Buy"
+            if position.trail_active is not None:
+                # Ждём цену включения, дальше пик считается от неё
+                if (price < position.trail_active) if long else (price > position.trail_active):
+                    continue
+                position.trail_active = None
+                position.trail_peak = price
+            elif (price > position.trail_peak) if long else (price < position.trail_peak):
+                position.trail_peak = price
+            else:
+                continue
+            self._trail_position(book, account, position, price)
+        if stale:
+            book.trailing = [
+                (account, position) for account, position in book.trailing
+                if account.positions.get(book.symbol) is position and position.trailing
+            ]
+
+    def _trail_position(self, book: _SymbolBook, account, position: _SimPosition, price: float) -> None:
+        """SL = пик ∓ расстояние, если это лучше текущего SL."""
+        if position.side == "Buy":
+            level = position.trail_peak - position.trailing
+            better = position.stop_loss is None or level > position.stop_loss
+        else:
+            level = position.trail_peak + position.trailing
+            better = position.stop_loss is None or level < position.stop_loss
+        if better:
+            position.stop_loss = level
+            self.arm(account, book.symbol, position)
+            account._publish(book.symbol)
+
+    def _push(self, book: _SymbolBook, heap: list, key: float, account, position: _SimPosition, reason: str) -> None:
+        heapq.heappush(heap, (key, next(self._seq), account, position, position.version, reason))
+        position.armed += 1
+        book.live += 1
+        if len(heap) >= COMPACT_AT and len(heap) > 4 * book.live:
+            self._compact(book)
+
+    def _compact(self, book: _SymbolBook) -> None:
+        """Выбросить устаревшие триггеры (SL трейлится — записей копится много)."""
+        live = 0
+        for heap in (book.below, book.above):
+            heap[:] = [
+                entry for entry in heap
+                if entry[2].positions.get(book.symbol) is entry[3] and entry[3].version == entry[4]
+            ]
+            heapq.heapify(heap)
+            live += len(heap)
+        book.live = live
+
+
+class SimulatedExchange(ExchangeClient):
+    """
+    Счёт на SimulatedMarket — ExchangeClient для paper trading.
+
+    Позиции в one-way режиме (одна на символ), встречный ордер уменьшает
+    или переворачивает позицию. Комиссия и реализованный PnL списываются
+    с баланса при каждом исполнении; нереализованный PnL — по последней цене.
+    Отклонённые запросы — SimulatedOrderError. subscribe_account — поток
+    счёта, как приватный WebSocket Bybit.
+    """
+
+    def __init__(self, market: SimulatedMarket, name: str, balance: float):
+        self.market = market
+        self.name = name
+        self.balance = balance
+        self.realized_pnl = 0.0
+        self.fees = 0.0
+        self.fills: list[Fill] = []
+        self.positions: dict[str, _SimPosition] = {}
+        self._leverage: dict[str, int] = {}
+        self._account_handlers: list[tuple] = []     # (on_position, on_order, on_execution)
+
+    @property
+    def unrealized_pnl(self) -> float:
+        return sum(
+            _pnl(position, self.market._book(symbol).price, position.size)
+            for symbol, position in self.positions.items()
+        )
+
+    @property
+    def equity(self) -> float:
+        """Баланс + нереализованный PnL."""
+        return self.balance + self.unrealized_pnl
+
+    def connect(self) -> None:
+        pass
+
+    # === Market Data ===
+
+    def get_ticker(self, symbol: str) -> Ticker:
+        with self.market._lock:
+            return self.market.ticker(symbol)
+
+    def get_tickers(self) -> list[Ticker]:
+        with self.market._lock:
+            return self.market.tickers()
+
+    def get_klines(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int = 100,
+        start: int | None = None,
+        end: int | None = None,
+    ) -> CandleFrame:
+        if self.market.source is None:
+            raise ValueError("У рынка нет source")
+        return self.market.source.get_klines(symbol, interval, limit, start, end)
+
+    def get_instruments(self) -> list[Instrument]:
+        return self.market.get_instruments()
+
+    def subscribe_prices(
+        self,
+        symbols: list[str],
+        callback: PriceCallback,
+        channel: str = "tickers",
+    ) -> Subscription:
+        return self.market.subscribe(symbols, callback)
+
+    # === Leverage ===
+
+    def set_leverage(self, symbol: str, leverage: int) -> None:
+        instrument = self.market.instruments.get(symbol)
+        if leverage < 1 or (instrument is not None and leverage > instrument.max_leverage):
+            raise SimulatedOrderError(f"{symbol}: недопустимое плечо {leverage}")
+        with self.market._lock:
+            self._leverage[symbol] = leverage
+            position = self.positions.get(symbol)
+            if position is not None:
+                position.leverage = leverage
+
+    # === Trading ===
+
+    def buy(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> Order:
+        with self.market._lock:
+            return self.market.submit(self, symbol, "Buy", float(qty), _level(stop_loss))
+
+    def sell(self, symbol: str, qty: str, stop_loss: float | str | None = None) -> Order:
+        with self.market._lock:
+            return self.market.submit(self, symbol, "Sell", float(qty), _level(stop_loss))
+
+    # === Positions ===
+
+    def get_positions(self, symbol: str) -> list[Position]:
+        with self.market._lock:
+            position = self._position(symbol)
+            return [position] if position.size else []
+
+    def subscribe_account(
+        self,
+        on_position: Callable[[list[Position]], None],
+        on_order: Callable[[list[Order]], None] | None = None,
+        on_execution: Callable[[list[Execution]], None] | None = None,
+        on_connect: Callable[[], None] | None = None,
+    ) -> Subscription:
+        """Поток счёта (как BybitClient.subscribe_account): события идут сразу, под блокировкой рынка."""
+        handlers = (on_position, on_order, on_execution)
+        with self.market._lock:
+            self._account_handlers = self._account_handlers + [handlers]
+        if on_connect is not None:
+            on_connect()
+        return _AccountSubscription(self, handlers)
+
+    def close_position(self, symbol: str, qty: str | None = None, side: str | None = None) -> Order | None:
+        with self.market._lock:
+            position = self.positions.get(symbol)
+            if position is None:
+                return None
+            close_side = "Sell" if position.side == "Buy" else "Buy"
+            close_qty = float(qty) if qty else position.size
+            return self.market.submit(self, symbol, close_side, close_qty, reduce_only=True)
+
+    # === TP/SL ===
+
+    def set_take_profit(self, symbol: str, price: float | str) -> None:
+        self._set_trading_stop(symbol, take_profit=_level(price))
+
+    def set_stop_loss(self, symbol: str, price: float | str) -> None:
+        self._set_trading_stop(symbol, stop_loss=_level(price))
+
+    def set_trailing_stop(
+        self,
+        symbol: str,
+        distance: float | str,
+        active_price: float | str | None = None,
+        stop_loss: float | str | None = None,
+    ) -> None:
+        with self.market._lock:
+            position = self.positions.get(symbol)
+            if position is None:
+                raise SimulatedOrderError(f"{symbol}: нет позиции для трейлинг-стопа")
+            distance = float(distance)
+            if distance < 0:
+                raise SimulatedOrderError(f"Неверное расстояние трейлинга: {distance}")
+            if stop_loss is not None:
+                self._set_trading_stop(symbol, stop_loss=_level(stop_loss))
+            position.trailing = distance
+            position.trail_active = _level(active_price)
+            position.trail_peak = 0.0
+            if distance:
+                self.market.trail(self, symbol, position)
+
+    # === Внутреннее ===
+
+    def _set_trading_stop(self, symbol: str, stop_loss: float | None = None, take_profit: float | None = None) -> None:
+        with self.market._lock:
+            position = self.positions.get(symbol)
+            if position is None:
+                raise SimulatedOrderError(f"{symbol}: нет позиции для TP/SL")
+            price = self.market._book(symbol).price
+            if stop_loss is not None:
+                _check_stop(position.side, stop_loss, price)
+                position.stop_loss = stop_loss
+            if take_profit is not None:
+                _check_take_profit(position.side, take_profit, price)
+                position.take_profit = take_profit
+            self.market.arm(self, symbol, position)
+            self._publish(symbol)
+
+    def _position(self, symbol: str) -> Position:
+        """Позиция в виде модели (size=0 — позиции нет)."""
+        position = self.positions.get(symbol)
+        if position is None:
+            return Position(symbol=symbol, side="", size=0.0, entry_price=0.0, unrealized_pnl=0.0)
+        return Position(
+            symbol=symbol,
+            side=position.side,
+            size=position.size,
+            entry_price=position.entry_price,
+            unrealized_pnl=_pnl(position, self.market._book(symbol).price, position.size),
+            leverage=position.leverage,
+            take_profit=position.take_profit,
+            stop_loss=position.stop_loss,
+        )
+
+    def _publish(self, symbol: str, order: Order | None = None, execution: Execution | None = None) -> None:
+        """Раздать подписчикам subscribe_account позицию (и ордер / исполнение)."""
+        if not self._account_handlers:
+            return
+        position = self._position(symbol)
+        for on_position, on_order, on_execution in self._account_handlers:
+            try:
+                on_position([position])
+                if execution is not None and on_execution is not None:
+                    on_execution([execution])
+                if order is not None and on_order is not None:
+                    on_order([order])
+            except Exception as e:
+                logger.error(f"SimulatedExchange {self.name}: ошибка обработки потока счёта: {e}")
+
+    def _check_margin(self, symbol: str, side: str, qty: float, price: float) -> None:
+        """Хватает ли свободного баланса на маржу ордера, наращивающего позицию."""
+        position = self.positions.get(symbol)
+        if position is not None and position.side != side:
+            qty -= position.size
+            if qty <= 0:
+                return
+
+        used = sum(p.size * p.entry_price / p.leverage for p in self.positions.values())
+        leverage = self._leverage.get(symbol, 1)
+        required = qty * price / leverage + qty * price * self.market.config.fee_percent / 100
+        if required > self.balance + self.unrealized_pnl - used:
+            raise SimulatedOrderError(f"{self.name}: недостаточно средств для {side} {qty} {symbol}")
+
+    def _apply(self, order: _PendingOrder, price: float, ts_ms: int, reason: str) -> None:
+        """Исполнить ордер по price: открыть, нарастить, уменьшить или перевернуть позицию."""
+        symbol = order.symbol
+        qty = order.qty
+        position = self.positions.get(symbol)
+        realized = 0.0
+
+        if position is not None and position.side != order.side:
+            closed = min(qty, position.size)
+            realized = _pnl(position, price, closed)
+            position.size -= closed
+            qty -= closed
+            if position.size <= 1e-12:
+                del self.positions[symbol]
+                self.market.disarm(self.market._book(symbol), position)
+                position = None
+        elif order.reduce_only:
+            raise SimulatedOrderError(f"{symbol}: нет позиции для reduce-only ордера")
+
+        if qty > 1e-12 and not order.reduce_only:
+            if position is None:
+                position = self.positions[symbol] = _SimPosition(
+                    order.side, qty, price, self._leverage.get(symbol, 1), order.stop_loss,
+                )
+                self.market.arm(self, symbol, position)
+            else:
+                total = position.size + qty
+                position.entry_price = (position.entry_price * position.size + price * qty) / total
+                position.size = total
+                if order.stop_loss is not None:
+                    position.stop_loss = order.stop_loss
+                    self.market.arm(self, symbol, position)
+
+        filled = order.qty - (qty if order.reduce_only else 0.0)
+        fee = filled * price * self.market.config.fee_percent / 100
+        self.balance += realized - fee
+        self.realized_pnl += realized
+        self.fees += fee
+        self.fills.append(Fill(order.order_id, symbol, order.side, filled, price, fee, realized, ts_ms, reason))
+
+        if self._account_handlers:
+            self._publish(
+                symbol,
+                Order(order.order_id, symbol, order.side, _fmt_qty(order.qty), "Filled", price, filled),
+                Execution(f"{order.order_id}-{len(self.fills)}", order.order_id, symbol, order.side, price, filled, fee, ts_ms),
+            )
+
+
+class _SimSubscription:
+    """Подписка на цены SimulatedMarket."""
+
+    def __init__(self, market: SimulatedMarket, symbols: list[str], callback: PriceCallback):
+        self._market = market
+        self._symbols = symbols
+        self._callback = callback
+
+    def stop(self) -> None:
+        self._market.unsubscribe(self._symbols, self._callback)
+
+
+class _AccountSubscription:
+    """Подписка на поток счёта SimulatedExchange."""
+
+    def __init__(self, account: SimulatedExchange, handlers: tuple):
+        self._account = account
+        self._handlers = handlers
+
+    def stop(self) -> None:
+        with self._account.market._lock:
+            self._account._account_handlers = [
+                handlers for handlers in self._account._account_handlers if handlers is not self._handlers
+            ]
+
+
+def _pnl(position: _SimPosition, price: float, qty: float) -> float:
+    if position.side == "Buy":
+        return (price - position.entry_price) * qty
+    return (position.entry_price - price) * qty
+
+
+def _level(price: float | str | None) -> float | None:
+    """Цена SL/TP из запроса ("0" — снять, как у Bybit)."""
+    if price is None:
+        return None
+    return float(price) or None
+
+
+def _check_stop(side: str, stop_loss: float, price: float) -> None:
+    """SL long — ниже цены, short — выше (иначе Bybit отклоняет запрос)."""
+    if (side == "Buy" and stop_loss >= price) or (side == "Sell" and stop_loss <= price):
+        raise SimulatedOrderError(f"SL {stop_loss} по неверную сторону от цены {price} ({side})")
+
+
+def _check_take_profit(side: str, take_profit: float, price: float) -> None:
+    if (side == "Buy" and take_profit <= price) or (side == "Sell" and take_profit >= price):
+        raise SimulatedOrderError(f"TP {take_profit} по неверную сторону от цены {price} ({side})")
+
+
+def _fmt_qty(qty: float) -> str:
+    return f"{qty:.12g}"
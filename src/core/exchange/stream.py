@@ -0,0 +1,253 @@
+import json
+import threading
+import time
+from typing import Callable
+
+import websocket
+
+from ..logger import logger
+
+
+MessageHandler = Callable[[dict], None]
+
+
+class BybitStream:
+    """
+    WebSocket-поток Bybit v5.
+
+    Держит одно соединение в фоновом потоке:
+    - auth перед подписками (приватный поток) — на каждом подключении
+    - подписки на топики (переподписка после реконнекта)
+    - heartbeat: {"op": "ping"} каждые ping_interval секунд
+    - реконнект с экспоненциальной задержкой
+
+    Никакой бизнес-логики — только доставка сообщений в обработчики.
+    """
+
+    # Bybit принимает не больше 10 топиков в одном subscribe
+    SUBSCRIBE_CHUNK = 10
+
+    def __init__(
+        self,
+        url: str,
+        ping_interval: float = 20.0,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+        name: str = "bybit-stream",
+        auth: Callable[[], dict] | None = None,
+        on_connect: Callable[[], None] | None = None,
+    ):
+        """
+        Args:
+            auth: Собирает сообщение auth (подпись со свежим сроком) — для
+                приватного потока
+            on_connect: Вызывается после каждого (пере)подключения и подписки
+        """
+        self.url = url
+        self.ping_interval = ping_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.name = name
+        self.auth = auth
+        self.on_connect = on_connect
+
+        self._handlers: dict[str, MessageHandler] = {}
+        self._ws: websocket.WebSocket | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._connected = threading.Event()
+        self._lock = threading.Lock()
+
+    # === Подписки ===
+
+    def subscribe(self, topic: str, handler: MessageHandler) -> None:
+        """
+        Подписаться на топик.
+
+        Args:
+            topic: Топик Bybit (например "tickers.BTCUSDT")
+            handler: Вызывается с каждым сообщением топика
+        """
+        with self._lock:
+            self._handlers[topic] = handler
+            ws = self._ws if self._connected.is_set() else None
+
+        if ws is not None:
+            self._send_subscribe(ws, [topic])
+
+    def resubscribe(self, topic: str) -> None:
+        """
+        Отписаться и подписаться на топик заново (биржа пришлёт свежий snapshot).
+
+        Без соединения ничего не делает: при подключении подписка будет и так.
+        """
+        with self._lock:
+            ws = self._ws if self._connected.is_set() and topic in self._handlers else None
+
+        if ws is not None:
+            ws.send(json.dumps({"op": "unsubscribe", "args": [topic]}))
+            self._send_subscribe(ws, [topic])
+
+    @property
+    def topics(self) -> list[str]:
+        """Текущие топики."""
+        return list(self._handlers)
+
+    @property
+    def connected(self) -> bool:
+        """Есть ли живое соединение."""
+        return self._connected.is_set()
+
+    # === Жизненный цикл ===
+
+    def start(self) -> "BybitStream":
+        """Запустить поток (не блокирует)."""
+        if self._thread and self._thread.is_alive():
+            return self
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        """Остановить поток и закрыть соединение."""
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            # abort() будит recv() в потоке чтения; close() ждал бы его
+            # (до ping_interval), соединение закроет сам поток
+            try:
+                ws.abort()
+            except Exception:
+                pass
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def wait_connected(self, timeout: float | None = None) -> bool:
+        """Дождаться подключения."""
+        return self._connected.wait(timeout)
+
+    # === Внутреннее ===
+
+    def _run(self) -> None:
+        """Цикл: подключиться → читать → при обрыве переподключиться."""
+        delay = self.reconnect_delay
+
+        while not self._stop.is_set():
+            try:
+                ws = websocket.create_connection(self.url, timeout=self.ping_interval)
+                self._ws = ws
+                self._on_open(ws)
+                delay = self.reconnect_delay
+                self._read_loop(ws)
+            except Exception as e:
+                if not self._stop.is_set():
+                    logger.warning(f"[{self.name}] Соединение потеряно: {e}")
+            finally:
+                self._connected.clear()
+                if self._ws is not None:
+                    try:
+                        self._ws.close()
+                    except Exception:
+                        pass
+                    self._ws = None
+
+            if self._stop.wait(delay):
+                break
+            logger.info(f"[{self.name}] Переподключение...")
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _on_open(self, ws: websocket.WebSocket) -> None:
+        """Соединение открыто — авторизуемся и подписываемся заново."""
+        if self.auth is not None:
+            self._authenticate(ws)
+
+        with self._lock:
+            topics = list(self._handlers)
+            self._connected.set()
+
+        if topics:
+            self._send_subscribe(ws, topics)
+        logger.info(f"[{self.name}] Подключено: {self.url} ({len(topics)} топиков)")
+
+        if self.on_connect is not None:
+            try:
+                self.on_connect()
+            except Exception as e:
+                logger.error(f"[{self.name}] Ошибка on_connect: {e}")
+
+    def _authenticate(self, ws: websocket.WebSocket) -> None:
+        """Отправить auth и дождаться ответа: до него подписки приватных топиков не примут."""
+        ws.send(json.dumps(self.auth()))
+        deadline = time.monotonic() + self.ping_interval
+
+        while time.monotonic() < deadline:
+            try:
+                raw = ws.recv()
+            except websocket.WebSocketTimeoutException:
+                break
+            if raw == "":
+                raise ConnectionError("сервер закрыл соединение")
+            if not raw:
+                continue
+            message = json.loads(raw)
+            if message.get("op") == "auth":
+                if not message.get("success"):
+                    raise ConnectionError(f"auth отклонён: {message.get('ret_msg')}")
+                return
+
+        raise ConnectionError("нет ответа на auth")
+
+    def _read_loop(self, ws: websocket.WebSocket) -> None:
+        """Читать сообщения, отправлять ping и следить за тишиной."""
+        last_ping = last_recv = time.monotonic()
+
+        while not self._stop.is_set():
+            try:
+                raw = ws.recv()
+            except websocket.WebSocketTimeoutException:
+                raw = None
+
+            now = time.monotonic()
+
+            if raw:
+                last_recv = now
+                self._dispatch(raw)
+            elif raw == "":
+                raise ConnectionError("сервер закрыл соединение")
+
+            # Ни одного сообщения (даже pong) за 2 интервала — соединение мёртвое
+            if now - last_recv > self.ping_interval * 2:
+                raise ConnectionError("нет heartbeat от сервера")
+
+            if now - last_ping >= self.ping_interval:
+                ws.send(json.dumps({"op": "ping"}))
+                last_ping = now
+
+    def _send_subscribe(self, ws: websocket.WebSocket, topics: list[str]) -> None:
+        """Отправить subscribe пачками."""
+        for i in range(0, len(topics), self.SUBSCRIBE_CHUNK):
+            chunk = topics[i:i + self.SUBSCRIBE_CHUNK]
+            ws.send(json.dumps({"op": "subscribe", "args": chunk}))
+
+    def _dispatch(self, raw: str) -> None:
+        """Отдать сообщение обработчику топика."""
+        message = json.loads(raw)
+
+        topic = message.get("topic")
+        if topic is None:
+            # Служебные ответы: pong, subscribe, auth
+            if message.get("success") is False:
+                logger.error(f"[{self.name}] Ошибка от биржи: {message.get('ret_msg')}")
+            return
+
+        handler = self._handlers.get(topic)
+        if handler is None:
+            return
+
+        try:
+            handler(message)
+        except Exception as e:
+            # Ошибка в обработчике не должна рвать соединение
+            logger.error(f"[{self.name}] Ошибка обработки {topic}: {e}")
@@ -0,0 +1,311 @@
+import math
+
+import numpy as np
+
+from .buffers import RingBuffer
+
+
+# Потоковые индикаторы: O(1) времени и памяти на значение.
+# У каждого есть пакетный двойник на numpy (для бэктестов) — те же числа,
+# включая NaN, пока индикатору не хватает данных.
+
+
+class EMA:
+    """Экспоненциальное среднее: alpha = 2 / (period + 1), старт — с первого значения."""
+
+    __slots__ = ("period", "alpha", "value", "count")
+
+    def __init__(self, period: int):
+        if period < 1:
+            raise ValueError("period должен быть ≥ 1")
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.value = math.nan
+        self.count = 0
+
+    @property
+    def ready(self) -> bool:
+        """Набралось period значений (раньше сильно влияет первое)."""
+        return self.count >= self.period
+
+    def update(self, x: float) -> float:
+        self.count += 1
+        if self.count == 1:
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+    def reset(self) -> None:
+        self.value = math.nan
+        self.count = 0
+
+
+class ATR:
+    """
+    Average True Range по Уайлдеру.
+
+    Первое значение — среднее первых period TR, дальше
+    ATR = ATR + (TR − ATR) / period. До этого — NaN.
+    """
+
+    __slots__ = ("period", "value", "count", "_sum", "_prev_close")
+
+    def __init__(self, period: int = 14):
+        if period < 1:
+            raise ValueError("period должен быть ≥ 1")
+        self.period = period
+        self.reset()
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.period
+
+    def update(self, high: float, low: float, close: float) -> float:
+        """Новая свеча (для тиков: high = low = close = цена)."""
+        prev = self._prev_close
+        tr = high - low if prev is None else max(high, prev) - min(low, prev)
+        self._prev_close = close
+        self.count += 1
+
+        if self.count < self.period:
+            self._sum += tr
+        elif self.count == self.period:
+            self.value = (self._sum + tr) / self.period
+        else:
+            self.value += (tr - self.value) / self.period
+        return self.value
+
+    def reset(self) -> None:
+        self.value = math.nan
+        self.count = 0
+        self._sum = 0.0
+        self._prev_close: float | None = None
+
+
+class RollingStd:
+    """
+    Стандартное отклонение последних window значений (ddof=1).
+
+    Welford со скользящим окном: новое значение вытесняет самое старое
+    за O(1), без прохода по окну. Раз в window обновлений сумма
+    пересчитывается по окну заново, чтобы не копилась ошибка округления
+    (в среднем всё равно O(1)). Ещё пересчёт — когда M2 обвалилась на
+    порядки от пика: остаток там — ошибка округления, и плоское окно без
+    него дало бы σ ≠ 0. До заполнения окна — NaN.
+    """
+
+    __slots__ = ("window", "mean", "_m2", "_peak", "_values", "_since")
+
+    def __init__(self, window: int):
+        if window < 2:
+            raise ValueError("window должно быть ≥ 2")
+        self.window = window
+        self._values = RingBuffer(window)
+        self.reset()
+
+    @property
+    def ready(self) -> bool:
+        return len(self._values) == self.window
+
+    @property
+    def value(self) -> float:
+        if len(self._values) < self.window:
+            return math.nan
+        return math.sqrt(max(self._m2, 0.0) / (self.window - 1))
+
+    def update(self, x: float) -> float:
+        values = self._values
+        n = len(values)
+        if n < self.window:
+            delta = x - self.mean
+            self.mean += delta / (n + 1)
+            self._m2 += delta * (x - self.mean)
+        else:
+            old = values[0]
+            delta = x - old
+            mean = self.mean + delta / n
+            self._m2 += delta * (x - mean + old - self.mean)
+            self.mean = mean
+        values.append(x)
+
+        if self._m2 > self._peak:
+            self._peak = self._m2
+        self._since += 1
+        if self._since >= self.window or self._m2 < self._peak * M2_COLLAPSE:
+            self._recompute()
+        return self.value
+
+    def reset(self) -> None:
+        self._values.clear()
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._peak = 0.0
+        self._since = 0
+
+    def _recompute(self) -> None:
+        """Точные mean и M2 по окну."""
+        values = self._values.to_list()
+        mean = math.fsum(values) / len(values)
+        self.mean = mean
+        self._m2 = math.fsum((x - mean) ** 2 for x in values)
+        self._peak = self._m2
+        self._since = 0
+
+
+class VWAP:
+    """
+    VWAP сессии: Σ(цена × объём) / Σ объём с начала сессии.
+
+    Сессия — отрезок session_ms от эпохи (по умолчанию сутки UTC).
+    Пока объёма в сессии нет — NaN.
+    """
+
+    __slots__ = ("session_ms", "value", "_session", "_pv", "_volume")
+
+    def __init__(self, session_ms: int = 86_400_000):
+        self.session_ms = session_ms
+        self.reset()
+
+    @property
+    def ready(self) -> bool:
+        return self._volume > 0
+
+    def update(self, price: float, qty: float, ts_ms: int) -> float:
+        session = ts_ms // self.session_ms
+        if session != self._session:
+            self._session = session
+            self._pv = 0.0
+            self._volume = 0.0
+        self._pv += price * qty
+        self._volume += qty
+        self.value = self._pv / self._volume if self._volume > 0 else math.nan
+        return self.value
+
+    def reset(self) -> None:
+        self.value = math.nan
+        self._session: int | None = None
+        self._pv = 0.0
+        self._volume = 0.0
+
+
+# === Пакетные версии ===
+
+def ema(values: np.ndarray, period: int) -> np.ndarray:
+    """EMA по массиву — как EMA.update() по каждому значению."""
+    x = np.asarray(values, dtype=np.float64)
+    if not len(x):
+        return x.copy()
+    alpha = 2 / (period + 1)
+    out = np.empty_like(x)
+    out[0] = x[0]
+    out[1:] = _recurrence(alpha * x[1:], 1 - alpha, x[0])
+    return out
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """ATR Уайлдера по массивам свечей — как ATR.update() по каждой."""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    out = np.full(n, np.nan)
+    if n < period:
+        return out
+
+    prev = close[:-1]
+    tr = np.empty(n)
+    tr[0] = high[0] - low[0]
+    tr[1:] = np.maximum(high[1:], prev) - np.minimum(low[1:], prev)
+
+    first = tr[:period].sum() / period
+    out[period - 1] = first
+    out[period:] = _recurrence(tr[period:] / period, 1 - 1 / period, first)
+    return out
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Стандартное отклонение скользящего окна (ddof=1) по последней оси.
+
+    out[..., i] — по значениям [i − window + 1, i]; первые window − 1 — NaN.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] < window:
+        return out
+    windows = np.lib.stride_tricks.sliding_window_view(x, window, axis=-1)
+    # std() копирует окна: кусками, чтобы не держать в памяти все n × window
+    rows = max(x.size // x.shape[-1], 1)
+    step = max(ROLLING_CHUNK // (window * rows), 1)
+    for start in range(0, windows.shape[-2], step):
+        stop = start + step
+        out[..., window - 1 + start:window - 1 + stop] = windows[..., start:stop, :].std(axis=-1, ddof=1)
+    return out
+
+
+def vwap(prices: np.ndarray, qty: np.ndarray, ts_ms: np.ndarray, session_ms: int = 86_400_000) -> np.ndarray:
+    """VWAP сессии по массивам сделок — как VWAP.update() по каждой."""
+    prices = np.asarray(prices, dtype=np.float64)
+    qty = np.asarray(qty, dtype=np.float64)
+    n = len(prices)
+    if not n:
+        return np.empty(0)
+
+    session = np.asarray(ts_ms, dtype=np.int64) // session_ms
+    new = np.empty(n, dtype=bool)
+    new[0] = True
+    new[1:] = session[1:] != session[:-1]
+
+    pv = _segment_cumsum(prices * qty, new)
+    volume = _segment_cumsum(qty, new)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = pv / volume
+    out[volume <= 0] = np.nan
+    return out
+
+
+# === Внутреннее ===
+
+# Сколько значений окон rolling_std обрабатывает за раз
+ROLLING_CHUNK = 1 << 20
+
+# RollingStd пересчитывает окно, когда M2 упала ниже этой доли пика:
+# ошибка Welford ~ eps × пик × window, дальше она сравнима с самой M2
+M2_COLLAPSE = 1e-8
+
+# Длина блока для _recurrence: матрица весов блока — RECURRENCE_BLOCK²
+RECURRENCE_BLOCK = 256
+
+
+def _recurrence(x: np.ndarray, decay: float, y0: float) -> np.ndarray:
+    """
+    y[i] = decay · y[i−1] + x[i], y[−1] = y0 — без цикла по элементам.
+
+    Внутри блока — умножение на нижнетреугольную матрицу степеней decay,
+    между блоками переносится последнее значение.
+    """
+    n = len(x)
+    out = np.empty(n)
+    if not n:
+        return out
+    size = min(RECURRENCE_BLOCK, n)
+    i = np.arange(size)
+    lag = i[:, None] - i[None, :]
+    weights = np.where(lag >= 0, decay ** np.maximum(lag, 0), 0.0)
+    carry = decay ** (i + 1)
+
+    y = y0
+    for start in range(0, n, size):
+        block = x[start:start + size]
+        m = len(block)
+        out[start:start + m] = weights[:m, :m] @ block + carry[:m] * y
+        y = out[start + m - 1]
+    return out
+
+
+def _segment_cumsum(x: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """Накопленная сумма, которая начинается заново там, где new = True."""
+    total = np.cumsum(x)
+    start = np.maximum.accumulate(np.where(new, np.arange(len(x)), 0))
+    return total - (total - x)[start]
@@ -0,0 +1,208 @@
+import json
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+# Границы корзин латентности (секунды): от 0.1 ms до 10 s
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Counter:
+    """Монотонный счётчик."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными корзинами.
+
+    observe() — бинарный поиск по границам и пара сложений,
+    без аллокаций и блокировок (при записи из нескольких потоков
+    возможна потеря единичных отсчётов); корзины хранятся не накопительными.
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # Последняя — +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля — верхняя граница корзины (inf за последней)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик процесса.
+
+    Метрика — имя + метки; объект создаётся один раз при первом запросе,
+    горячий путь держит ссылку на него и только вызывает observe()/inc().
+    Снаружи: текстовый формат Prometheus (render/serve) или файл (dump).
+    """
+
+    def __init__(self):
+        self._help: dict[str, tuple[str, str]] = {}     # name → (type, help)
+        self._metrics: dict[str, dict[Labels, Counter | Histogram]] = {}
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+
+    def counter(self, name: str, help: str = "", **labels: str) -> Counter:
+        """Счётчик name{labels} (создаётся при первом обращении)."""
+        return self._get(name, "counter", help, labels, Counter)
+
+    def histogram(
+        self,
+        name: str,
+        help: str = "",
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        **labels: str,
+    ) -> Histogram:
+        """Гистограмма name{labels} (создаётся при первом обращении)."""
+        return self._get(name, "histogram", help, labels, lambda: Histogram(buckets))
+
+    # === Экспорт ===
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus."""
+        lines = []
+        with self._lock:
+            families = [(name, dict(children)) for name, children in self._metrics.items()]
+
+        for name, children in families:
+            kind, help = self._help[name]
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+
+            for labels, metric in sorted(children.items()):
+                if isinstance(metric, Counter):
+                    lines.append(f"{name}{_fmt_labels(labels)} {metric.value}")
+                    continue
+
+                cumulative = 0
+                for bound, n in zip(metric.bounds + (float("inf"),), metric.counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_fmt_labels(labels)} {metric.sum}")
+                lines.append(f"{name}_count{_fmt_labels(labels)} {metric.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """Сводка: count/sum/p50/p99 для гистограмм, value для счётчиков."""
+        result = {}
+        with self._lock:
+            families = [(name, dict(children)) for name, children in self._metrics.items()]
+
+        for name, children in families:
+            for labels, metric in sorted(children.items()):
+                key = f"{name}{_fmt_labels(labels)}"
+                if isinstance(metric, Counter):
+                    result[key] = metric.value
+                else:
+                    result[key] = {
+                        "count": metric.count,
+                        "sum": metric.sum,
+                        "p50": metric.quantile(0.5),
+                        "p99": metric.quantile(0.99),
+                    }
+        return result
+
+    def dump(self, path: str | Path) -> None:
+        """Записать метрики в файл: .json — сводка, иначе — формат Prometheus."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == ".json":
+            path.write_text(json.dumps(self.snapshot(), indent=2))
+        else:
+            path.write_text(self.render())
+
+    def serve(self, port: int = 9108, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Отдавать /metrics на локальном порту (фоновый поток)."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        return self._server
+
+    def stop(self) -> None:
+        """Остановить HTTP-экспорт."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _get(self, name: str, kind: str, help: str, labels: dict, factory) -> Counter | Histogram:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            known = self._help.get(name)
+            if known is None:
+                self._help[name] = (kind, help)
+                self._metrics[name] = {}
+            elif known[0] != kind:
+                raise ValueError(f"Метрика {name} уже зарегистрирована как {known[0]}")
+
+            children = self._metrics[name]
+            metric = children.get(key)
+            if metric is None:
+                metric = children[key] = factory()
+            return metric
+
+
+def _fmt_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+    return "{" + inner + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Реестр процесса по умолчанию
+metrics = MetricsRegistry()
+
+__all__ = ["metrics", "MetricsRegistry", "Histogram", "Counter", "LATENCY_BUCKETS"]
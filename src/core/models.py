@@ -1,6 +1,10 @@
 from dataclasses import dataclass
+from decimal import Decimal, ROUND_CEILING, ROUND_DOWN, ROUND_FLOOR, ROUND_HALF_UP
 from enum import Enum
 from datetime import datetime
+from itertools import chain
+
+import numpy as np
 
 
 class SignalType(Enum):
@@ -33,6 +37,116 @@ class Candle:
         )
 
 
+class CandleFrame:
+    """
+    Свечи колонками (struct-of-arrays).
+    
+    Каждая колонка — непрерывный numpy-массив, timestamp — int64 в ms.
+    Срезы возвращают view без копирования; объекты Candle создаются
+    только при обращении по индексу или итерации.
+    """
+    
+    COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+    __slots__ = COLUMNS
+    
+    def __init__(
+        self,
+        timestamp: np.ndarray,
+        open: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray,
+    ):
+        self.timestamp = timestamp
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+    
+    @classmethod
+    def empty(cls) -> "CandleFrame":
+        """Пустой фрейм."""
+        return cls(np.empty(0, dtype=np.int64), *(np.empty(0) for _ in range(5)))
+    
+    @classmethod
+    def from_bybit(cls, raw: list[list[str]]) -> "CandleFrame":
+        """
+        Разобрать ответ Bybit get_kline одним проходом.
+        
+        Bybit возвращает строки [timestamp, open, high, low, close, volume, turnover]
+        от новых к старым — во фрейме они от старых к новым.
+        """
+        if not raw:
+            return cls.empty()
+        
+        width = len(raw[0])
+        flat = np.fromiter(chain.from_iterable(raw), dtype=np.float64, count=len(raw) * width)
+        # Переворот и транспонирование — одна копия, дальше колонки непрерывны
+        block = np.ascontiguousarray(flat.reshape(len(raw), width)[::-1, :6].T)
+        
+        return cls(block[0].astype(np.int64), block[1], block[2], block[3], block[4], block[5])
+    
+    @classmethod
+    def from_candles(cls, candles: list[Candle]) -> "CandleFrame":
+        """Собрать из списка Candle."""
+        n = len(candles)
+        return cls(
+            np.fromiter((round(c.timestamp.timestamp() * 1000) for c in candles), dtype=np.int64, count=n),
+            np.fromiter((c.open for c in candles), dtype=np.float64, count=n),
+            np.fromiter((c.high for c in candles), dtype=np.float64, count=n),
+            np.fromiter((c.low for c in candles), dtype=np.float64, count=n),
+            np.fromiter((c.close for c in candles), dtype=np.float64, count=n),
+            np.fromiter((c.volume for c in candles), dtype=np.float64, count=n),
+        )
+    
+    @classmethod
+    def from_columns(cls, columns: dict[str, np.ndarray]) -> "CandleFrame":
+        """Обернуть готовые колонки (без копирования)."""
+        return cls(*(columns[name] for name in cls.COLUMNS))
+    
+    def to_columns(self) -> dict[str, np.ndarray]:
+        """Колонки словарём."""
+        return {name: getattr(self, name) for name in self.COLUMNS}
+    
+    def to_candles(self) -> list[Candle]:
+        """Материализовать все свечи."""
+        return list(self)
+    
+    def candle(self, i: int) -> Candle:
+        """Одна свеча по индексу."""
+        return Candle(
+            timestamp=datetime.fromtimestamp(int(self.timestamp[i]) / 1000),
+            open=float(self.open[i]),
+            high=float(self.high[i]),
+            low=float(self.low[i]),
+            close=float(self.close[i]),
+            volume=float(self.volume[i]),
+        )
+    
+    def __len__(self) -> int:
+        return len(self.timestamp)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CandleFrame(*(getattr(self, name)[index] for name in self.COLUMNS))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("индекс вне фрейма")
+        return self.candle(index)
+    
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.candle(i)
+    
+    def __repr__(self) -> str:
+        if not len(self):
+            return "CandleFrame(0)"
+        return f"CandleFrame({len(self)}, {self.timestamp[0]}..{self.timestamp[-1]})"
+
+
 @dataclass
 class Ticker:
     """Текущая цена инструмента."""
@@ -51,6 +165,33 @@ class Order:
     side: str  # "Buy" или "Sell"
     qty: str
     status: str
+    avg_price: float = 0.0      # Средняя цена исполнения (из потока ордеров)
+    filled_qty: float = 0.0
+    link_id: str = ""           # orderLinkId — клиентский id ордера
+
+
+@dataclass
+class Execution:
+    """Исполнение (сделка) по ордеру — с реальной ценой и комиссией."""
+    exec_id: str
+    order_id: str
+    symbol: str
+    side: str  # "Buy" или "Sell"
+    price: float
+    qty: float
+    fee: float
+    ts_ms: int
+
+
+@dataclass
+class BookUpdate:
+    """Сообщение стакана: snapshot (весь стакан) или delta (изменённые уровни)."""
+    symbol: str
+    bids: list[tuple[float, float]]     # (цена, объём); объём 0 — уровень удалён
+    asks: list[tuple[float, float]]
+    update_id: int                      # Растёт на 1 с каждым сообщением
+    snapshot: bool = False
+    ts_ms: int = 0
 
 
 @dataclass
@@ -75,3 +216,57 @@ class Position:
     stop_loss: float | None = None
 
 
+@dataclass(frozen=True)
+class Instrument:
+    """
+    Ограничения инструмента: шаг лота, минимальный объём, шаг цены, плечо.
+    
+    Шаги хранятся как Decimal и сразу служат квантователями:
+    qty и цены округляются до допустимых значений без float-хвостов.
+    """
+    symbol: str
+    qty_step: Decimal
+    min_qty: Decimal
+    tick_size: Decimal
+    max_leverage: float
+    
+    def round_qty(self, qty: float) -> str:
+        """Округлить количество вниз до шага лота."""
+        return _snap(qty, self.qty_step, ROUND_DOWN)
+    
+    def round_price(self, price: float | str) -> str:
+        """Округлить цену до ближайшего шага цены."""
+        return _snap(price, self.tick_size, ROUND_HALF_UP)
+    
+    def round_distance(self, distance: float | str) -> str:
+        """Округлить расстояние (трейлинг-стоп) вниз до шага цены — стоп не дальше заданного."""
+        return _snap(distance, self.tick_size, ROUND_DOWN)
+    
+    def round_stop(self, price: float | str, side: str) -> str:
+        """
+        Округлить SL до шага цены в сторону позиции — стоп не слабее заданного.
+        
+        Args:
+            side: Сторона позиции: "Buy" — вверх, "Sell" — вниз
+        """
+        return _snap(price, self.tick_size, ROUND_CEILING if side == "Buy" else ROUND_FLOOR)
+    
+    @classmethod
+    def from_bybit(cls, data: dict) -> "Instrument":
+        """Парсинг из ответа Bybit get_instruments_info."""
+        lot = data.get("lotSizeFilter", {})
+        price = data.get("priceFilter", {})
+        leverage = data.get("leverageFilter", {})
+        return cls(
+            symbol=data["symbol"],
+            qty_step=Decimal(lot.get("qtyStep", "0.001")),
+            min_qty=Decimal(lot.get("minOrderQty", "0")),
+            tick_size=Decimal(price.get("tickSize", "0.01")),
+            max_leverage=float(leverage.get("maxLeverage", 1)),
+        )
+
+
+def _snap(value: float | str, step: Decimal, rounding: str) -> str:
+    """Кратное step, записанное с точностью step."""
+    steps = (Decimal(str(value)) / step).to_integral_value(rounding)
+    return str((steps * step).quantize(step))
@@ -0,0 +1,192 @@
+from bisect import bisect_left, insort
+
+from .models import BookUpdate
+
+
+class _BookSide:
+    """
+    Одна сторона стакана: объём по цене + отсортированные ключи.
+
+    Ключи хранятся так, чтобы лучшая цена была первой: у асков — цена,
+    у бидов — цена со знаком минус. Изменение уровня — dict + bisect,
+    проход от лучшей цены — по списку без сортировки.
+    """
+
+    __slots__ = ("_sign", "_sizes", "_keys")
+
+    def __init__(self, sign: int):
+        self._sign = sign
+        self._sizes: dict[float, float] = {}
+        self._keys: list[float] = []
+
+    def clear(self) -> None:
+        self._sizes.clear()
+        self._keys.clear()
+
+    def set(self, price: float, size: float) -> None:
+        """Выставить объём уровня (0 — удалить уровень)."""
+        key = price * self._sign
+        if size > 0:
+            if key not in self._sizes:
+                insort(self._keys, key)
+            self._sizes[key] = size
+        elif key in self._sizes:
+            del self._sizes[key]
+            del self._keys[bisect_left(self._keys, key)]
+
+    def best(self) -> float | None:
+        return self._keys[0] * self._sign if self._keys else None
+
+    def levels(self, depth: int | None = None) -> list[tuple[float, float]]:
+        """Уровни (цена, объём) от лучшей цены."""
+        keys = self._keys if depth is None else self._keys[:depth]
+        return [(key * self._sign, self._sizes[key]) for key in keys]
+
+    def volume(self, depth: int) -> float:
+        """Объём (в монетах) первых depth уровней."""
+        sizes = self._sizes
+        return sum(sizes[key] for key in self._keys[:depth])
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class OrderBook:
+    """
+    Локальный L2-стакан одного символа из snapshot + delta сообщений.
+
+    apply() проверяет непрерывность update_id: после пропуска стакан
+    помечается несинхронизированным и ждёт следующего snapshot (его даёт
+    переподписка). Запросы к несинхронизированному стакану возвращают None.
+
+    Стороны — как у ордера: "Buy" покупает по аскам, "Sell" продаёт по бидам.
+    Проскальзывание — в % от середины спреда (half-spread входит в цену).
+    """
+
+    __slots__ = ("symbol", "bids", "asks", "update_id", "ts_ms", "synced")
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = _BookSide(-1)
+        self.asks = _BookSide(1)
+        self.update_id = 0
+        self.ts_ms = 0
+        self.synced = False
+
+    # === Обновление ===
+
+    def apply(self, update: BookUpdate) -> bool:
+        """
+        Применить сообщение стакана.
+
+        Returns:
+            False — пропущено сообщение (или delta до первого snapshot):
+            стакан нужно пересинхронизировать
+        """
+        if update.snapshot:
+            self.bids.clear()
+            self.asks.clear()
+        elif not self.synced or update.update_id != self.update_id + 1:
+            self.synced = False
+            return False
+
+        for price, size in update.bids:
+            self.bids.set(price, size)
+        for price, size in update.asks:
+            self.asks.set(price, size)
+
+        self.update_id = update.update_id
+        self.ts_ms = update.ts_ms
+        self.synced = True
+        return True
+
+    def invalidate(self) -> None:
+        """Стакану больше нельзя верить (обрыв потока) — до следующего snapshot."""
+        self.synced = False
+
+    # === Запросы ===
+
+    @property
+    def best_bid(self) -> float | None:
+        return self.bids.best()
+
+    @property
+    def best_ask(self) -> float | None:
+        return self.asks.best()
+
+    @property
+    def mid(self) -> float | None:
+        """Середина спреда (None — стакан пуст с какой-то стороны или не синхронизирован)."""
+        bid, ask = self.bids.best(), self.asks.best()
+        if not self.synced or bid is None or ask is None:
+            return None
+        return (bid + ask) / 2
+
+    def fill_price(self, side: str, notional: float) -> float | None:
+        """
+        Средняя цена рыночного ордера на notional USDT.
+
+        Returns:
+            None — стакан не синхронизирован или его глубины не хватает
+        """
+        if not self.synced:
+            return None
+        remaining = notional
+        qty = 0.0
+        for price, size in self._book_side(side).levels():
+            cost = price * size
+            if cost >= remaining:
+                return notional / (qty + remaining / price)
+            remaining -= cost
+            qty += size
+        return None
+
+    def slippage(self, side: str, notional: float) -> float | None:
+        """Ожидаемое проскальзывание (%) рыночного ордера на notional USDT."""
+        mid = self.mid
+        price = self.fill_price(side, notional)
+        if mid is None or price is None:
+            return None
+        return abs(price - mid) / mid * 100
+
+    def max_notional(self, side: str, max_slippage: float) -> float | None:
+        """
+        Наибольший рыночный ордер (USDT), проскальзывание которого не выше max_slippage (%).
+
+        Returns:
+            None — стакан не синхронизирован; вся видимая глубина, если её не хватает
+        """
+        mid = self.mid
+        if mid is None:
+            return None
+        # Предельная средняя цена исполнения
+        sign = 1 if side == "Buy" else -1
+        limit = mid * (1 + sign * max_slippage / 100)
+
+        notional = 0.0
+        qty = 0.0
+        for price, size in self._book_side(side).levels():
+            if (price - limit) * sign > 0:
+                # Уровень хуже limit: берём столько, чтобы средняя цена дошла ровно до limit
+                extra = (limit * qty - notional) / (price - limit)
+                if extra < size:
+                    return notional + max(extra, 0.0) * price
+            notional += price * size
+            qty += size
+        return notional
+
+    def imbalance(self, depth: int = 5) -> float | None:
+        """
+        Перекос первых depth уровней: (биды − аски) / (биды + аски), от −1 до 1.
+
+        > 0 — покупателей больше.
+        """
+        if not self.synced:
+            return None
+        bids, asks = self.bids.volume(depth), self.asks.volume(depth)
+        total = bids + asks
+        return (bids - asks) / total if total else None
+
+    def _book_side(self, side: str) -> _BookSide:
+        """Сторона стакана, о которую исполняется ордер side."""
+        return self.asks if side == "Buy" else self.bids
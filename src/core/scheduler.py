@@ -0,0 +1,189 @@
+import heapq
+import itertools
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from .logger import logger
+from .metrics import MetricsRegistry, metrics as default_registry
+
+
+# callback(deadline) — deadline: плановое время запуска (unix, секунды)
+JobCallback = Callable[[float], None]
+
+# Backoff перестаёт расти после стольких удвоений (дальше всё равно max_backoff)
+MAX_BACKOFF_EXPONENT = 32
+
+
+@dataclass
+class ScheduledJob:
+    """Периодическая задача планировщика."""
+    name: str
+    interval: float                 # Период, с (можно < 1)
+    callback: JobCallback
+    offset: float = 0.0             # Сдвиг от границы сетки, с
+    next_run: float = 0.0           # Следующий дедлайн (unix)
+    runs: int = 0
+    missed: int = 0                 # Пропущенные дедлайны
+    overruns: int = 0               # Запусков дольше периода
+    errors: int = 0
+    failures: int = 0               # Ошибок подряд (для backoff)
+    last_duration: float = 0.0
+    _metrics: dict = field(default_factory=dict, repr=False)
+
+
+class TickScheduler:
+    """
+    Планировщик тиков по дедлайнам на сетке настенного времени.
+
+    - дедлайны кратны interval (+ offset): 5 с → :00, :05, :10...
+      Время работы тика не сдвигает расписание
+    - если тик затянулся и следующие дедлайны прошли, они считаются
+      пропущенными (missed), а задача встаёт на ближайший будущий
+    - тик дольше периода — overrun
+    - ошибка: повтор через экспоненциальный backoff со случайным
+      разбросом, после успеха — снова по сетке
+    - несколько задач со своими периодами (например, по символу)
+
+    Задачи выполняются по очереди в одном потоке.
+    """
+
+    def __init__(
+        self,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        jitter: float = 0.5,
+        registry: MetricsRegistry | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter            # Разброс backoff: ±jitter доля
+        self.registry = registry or default_registry
+        self.clock = clock
+
+        self.jobs: dict[str, ScheduledJob] = {}
+        self._queue: list[tuple[float, int, ScheduledJob]] = []
+        self._seq = itertools.count()
+        self._stop = threading.Event()
+
+    def add(
+        self,
+        name: str,
+        interval: float,
+        callback: JobCallback,
+        offset: float = 0.0,
+    ) -> ScheduledJob:
+        """
+        Добавить задачу.
+
+        Args:
+            name: Имя (для метрик и логов), например символ
+            interval: Период, с
+            callback: Вызывается с плановым временем запуска
+            offset: Сдвиг от границы сетки (разнести задачи с одним периодом)
+        """
+        if interval <= 0:
+            raise ValueError("interval должен быть > 0")
+        if name in self.jobs:
+            raise ValueError(f"Задача {name} уже есть")
+
+        job = ScheduledJob(name, interval, callback, offset % interval)
+        job.next_run = self._aligned(job, self.clock())
+        job._metrics = {
+            "lag": self.registry.histogram("scheduler_lag_seconds", "Опоздание запуска от дедлайна, с", job=name),
+            "duration": self.registry.histogram("scheduler_tick_seconds", "Время тика, с", job=name),
+            "missed": self.registry.counter("scheduler_missed_total", "Пропущенные дедлайны", job=name),
+            "overruns": self.registry.counter("scheduler_overruns_total", "Тики дольше периода", job=name),
+            "errors": self.registry.counter("scheduler_errors_total", "Ошибки тиков", job=name),
+        }
+        self.jobs[name] = job
+        self._push(job)
+        return job
+
+    def run(self) -> None:
+        """Крутить задачи до stop() (KeyboardInterrupt пробрасывается)."""
+        self._stop.clear()
+        while not self._stop.is_set():
+            delay = self.run_pending()
+            if delay > 0:
+                self._stop.wait(delay)
+
+    def stop(self) -> None:
+        """Остановить run() (можно из другого потока)."""
+        self._stop.set()
+
+    def run_pending(self) -> float:
+        """
+        Выполнить задачи, чей дедлайн наступил.
+
+        Returns:
+            Секунд до следующего дедлайна
+        """
+        while self._queue:
+            deadline, _, job = self._queue[0]
+            now = self.clock()
+            if deadline > now:
+                return deadline - now
+
+            heapq.heappop(self._queue)
+            self._run(job, deadline, now)
+            self._push(job)
+        return 0.0
+
+    # === Внутреннее ===
+
+    def _run(self, job: ScheduledJob, deadline: float, started: float) -> None:
+        job._metrics["lag"].observe(started - deadline)
+
+        try:
+            job.callback(deadline)
+        except Exception as e:
+            finished = self.clock()
+            job.errors += 1
+            job.failures += 1
+            job._metrics["errors"].inc()
+            delay = self._backoff(job.failures)
+            job.next_run = finished + delay
+            logger.error(f"{job.name}: {e} — повтор через {delay:.1f}с")
+            return
+        finally:
+            job.runs += 1
+            job.last_duration = self.clock() - started
+            job._metrics["duration"].observe(job.last_duration)
+
+        job.failures = 0
+        finished = self.clock()
+
+        if job.last_duration > job.interval:
+            job.overruns += 1
+            job._metrics["overruns"].inc()
+
+        # Следующий дедлайн по сетке (эпсилон — от погрешности float);
+        # прошедшие — пропущены
+        next_run = self._aligned(job, deadline + job.interval * 1e-3)
+        if next_run <= finished:
+            upcoming = self._aligned(job, finished)
+            skipped = round((upcoming - next_run) / job.interval)
+            job.missed += skipped
+            job._metrics["missed"].inc(skipped)
+            next_run = upcoming
+        job.next_run = next_run
+
+    def _aligned(self, job: ScheduledJob, after: float) -> float:
+        """Ближайший дедлайн сетки строго после after."""
+        k = math.floor((after - job.offset) / job.interval) + 1
+        return k * job.interval + job.offset
+
+    def _backoff(self, failures: int) -> float:
+        # Показатель ограничен: 2 ** 1024 уже не влезает во float
+        # (задача, падающая сутками, уронила бы планировщик)
+        exponent = min(failures - 1, MAX_BACKOFF_EXPONENT)
+        delay = min(self.max_backoff, self.base_backoff * 2 ** exponent)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _push(self, job: ScheduledJob) -> None:
+        heapq.heappush(self._queue, (job.next_run, next(self._seq), job))
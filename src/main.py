@@ -2,8 +2,14 @@ import time
 import sys
 sys.path.insert(0, str(__file__).rsplit("/", 1)[0])
 
-from core import settings, BybitClient, logger
-from services import Fetcher, Trader, Strategy, StrategyConfig
+from core import (
+    settings, BybitClient, InstrumentedClient, RateLimitedClient, SimulatedMarket, TickScheduler,
+    logger, metrics,
+)
+from services import (
+    Fetcher, Trader, Strategy, StrategyConfig, TickResult, Action, CandleStore, CandleAggregator, InstrumentCache,
+    Scanner, AnalyzerConfig, StateStore, PositionCache, OrderBookCache,
+)
 
 
 def main():
@@ -12,16 +18,31 @@ def main():
         logger.error("Установи BYBIT_API_KEY и BYBIT_API_SECRET в .env")
         return
     
-    # Инициализация клиента
-    client = BybitClient(
+    # Инициализация клиента (запросы — через планировщик лимитов,
+    # время каждого запроса — в метрики)
+    client = RateLimitedClient(InstrumentedClient(BybitClient(
         api_key=settings.api_key,
         api_secret=settings.api_secret,
         testnet=settings.testnet,
-    )
+    )))
+    
+    # Paper trading: ордера исполняет локальная биржа по живым ценам
+    paper = False
+    if paper:
+        market = SimulatedMarket(source=client)
+        client = market.account("paper")
     
     # Сервисы
-    fetcher = Fetcher(client)
-    trader = Trader(client)
+    # Свечи: с диска, а в режиме потока — собираются из сделок в памяти
+    fetcher = Fetcher(client, store=CandleStore(client, "data/candles"), aggregator=CandleAggregator())
+    instruments = InstrumentCache(client)
+    instruments.load()
+    # Позиции и исполнения — из приватного потока, REST только на ресинхронизации
+    positions = PositionCache(client).start()
+    positions.on_fill(lambda e: logger.info(f"Исполнено: {e.side} {e.qty:g} {e.symbol} @ {e.price} (комиссия {e.fee:.4f})"))
+    # Стакан — публичные данные: в paper тоже с биржи
+    books = OrderBookCache(market.source if paper else client)
+    trader = Trader(client, instruments, positions, books)
     
     # Конфиг стратегии
     config = StrategyConfig(
@@ -32,6 +53,8 @@ def main():
         # Вход
         entry_spike_percent=0.3,    # 0.3% скачок
         spikes_to_enter=2,          # 2 подряд
+        spike_volatility=0.0,       # >0 — порог в σ изменений цены (например 3), вместо 0.3%
+        volatility_window=100,
         
         # Stop Loss
         initial_sl_percent=0.3,
@@ -47,6 +70,14 @@ def main():
         guaranteed_trigger=10.0,
         guaranteed_min=5.0,
         
+        # Стакан: урезать вход, чтобы проскальзывание не съело скачок
+        max_slippage_percent=0.0,   # 0 — не проверять (например 0.1 при скачке 0.3%)
+        
+        # Отправка SL на биржу
+        native_trailing=False,      # True — трейлинг ведёт Bybit
+        sl_min_ticks=0,             # Мелкие сдвиги SL придерживать...
+        sl_min_interval=0.0,        # ...не дольше стольких секунд
+        
         # Лимиты
         cooldown_minutes=15,
         max_losses_per_day=3,
@@ -54,8 +85,15 @@ def main():
         # ⚠️ DRY RUN MODE - БЕЗ РЕАЛЬНЫХ СДЕЛОК
         dry_run=True,
     )
+    if paper:
+        config.dry_run = False  # Сделки уходят в симулятор
+    if config.max_slippage_percent:
+        books.add([config.symbol])
     
-    strategy = Strategy(trader, fetcher, config)
+    # Состояние сделки переживает рестарт; окно цен — из последних свечей
+    store = StateStore(f"data/state/{config.symbol}{'.paper' if paper else ''}.json")
+    strategy = Strategy(trader, fetcher, config, store)
+    strategy.enable_tick_metrics(metrics.histogram("strategy_tick_seconds", "Время on_price(), с"))
     
     logger.info("=" * 50)
     logger.info("🤖 TRADING BOT STARTED")
@@ -67,40 +105,123 @@ def main():
     logger.info(f"Cooldown: {config.cooldown_minutes} min | Max losses: {config.max_losses_per_day}/day")
     logger.info(f"Testnet: {settings.testnet}")
     logger.info(f"⚠️  DRY RUN: {config.dry_run} (no real trades)")
+    logger.info(f"Paper trading: {paper}")
     logger.info("=" * 50)
     
-    tick_interval = 5  # секунд между проверками
-    
-    while True:
-        try:
-            # Один тик стратегии
-            result = strategy.tick()
-            
-            # Логируем
-            action = result["action"]
-            price = result["price"]
-            details = result["details"]
-            
-            if action == "none":
-                logger.debug(f"${price:.2f} | {details}")
-            elif action == "blocked":
-                logger.warning(f"${price:.2f} | BLOCKED: {details}")
-            elif action in ("enter_long", "enter_short"):
-                logger.info(f"${price:.2f} | 🚀 {action.upper()}: {details}")
-            elif action == "update_sl":
-                logger.info(f"${price:.2f} | 📊 {details}")
-            elif action == "close":
-                logger.info(f"${price:.2f} | 🔴 CLOSED: {details}")
-            
-            time.sleep(tick_interval)
-            
-        except KeyboardInterrupt:
-            logger.info("Bot stopped by user")
-            break
-        except Exception as e:
-            logger.error(f"Error: {e}")
-            time.sleep(10)
+    tick_interval = 5  # секунд между проверками (режим опроса; можно < 1)
+    use_stream = True  # True = цены через WebSocket, False = REST опрос
+    scan_only = False  # True = только сканер всех пар (без торговли)
+    metrics_port = 9108  # /metrics в формате Prometheus (None = не отдавать)
+    
+    if metrics_port:
+        metrics.serve(metrics_port)
+    
+    candles = None
+    try:
+        if scan_only:
+            scanner = Scanner(client, AnalyzerConfig(
+                spike_percent=config.entry_spike_percent,
+                spikes_to_enter=config.spikes_to_enter,
+                spike_volatility=config.spike_volatility,
+                volatility_window=config.volatility_window,
+            ))
+            run_scanner(scanner, tick_interval)
+        elif use_stream:
+            if paper:
+                market.follow([config.symbol])
+            candles = fetcher.track([config.symbol])
+            strategy.warm_start()
+            run_stream(strategy, fetcher, config.symbol)
+        else:
+            strategy.warm_start()
+            run_polling(strategy, fetcher, config.symbol, tick_interval)
+    finally:
+        if candles is not None:
+            candles.stop()
+        positions.stop()
+        books.stop()
+        metrics.stop()
+        metrics.dump("logs/metrics.prom")
+        if paper:
+            logger.info(
+                f"Paper: баланс {client.balance:.2f} USDT, PnL {client.realized_pnl:+.2f}, "
+                f"комиссии {client.fees:.2f}, сделок {len(client.fills)}"
+            )
 
 
+def log_result(strategy: Strategy, result: TickResult):
+    """Залогировать результат тика (строка собирается только здесь)."""
+    action = result.action
+    price = result.price
+    details = strategy.describe(result)
+    
+    if action is Action.NONE:
+        logger.debug(f"${price:.2f} | {details}")
+    elif action is Action.BLOCKED:
+        logger.warning(f"${price:.2f} | BLOCKED: {details}")
+    elif action in (Action.ENTER_LONG, Action.ENTER_SHORT):
+        logger.info(f"${price:.2f} | 🚀 {action.value.upper()}: {details}")
+    elif action is Action.UPDATE_SL:
+        logger.info(f"${price:.2f} | 📊 {details}")
+    elif action is Action.CLOSE:
+        logger.info(f"${price:.2f} | 🔴 CLOSED: {details}")
+
+
+def run_stream(strategy: Strategy, fetcher: Fetcher, symbol: str):
+    """Цены приходят из WebSocket — тик на каждое обновление."""
+    def on_price(_symbol: str, price: float, ts: int):
+        log_result(strategy, strategy.on_price(price, ts / 1000))
+    
+    stream = fetcher.stream_prices([symbol], on_price)
+    
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        logger.info("Bot stopped by user")
+    finally:
+        stream.stop()
+
+
+def run_polling(strategy: Strategy, fetcher: Fetcher, symbol: str, tick_interval: float):
+    """Опрос цены через REST по сетке каждые tick_interval секунд."""
+    scheduler = TickScheduler()
+    
+    def tick(deadline: float):
+        price = fetcher.get_current_price(symbol)
+        log_result(strategy, strategy.on_price(price, time.time()))
+    
+    scheduler.add(symbol, tick_interval, tick)
+    run_scheduler(scheduler, "Bot")
+
+
+def run_scanner(scanner: Scanner, interval: float, top: int = 10):
+    """Все пары одним запросом каждые interval секунд; лучшие кандидаты — в лог."""
+    scheduler = TickScheduler()
+    
+    def scan(deadline: float):
+        for candidate in scanner.poll(limit=top):
+            logger.info(
+                f"🔎 {candidate.symbol} {candidate.type.value.upper()} "
+                f"{candidate.change_percent:+.2f}% @ {candidate.price}"
+            )
+    
+    scheduler.add("scanner", interval, scan)
+    run_scheduler(scheduler, "Scanner")
+
+
+def run_scheduler(scheduler: TickScheduler, name: str):
+    """Крутить планировщик до Ctrl+C (ошибки тиков — backoff внутри)."""
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        logger.info(f"{name} stopped by user")
+    
+    for job in scheduler.jobs.values():
+        logger.info(
+            f"{job.name}: {job.runs} тиков, пропущено {job.missed}, "
+            f"overrun {job.overruns}, ошибок {job.errors}"
+        )
+
 if __name__ == "__main__":
     main()
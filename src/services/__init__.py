@@ -1,4 +1,15 @@
+from .candle_store import CandleStore
+from .candle_aggregator import CandleAggregator
 from .fetcher import Fetcher
-from .analyzer import Analyzer, AnalyzerConfig
-from .trader import Trader
-from .strategy import Strategy, StrategyConfig, TradeState
+from .analyzer import Analyzer, AnalyzerConfig, BatchSignals, SpikeDetector
+from .scanner import Scanner, ScanCandidate
+from .instruments import InstrumentCache
+from .positions import PositionCache
+from .orderbook import OrderBookCache
+from .trader import Trader, AsyncTrader
+from .state_store import StateStore
+from .stop_loss import StopLossCoalescer
+from .strategy import Strategy, StrategyConfig, TradeState, TickResult, Action, Reason
+from .supervisor import Supervisor, ShardWorker, WorkerLoad, plan_rebalance
+from .backtest import Backtester, BacktestResult, BacktestStats, BacktestTrade
+from .optimizer import Optimizer, OptimizerResult
@@ -1,12 +1,64 @@
+import math
 from dataclasses import dataclass
+
+import numpy as np
+
+from core.buffers import RingBuffer
+from core.indicators import RollingStd, rolling_std
 from core.models import Signal, SignalType
 
 
+# Коды сигналов в пакетных массивах
+SIGNAL_CODES = {1: SignalType.LONG, -1: SignalType.SHORT, 0: SignalType.NONE}
+
+
 @dataclass
 class AnalyzerConfig:
-    """Конфигурация анализатора."""
+    """
+    Конфигурация анализатора.
+    
+    spike_volatility > 0 — порог скачка не фиксированный, а в σ: столько
+    стандартных отклонений изменений цены (%) за предыдущие volatility_window
+    изменений. spike_percent тогда не используется; при σ = 0 скачков нет.
+    """
     spike_percent: float = 0.5   # Порог скачка для входа (%)
     spikes_to_enter: int = 2     # Кол-во скачков для подтверждения
+    spike_volatility: float = 0.0    # Порог = N σ изменений цены (0 — spike_percent)
+    volatility_window: int = 100     # По скольким изменениям считать σ
+    
+    @property
+    def history(self) -> int:
+        """Сколько цен нужно для сигнала."""
+        required = self.spikes_to_enter + 1
+        if self.spike_volatility:
+            required += self.volatility_window
+        return required
+    
+    @property
+    def spike_label(self) -> str:
+        """Порог для логов: "0.3%" или "3σ"."""
+        if self.spike_volatility:
+            return f"{self.spike_volatility:g}σ"
+        return f"{self.spike_percent}%"
+
+
+@dataclass
+class BatchSignals:
+    """Сигналы по многим символам сразу (массивы одной длины)."""
+    symbols: list[str] | np.ndarray     # Метки символов (строки prices)
+    types: np.ndarray       # int8: 1 — LONG, -1 — SHORT, 0 — нет (SIGNAL_CODES)
+    spikes: np.ndarray      # Кол-во скачков — как Analyzer.detect()
+    prices: np.ndarray      # Последняя цена
+    
+    def __len__(self) -> int:
+        return len(self.types)
+    
+    def signal_type(self, i: int) -> SignalType:
+        return SIGNAL_CODES[int(self.types[i])]
+    
+    def hits(self) -> np.ndarray:
+        """Индексы символов с сигналом."""
+        return np.flatnonzero(self.types)
 
 
 class Analyzer:
@@ -20,64 +72,162 @@ class Analyzer:
     def __init__(self, config: AnalyzerConfig | None = None):
         self.config = config or AnalyzerConfig()
     
-    def check_entry(self, prices: list[float], symbol: str = "BTCUSDT") -> Signal:
+    def detect(self, prices: list[float]) -> tuple[SignalType, int]:
         """
-        Проверить условия для входа в позицию.
+        Быстрая проверка сигнала без построения Signal и строк.
         
         Args:
-            prices: Список последних цен (минимум spikes_to_enter + 1)
-            symbol: Торговая пара
+            prices: Список последних цен
         
         Returns:
-            Signal (LONG / SHORT / NONE)
+            (тип сигнала, кол-во скачков подряд)
         """
-        required = self.config.spikes_to_enter + 1
+        if self.config.spike_volatility:
+            return self._detect_volatility(prices)
         
+        required = self.config.spikes_to_enter + 1
         if len(prices) < required:
-            return Signal(
-                type=SignalType.NONE,
-                symbol=symbol,
-                price=prices[-1] if prices else 0,
-                reason=f"Недостаточно данных (нужно {required})"
-            )
+            return SignalType.NONE, 0
         
-        # Берём последние N+1 цен
-        recent = prices[-required:]
+        spike = self.config.spike_percent
         
-        # Считаем скачки
+        # Считаем скачки по последним N+1 ценам
         up_spikes = 0
         down_spikes = 0
+        prev = prices[-required]
         
-        for i in range(1, len(recent)):
-            change = ((recent[i] - recent[i-1]) / recent[i-1]) * 100
+        for i in range(len(prices) - required + 1, len(prices)):
+            price = prices[i]
+            change = ((price - prev) / prev) * 100
+            prev = price
             
-            if change >= self.config.spike_percent:
+            if change >= spike:
                 up_spikes += 1
                 down_spikes = 0  # Сбрасываем противоположный
-            elif change <= -self.config.spike_percent:
+            elif change <= -spike:
                 down_spikes += 1
                 up_spikes = 0
             else:
                 up_spikes = 0
                 down_spikes = 0
         
-        current_price = recent[-1]
-        
-        # Проверяем сигнал
         if up_spikes >= self.config.spikes_to_enter:
+            return SignalType.LONG, up_spikes
+        if down_spikes >= self.config.spikes_to_enter:
+            return SignalType.SHORT, down_spikes
+        return SignalType.NONE, 0
+    
+    def _detect_volatility(self, prices: list[float]) -> tuple[SignalType, int]:
+        """detect() с порогом в σ: последние k изменений — каждое за своим порогом."""
+        config = self.config
+        if len(prices) < config.history:
+            return SignalType.NONE, 0
+        
+        k = config.spikes_to_enter
+        window = np.asarray(prices[-config.history:], dtype=np.float64)
+        change = (window[1:] - window[:-1]) / window[:-1] * 100
+        # Порог k-го с конца изменения — σ предыдущих volatility_window изменений
+        threshold = config.spike_volatility * rolling_std(change[:-1], config.volatility_window)[-k:]
+        threshold[~(threshold > 0)] = np.inf
+        recent = change[-k:]
+        
+        if (recent >= threshold).all():
+            return SignalType.LONG, k
+        if (recent <= -threshold).all():
+            return SignalType.SHORT, k
+        return SignalType.NONE, 0
+    
+    def detect_batch(self, prices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        detect() для матрицы историй цен без цикла по символам.
+        
+        Args:
+            prices: (символы × окно), по строке — цены от старых к новым;
+                    NaN — нет цены (как разрыв: сигнала нет)
+        
+        Returns:
+            (типы int8 — см. SIGNAL_CODES, кол-во скачков)
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        n = len(prices)
+        k = self.config.spikes_to_enter
+        required = self.config.history
+        
+        if prices.ndim != 2 or prices.shape[1] < required:
+            return np.zeros(n, dtype=np.int8), np.zeros(n, dtype=np.int64)
+        
+        recent = prices[:, -required:]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            change = ((recent[:, 1:] - recent[:, :-1]) / recent[:, :-1]) * 100
+            if self.config.spike_volatility:
+                window = self.config.volatility_window
+                spike = self.config.spike_volatility * rolling_std(change[:, :-1], window)[:, -k:]
+                spike[~(spike > 0)] = np.inf
+                change = change[:, -k:]
+            else:
+                spike = self.config.spike_percent
+            # Серия ≥ k из k изменений = все k изменений — скачки в одну сторону
+            up = (change >= spike).all(axis=1)
+            down = (change <= -spike).all(axis=1) & ~up
+        
+        types = up.astype(np.int8) - down.astype(np.int8)
+        spikes = np.where(types != 0, k, 0)
+        return types, spikes
+    
+    def check_entry_batch(self, prices: np.ndarray, symbols: list[str] | np.ndarray) -> BatchSignals:
+        """
+        Пакетный check_entry: многие символы за один проход.
+        
+        Args:
+            prices: (символы × окно), по строке — цены от старых к новым
+            symbols: Метки строк
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        if len(symbols) != len(prices):
+            raise ValueError("symbols и prices разной длины")
+        
+        types, spikes = self.detect_batch(prices)
+        last = prices[:, -1] if prices.ndim == 2 and prices.shape[1] else np.zeros(len(prices))
+        return BatchSignals(symbols, types, spikes, last)
+    
+    def check_entry(self, prices: list[float], symbol: str = "BTCUSDT") -> Signal:
+        """
+        Проверить условия для входа в позицию.
+        
+        Args:
+            prices: Список последних цен (минимум spikes_to_enter + 1)
+            symbol: Торговая пара
+        
+        Returns:
+            Signal (LONG / SHORT / NONE)
+        """
+        required = self.config.history
+        
+        if len(prices) < required:
+            return Signal(
+                type=SignalType.NONE,
+                symbol=symbol,
+                price=prices[-1] if prices else 0,
+                reason=f"Недостаточно данных (нужно {required})"
+            )
+        
+        signal_type, spikes = self.detect(prices)
+        current_price = prices[-1]
+        
+        if signal_type == SignalType.LONG:
             return Signal(
                 type=SignalType.LONG,
                 symbol=symbol,
                 price=current_price,
-                reason=f"Momentum LONG: {up_spikes} скачков ≥{self.config.spike_percent}%"
+                reason=f"Momentum LONG: {spikes} скачков ≥{self.config.spike_label}"
             )
         
-        if down_spikes >= self.config.spikes_to_enter:
+        if signal_type == SignalType.SHORT:
             return Signal(
                 type=SignalType.SHORT,
                 symbol=symbol,
                 price=current_price,
-                reason=f"Momentum SHORT: {down_spikes} скачков ≥{self.config.spike_percent}%"
+                reason=f"Momentum SHORT: {spikes} скачков ≥{self.config.spike_label}"
             )
         
         return Signal(
@@ -86,3 +236,141 @@ class Analyzer:
             price=current_price,
             reason="Нет сигнала"
         )
+
+
+class SpikeDetector:
+    """
+    Потоковый анализатор скачков.
+    
+    То же правило, что Analyzer.check_entry, но O(1) на каждую цену:
+    вместо пересчёта окна держим длину текущей серии скачков вверх/вниз.
+    Сигнал есть, когда последние spikes_to_enter изменений — скачки
+    в одну сторону, то есть серия ≥ spikes_to_enter.
+    
+    Порог в σ (spike_volatility) — по RollingStd изменений, тоже O(1).
+    """
+    
+    def __init__(
+        self,
+        config: AnalyzerConfig | None = None,
+        prices: RingBuffer | None = None,
+        capacity: int = 20,
+    ):
+        self.config = config or AnalyzerConfig()
+        self._required = self.config.spikes_to_enter + 1
+        
+        # Окно цен должно вмещать хотя бы N+1 цену
+        if prices is None:
+            prices = RingBuffer(max(capacity, self._required))
+        elif prices.capacity < self._required:
+            raise ValueError(f"Буфер цен меньше {self._required}")
+        self.prices = prices
+        
+        # σ изменений цены (%) — для порога в σ
+        self.volatility = RollingStd(self.config.volatility_window) if self.config.spike_volatility else None
+        
+        self.up_run = 0      # Скачков вверх подряд
+        self.down_run = 0    # Скачков вниз подряд
+        self._rebuild()
+    
+    @property
+    def ready(self) -> bool:
+        """Достаточно ли цен для сигнала."""
+        if self.volatility is not None and not self.volatility.ready:
+            return False
+        return len(self.prices) >= self._required
+    
+    def update(self, price: float) -> tuple[SignalType, int]:
+        """
+        Добавить цену.
+        
+        Returns:
+            (тип сигнала, кол-во скачков) — как Analyzer.detect() по тому же окну
+        """
+        if len(self.prices):
+            prev = self.prices.last()
+            self._count(((price - prev) / prev) * 100)
+        self.prices.append(price)
+        return self.signal()
+    
+    def signal(self) -> tuple[SignalType, int]:
+        """Текущий сигнал без добавления цены."""
+        if len(self.prices) < self._required:
+            return SignalType.NONE, 0
+        
+        spikes = self.config.spikes_to_enter
+        if self.up_run >= spikes:
+            return SignalType.LONG, spikes
+        if self.down_run >= spikes:
+            return SignalType.SHORT, spikes
+        return SignalType.NONE, 0
+    
+    def check(self, symbol: str = "BTCUSDT") -> Signal:
+        """Текущий сигнал в формате Analyzer.check_entry()."""
+        signal_type, spikes = self.signal()
+        price = self.prices.last() if len(self.prices) else 0
+        
+        if not self.ready:
+            reason = f"Недостаточно данных (нужно {self._required})"
+        elif signal_type == SignalType.LONG:
+            reason = f"Momentum LONG: {spikes} скачков ≥{self.config.spike_label}"
+        elif signal_type == SignalType.SHORT:
+            reason = f"Momentum SHORT: {spikes} скачков ≥{self.config.spike_label}"
+        else:
+            reason = "Нет сигнала"
+        
+        return Signal(type=signal_type, symbol=symbol, price=price, reason=reason)
+    
+    def seed(self, prices) -> None:
+        """
+        Заполнить окно готовыми ценами (например, закрытиями свечей после рестарта).
+        
+        В окне остаются последние capacity цен; счётчики серий (и σ для
+        порога в σ — по всем ценам) — как если бы цены пришли потоком.
+        """
+        prices = list(prices)
+        if self.volatility is None:
+            prices = prices[-self.prices.capacity:]
+        self.reset()
+        for price in prices:
+            self.update(float(price))
+    
+    def reset(self) -> None:
+        """Очистить окно и счётчики."""
+        self.prices.clear()
+        self.up_run = 0
+        self.down_run = 0
+        if self.volatility is not None:
+            self.volatility.reset()
+    
+    def _count(self, change: float) -> None:
+        """Обновить счётчики серий по одному изменению (%)."""
+        spike = self.config.spike_percent
+        volatility = self.volatility
+        if volatility is not None:
+            # σ — по изменениям до этого: скачок не поднимает собственный порог.
+            # Пока σ нет (NaN), сравнения ложны; σ = 0 — скачков нет
+            spike = self.config.spike_volatility * volatility.value or math.inf
+            volatility.update(change)
+        
+        if change >= spike:
+            self.up_run += 1
+            self.down_run = 0
+        elif change <= -spike:
+            self.down_run += 1
+            self.up_run = 0
+        else:
+            self.up_run = 0
+            self.down_run = 0
+    
+    def _rebuild(self) -> None:
+        """Пересчитать счётчики по ценам, уже лежащим в буфере."""
+        self.up_run = 0
+        self.down_run = 0
+        if self.volatility is not None:
+            self.volatility.reset()
+        prev = None
+        for price in self.prices:
+            if prev is not None:
+                self._count(((price - prev) / prev) * 100)
+            prev = price
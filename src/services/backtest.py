@@ -0,0 +1,360 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from core.indicators import rolling_std
+from core.models import Candle, CandleFrame
+from .strategy import StrategyConfig, next_midnight
+
+
+OHLCV_COLUMNS = CandleFrame.COLUMNS
+
+
+@dataclass
+class BacktestTrade:
+    """Сделка в бэктесте."""
+    side: str                   # "long" / "short"
+    entry_index: int
+    exit_index: int
+    entry_ts: int               # ms
+    exit_ts: int                # ms
+    entry_price: float
+    exit_price: float
+    profit_percent: float
+    pnl_usdt: float
+
+
+@dataclass
+class BacktestStats:
+    """Итоговая статистика."""
+    trades: int = 0
+    wins: int = 0
+    losses: int = 0
+    win_rate: float = 0.0           # %
+    total_pnl: float = 0.0          # USDT
+    avg_profit_percent: float = 0.0
+    max_drawdown: float = 0.0       # USDT от пика
+    profit_factor: float = 0.0
+
+
+@dataclass
+class BacktestResult:
+    """Результат бэктеста."""
+    trades: list[BacktestTrade]
+    stats: BacktestStats
+    equity: np.ndarray                      # Накопленный PnL после каждой сделки
+    open_trade: BacktestTrade | None = None  # Позиция, не закрытая к концу данных
+    config: StrategyConfig = field(default_factory=StrategyConfig)
+
+
+class Backtester:
+    """
+    Бэктест стратегии на исторических свечах.
+
+    Та же логика, что в Strategy.on_price(), тиком считается close свечи:
+    - вход: сигналы Analyzer считаются векторно по всему ряду
+    - выход: для каждой сделки SL/trailing/breakeven/гарантия считаются
+      массивами (accumulate по окну после входа), а не тик за тиком
+    - cooldown и дневной лимит убытков — между сделками
+
+    Дни для лимита убытков — как у Strategy: до локальной полуночи.
+    """
+
+    def __init__(self, config: StrategyConfig | None = None, fee_percent: float = 0.0):
+        self.config = config or StrategyConfig()
+        self.fee_percent = fee_percent   # Комиссия за сторону (% от объёма)
+
+    # === Входные данные ===
+
+    def run_candles(self, candles: CandleFrame | list[Candle]) -> BacktestResult:
+        """Прогнать свечи (например, из Fetcher.get_candles или load_ohlcv)."""
+        if not isinstance(candles, CandleFrame):
+            candles = CandleFrame.from_candles(candles)
+        return self.run(candles.timestamp, candles.close)
+
+    def run(self, timestamps: np.ndarray, closes: np.ndarray) -> BacktestResult:
+        """
+        Прогнать ряд цен.
+
+        Args:
+            timestamps: Время свечей (ms, int64), по возрастанию
+            closes: Цены закрытия
+        """
+        ts = np.ascontiguousarray(timestamps, dtype=np.int64)
+        close = np.ascontiguousarray(closes, dtype=np.float64)
+        if ts.shape != close.shape:
+            raise ValueError("timestamps и closes разной длины")
+
+        cfg = self.config
+        long_sig, short_sig = self.entry_signals(close)
+        signal_idx = np.flatnonzero(long_sig | short_sig)
+
+        cooldown_ms = cfg.cooldown_minutes * 60_000
+        last_loss_ts: int | None = None
+        losses_today = 0
+        loss_day_end = 0
+
+        trades: list[BacktestTrade] = []
+        open_trade = None
+        i = 0
+
+        while True:
+            p = np.searchsorted(signal_idx, i)
+            if p >= len(signal_idx):
+                break
+            j = int(signal_idx[p])
+            now = int(ts[j])
+
+            # Блокировки — как Strategy._is_blocked()
+            if now >= loss_day_end:
+                losses_today = 0
+                loss_day_end = int(next_midnight(now / 1000) * 1000)
+
+            if losses_today >= cfg.max_losses_per_day:
+                i = int(np.searchsorted(ts, loss_day_end))
+                continue
+
+            if last_loss_ts is not None and now < last_loss_ts + cooldown_ms:
+                i = int(np.searchsorted(ts, last_loss_ts + cooldown_ms))
+                continue
+
+            side = "long" if long_sig[j] else "short"
+            x = self._find_exit(close, j, side)
+
+            if x is None:
+                open_trade = self._make_trade(ts, close, j, len(close) - 1, side)
+                break
+
+            trade = self._make_trade(ts, close, j, x, side)
+            trades.append(trade)
+
+            if trade.profit_percent < 0:
+                losses_today += 1
+                last_loss_ts = int(ts[x])
+
+            i = x + 1
+
+        equity = np.cumsum([t.pnl_usdt for t in trades], dtype=np.float64)
+        return BacktestResult(
+            trades=trades,
+            stats=self._stats(trades, equity),
+            equity=equity,
+            open_trade=open_trade,
+            config=cfg,
+        )
+
+    # === Вход ===
+
+    def entry_signals(self, close: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Сигналы входа на каждом баре (как Analyzer.check_entry по истории).
+
+        Returns:
+            (long, short) — булевы массивы длины len(close)
+        """
+        n = len(close)
+        cfg = self.config
+        k = cfg.spikes_to_enter
+
+        long_sig = np.zeros(n, dtype=bool)
+        short_sig = np.zeros(n, dtype=bool)
+        if n <= k:
+            return long_sig, short_sig
+
+        change = ((close[1:] - close[:-1]) / close[:-1]) * 100
+
+        if cfg.spike_volatility:
+            # Порог изменения i — σ предыдущих volatility_window изменений
+            spike = np.full(len(change), np.inf)
+            spike[1:] = cfg.spike_volatility * rolling_std(change[:-1], cfg.volatility_window)
+            spike[~(spike > 0)] = np.inf
+        else:
+            spike = cfg.entry_spike_percent
+
+        # Сигнал на баре j: все k изменений, приведших к j, — скачки в одну сторону
+        up = np.concatenate(([0], np.cumsum(change >= spike)))
+        down = np.concatenate(([0], np.cumsum(change <= -spike)))
+        long_sig[k:] = (up[k:] - up[:-k]) == k
+        short_sig[k:] = (down[k:] - down[:-k]) == k
+
+        # LONG проверяется первым (как в Analyzer)
+        short_sig &= ~long_sig
+        return long_sig, short_sig
+
+    # === Выход ===
+
+    def _find_exit(self, close: np.ndarray, entry: int, side: str) -> int | None:
+        """
+        Найти бар, на котором сработает SL.
+
+        Окно после входа просматривается кусками растущего размера:
+        короткие сделки не трогают весь хвост массива.
+        """
+        cfg = self.config
+        price = float(close[entry])
+        offset = price * (cfg.initial_sl_percent / 100)
+        is_long = side == "long"
+
+        sl = price - offset if is_long else price + offset
+        extreme = price
+        start = entry + 1
+        size = 64
+
+        while start < len(close):
+            seg = close[start:start + size]
+            hit, sl, extreme = self._scan_segment(seg, price, sl, extreme, is_long)
+            if hit >= 0:
+                return start + hit
+            start += len(seg)
+            size *= 2
+
+        return None
+
+    def _scan_segment(
+        self,
+        seg: np.ndarray,
+        entry: float,
+        sl: float,
+        extreme: float,
+        is_long: bool,
+    ) -> tuple[int, float, float]:
+        """
+        Один кусок цен после входа.
+
+        Returns:
+            (индекс срабатывания SL или -1, SL в конце куска, max/min в конце куска)
+        """
+        cfg = self.config
+
+        if is_long:
+            ext = np.maximum(np.maximum.accumulate(seg), extreme)
+            profit = ((seg - entry) / entry) * 100
+            max_profit = ((ext - entry) / entry) * 100
+        else:
+            ext = np.minimum(np.minimum.accumulate(seg), extreme)
+            profit = ((entry - seg) / entry) * 100
+            max_profit = ((entry - ext) / entry) * 100
+
+        # Offset по уровням профита — как Strategy._get_trailing_offset()
+        offset_pct = np.select(
+            [max_profit < 2, max_profit < 5, max_profit < 10],
+            [cfg.trailing_tight, cfg.trailing_medium, cfg.trailing_normal],
+            cfg.trailing_loose,
+        )
+        offset = ext * (offset_pct / 100)
+        g_offset = entry * (cfg.guaranteed_min / 100)
+        guaranteed = max_profit >= cfg.guaranteed_trigger
+        below_trigger = profit < cfg.breakeven_trigger
+
+        if is_long:
+            candidate = np.maximum(entry, ext - offset)
+            candidate = np.where(guaranteed, np.maximum(candidate, entry + g_offset), candidate)
+            candidate[below_trigger] = -np.inf
+            sl_after = np.maximum(np.maximum.accumulate(candidate), sl)
+        else:
+            candidate = np.minimum(entry, ext + offset)
+            candidate = np.where(guaranteed, np.minimum(candidate, entry - g_offset), candidate)
+            candidate[below_trigger] = np.inf
+            sl_after = np.minimum(np.minimum.accumulate(candidate), sl)
+
+        # SL на момент проверки — тот, что был после предыдущего тика
+        sl_before = np.empty_like(sl_after)
+        sl_before[0] = sl
+        sl_before[1:] = sl_after[:-1]
+
+        hits = seg <= sl_before if is_long else seg >= sl_before
+        hit = int(np.argmax(hits)) if hits.any() else -1
+        return hit, float(sl_after[-1]), float(ext[-1])
+
+    # === Результат ===
+
+    def _make_trade(
+        self,
+        ts: np.ndarray,
+        close: np.ndarray,
+        entry: int,
+        exit_: int,
+        side: str,
+    ) -> BacktestTrade:
+        """Собрать сделку."""
+        entry_price = float(close[entry])
+        exit_price = float(close[exit_])
+
+        if side == "long":
+            profit = ((exit_price - entry_price) / entry_price) * 100
+        else:
+            profit = ((entry_price - exit_price) / entry_price) * 100
+
+        notional = self.config.amount_usdt * self.config.leverage
+        pnl = notional * profit / 100 - notional * self.fee_percent * 2 / 100
+
+        return BacktestTrade(
+            side=side,
+            entry_index=entry,
+            exit_index=exit_,
+            entry_ts=int(ts[entry]),
+            exit_ts=int(ts[exit_]),
+            entry_price=entry_price,
+            exit_price=exit_price,
+            profit_percent=profit,
+            pnl_usdt=pnl,
+        )
+
+    @staticmethod
+    def _stats(trades: list[BacktestTrade], equity: np.ndarray) -> BacktestStats:
+        """Посчитать статистику по сделкам."""
+        if not trades:
+            return BacktestStats()
+
+        pnl = np.array([t.pnl_usdt for t in trades])
+        profit = np.array([t.profit_percent for t in trades])
+
+        gross_win = pnl[pnl > 0].sum()
+        gross_loss = -pnl[pnl < 0].sum()
+        peak = np.maximum.accumulate(np.concatenate(([0.0], equity)))
+        drawdown = peak[1:] - equity
+
+        wins = int((profit >= 0).sum())
+        return BacktestStats(
+            trades=len(trades),
+            wins=wins,
+            losses=len(trades) - wins,
+            win_rate=wins / len(trades) * 100,
+            total_pnl=float(equity[-1]),
+            avg_profit_percent=float(profit.mean()),
+            max_drawdown=float(drawdown.max()),
+            profit_factor=float(gross_win / gross_loss) if gross_loss else float("inf"),
+        )
+
+
+# === Файлы со свечами ===
+
+def save_ohlcv(path: str | Path, candles: CandleFrame | list[Candle]) -> None:
+    """Сохранить свечи в .npz (колонки OHLCV_COLUMNS)."""
+    if not isinstance(candles, CandleFrame):
+        candles = CandleFrame.from_candles(candles)
+    np.savez(path, **candles.to_columns())
+
+
+def load_ohlcv(path: str | Path) -> CandleFrame:
+    """
+    Загрузить свечи из файла.
+
+    .npz — как сохраняет save_ohlcv()
+    .csv — колонки timestamp(ms),open,high,low,close,volume; строка заголовка допускается
+    """
+    path = Path(path)
+
+    if path.suffix == ".npz":
+        with np.load(path) as data:
+            return CandleFrame.from_columns({name: data[name] for name in OHLCV_COLUMNS})
+
+    with open(path) as f:
+        first = f.readline()
+    skip = 0 if first[:1].isdigit() else 1
+    raw = np.loadtxt(path, delimiter=",", skiprows=skip, usecols=range(6), ndmin=2)
+
+    columns = {name: np.ascontiguousarray(raw[:, i]) for i, name in enumerate(OHLCV_COLUMNS)}
+    columns["timestamp"] = raw[:, 0].astype(np.int64)
+    return CandleFrame.from_columns(columns)
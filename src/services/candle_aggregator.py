@@ -0,0 +1,219 @@
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from core.models import Candle, CandleFrame
+from .candle_store import INTERVAL_MS
+
+
+# Интервалы, которые собираются по умолчанию
+DEFAULT_INTERVALS = ("1", "5", "15", "60", "240", "D")
+
+# Недельные свечи Bybit начинаются в понедельник, а эпоха — четверг
+BUCKET_OFFSET_MS = {"W": 4 * 86_400_000}
+
+
+class _CandleRing:
+    """Закрытые свечи: кольцо фиксированной ёмкости, колонки — numpy."""
+
+    __slots__ = ("capacity", "_columns", "_start", "_size")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._columns = [np.empty(capacity, dtype=np.int64)] + [np.empty(capacity) for _ in range(5)]
+        self._start = 0
+        self._size = 0
+
+    def append(self, ts: int, open: float, high: float, low: float, close: float, volume: float) -> None:
+        i = (self._start + self._size) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+        for column, value in zip(self._columns, (ts, open, high, low, close, volume)):
+            column[i] = value
+
+    def clear(self) -> None:
+        self._start = 0
+        self._size = 0
+
+    def frame(self, limit: int | None = None) -> CandleFrame:
+        """Последние limit свечей от старых к новым (копия)."""
+        n = self._size if limit is None else min(limit, self._size)
+        first = self._start + self._size - n
+        idx = np.arange(first, first + n) % self.capacity
+        return CandleFrame(*(column[idx] for column in self._columns))
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class _Series:
+    """Свечи одного символа и интервала: закрытые в кольце + текущая (незакрытая)."""
+
+    __slots__ = ("step", "offset", "ring", "start", "end", "open", "high", "low", "close", "volume")
+
+    def __init__(self, interval: str, capacity: int):
+        self.step = INTERVAL_MS[interval]
+        self.offset = BUCKET_OFFSET_MS.get(interval, 0)
+        self.ring = _CandleRing(capacity)
+        self.start = -1                     # Начало текущей свечи (-1 — её ещё нет)
+        self.end = -1                       # Начало следующей
+        self.open = self.high = self.low = self.close = self.volume = 0.0
+
+    def bucket(self, ts_ms: int) -> int:
+        """Начало свечи, в которую попадает ts_ms."""
+        return ts_ms - (ts_ms - self.offset) % self.step
+
+    def roll(self, ts_ms: int, price: float) -> None:
+        """Закрыть текущую свечу (и пустые между ней и новой) и открыть новую."""
+        start = self.bucket(ts_ms)
+        if self.start >= 0:
+            self.ring.append(self.start, self.open, self.high, self.low, self.close, self.volume)
+            # Минуты без сделок — плоские свечи по последней цене, как у биржи
+            missing = min((start - self.end) // self.step, self.ring.capacity)
+            for i in range(missing, 0, -1):
+                self.ring.append(start - i * self.step, self.close, self.close, self.close, self.close, 0.0)
+        self.start = start
+        self.end = start + self.step
+        self.open = self.high = self.low = price
+        self.volume = 0.0
+
+    def current(self) -> Candle | None:
+        if self.start < 0:
+            return None
+        return Candle(
+            timestamp=datetime.fromtimestamp(self.start / 1000),
+            open=self.open,
+            high=self.high,
+            low=self.low,
+            close=self.close,
+            volume=self.volume,
+        )
+
+
+class CandleAggregator:
+    """
+    Свечи всех интервалов из потока сделок — без запросов к бирже.
+
+    Каждая сделка обновляет текущую свечу каждого интервала: O(1) на интервал,
+    старшие интервалы всегда актуальны (то же, что сворачивать минутки, но без
+    ожидания закрытия минуты). Закрытые свечи — в кольцах фиксированной
+    ёмкости (numpy), минуты без сделок заполняются плоскими свечами.
+
+    История и текущая свеча на старте — seed() (одна страница get_klines
+    на интервал), дальше только поток. Символ без seed() начинается
+    с первой сделки.
+    """
+
+    def __init__(self, intervals: tuple[str, ...] = DEFAULT_INTERVALS, capacity: int = 1000):
+        for interval in intervals:
+            if interval not in INTERVAL_MS:
+                raise ValueError(f"Интервал {interval} не поддерживается")
+        self.intervals = intervals
+        self.capacity = capacity
+
+        self._series: dict[str, dict[str, _Series]] = {}
+        self._lock = threading.Lock()
+
+    # === Обновление ===
+
+    def on_trade(self, symbol: str, price: float, ts_ms: int, qty: float = 0.0) -> None:
+        """
+        Сделка (или тик — тогда без объёма).
+
+        Совместим с PriceCallback: можно отдавать прямо в subscribe_prices.
+        """
+        with self._lock:
+            series = self._series.get(symbol)
+            if series is None:
+                series = self._create(symbol)
+            for s in series.values():
+                if ts_ms >= s.end:
+                    s.roll(ts_ms, price)
+                elif ts_ms < s.start:
+                    continue            # Опоздавшая сделка: закрытые свечи не меняем
+                elif price > s.high:
+                    s.high = price
+                elif price < s.low:
+                    s.low = price
+                s.close = price
+                s.volume += qty
+
+    def seed(self, symbol: str, interval: str, candles: CandleFrame, now_ms: int | None = None) -> None:
+        """
+        Заполнить историю интервала (ответ get_klines, от старых к новым).
+
+        Свеча, которая ещё не закрылась (ts + длительность > now_ms),
+        становится текущей — сделки продолжат её.
+        """
+        if now_ms is None:
+            now_ms = int(time.time() * 1000)
+        with self._lock:
+            series = self._series.get(symbol) or self._create(symbol)
+            s = series[interval]
+            s.ring.clear()
+            s.start = s.end = -1
+
+            n = len(candles)
+            if n and int(candles.timestamp[-1]) + s.step > now_ms:
+                n -= 1
+                s.start = int(candles.timestamp[n])
+                s.end = s.start + s.step
+                s.open, s.high, s.low, s.close, s.volume = (
+                    float(candles.open[n]), float(candles.high[n]), float(candles.low[n]),
+                    float(candles.close[n]), float(candles.volume[n]),
+                )
+            for i in range(max(0, n - s.ring.capacity), n):
+                s.ring.append(
+                    int(candles.timestamp[i]), candles.open[i], candles.high[i],
+                    candles.low[i], candles.close[i], candles.volume[i],
+                )
+
+    # === Чтение ===
+
+    def candles(self, symbol: str, interval: str, limit: int | None = None, partial: bool = False) -> CandleFrame | None:
+        """
+        Свечи от старых к новым (копия).
+
+        Args:
+            limit: Сколько последних свечей (None — все)
+            partial: Добавить в конец текущую (незакрытую) свечу
+
+        Returns:
+            None — символ или интервал не собирается
+        """
+        with self._lock:
+            s = self._series.get(symbol, {}).get(interval)
+            if s is None:
+                return None
+            if not partial or s.start < 0:
+                return s.ring.frame(limit)
+            closed = s.ring.frame(None if limit is None else limit - 1)
+            current = (s.start, s.open, s.high, s.low, s.close, s.volume)
+        return CandleFrame(*(
+            np.append(column, value).astype(column.dtype)
+            for column, value in zip(
+                (closed.timestamp, closed.open, closed.high, closed.low, closed.close, closed.volume),
+                current,
+            )
+        ))
+
+    def current(self, symbol: str, interval: str) -> Candle | None:
+        """Текущая (незакрытая) свеча."""
+        with self._lock:
+            s = self._series.get(symbol, {}).get(interval)
+            return None if s is None else s.current()
+
+    def closed_count(self, symbol: str, interval: str) -> int:
+        """Сколько закрытых свечей есть в памяти."""
+        with self._lock:
+            s = self._series.get(symbol, {}).get(interval)
+            return 0 if s is None else len(s.ring)
+
+    def _create(self, symbol: str) -> dict[str, _Series]:
+        series = {interval: _Series(interval, self.capacity) for interval in self.intervals}
+        self._series[symbol] = series
+        return series
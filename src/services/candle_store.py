@@ -0,0 +1,316 @@
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from core.exchange import ExchangeClient
+from core.logger import logger
+from core.models import CandleFrame
+
+
+# Длительность свечи в ms (месячные свечи неравномерны — не храним)
+INTERVAL_MS = {
+    "1": 60_000,
+    "3": 180_000,
+    "5": 300_000,
+    "15": 900_000,
+    "30": 1_800_000,
+    "60": 3_600_000,
+    "120": 7_200_000,
+    "240": 14_400_000,
+    "360": 21_600_000,
+    "720": 43_200_000,
+    "D": 86_400_000,
+    "W": 604_800_000,
+}
+
+COLUMNS = {
+    "timestamp": np.dtype("<i8"),
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "volume": np.dtype("<f8"),
+}
+
+
+class CandleStore:
+    """
+    Локальное хранилище свечей.
+
+    Колоночный формат: на каждую пару (symbol, interval) — каталог
+    с сырыми бинарными файлами по колонкам и meta.json:
+
+        {root}/BTCUSDT/1/timestamp.i8, open.f8, ..., meta.json
+
+    - чтение через np.memmap — без копирования и парсинга
+    - sync() докачивает с биржи только недостающие диапазоны
+    - хранятся только закрытые свечи
+    - meta.json (кол-во строк + покрытый диапазон) пишется последним
+      и атомарно: недописанный хвост после сбоя игнорируется
+    - дописывание в начало пишет все колонки в файлы нового поколения
+      (timestamp.g1.i8, ...), переключает на них meta.json и только потом
+      удаляет старые: после сбоя колонки не разъезжаются
+    """
+
+    PAGE_LIMIT = 1000   # Максимум свечей в одном get_kline у Bybit
+
+    def __init__(self, client: ExchangeClient, root: str | Path = "data/candles"):
+        self.client = client
+        self.root = Path(root)
+
+    @staticmethod
+    def supports(interval: str) -> bool:
+        """Можно ли хранить этот интервал."""
+        return interval in INTERVAL_MS
+
+    # === Чтение ===
+
+    def read(
+        self,
+        symbol: str,
+        interval: str,
+        start: int | None = None,
+        end: int | None = None,
+    ) -> CandleFrame:
+        """
+        Прочитать свечи (колонки — memmap, только чтение).
+
+        Args:
+            start: Начало (ms, включительно)
+            end: Конец (ms, включительно)
+        """
+        path = self._path(symbol, interval)
+        meta = self._meta(path)
+        columns = {name: self._map(path, meta, name) for name in COLUMNS}
+        count = meta["count"]
+
+        ts = columns["timestamp"]
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        hi = count if end is None else int(np.searchsorted(ts, end, side="right"))
+        return CandleFrame.from_columns(columns)[lo:hi]
+
+    def tail(self, symbol: str, interval: str, limit: int) -> CandleFrame:
+        """Последние limit свечей."""
+        return self.read(symbol, interval)[-limit:]
+
+    def latest(self, symbol: str, interval: str, limit: int) -> CandleFrame:
+        """Догнать хранилище и вернуть последние limit закрытых свечей."""
+        step = INTERVAL_MS[interval]
+        last_closed = (int(time.time() * 1000) // step) * step - step
+        self.sync(symbol, interval, start=last_closed - (limit - 1) * step)
+        return self.tail(symbol, interval, limit)
+
+    def coverage(self, symbol: str, interval: str) -> tuple[int, int] | None:
+        """Покрытый диапазон (ms) или None, если пусто."""
+        meta = self._meta(self._path(symbol, interval))
+        if meta["covered_from"] is None:
+            return None
+        return meta["covered_from"], meta["covered_to"]
+
+    # === Синхронизация с биржей ===
+
+    def sync(
+        self,
+        symbol: str,
+        interval: str,
+        start: int | None = None,
+        end: int | None = None,
+    ) -> int:
+        """
+        Докачать недостающие закрытые свечи.
+
+        Args:
+            start: С какого времени нужны данные (ms). None — только догнать хвост
+                   (для пустого хранилища — одна страница)
+            end: До какого времени (ms). None — до последней закрытой свечи
+
+        Returns:
+            Сколько свечей добавлено
+        """
+        if not self.supports(interval):
+            raise ValueError(f"Интервал {interval} не поддерживается хранилищем")
+
+        step = INTERVAL_MS[interval]
+        now_ms = int(time.time() * 1000)
+        last_closed = (now_ms // step) * step - step
+        end = last_closed if end is None else min(end, last_closed)
+
+        path = self._path(symbol, interval)
+        path.mkdir(parents=True, exist_ok=True)
+        meta = self._meta(path)
+        added = 0
+
+        if meta["covered_from"] is None:
+            if start is None:
+                start = end - (self.PAGE_LIMIT - 1) * step
+            if start > end:
+                return 0
+            candles = self._fetch(symbol, interval, start, end)
+            added += self._append(path, meta, candles)
+            meta["covered_from"], meta["covered_to"] = start, end
+            self._write_meta(path, meta)
+            return added
+
+        # Дыра перед началом
+        if start is not None and start < meta["covered_from"]:
+            candles = self._fetch(symbol, interval, start, meta["covered_from"] - step)
+            added += self._prepend(path, meta, candles)
+            meta["covered_from"] = start
+
+        # Хвост
+        if end > meta["covered_to"]:
+            candles = self._fetch(symbol, interval, meta["covered_to"] + step, end)
+            added += self._append(path, meta, candles)
+            meta["covered_to"] = end
+
+        self._write_meta(path, meta)
+        return added
+
+    def _fetch(self, symbol: str, interval: str, start: int, end: int) -> CandleFrame:
+        """
+        Скачать [start, end] постранично.
+
+        Bybit отдаёт самые новые свечи диапазона, поэтому идём от end назад.
+        """
+        step = INTERVAL_MS[interval]
+        pages = []
+        cursor = end
+
+        while cursor >= start:
+            candles = self.client.get_klines(
+                symbol, interval, limit=self.PAGE_LIMIT, start=start, end=cursor,
+            )
+            if not len(candles):
+                break
+            pages.append(candles)
+            oldest = int(candles.timestamp[0])
+            if len(candles) < self.PAGE_LIMIT:
+                break
+            cursor = oldest - step
+
+        pages.reverse()
+        columns = {
+            name: np.concatenate([getattr(page, name) for page in pages])
+            if pages else getattr(CandleFrame.empty(), name)
+            for name in COLUMNS
+        }
+        logger.debug(f"CandleStore: {symbol} {interval} +{len(columns['timestamp'])} свечей ({len(pages)} запросов)")
+
+        # Сортировка, дедупликация и обрезка по диапазону
+        ts_unique, idx = np.unique(columns["timestamp"], return_index=True)
+        keep = idx[(ts_unique >= start) & (ts_unique <= end)]
+        return CandleFrame.from_columns({name: column[keep] for name, column in columns.items()})
+
+    # === Запись ===
+
+    def _append(self, path: Path, meta: dict, frame: CandleFrame) -> int:
+        """Дописать в конец (только свечи новее последней)."""
+        columns = frame.to_columns()
+        count = meta["count"]
+        if count:
+            last = int(self._map(path, meta, "timestamp")[-1])
+            keep = columns["timestamp"] > last
+            columns = {name: column[keep] for name, column in columns.items()}
+
+        n = len(columns["timestamp"])
+        if not n:
+            return 0
+
+        for name, dtype in COLUMNS.items():
+            file = path / _file_name(name, meta["generation"])
+            with open(file, "ab") as f:
+                # Отрезаем недописанный хвост после сбоя
+                f.truncate(count * dtype.itemsize)
+                f.write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        meta["count"] = count + n
+        return n
+
+    def _prepend(self, path: Path, meta: dict, frame: CandleFrame) -> int:
+        """
+        Дописать в начало (переписывает файлы — бывает редко).
+
+        Колонки пишутся в файлы следующего поколения; старые остаются
+        действующими, пока meta.json не переключён на новое (_write_meta).
+        """
+        columns = frame.to_columns()
+        count = meta["count"]
+        if count:
+            first = int(self._map(path, meta, "timestamp")[0])
+            keep = columns["timestamp"] < first
+            columns = {name: column[keep] for name, column in columns.items()}
+
+        n = len(columns["timestamp"])
+        if not n:
+            return 0
+
+        generation = meta["generation"] + 1
+        for name, dtype in COLUMNS.items():
+            old = np.array(self._map(path, meta, name))
+            data = np.concatenate((columns[name].astype(dtype), old))
+            _atomic_write(path / _file_name(name, generation), data.tobytes())
+
+        meta["count"] = count + n
+        meta["generation"] = generation
+        return n
+
+    # === Файлы ===
+
+    def _path(self, symbol: str, interval: str) -> Path:
+        """Каталог пары (не создаётся: чтение неизвестной пары не оставляет следов)."""
+        return self.root / symbol / interval
+
+    @staticmethod
+    def _map(path: Path, meta: dict, name: str) -> np.ndarray:
+        """Открыть колонку текущего поколения через memmap."""
+        dtype = COLUMNS[name]
+        count = meta["count"]
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        file = path / _file_name(name, meta["generation"])
+        return np.memmap(file, dtype=dtype, mode="r", shape=(count,))
+
+    @staticmethod
+    def _meta(path: Path) -> dict:
+        file = path / "meta.json"
+        if not file.exists():
+            return {"count": 0, "covered_from": None, "covered_to": None, "generation": 0}
+        meta = json.loads(file.read_text())
+        meta.setdefault("generation", 0)    # Хранилища до поколений
+        return meta
+
+    @staticmethod
+    def _write_meta(path: Path, meta: dict) -> None:
+        """Зафиксировать meta.json и удалить колонки прошлых поколений."""
+        _atomic_write(path / "meta.json", json.dumps(meta).encode())
+
+        current = {_file_name(name, meta["generation"]) for name in COLUMNS}
+        for name in COLUMNS:
+            dtype = COLUMNS[name]
+            for file in path.glob(f"{name}.*{dtype.kind}{dtype.itemsize}"):
+                if file.name not in current:
+                    file.unlink(missing_ok=True)
+
+
+# === Helpers ===
+
+def _file_name(column: str, generation: int = 0) -> str:
+    """Файл колонки: timestamp.i8, с поколения 1 — timestamp.g1.i8."""
+    dtype = COLUMNS[column]
+    prefix = f"g{generation}." if generation else ""
+    return f"{column}.{prefix}{dtype.kind}{dtype.itemsize}"
+
+
+def _atomic_write(file: Path, data: bytes) -> None:
+    """Записать файл атомарно (tmp + rename)."""
+    tmp = file.with_suffix(file.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, file)
@@ -1,14 +1,24 @@
-from core.exchange import ExchangeClient
-from core.models import Candle
+from core.exchange import ExchangeClient, PriceCallback, Subscription
+from core.logger import logger
+from core.models import CandleFrame
+from .candle_aggregator import CandleAggregator
+from .candle_store import CandleStore
 
 
 class Fetcher:
     """Сервис получения рыночных данных."""
     
-    def __init__(self, client: ExchangeClient):
+    def __init__(
+        self,
+        client: ExchangeClient,
+        store: CandleStore | None = None,
+        aggregator: CandleAggregator | None = None,
+    ):
         self.client = client
+        self.store = store
+        self.aggregator = aggregator
     
-    def get_candles(self, symbol: str, interval: str = "5", limit: int = 100) -> list[Candle]:
+    def get_candles(self, symbol: str, interval: str = "5", limit: int = 100) -> CandleFrame:
         """
         Получить свечи.
         
@@ -18,11 +28,66 @@ class Fetcher:
             limit: Количество свечей
         
         Returns:
-            Список свечей от старых к новым
+            Свечи от старых к новым (колонками; Candle — по индексу)
+        
+        С хранилищем (store) свечи читаются с диска, с биржи докачивается
+        только недостающее; текущая (незакрытая) свеча не возвращается.
+        
+        Символы из track() отдаются из памяти (тоже только закрытые свечи),
+        если их там не меньше limit.
         """
-        return self.client.get_klines(symbol, interval, limit)
+        if self.aggregator is not None:
+            candles = self.aggregator.candles(symbol, interval, limit)
+            if candles is not None and len(candles) >= limit:
+                return candles
+        
+        if self.store is None or not self.store.supports(interval):
+            return self.client.get_klines(symbol, interval, limit)
+        
+        return self.store.latest(symbol, interval, limit)
     
     def get_current_price(self, symbol: str) -> float:
         """Получить текущую цену."""
         ticker = self.client.get_ticker(symbol)
         return ticker.last_price
+    
+    def stream_prices(
+        self,
+        symbols: list[str],
+        callback: PriceCallback,
+        channel: str = "tickers",
+    ) -> Subscription:
+        """
+        Получать цены потоком вместо опроса.
+        
+        Args:
+            symbols: Торговые пары
+            callback: (symbol, price, ts_ms) на каждое обновление
+            channel: "tickers" или "trades"
+        
+        Returns:
+            Подписка (вызвать stop() для остановки)
+        """
+        return self.client.subscribe_prices(symbols, callback, channel)
+    
+    def track(self, symbols: list[str]) -> Subscription:
+        """
+        Собирать свечи символов в памяти (нужен aggregator).
+        
+        История — одна страница get_klines на интервал, дальше — поток сделок
+        (без subscribe_trades у клиента — поток цен, свечи без объёма).
+        
+        Returns:
+            Подписка (вызвать stop() для остановки)
+        """
+        aggregator = self.aggregator
+        limit = min(aggregator.capacity, CandleStore.PAGE_LIMIT)
+        for symbol in symbols:
+            for interval in aggregator.intervals:
+                aggregator.seed(symbol, interval, self.client.get_klines(symbol, interval, limit))
+        
+        subscribe = getattr(self.client, "subscribe_trades", None)
+        if subscribe is None:
+            logger.warning("Fetcher: у клиента нет потока сделок — свечи собираются без объёма")
+            return self.client.subscribe_prices(symbols, aggregator.on_trade, "trades")
+        return subscribe(symbols, aggregator.on_trade)
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+
+from core.exchange import AsyncExchangeClient, ExchangeClient
+from core.logger import logger
+from core.models import Instrument
+
+
+class InstrumentCache:
+    """
+    Кэш параметров инструментов (шаг лота, мин. qty, шаг цены, макс. плечо).
+
+    Загружается одним запросом на все символы и обновляется целиком
+    раз в ttl секунд — чтобы Trader отправлял на биржу только
+    допустимые qty и цены.
+
+    Синхронно грузится только пустой кэш. Устаревший отдаётся как есть,
+    а обновление идёт в фоне (поток или задача asyncio): вход и сдвиг SL
+    не ждут постраничной загрузки списка. Шаги лота и цены меняются
+    редко, устаревший на минуты список для них безопасен.
+    """
+
+    # Через сколько секунд повторить фоновое обновление после ошибки
+    RETRY_DELAY = 60.0
+
+    def __init__(self, client: ExchangeClient | AsyncExchangeClient, ttl: float = 3600.0):
+        self.client = client
+        self.ttl = ttl
+        self._instruments: dict[str, Instrument] = {}
+        self._loaded_at: float | None = None
+        self._retry_at = 0.0                # Раньше — не запускать фоновое обновление
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def stale(self) -> bool:
+        """Пора ли перезагрузить."""
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl
+
+    def load(self) -> int:
+        """Загрузить все инструменты (синхронный клиент)."""
+        return self._update(self.client.get_instruments())
+
+    async def load_async(self) -> int:
+        """Загрузить все инструменты (асинхронный клиент)."""
+        return self._update(await self.client.get_instruments())
+
+    def get(self, symbol: str) -> Instrument:
+        """
+        Параметры символа (синхронный клиент).
+
+        Пустой кэш загружается сразу; устаревший отдаётся без ожидания,
+        а обновляется в фоновом потоке.
+        """
+        if self._loaded_at is None:
+            self.load()
+        elif self.stale:
+            self.refresh_in_background()
+        return self.lookup(symbol)
+
+    async def get_async(self, symbol: str) -> Instrument:
+        """get() для асинхронного клиента: фоновое обновление — задачей asyncio."""
+        if self._loaded_at is None:
+            await self.load_async()
+        elif self.stale and self._start_refresh():
+            self._task = asyncio.create_task(self._refresh_async())
+        return self.lookup(symbol)
+
+    def refresh_in_background(self) -> bool:
+        """
+        Обновить кэш в фоновом потоке (синхронный клиент).
+
+        Returns:
+            False — обновление уже идёт или недавно не удалось
+        """
+        if not self._start_refresh():
+            return False
+        threading.Thread(target=self._refresh, name="instruments-refresh", daemon=True).start()
+        return True
+
+    def lookup(self, symbol: str) -> Instrument:
+        """Параметры символа без обращения к бирже."""
+        instrument = self._instruments.get(symbol)
+        if instrument is None:
+            raise ValueError(f"Инструмент {symbol} не найден")
+        return instrument
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._instruments
+
+    def __len__(self) -> int:
+        return len(self._instruments)
+
+    def _start_refresh(self) -> bool:
+        """Занять право на фоновое обновление (одно за раз, не чаще RETRY_DELAY после ошибки)."""
+        with self._lock:
+            if self._refreshing or time.monotonic() < self._retry_at:
+                return False
+            self._refreshing = True
+            return True
+
+    def _refresh(self) -> None:
+        try:
+            self.load()
+        except Exception as e:
+            self._refresh_failed(e)
+        finally:
+            self._refreshing = False
+
+    async def _refresh_async(self) -> None:
+        try:
+            await self.load_async()
+        except Exception as e:
+            self._refresh_failed(e)
+        finally:
+            self._refreshing = False
+
+    def _refresh_failed(self, error: Exception) -> None:
+        self._retry_at = time.monotonic() + self.RETRY_DELAY
+        logger.warning(f"InstrumentCache: обновление не удалось ({error}), работаем со старым списком")
+
+    def _update(self, instruments: list[Instrument]) -> int:
+        self._instruments = {instrument.symbol: instrument for instrument in instruments}
+        self._loaded_at = time.monotonic()
+        logger.debug(f"InstrumentCache: загружено {len(self._instruments)} инструментов")
+        return len(self._instruments)
@@ -0,0 +1,322 @@
+import hashlib
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, fields, replace
+from itertools import product
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from core.logger import logger
+from .backtest import Backtester, BacktestStats
+from .strategy import StrategyConfig
+
+
+@dataclass
+class OptimizerResult:
+    """Результат одного варианта конфига."""
+    params: dict
+    stats: BacktestStats
+    score: float
+
+
+ProgressCallback = Callable[[int, int, OptimizerResult | None], None]
+
+
+class Optimizer:
+    """
+    Перебор параметров StrategyConfig на исторических данных.
+
+    - варианты считаются в пуле процессов (по умолчанию — все ядра)
+    - цены лежат в shared memory: воркеры читают их без копирования
+    - каждый результат сразу дописывается в checkpoint (JSONL),
+      при повторном запуске готовые варианты пропускаются
+    """
+
+    RANK_KEYS = ("pnl", "pnl_dd")
+
+    def __init__(
+        self,
+        base_config: StrategyConfig | None = None,
+        workers: int | None = None,
+        fee_percent: float = 0.0,
+        checkpoint: str | Path | None = None,
+        rank_by: str = "pnl_dd",
+    ):
+        if rank_by not in self.RANK_KEYS:
+            raise ValueError(f"rank_by должен быть одним из {self.RANK_KEYS}")
+
+        self.base_config = base_config or StrategyConfig()
+        self.workers = workers or os.cpu_count() or 1
+        self.fee_percent = fee_percent
+        self.checkpoint = Path(checkpoint) if checkpoint else None
+        self.rank_by = rank_by
+
+    # === Варианты ===
+
+    @staticmethod
+    def grid(space: dict[str, list]) -> list[dict]:
+        """
+        Полный перебор.
+
+        Args:
+            space: {"entry_spike_percent": [0.2, 0.3], "spikes_to_enter": [1, 2, 3]}
+        """
+        _check_params(space)
+        names = list(space)
+        return [dict(zip(names, values)) for values in product(*space.values())]
+
+    @staticmethod
+    def random(space: dict[str, list | tuple], n: int, seed: int | None = None) -> list[dict]:
+        """
+        Случайный поиск.
+
+        Args:
+            space: list — выбор из значений, tuple (lo, hi) — равномерно
+                   (целые, если обе границы int)
+            n: Кол-во вариантов
+            seed: Для воспроизводимости (и корректного resume)
+        """
+        _check_params(space)
+        rnd = random.Random(seed)
+        variants = []
+
+        for _ in range(n):
+            params = {}
+            for name, values in space.items():
+                if isinstance(values, tuple):
+                    lo, hi = values
+                    if isinstance(lo, int) and isinstance(hi, int):
+                        params[name] = rnd.randint(lo, hi)
+                    else:
+                        params[name] = rnd.uniform(lo, hi)
+                else:
+                    params[name] = rnd.choice(values)
+            variants.append(params)
+
+        return variants
+
+    # === Запуск ===
+
+    def run(
+        self,
+        timestamps: np.ndarray,
+        closes: np.ndarray,
+        variants: list[dict],
+        progress: ProgressCallback | None = None,
+    ) -> list[OptimizerResult]:
+        """
+        Прогнать варианты и вернуть их отсортированными (лучшие первыми).
+
+        Args:
+            timestamps: Время свечей (ms)
+            closes: Цены закрытия
+            variants: Список изменений к base_config (grid() / random())
+            progress: callback(done, total, последний результат)
+        """
+        ts = np.ascontiguousarray(timestamps, dtype=np.int64)
+        close = np.ascontiguousarray(closes, dtype=np.float64)
+
+        fingerprint = _fingerprint(ts, close, self.base_config, self.fee_percent)
+        done = self._load_checkpoint(fingerprint)
+        results = [done[key] for key in map(_key, variants) if key in done]
+        pending = [p for p in variants if _key(p) not in done]
+        total = len(variants)
+
+        if results:
+            logger.info(f"Optimizer: {len(results)}/{total} уже посчитано (checkpoint)")
+        if progress:
+            progress(len(results), total, None)
+
+        if pending:
+            results.extend(self._run_pool(ts, close, pending, len(results), total, progress))
+
+        return self.rank(results)
+
+    def rank(self, results: list[OptimizerResult]) -> list[OptimizerResult]:
+        """Отсортировать по score (лучшие первыми)."""
+        return sorted(results, key=lambda r: r.score, reverse=True)
+
+    def score(self, stats: BacktestStats) -> float:
+        """Метрика для ранжирования."""
+        if self.rank_by == "pnl":
+            return stats.total_pnl
+        if stats.max_drawdown > 0:
+            return stats.total_pnl / stats.max_drawdown
+        return float("inf") if stats.total_pnl > 0 else stats.total_pnl
+
+    def _run_pool(
+        self,
+        ts: np.ndarray,
+        close: np.ndarray,
+        pending: list[dict],
+        done: int,
+        total: int,
+        progress: ProgressCallback | None,
+    ) -> list[OptimizerResult]:
+        """Раздать варианты пулу процессов."""
+        shm_ts = _to_shared(ts)
+        shm_close = _to_shared(close)
+        results = []
+        started = time.monotonic()
+
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(
+                    shm_ts.name, shm_close.name, len(ts),
+                    asdict(self.base_config), self.fee_percent,
+                ),
+            ) as pool:
+                futures = [pool.submit(_run_variant, params) for params in pending]
+
+                for future in as_completed(futures):
+                    params, stats = future.result()
+                    result = OptimizerResult(params, stats, self.score(stats))
+                    results.append(result)
+                    self._save_checkpoint(result)
+                    done += 1
+
+                    if progress:
+                        progress(done, total, result)
+                    elif done % max(1, total // 20) == 0 or done == total:
+                        elapsed = time.monotonic() - started
+                        logger.info(f"Optimizer: {done}/{total} ({elapsed:.1f}s)")
+        finally:
+            for shm in (shm_ts, shm_close):
+                shm.close()
+                shm.unlink()
+
+        return results
+
+    # === Checkpoint ===
+
+    def _load_checkpoint(self, fingerprint: str) -> dict[str, OptimizerResult]:
+        """
+        Прочитать готовые результаты.
+
+        Пустой файл (прерван до записи заголовка) — начинаем заново;
+        нечитаемый заголовок — как чужой fingerprint (ValueError).
+        Недописанная последняя строка отрезается, чтобы новые результаты
+        не склеились с ней.
+        """
+        if not self.checkpoint:
+            return {}
+        if not self.checkpoint.exists() or self.checkpoint.stat().st_size == 0:
+            self._write_line({"fingerprint": fingerprint})
+            return {}
+
+        data = self.checkpoint.read_bytes()
+        end = data.rfind(b"\n") + 1
+        lines = data[:end].decode("utf-8").splitlines()
+
+        try:
+            header = json.loads(lines[0]) if lines else {}
+        except json.JSONDecodeError:
+            header = {}
+        if not isinstance(header, dict) or header.get("fingerprint") != fingerprint:
+            raise ValueError(f"Checkpoint {self.checkpoint} посчитан на других данных или настройках")
+
+        if end < len(data):
+            logger.warning(f"Optimizer: недописанная строка в конце {self.checkpoint} отброшена")
+            with open(self.checkpoint, "r+b") as f:
+                f.truncate(end)
+
+        done = {}
+        for line in lines[1:]:
+            try:
+                row = json.loads(line)
+                stats = BacktestStats(**row["stats"])
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue   # Битая строка — вариант посчитаем заново
+            done[_key(row["params"])] = OptimizerResult(row["params"], stats, self.score(stats))
+
+        return done
+
+    def _save_checkpoint(self, result: OptimizerResult) -> None:
+        """Дописать результат."""
+        if self.checkpoint:
+            self._write_line({"params": result.params, "stats": asdict(result.stats)})
+
+    def _write_line(self, row: dict) -> None:
+        with open(self.checkpoint, "a", encoding="utf-8") as f:
+            f.write(json.dumps(row) + "\n")
+
+
+# === Воркер (уровень модуля — для pickle) ===
+
+_worker: dict = {}
+
+
+def _init_worker(ts_name: str, close_name: str, n: int, config: dict, fee_percent: float) -> None:
+    """Подключить shared memory один раз на процесс."""
+    shm_ts = _attach_shared(ts_name)
+    shm_close = _attach_shared(close_name)
+
+    _worker["shm"] = (shm_ts, shm_close)
+    _worker["ts"] = np.ndarray((n,), dtype=np.int64, buffer=shm_ts.buf)
+    _worker["close"] = np.ndarray((n,), dtype=np.float64, buffer=shm_close.buf)
+    # Данные общие для всех воркеров: запись в них испортила бы чужие бэктесты
+    _worker["ts"].flags.writeable = False
+    _worker["close"].flags.writeable = False
+    _worker["config"] = StrategyConfig(**config)
+    _worker["fee_percent"] = fee_percent
+
+
+def _run_variant(params: dict) -> tuple[dict, BacktestStats]:
+    """Бэктест одного варианта."""
+    config = replace(_worker["config"], **params)
+    result = Backtester(config, _worker["fee_percent"]).run(_worker["ts"], _worker["close"])
+    return params, result.stats
+
+
+# === Helpers ===
+
+def _to_shared(array: np.ndarray) -> SharedMemory:
+    """Скопировать массив в shared memory (один раз, в родителе)."""
+    shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm
+
+
+def _attach_shared(name: str) -> SharedMemory:
+    """
+    Подключиться к shared memory, которой владеет родитель.
+
+    Воркеры пула делят resource_tracker с родителем, поэтому повторная
+    регистрация блока безвредна, а удаляет его только родитель (unlink).
+    """
+    return SharedMemory(name=name)
+
+
+def _check_params(space: dict) -> None:
+    """Проверить, что параметры есть в StrategyConfig."""
+    known = {f.name for f in fields(StrategyConfig)}
+    unknown = set(space) - known
+    if unknown:
+        raise ValueError(f"Неизвестные параметры StrategyConfig: {sorted(unknown)}")
+
+
+def _key(params: dict) -> str:
+    """Ключ варианта для checkpoint."""
+    return json.dumps(params, sort_keys=True)
+
+
+def _fingerprint(ts: np.ndarray, close: np.ndarray, config: StrategyConfig, fee_percent: float) -> str:
+    """
+    Отпечаток прогона: resume только на тех же свечах, base_config и комиссии.
+
+    Варианты в checkpoint — это изменения к base_config: с другой базой
+    (или комиссией) те же params дают другие результаты.
+    """
+    digest = hashlib.sha256()
+    digest.update(ts)
+    digest.update(close)
+    digest.update(json.dumps({"config": asdict(config), "fee_percent": fee_percent}, sort_keys=True).encode())
+    return f"{len(ts)}:{digest.hexdigest()[:32]}"
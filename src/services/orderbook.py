@@ -0,0 +1,110 @@
+import threading
+
+from core.exchange import ExchangeClient, Subscription
+from core.logger import logger
+from core.models import BookUpdate
+from core.orderbook import OrderBook
+
+
+class OrderBookCache:
+    """
+    Локальные стаканы символов — из потока стакана биржи.
+
+    - slippage(symbol, side, notional) — ожидаемое проскальзывание рыночного ордера
+    - max_notional(symbol, side, max_slippage) — сколько можно взять в пределах проскальзывания
+    - imbalance(symbol, depth) — перекос бидов/асков
+
+    Символы добавляются через add(). Пропуск update_id — стакан сбрасывается до нового snapshot (клиент
+    переподписывается). Пока стакан не синхронизирован или поток отключён,
+    запросы возвращают None: решать без стакана — дело вызывающего.
+    Клиент без потока стакана (нет subscribe_orderbook) — всегда None.
+    """
+
+    def __init__(self, client: ExchangeClient):
+        self.client = client
+        self.resyncs = 0                    # Сколько раз стакан разошёлся
+
+        self._books: dict[str, OrderBook] = {}
+        self._streams: dict[str, Subscription] = {}     # Поток, в котором идёт стакан символа
+        self._lock = threading.Lock()
+
+    # === Жизненный цикл ===
+
+    def add(self, symbols: list[str]) -> "OrderBookCache":
+        """Подписаться на стаканы символов (уже подписанные пропускаются)."""
+        new = [symbol for symbol in symbols if symbol not in self._books]
+        if not new:
+            return self
+        subscribe = getattr(self.client, "subscribe_orderbook", None)
+        if subscribe is None:
+            logger.warning("OrderBookCache: у клиента нет потока стакана — проскальзывание не оценивается")
+            return self
+
+        with self._lock:
+            for symbol in new:
+                self._books[symbol] = OrderBook(symbol)
+        stream = subscribe(new, self._on_update, on_connect=lambda: self._invalidate(new))
+        for symbol in new:
+            self._streams[symbol] = stream
+        return self
+
+    def stop(self) -> None:
+        for stream in {id(stream): stream for stream in self._streams.values()}.values():
+            stream.stop()
+        self._streams.clear()
+
+    # === Запросы ===
+
+    def slippage(self, symbol: str, side: str, notional: float) -> float | None:
+        """Ожидаемое проскальзывание (%) рыночного ордера side ("Buy"/"Sell") на notional USDT."""
+        book = self._book(symbol)
+        if book is None:
+            return None
+        with self._lock:
+            return book.slippage(side, notional)
+
+    def max_notional(self, symbol: str, side: str, max_slippage: float) -> float | None:
+        """Наибольший рыночный ордер (USDT) с проскальзыванием не выше max_slippage (%)."""
+        book = self._book(symbol)
+        if book is None:
+            return None
+        with self._lock:
+            return book.max_notional(side, max_slippage)
+
+    def imbalance(self, symbol: str, depth: int = 5) -> float | None:
+        """Перекос первых depth уровней (от −1 до 1, > 0 — бидов больше)."""
+        book = self._book(symbol)
+        if book is None:
+            return None
+        with self._lock:
+            return book.imbalance(depth)
+
+    def _book(self, symbol: str) -> OrderBook | None:
+        """Стакан, которому можно верить: поток подключён, snapshot получен."""
+        stream = self._streams.get(symbol)
+        if stream is None or not getattr(stream, "connected", True):
+            return None
+        book = self._books[symbol]
+        return book if book.synced else None
+
+    # === Поток ===
+
+    def _on_update(self, update: BookUpdate) -> bool:
+        book = self._books.get(update.symbol)
+        if book is None:
+            return True
+        with self._lock:
+            was_synced = book.synced
+            applied = book.apply(update)
+        if applied or not was_synced:
+            # Пока ждём snapshot, запоздавшие delta просто отбрасываются
+            return True
+        self.resyncs += 1
+        logger.warning(f"OrderBookCache: {update.symbol} пропуск update_id → новый snapshot")
+        return False
+
+    def _invalidate(self, symbols: list[str]) -> None:
+        # После (пере)подключения верим только свежему snapshot
+        with self._lock:
+            for symbol in symbols:
+                self._books[symbol].invalidate()
@@ -0,0 +1,174 @@
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+from core.exchange import ExchangeClient, Subscription
+from core.logger import logger
+from core.models import Execution, Order, Position
+
+
+# Ордер в этих статусах больше не изменится
+FINAL_ORDER_STATUSES = {"Filled", "Cancelled", "Rejected", "Deactivated", "PartiallyFilledCanceled"}
+
+FillCallback = Callable[[Execution], None]
+
+
+class PositionCache:
+    """
+    Позиции и ордера счёта в памяти — из приватного потока биржи.
+
+    - get(symbol) — позиция (размер, средняя цена, SL/TP) без запроса
+    - order(order_id) / wait_fill() — статус ордера и средняя цена исполнения
+    - on_fill(callback) — каждое исполнение с реальной ценой
+    - closed_on_exchange(symbol) — позицию закрыла сама биржа (SL/TP/ликвидация)
+
+    REST (get_positions) — только при ресинхронизации: для символа, о котором
+    поток ещё ничего не сообщал, и после каждого (пере)подключения — всё, что
+    пришло за время обрыва, потеряно. Пока поток отключён, чтения идут в REST.
+    Клиент без приватного потока (нет subscribe_account) — всегда REST.
+    """
+
+    # Сколько последних ордеров помнить
+    MAX_ORDERS = 1000
+
+    def __init__(self, client: ExchangeClient):
+        self.client = client
+        self.rest_reads = 0                 # Сколько раз пришлось идти в REST
+
+        self._positions: dict[str, Position | None] = {}   # None — позиции точно нет
+        self._orders: OrderedDict[str, Order] = OrderedDict()
+        self._fill_listeners: list[FillCallback] = []
+        self._stream: Subscription | None = None
+        self._epoch = 0                     # Растёт на каждом (пере)подключении
+        self._versions: dict[str, int] = {} # Обновлений из потока по символу
+        self._opened: set[str] = set()      # Поток видел позицию открытой после forget()
+        self._closed: set[str] = set()      # ...а потом закрытой
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    # === Жизненный цикл ===
+
+    def start(self) -> "PositionCache":
+        """Подписаться на поток счёта (если клиент его умеет)."""
+        subscribe = getattr(self.client, "subscribe_account", None)
+        if subscribe is None:
+            logger.warning("PositionCache: у клиента нет потока счёта — позиции через REST")
+            return self
+        self._stream = subscribe(self._on_positions, self._on_orders, self._on_executions, self._on_connect)
+        return self
+
+    def stop(self) -> None:
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream = None
+
+    @property
+    def live(self) -> bool:
+        """Поток подключён — кэшу можно верить."""
+        return self._stream is not None and getattr(self._stream, "connected", True)
+
+    # === Чтение ===
+
+    def get(self, symbol: str) -> Position | None:
+        """Открытая позиция по символу (None — нет); REST — только на ресинхронизации."""
+        with self._lock:
+            live = self.live
+            if live and symbol in self._positions:
+                return self._positions[symbol]
+            epoch = self._epoch
+            version = self._versions.get(symbol, 0)
+
+        positions = self.client.get_positions(symbol)
+        position = positions[0] if positions else None
+
+        with self._lock:
+            self.rest_reads += 1
+            # Пока шёл запрос, поток мог прислать свежее — тогда его не затираем
+            if live and epoch == self._epoch and version == self._versions.get(symbol, 0):
+                self._positions[symbol] = position
+        return position
+
+    def order(self, order_id: str) -> Order | None:
+        """Последнее известное состояние ордера."""
+        with self._lock:
+            return self._orders.get(order_id)
+
+    def wait_fill(self, order_id: str, timeout: float = 5.0) -> Order | None:
+        """
+        Дождаться, пока ордер завершится (исполнен, отменён, отклонён).
+
+        Returns:
+            Ордер со статусом и средней ценой; None — не дождались
+        """
+        with self._changed:
+            done = self._changed.wait_for(
+                lambda: (order := self._orders.get(order_id)) is not None
+                and order.status in FINAL_ORDER_STATUSES,
+                timeout,
+            )
+            return self._orders[order_id] if done else None
+
+    def on_fill(self, callback: FillCallback) -> None:
+        """Получать каждое исполнение (в потоке WebSocket — без долгой работы)."""
+        self._fill_listeners.append(callback)
+
+    def closed_on_exchange(self, symbol: str) -> bool:
+        """
+        Позиция, открытая после последнего forget() (нашего ордера), закрылась
+        без нашего ордера — по SL/TP/ликвидации. Без блокировки: для горячего пути.
+        """
+        return symbol in self._closed
+
+    def forget(self, symbol: str) -> None:
+        """
+        Сейчас уйдёт наш ордер по символу.
+        
+        До сообщения потока позиция читается из REST, а закрытия, о которых
+        поток сообщит дальше, — уже этого ордера, не прошлой позиции.
+        """
+        with self._lock:
+            self._positions.pop(symbol, None)
+            self._versions[symbol] = self._versions.get(symbol, 0) + 1
+            self._opened.discard(symbol)
+            self._closed.discard(symbol)
+
+    def resync(self) -> None:
+        """Забыть позиции: следующие чтения сходят в REST."""
+        with self._lock:
+            self._positions.clear()
+            self._epoch += 1
+
+    # === Поток ===
+
+    def _on_connect(self) -> None:
+        # Что пришло за время обрыва, потеряно — перечитаем по запросу
+        self.resync()
+
+    def _on_positions(self, positions: list[Position]) -> None:
+        with self._lock:
+            for position in positions:
+                symbol = position.symbol
+                self._positions[symbol] = position if position.size > 0 else None
+                self._versions[symbol] = self._versions.get(symbol, 0) + 1
+                if position.size > 0:
+                    self._opened.add(symbol)
+                elif symbol in self._opened:
+                    self._opened.discard(symbol)
+                    self._closed.add(symbol)
+
+    def _on_orders(self, orders: list[Order]) -> None:
+        with self._changed:
+            for order in orders:
+                self._orders[order.order_id] = order
+                self._orders.move_to_end(order.order_id)
+            while len(self._orders) > self.MAX_ORDERS:
+                self._orders.popitem(last=False)
+            self._changed.notify_all()
+
+    def _on_executions(self, executions: list[Execution]) -> None:
+        for execution in executions:
+            for callback in self._fill_listeners:
+                try:
+                    callback(execution)
+                except Exception as e:
+                    logger.error(f"PositionCache: ошибка обработки исполнения {execution.symbol}: {e}")
@@ -0,0 +1,143 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from core.exchange import ExchangeClient
+from core.models import SignalType, Ticker
+from .analyzer import Analyzer, AnalyzerConfig
+
+
+@dataclass
+class ScanCandidate:
+    """Символ с сигналом входа."""
+    symbol: str
+    type: SignalType
+    price: float
+    change_percent: float   # Изменение за последние spikes_to_enter шагов (%)
+    volume_24h: float
+
+
+class Scanner:
+    """
+    Сканер рынка по всем символам.
+
+    Один запрос get_tickers за цикл; последние цены всех символов
+    лежат в общей матрице (символы × window) — кольцевой буфер по столбцам.
+    Правило скачков (как Analyzer.check_entry) проверяется сразу для всех
+    символов операциями над массивами.
+    """
+
+    def __init__(
+        self,
+        client: ExchangeClient,
+        config: AnalyzerConfig | None = None,
+        window: int = 20,
+        min_volume_24h: float = 0.0,
+        quote: str = "USDT",
+    ):
+        self.client = client
+        self.config = config or AnalyzerConfig()
+        self.analyzer = Analyzer(self.config)
+        self.window = max(window, self.config.history)
+        self.min_volume_24h = min_volume_24h
+        self.quote = quote
+
+        self.symbols: list[str] = []
+        self._index: dict[str, int] = {}
+        self.prices = np.full((0, self.window), np.nan)   # Строка — символ, столбцы — циклы
+        self.volumes = np.zeros(0)
+        self._cursor = 0    # Столбец для следующего цикла
+        self._filled = 0    # Сколько циклов в окне
+
+    def poll(self, limit: int | None = None) -> list[ScanCandidate]:
+        """Один цикл: тикеры одним запросом → обновить окно → кандидаты."""
+        self.update(self.client.get_tickers())
+        return self.scan(limit)
+
+    def update(self, tickers: list[Ticker]) -> None:
+        """Записать цены цикла (символы без тикера получают NaN)."""
+        rows = []
+        prices = []
+        for ticker in tickers:
+            if not ticker.symbol.endswith(self.quote) or ticker.last_price <= 0:
+                continue
+            row = self._index.get(ticker.symbol)
+            if row is None:
+                row = self._add_symbol(ticker.symbol)
+            rows.append(row)
+            prices.append(ticker.last_price)
+            self.volumes[row] = ticker.volume_24h
+
+        column = np.full(len(self.prices), np.nan)
+        column[rows] = prices
+        self.prices[:, self._cursor] = column
+        self._cursor = (self._cursor + 1) % self.window
+        self._filled = min(self._filled + 1, self.window)
+
+    def scan(self, limit: int | None = None) -> list[ScanCandidate]:
+        """
+        Кандидаты на вход, сильнейшие первыми.
+
+        Args:
+            limit: Сколько вернуть (None — все)
+        """
+        types, change = self.signals()
+        hits = np.flatnonzero(types != 0)
+        if self.min_volume_24h:
+            hits = hits[self.volumes[hits] >= self.min_volume_24h]
+
+        order = hits[np.argsort(-np.abs(change[hits]), kind="stable")]
+        if limit is not None:
+            order = order[:limit]
+
+        last = self.prices[:, (self._cursor - 1) % self.window]
+        return [
+            ScanCandidate(
+                symbol=self.symbols[i],
+                type=SignalType.LONG if types[i] > 0 else SignalType.SHORT,
+                price=float(last[i]),
+                change_percent=float(change[i]),
+                volume_24h=float(self.volumes[i]),
+            )
+            for i in order
+        ]
+
+    def signals(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Сигналы по всем символам.
+
+        Returns:
+            (тип: 1 LONG / -1 SHORT / 0 нет, изменение за окно сигнала в %)
+        """
+        n = len(self.symbols)
+        k = self.config.spikes_to_enter
+        required = self.config.history
+        if self._filled < required:
+            return np.zeros(n, dtype=np.int8), np.zeros(n)
+
+        # Последние required столбцов (k+1, с порогом в σ — и окно σ)
+        # в хронологическом порядке; NaN (символ пропал из тикеров) — сигнала нет
+        cols = (self._cursor - required + np.arange(required)) % self.window
+        recent = self.prices[:n, cols]
+        types, _ = self.analyzer.detect_batch(recent)
+
+        with np.errstate(invalid="ignore"):
+            total = ((recent[:, -1] - recent[:, -(k + 1)]) / recent[:, -(k + 1)]) * 100
+        return types, np.nan_to_num(total)
+
+    def history(self, symbol: str) -> np.ndarray:
+        """Цены символа в окне, от старых к новым."""
+        row = self._index[symbol]
+        cols = (self._cursor - self._filled + np.arange(self._filled)) % self.window
+        return self.prices[row, cols]
+
+    def _add_symbol(self, symbol: str) -> int:
+        """Новая строка; матрица растёт удвоением."""
+        row = len(self.symbols)
+        if row == len(self.prices):
+            grow = max(row, 64)
+            self.prices = np.vstack((self.prices, np.full((grow, self.window), np.nan)))
+            self.volumes = np.concatenate((self.volumes, np.zeros(grow)))
+        self.symbols.append(symbol)
+        self._index[symbol] = row
+        return row
@@ -0,0 +1,76 @@
+import json
+import os
+import time
+from pathlib import Path
+
+from core.logger import logger
+
+
+FORMAT_VERSION = 1
+
+
+class StateStore:
+    """
+    Снимок состояния стратегии на диске (переживает рестарт и падение).
+
+    Один маленький JSON-файл на символ, запись атомарная: tmp + fsync +
+    rename — после сбоя на диске либо старый, либо новый снимок целиком.
+    Одинаковый снимок повторно не пишется.
+    """
+
+    def __init__(self, path: str | Path, fsync: bool = True):
+        self.path = Path(path)
+        self.fsync = fsync
+        self._last: str | None = None
+
+    def save(self, data: dict) -> bool:
+        """
+        Записать снимок.
+
+        Returns:
+            False, если он не изменился с прошлой записи
+        """
+        payload = json.dumps(data, separators=(",", ":"), sort_keys=True)
+        if payload == self._last:
+            return False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        record = f'{{"version":{FORMAT_VERSION},"saved_at":{time.time()!r},"state":{payload}}}'
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w") as f:
+            f.write(record)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+        self._last = payload
+        return True
+
+    def load(self) -> tuple[dict, float] | None:
+        """
+        Прочитать снимок.
+
+        Returns:
+            (state, saved_at) или None, если снимка нет или он нечитаем
+        """
+        try:
+            record = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"StateStore: {self.path} не читается ({e}) — стартуем с нуля")
+            return None
+
+        if record.get("version") != FORMAT_VERSION:
+            logger.warning(f"StateStore: неизвестная версия снимка {record.get('version')}")
+            return None
+
+        state = record["state"]
+        self._last = json.dumps(state, separators=(",", ":"), sort_keys=True)
+        return state, record["saved_at"]
+
+    def clear(self) -> None:
+        """Удалить снимок."""
+        self.path.unlink(missing_ok=True)
+        self._last = None
@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+from .trader import Trader
+
+
+class StopLossCoalescer:
+    """
+    Отправка сдвигов SL на биржу без лишних запросов.
+
+    Стратегия двигает и проверяет свой SL на каждом тике, как и раньше, —
+    сюда приходит только отправка на биржу:
+    - SL округляется до шага цены в сторону позиции (не слабее расчётного);
+      не изменившийся после округления не шлётся
+    - сдвиг от последнего отправленного на min_ticks шагов и больше — сразу
+    - меньший сдвиг придерживается, пока с прошлой отправки не пройдёт
+      min_interval секунд (его досылает poll() на следующих тиках)
+
+    По умолчанию (0 шагов, 0 с) уходит каждое улучшение — как без коалесцера.
+    Неудавшаяся отправка остаётся в pending, poll() повторяет её сразу.
+    """
+
+    def __init__(self, trader: Trader, symbol: str, min_ticks: int = 0, min_interval: float = 0.0):
+        self.trader = trader
+        self.symbol = symbol
+        self.min_ticks = min_ticks
+        self.min_interval = min_interval
+        self.side: str | None = None         # Сторона позиции: "Buy" / "Sell"
+        self.sent: str | None = None         # Последний SL на бирже (округлённый)
+        self.sent_at = 0.0
+        self.pending: float | None = None    # Придержанный SL
+        self.requests = 0                    # Отправлено запросов
+
+    def reset(self, sent: float | None = None, ts: float = 0.0, side: str | None = None) -> None:
+        """
+        Начать заново (вход, закрытие, SL выставлен в обход коалесцера).
+
+        Args:
+            sent: SL, который сейчас стоит на бирже (None — никакого)
+            ts: Когда он выставлен
+            side: Сторона позиции ("Buy" / "Sell"), None — позиции нет
+        """
+        self.side = side
+        self.sent = None if sent is None else self._round(sent)
+        self.sent_at = ts
+        self.pending = None
+
+    def update(self, sl: float, ts: float) -> bool:
+        """
+        Новый (лучший) SL стратегии.
+
+        Returns:
+            True, если ушёл запрос на биржу
+        """
+        price = self._round(sl)
+        if price == self.sent:
+            self.pending = None
+            return False
+
+        if (
+            self.sent is not None
+            and ts - self.sent_at < self.min_interval
+            and abs(Decimal(price) - Decimal(self.sent)) < self.min_ticks * self._tick_size()
+        ):
+            self.pending = sl
+            return False
+
+        # До ответа биржи: при ошибке poll() повторит на следующем же тике
+        self.pending = sl
+        self.sent_at = float("-inf")
+        self.trader.client.set_stop_loss(self.symbol, price)     # Уже округлена
+        self.requests += 1
+        self.sent = price
+        self.sent_at = ts
+        self.pending = None
+        return True
+
+    def poll(self, ts: float) -> bool:
+        """Дослать придержанный SL, если его время пришло."""
+        if self.pending is None or ts - self.sent_at < self.min_interval:
+            return False
+        return self.update(self.pending, ts)
+
+    def _round(self, price: float) -> str:
+        instrument = self.trader.instruments.get(self.symbol)
+        if self.side is None:
+            return instrument.round_price(price)
+        return instrument.round_stop(price, self.side)
+
+    def _tick_size(self) -> Decimal:
+        return self.trader.instruments.get(self.symbol).tick_size
@@ -1,10 +1,17 @@
+import time
+from time import perf_counter
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from core.models import SignalType
+from enum import Enum
+from core.buffers import RingBuffer
+from core.metrics import Histogram
+from core.models import Position, SignalType
 from core.logger import logger
-from .analyzer import Analyzer, AnalyzerConfig
+from .analyzer import Analyzer, AnalyzerConfig, SpikeDetector
 from .trader import Trader
 from .fetcher import Fetcher
+from .state_store import StateStore
+from .stop_loss import StopLossCoalescer
 
 
 @dataclass
@@ -18,6 +25,8 @@ class StrategyConfig:
     # Вход (передаётся в Analyzer)
     entry_spike_percent: float = 0.5
     spikes_to_enter: int = 2
+    spike_volatility: float = 0.0       # Порог в σ изменений цены вместо entry_spike_percent (0 — выкл)
+    volatility_window: int = 100        # По скольким изменениям считать σ
     
     # Stop Loss
     initial_sl_percent: float = 0.3     # Начальный SL
@@ -33,6 +42,14 @@ class StrategyConfig:
     guaranteed_trigger: float = 10.0    # После +10%...
     guaranteed_min: float = 5.0         # ...минимум +5%
     
+    # Стакан (нужен OrderBookCache у Trader)
+    max_slippage_percent: float = 0.0   # Урезать вход до проскальзывания N% (0 — не проверять)
+    
+    # Отправка SL на биржу
+    native_trailing: bool = False       # Трейлинг ведёт Bybit (trailingStop), пока тир offset не сменился
+    sl_min_ticks: int = 0               # Сдвиг SL меньше N шагов цены придерживается...
+    sl_min_interval: float = 0.0        # ...но не дольше N секунд с прошлой отправки
+    
     # Cooldown и лимиты
     cooldown_minutes: int = 15          # После SL не входить N минут
     max_losses_per_day: int = 3         # Макс убыточных сделок в день
@@ -41,6 +58,47 @@ class StrategyConfig:
     dry_run: bool = True                # True = только логи, без реальных сделок
 
 
+class Action(Enum):
+    """Что сделала стратегия на тике."""
+    NONE = "none"
+    ENTER_LONG = "enter_long"
+    ENTER_SHORT = "enter_short"
+    UPDATE_SL = "update_sl"
+    CLOSE = "close"
+    BLOCKED = "blocked"
+
+
+class Reason(Enum):
+    """Почему (для форматирования details)."""
+    NO_DATA = "no_data"
+    NO_SIGNAL = "no_signal"
+    SPIKES = "spikes"
+    LOSS_LIMIT = "loss_limit"
+    COOLDOWN = "cooldown"
+    HOLD = "hold"
+    SL_MOVED = "sl_moved"
+    SL_HIT = "sl_hit"
+    THIN_BOOK = "thin_book"
+
+
+@dataclass(slots=True)
+class TickResult:
+    """
+    Результат тика.
+    
+    Только числа — строка details собирается в Strategy.describe(),
+    когда результат действительно логируют.
+    """
+    action: Action
+    reason: Reason
+    price: float
+    ts: float
+    profit: float = 0.0                 # Профит позиции (%)
+    sl: float = 0.0                     # Текущий / новый SL
+    spikes: int = 0                     # Скачков подряд (для входа)
+    wait: float = 0.0                   # Секунд до конца cooldown
+
+
 @dataclass
 class TradeState:
     """Состояние текущей сделки."""
@@ -50,13 +108,40 @@ class TradeState:
     max_price: float = 0.0              # Максимум для long, минимум для short
     current_sl: float = 0.0
     
-    # История цен для анализа входа
-    price_history: list[float] = field(default_factory=list)
+    # Трейлинг на бирже (native_trailing)
+    trail_regime: int = -1              # Режим, под который он выставлен (-1 — не выставлен)
+    trail_distance: float = 0.0         # Расстояние от пика (0 — SL ведёт стратегия)
+    trail_peak: float = 0.0             # Пик с включения (0 — ждёт activePrice)
+    
+    # История цен для анализа входа (последние 20)
+    price_history: RingBuffer = field(default_factory=lambda: RingBuffer(20))
     
     # Cooldown и лимиты
-    last_loss_time: datetime | None = None
+    last_loss_ts: float = 0.0           # Unix time последнего убытка
     losses_today: int = 0
-    last_loss_date: str = ""            # Для сброса счётчика каждый день
+    loss_day_end: float = 0.0           # Когда сбросить счётчик (полночь)
+    
+    def snapshot(self) -> dict:
+        """Поля для StateStore (история цен не пишется — её дают свечи)."""
+        return {name: getattr(self, name) for name in PERSISTED_FIELDS}
+    
+    def restore(self, data: dict) -> None:
+        """Применить снимок (незнакомые и отсутствующие поля пропускаются)."""
+        for name in PERSISTED_FIELDS:
+            if name in data:
+                setattr(self, name, data[name])
+
+
+# Границы профита (%) тиров offset — как в Strategy._get_trailing_offset()
+TRAIL_TIERS = ((0.0, 2.0), (2.0, 5.0), (5.0, 10.0), (10.0, None))
+
+
+# Поля TradeState, переживающие рестарт
+PERSISTED_FIELDS = (
+    "in_position", "side", "entry_price", "max_price", "current_sl",
+    "trail_regime", "trail_distance", "trail_peak",
+    "last_loss_ts", "losses_today", "loss_day_end",
+)
 
 
 class Strategy:
@@ -69,6 +154,8 @@ class Strategy:
     - Trailing stop
     - Cooldown после убытка
     - Лимит убытков в день
+    
+    Цены приходят через on_price() — из любого источника (REST, WebSocket, бэктест).
     """
     
     def __init__(
@@ -76,21 +163,91 @@ class Strategy:
         trader: Trader,
         fetcher: Fetcher,
         config: StrategyConfig | None = None,
+        store: StateStore | None = None,
     ):
         self.config = config or StrategyConfig()
         self.trader = trader
         self.fetcher = fetcher
+        self.store = store              # Снимок состояния на каждое его изменение
         self.state = TradeState()
         
         # Создаём анализатор с нужным конфигом
         self.analyzer = Analyzer(AnalyzerConfig(
             spike_percent=self.config.entry_spike_percent,
             spikes_to_enter=self.config.spikes_to_enter,
+            spike_volatility=self.config.spike_volatility,
+            volatility_window=self.config.volatility_window,
         ))
+        # Потоковый детектор скачков пишет прямо в историю цен
+        self.detector = SpikeDetector(
+            self.analyzer.config,
+            capacity=self.state.price_history.capacity,
+        )
+        self.state.price_history = self.detector.prices
+        # Сдвиги SL уходят на биржу через коалесцер
+        self.stops = StopLossCoalescer(
+            trader, self.config.symbol, self.config.sl_min_ticks, self.config.sl_min_interval,
+        )
+        self._required = self.analyzer.config.history
+        self._cooldown_sec = self.config.cooldown_minutes * 60
+        self.tick_latency: Histogram | None = None
     
-    def tick(self) -> dict:
+    def enable_tick_metrics(self, histogram: Histogram) -> None:
+        """
+        Замерять время каждого on_price() в histogram.
+        
+        Замер подменяет on_price у экземпляра — без метрик горячий путь
+        не платит даже за проверку флага.
         """
-        Один тик стратегии. Вызывать периодически.
+        plain = type(self).on_price.__get__(self)
+        
+        def on_price(price: float, ts: float) -> TickResult:
+            start = perf_counter()
+            result = plain(price, ts)
+            histogram.observe(perf_counter() - start)
+            return result
+        
+        self.tick_latency = histogram
+        self.on_price = on_price
+    
+    def warm_start(self, interval: str = "1") -> None:
+        """
+        Подготовиться к первому тику после рестарта.
+        
+        1. Позиция и счётчики убытков — из снимка (store)
+        2. Сверка с позицией на бирже (кроме dry_run): биржа главнее
+        3. Окно цен — закрытия последних свечей interval, чтобы сигнал
+           был возможен уже на первом тике
+        
+        Args:
+            interval: Интервал свечей для окна цен
+        """
+        symbol = self.config.symbol
+        
+        if self.store is not None:
+            loaded = self.store.load()
+            if loaded is not None:
+                data, saved_at = loaded
+                self.state.restore(data)
+                logger.info(f"Состояние восстановлено (снимок от {datetime.fromtimestamp(saved_at):%H:%M:%S})")
+        
+        if not self.config.dry_run:
+            self._reconcile(self.trader.get_position(symbol))
+        
+        # С порогом в σ нужна история и для σ
+        limit = max(self.state.price_history.capacity, self.analyzer.config.history)
+        candles = self.fetcher.get_candles(symbol, interval, limit=limit)
+        self.detector.seed(candles.close)
+        logger.info(f"Окно цен: {len(self.state.price_history)} закрытий свечей {interval}")
+        
+        self.persist()
+    
+    def tick(self, price: float | None = None) -> dict:
+        """
+        Один тик стратегии. Обёртка над on_price() для совместимости.
+        
+        Args:
+            price: Цена из потока (None = запросить через REST)
         
         Returns:
             {
@@ -99,173 +256,224 @@ class Strategy:
                 "details": str
             }
         """
-        # Получаем текущую цену
-        current_price = self.fetcher.get_current_price(self.config.symbol)
+        if price is None:
+            price = self.fetcher.get_current_price(self.config.symbol)
         
-        # Добавляем в историю
-        self.state.price_history.append(current_price)
-        if len(self.state.price_history) > 20:
-            self.state.price_history.pop(0)
+        result = self.on_price(price, time.time())
+        return {
+            "action": result.action.value,
+            "price": result.price,
+            "details": self.describe(result),
+        }
+    
+    def on_price(self, price: float, ts: float) -> TickResult:
+        """
+        Обработать новую цену.
+        
+        Горячий путь: никаких запросов за ценой и форматирования строк.
+        
+        Args:
+            price: Текущая цена
+            ts: Время цены (unix, секунды)
+        """
+        # Добавляем в историю и обновляем счётчики скачков — O(1)
+        signal_type, spikes = self.detector.update(price)
         
         if not self.state.in_position:
-            return self._check_entry(current_price)
+            return self._check_entry(price, ts, signal_type, spikes)
         else:
-            return self._manage_position(current_price)
+            return self._manage_position(price, ts)
+    
+    def describe(self, result: TickResult) -> str:
+        """Текстовое описание результата (для логов)."""
+        reason = result.reason
+        
+        if reason is Reason.HOLD:
+            return f"Держим. Профит: {result.profit:.2f}%, SL: {result.sl:.2f}"
+        if reason is Reason.NO_SIGNAL:
+            return "Нет сигнала"
+        if reason is Reason.NO_DATA:
+            return f"Недостаточно данных (нужно {self._required})"
+        if reason is Reason.SPIKES:
+            side = "LONG" if result.action is Action.ENTER_LONG else "SHORT"
+            return f"Momentum {side}: {result.spikes} скачков ≥{self.analyzer.config.spike_label}"
+        if reason is Reason.SL_MOVED:
+            mode = "[DRY RUN] " if self.config.dry_run else ""
+            return f"{mode}SL → {result.sl:.2f} (профит: {result.profit:.2f}%)"
+        if reason is Reason.SL_HIT:
+            return f"SL сработал. Профит: {result.profit:.2f}%"
+        if reason is Reason.LOSS_LIMIT:
+            return f"Лимит убытков ({self.config.max_losses_per_day}) исчерпан на сегодня"
+        if reason is Reason.THIN_BOOK:
+            return f"Пропуск входа: стакан не держит и минимальный объём в {self.config.max_slippage_percent}%"
+        if reason is Reason.COOLDOWN:
+            return f"Cooldown: ждём ещё {int(result.wait) // 60} мин"
+        return ""
     
-    def _is_blocked(self) -> tuple[bool, str]:
+    def _is_blocked(self, ts: float) -> Reason | None:
         """Проверить блокировки (cooldown, лимит убытков)."""
-        now = datetime.now()
-        today = now.strftime("%Y-%m-%d")
+        state = self.state
         
         # Сброс счётчика убытков на новый день
-        if self.state.last_loss_date != today:
-            self.state.losses_today = 0
-            self.state.last_loss_date = today
+        if ts >= state.loss_day_end:
+            state.losses_today = 0
+            state.loss_day_end = next_midnight(ts)
         
         # Проверка лимита убытков
-        if self.state.losses_today >= self.config.max_losses_per_day:
-            return True, f"Лимит убытков ({self.config.max_losses_per_day}) исчерпан на сегодня"
+        if state.losses_today >= self.config.max_losses_per_day:
+            return Reason.LOSS_LIMIT
         
         # Проверка cooldown
-        if self.state.last_loss_time:
-            cooldown_end = self.state.last_loss_time + timedelta(minutes=self.config.cooldown_minutes)
-            if now < cooldown_end:
-                remaining = (cooldown_end - now).seconds // 60
-                return True, f"Cooldown: ждём ещё {remaining} мин"
+        if state.last_loss_ts and ts < state.last_loss_ts + self._cooldown_sec:
+            return Reason.COOLDOWN
         
-        return False, ""
+        return None
     
-    def _check_entry(self, current_price: float) -> dict:
-        """Проверить условия входа."""
+    def _check_entry(
+        self,
+        current_price: float,
+        ts: float,
+        signal_type: SignalType,
+        spikes: int,
+    ) -> TickResult:
+        """Проверить условия входа (сигнал уже посчитан детектором)."""
         # Проверяем блокировки
-        blocked, reason = self._is_blocked()
-        if blocked:
-            return {
-                "action": "blocked",
-                "price": current_price,
-                "details": reason
-            }
-        
-        signal = self.analyzer.check_entry(
-            self.state.price_history,
-            self.config.symbol
-        )
-        
-        if signal.type == SignalType.LONG:
-            self._enter_position(current_price, "long")
-            return {
-                "action": "enter_long",
-                "price": current_price,
-                "details": signal.reason
-            }
-        
-        if signal.type == SignalType.SHORT:
-            self._enter_position(current_price, "short")
-            return {
-                "action": "enter_short",
-                "price": current_price,
-                "details": signal.reason
-            }
-        
-        return {
-            "action": "none",
-            "price": current_price,
-            "details": signal.reason
-        }
+        blocked = self._is_blocked(ts)
+        if blocked is not None:
+            wait = self.state.last_loss_ts + self._cooldown_sec - ts
+            return TickResult(Action.BLOCKED, blocked, current_price, ts, wait=wait)
+        
+        if not self.detector.ready:
+            return TickResult(Action.NONE, Reason.NO_DATA, current_price, ts)
+        
+        if signal_type == SignalType.LONG:
+            if not self._enter_position(current_price, "long", ts):
+                return TickResult(Action.NONE, Reason.THIN_BOOK, current_price, ts, spikes=spikes)
+            return TickResult(
+                Action.ENTER_LONG, Reason.SPIKES, current_price, ts,
+                sl=self.state.current_sl, spikes=spikes,
+            )
+        
+        if signal_type == SignalType.SHORT:
+            if not self._enter_position(current_price, "short", ts):
+                return TickResult(Action.NONE, Reason.THIN_BOOK, current_price, ts, spikes=spikes)
+            return TickResult(
+                Action.ENTER_SHORT, Reason.SPIKES, current_price, ts,
+                sl=self.state.current_sl, spikes=spikes,
+            )
+        
+        return TickResult(Action.NONE, Reason.NO_SIGNAL, current_price, ts)
+
+    def _initial_sl(self, price: float, side: str) -> float:
+        """Начальный SL от цены входа."""
+        offset = price * (self.config.initial_sl_percent / 100)
+        return price - offset if side == "long" else price + offset
     
-    def _enter_position(self, price: float, side: str):
-        """Войти в позицию."""
-        # Исполняем (если не dry_run)
+    def _enter_position(self, price: float, side: str, ts: float = 0.0) -> bool:
+        """Войти в позицию (False — стакан слишком тонкий, вход пропущен)."""
+        amount = self.config.amount_usdt
+        if self.config.max_slippage_percent:
+            amount = self.trader.entry_amount(
+                self.config.symbol, "Buy" if side == "long" else "Sell",
+                amount, price, self.config.max_slippage_percent,
+            )
+            if not amount:
+                return False
+            if amount < self.config.amount_usdt:
+                logger.info(f"Вход урезан по стакану: {amount:.2f} из {self.config.amount_usdt:.2f} USDT")
+        
+        sl = self._initial_sl(price, side)
+        
+        # Исполняем (если не dry_run): ордер и SL — одним запросом
         if not self.config.dry_run:
-            if side == "long":
-                self.trader.enter_long(
-                    self.config.symbol,
-                    self.config.amount_usdt,
-                    self.config.leverage
-                )
-            else:
-                self.trader.enter_short(
-                    self.config.symbol,
-                    self.config.amount_usdt,
-                    self.config.leverage
-                )
+            enter = self.trader.enter_long if side == "long" else self.trader.enter_short
+            enter(
+                self.config.symbol,
+                amount,
+                self.config.leverage,
+                price=price,
+                stop_loss=sl,
+            )
         
         # Обновляем состояние
         self.state.in_position = True
         self.state.side = side
         self.state.entry_price = price
         self.state.max_price = price
-        
-        # Начальный SL
-        offset = price * (self.config.initial_sl_percent / 100)
-        if side == "long":
-            self.state.current_sl = price - offset
-        else:
-            self.state.current_sl = price + offset
-        
-        # Ставим SL на бирже (если не dry_run)
+        self.state.current_sl = sl
         if not self.config.dry_run:
-            self.trader.set_stop_loss(self.config.symbol, self.state.current_sl)
+            self.stops.reset(sl, ts, self._position_side)
+        if self.config.native_trailing:
+            self._arm_on_entry()
+        self.persist()
         
         mode = "[DRY RUN] " if self.config.dry_run else ""
         logger.info(f"{mode}Вошли {side.upper()} на {price:.2f}, SL: {self.state.current_sl:.2f}")
+        return True
     
-    def _manage_position(self, current_price: float) -> dict:
+    def _manage_position(self, current_price: float, ts: float) -> TickResult:
         """Управление открытой позицией."""
+        state = self.state
+        is_long = state.side == "long"
+        
         # Обновляем максимум/минимум
-        if self.state.side == "long":
-            if current_price > self.state.max_price:
-                self.state.max_price = current_price
+        if is_long:
+            if current_price > state.max_price:
+                state.max_price = current_price
         else:
-            if current_price < self.state.max_price:
-                self.state.max_price = current_price
+            if current_price < state.max_price:
+                state.max_price = current_price
+        
+        # Профит считаем один раз на тик
+        profit = self._calc_profit(current_price)
+        
+        # Позицию уже закрыла биржа (SL на бирже, ликвидация) — только учёт
+        positions = self.trader.positions
+        if positions is not None and not self.config.dry_run and positions.closed_on_exchange(self.config.symbol):
+            is_loss = (state.current_sl < state.entry_price) == is_long
+            self._close_position(is_loss, ts, on_exchange=True)
+            return TickResult(Action.CLOSE, Reason.SL_HIT, current_price, ts, profit=profit)
         
         # Проверяем SL
-        sl_hit = False
-        if self.state.side == "long" and current_price <= self.state.current_sl:
-            sl_hit = True
-        elif self.state.side == "short" and current_price >= self.state.current_sl:
-            sl_hit = True
+        if is_long:
+            sl_hit = current_price <= state.current_sl
+        else:
+            sl_hit = current_price >= state.current_sl
         
         if sl_hit:
-            profit = self._calc_profit(current_price)
-            is_loss = profit < 0
-            self._close_position(is_loss)
-            return {
-                "action": "close",
-                "price": current_price,
-                "details": f"SL сработал. Профит: {profit:.2f}%"
-            }
+            self._close_position(profit < 0, ts)
+            return TickResult(Action.CLOSE, Reason.SL_HIT, current_price, ts, profit=profit)
         
         # Рассчитываем новый SL
-        new_sl = self._calc_trailing_sl(current_price)
+        new_sl = self._calc_trailing_sl(profit)
+        if self.config.native_trailing:
+            new_sl = self._native_trailing(current_price, profit, new_sl, ts)
         
         # Обновляем если нужно
-        should_update = False
-        if self.state.side == "long" and new_sl > self.state.current_sl:
-            should_update = True
-        elif self.state.side == "short" and new_sl < self.state.current_sl:
-            should_update = True
+        if is_long:
+            should_update = new_sl > state.current_sl
+        else:
+            should_update = new_sl < state.current_sl
         
         if should_update:
-            self.state.current_sl = new_sl
-            # Обновляем SL на бирже (если не dry_run)
-            if not self.config.dry_run:
-                self.trader.set_stop_loss(self.config.symbol, new_sl)
-            profit = self._calc_profit(current_price)
-            mode = "[DRY RUN] " if self.config.dry_run else ""
-            return {
-                "action": "update_sl",
-                "price": current_price,
-                "details": f"{mode}SL → {new_sl:.2f} (профит: {profit:.2f}%)"
-            }
-        
-        profit = self._calc_profit(current_price)
-        return {
-            "action": "none",
-            "price": current_price,
-            "details": f"Держим. Профит: {profit:.2f}%, SL: {self.state.current_sl:.2f}"
-        }
+            state.current_sl = new_sl
+            # Трейлинг на бирже двигает SL сам — запрос не нужен
+            if not self.config.dry_run and not state.trail_distance:
+                self.stops.update(new_sl, ts)
+            self.persist()
+            return TickResult(
+                Action.UPDATE_SL, Reason.SL_MOVED, current_price, ts,
+                profit=profit, sl=new_sl,
+            )
+        
+        # Придержанный коалесцером SL — дослать, когда пришло время
+        if self.stops.pending is not None:
+            self.stops.poll(ts)
+        
+        return TickResult(
+            Action.NONE, Reason.HOLD, current_price, ts,
+            profit=profit, sl=state.current_sl,
+        )
     
     def _calc_profit(self, current_price: float) -> float:
         """Рассчитать профит в процентах."""
@@ -288,16 +496,20 @@ class Strategy:
         else:
             return self.config.trailing_loose
     
-    def _calc_trailing_sl(self, current_price: float) -> float:
-        """Рассчитать trailing stop loss."""
-        profit = self._calc_profit(current_price)
-        max_profit = self._calc_profit(self.state.max_price)
-        entry = self.state.entry_price
+    def _calc_trailing_sl(self, profit: float) -> float:
+        """
+        Рассчитать trailing stop loss.
         
+        Args:
+            profit: Текущий профит (%), уже посчитанный в _manage_position
+        """
         # Если не достигли breakeven — держим начальный
         if profit < self.config.breakeven_trigger:
             return self.state.current_sl
         
+        max_profit = self._calc_profit(self.state.max_price)
+        entry = self.state.entry_price
+        
         # Breakeven
         breakeven_sl = entry
         
@@ -331,10 +543,150 @@ class Strategy:
                 candidates.append(guaranteed_sl)
             return min(candidates)
     
-    def _close_position(self, is_loss: bool = False):
-        """Закрыть позицию."""
-        # Закрываем на бирже (если не dry_run)
+    def _trail_regime(self, max_profit: float) -> int:
+        """Режим трейлинга: тир offset (0–3) + 4 после guaranteed_trigger."""
+        if max_profit < 2:
+            tier = 0
+        elif max_profit < 5:
+            tier = 1
+        elif max_profit < 10:
+            tier = 2
+        else:
+            tier = 3
+        return tier + 4 if max_profit >= self.config.guaranteed_trigger else tier
+    
+    def _trail_distance(self, regime: int) -> float | None:
+        """
+        Расстояние трейлинга на бирже для режима.
+        
+        Offset тира, взятый от самой близкой к входу цены, которой максимум
+        может достичь в этом тире: от любого другого максимума биржевой стоп
+        тогда не дальше локального.
+        
+        Returns:
+            Расстояние в единицах цены; None — такого нет (short в последнем
+            тире: минимум цены снизу не ограничен)
+        """
+        cfg = self.config
+        tier = regime % 4
+        low, high = TRAIL_TIERS[tier]
+        offset = (cfg.trailing_tight, cfg.trailing_medium, cfg.trailing_normal, cfg.trailing_loose)[tier] / 100
+        entry = self.state.entry_price
+        
+        if self.state.side == "long":
+            return entry * (1 + max(low, cfg.breakeven_trigger) / 100) * offset
+        if high is None:
+            return None
+        return entry * (1 - high / 100) * offset
+    
+    def _arm_on_entry(self) -> None:
+        """
+        native_trailing: выставить трейлинг сразу после входа, с activePrice.
+        
+        Только если на цене включения (breakeven_trigger) биржевой стоп уже
+        не хуже breakeven — иначе трейлинг выставится на первом тике после
+        breakeven_trigger вместе с SL = breakeven (_native_trailing).
+        """
+        state = self.state
+        cfg = self.config
+        if self._trail_regime(cfg.breakeven_trigger) != 0:
+            return
+        
+        entry = state.entry_price
+        distance = self._trail_distance(0)
+        if distance is None:
+            return
+        if state.side == "long":
+            active = entry * (1 + cfg.breakeven_trigger / 100)
+        else:
+            active = entry * (1 - cfg.breakeven_trigger / 100)
+        if not cfg.dry_run:
+            # Проверяем то, что увидит биржа, — после округления
+            instrument = self.trader.instruments.get(cfg.symbol)
+            active = float(instrument.round_price(active))
+            distance = float(instrument.round_distance(distance))
+        
+        if state.side == "long":
+            safe = active - distance >= entry
+        else:
+            safe = active + distance <= entry
+        if not safe or not distance:
+            return
+        
+        if not cfg.dry_run:
+            self.trader.set_trailing_stop(cfg.symbol, distance, active_price=active)
+        state.trail_regime = 0
+        state.trail_distance = distance
+        state.trail_peak = 0.0
+    
+    def _native_trailing(self, price: float, profit: float, local_sl: float, ts: float) -> float:
+        """
+        SL при трейлинге на стороне биржи (native_trailing).
+        
+        Пока держится режим (тир offset и гарантированный минимум), SL на
+        бирже ведёт сама биржа: пик ∓ distance (_trail_distance) — не дальше
+        локального трейлинга. Стратегия повторяет этот расчёт, чтобы её SL
+        совпадал с биржевым. Смена режима — один запрос: новый distance и
+        SL не слабее локального.
+        
+        Args:
+            price: Текущая цена
+            profit: Текущий профит (%)
+            local_sl: SL по локальному расчёту (_calc_trailing_sl)
+            ts: Время цены
+        
+        Returns:
+            SL, который сейчас держит биржа
+        """
+        state = self.state
+        is_long = state.side == "long"
+        
+        if state.trail_distance:
+            if not state.trail_peak:
+                # Выставлен с activePrice — включается на breakeven_trigger
+                if profit >= self.config.breakeven_trigger:
+                    state.trail_peak = price
+            elif (price > state.trail_peak) if is_long else (price < state.trail_peak):
+                state.trail_peak = price
+            
+            if state.trail_peak:
+                if is_long:
+                    local_sl = max(local_sl, state.trail_peak - state.trail_distance)
+                else:
+                    local_sl = min(local_sl, state.trail_peak + state.trail_distance)
+        
+        # До breakeven трейлинга нет (SL держится начальный)
+        if state.trail_regime < 0 and profit < self.config.breakeven_trigger:
+            return local_sl
+        
+        regime = self._trail_regime(self._calc_profit(state.max_price))
+        if regime == state.trail_regime:
+            return local_sl
+        
+        # Новый режим: SL — не слабее локального, distance — под новый тир
+        if is_long:
+            floor = max(local_sl, state.current_sl)
+        else:
+            floor = min(local_sl, state.current_sl)
+        distance = self._trail_distance(regime) or 0.0
         if not self.config.dry_run:
+            distance = self.trader.set_trailing_stop(
+                self.config.symbol, distance, stop_loss=floor, side=self._position_side,
+            )
+            self.stops.reset(floor, ts, self._position_side)
+        
+        state.trail_regime = regime
+        state.trail_distance = distance
+        state.trail_peak = price if distance else 0.0
+        return floor
+    
+    def _close_position(self, is_loss: bool = False, ts: float | None = None, on_exchange: bool = False):
+        """Закрыть позицию (on_exchange — её уже закрыла биржа, ордер не нужен)."""
+        # Закрываем на бирже (если не dry_run)
+        if on_exchange:
+            self.trader.positions.forget(self.config.symbol)
+            logger.warning(f"Позиция {self.state.side.upper()} закрыта на бирже (SL)")
+        elif not self.config.dry_run:
             self.trader.close(self.config.symbol)
         
         mode = "[DRY RUN] " if self.config.dry_run else ""
@@ -342,21 +694,80 @@ class Strategy:
         # Если убыток — обновляем счётчики
         if is_loss:
             self.state.losses_today += 1
-            self.state.last_loss_time = datetime.now()
+            self.state.last_loss_ts = ts if ts is not None else time.time()
             logger.warning(f"{mode}Позиция закрыта с убытком. Убытков сегодня: {self.state.losses_today}/{self.config.max_losses_per_day}")
         else:
             logger.info(f"{mode}Позиция закрыта с профитом")
         
-        # Сбрасываем состояние позиции
+        self._reset_position()
+        self.stops.reset()
+        self.persist()
+    
+    @property
+    def _position_side(self) -> str:
+        """Сторона открытой позиции в терминах биржи: "Buy" / "Sell"."""
+        return "Buy" if self.state.side == "long" else "Sell"
+    
+    def _reset_position(self) -> None:
+        """Сбросить состояние позиции."""
         self.state.in_position = False
         self.state.side = ""
         self.state.entry_price = 0.0
         self.state.max_price = 0.0
         self.state.current_sl = 0.0
+        self.state.trail_regime = -1
+        self.state.trail_distance = 0.0
+        self.state.trail_peak = 0.0
+    
+    def persist(self) -> None:
+        """Записать снимок состояния (если задан store)."""
+        if self.store is not None:
+            self.store.save(self.state.snapshot())
+    
+    def _reconcile(self, position: Position | None) -> None:
+        """Сверить восстановленное состояние с позицией на бирже."""
+        state = self.state
+        symbol = self.config.symbol
+        
+        if position is None:
+            if state.in_position:
+                # Закрылась, пока бота не было, — скорее всего по SL на бирже
+                is_loss = (state.current_sl < state.entry_price) == (state.side == "long")
+                logger.warning(f"Позиция {state.side.upper()} из снимка на бирже уже закрыта")
+                if is_loss:
+                    state.losses_today += 1
+                    state.last_loss_ts = time.time()
+                self._reset_position()
+            return
+        
+        side = "long" if position.side == "Buy" else "short"
+        if not state.in_position or state.side != side:
+            # Позиция есть только на бирже — берём её, трейлинг с цены входа
+            logger.warning(f"Найдена позиция {side.upper()} {position.size} @ {position.entry_price} — подхватываем")
+            self._reset_position()
+            state.in_position = True
+            state.side = side
+            state.entry_price = position.entry_price
+            state.max_price = position.entry_price
+            state.current_sl = position.stop_loss or self._initial_sl(position.entry_price, side)
+        
+        # SL на бирже должен совпадать с состоянием (мог не дойти перед падением)
+        instrument = self.trader.instruments.get(symbol)
+        if position.stop_loss != float(instrument.round_stop(state.current_sl, position.side)):
+            logger.warning(f"SL на бирже {position.stop_loss} ≠ {state.current_sl:.2f} — выставляем")
+            self.trader.set_stop_loss(symbol, state.current_sl, side=position.side)
+        self.stops.reset(state.current_sl, time.time(), position.side)
     
     def get_status(self) -> dict:
         """Получить текущий статус стратегии."""
-        blocked, reason = self._is_blocked()
+        now = time.time()
+        blocked = self._is_blocked(now)
+        reason = ""
+        if blocked is not None:
+            reason = self.describe(TickResult(
+                Action.BLOCKED, blocked, 0.0, now,
+                wait=self.state.last_loss_ts + self._cooldown_sec - now,
+            ))
         return {
             "in_position": self.state.in_position,
             "side": self.state.side,
@@ -364,6 +775,12 @@ class Strategy:
             "current_sl": self.state.current_sl,
             "losses_today": self.state.losses_today,
             "max_losses": self.config.max_losses_per_day,
-            "blocked": blocked,
+            "blocked": blocked is not None,
             "block_reason": reason,
         }
+
+
+def next_midnight(ts: float) -> float:
+    """Ближайшая локальная полночь после ts (unix, секунды)."""
+    tomorrow = datetime.fromtimestamp(ts).date() + timedelta(days=1)
+    return datetime.combine(tomorrow, datetime.min.time()).timestamp()
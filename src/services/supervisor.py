@@ -0,0 +1,503 @@
+import multiprocessing as mp
+import os
+import queue
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection
+from pathlib import Path
+from time import perf_counter
+from typing import Callable
+
+from core.exchange import ExchangeClient, Subscription
+from core.logger import logger, setup_logging
+from .candle_store import CandleStore
+from .fetcher import Fetcher
+from .instruments import InstrumentCache
+from .orderbook import OrderBookCache
+from .positions import PositionCache
+from .state_store import StateStore
+from .strategy import Strategy, StrategyConfig
+from .trader import Trader
+
+
+# factory(номер воркера, всего воркеров) → клиент; вызывается в процессе воркера,
+# поэтому должна быть функцией уровня модуля (её передают через pickle)
+ClientFactory = Callable[[int, int], ExchangeClient]
+
+# Сообщения воркер → супервизор (одна общая очередь)
+LOAD = "load"
+REMOVED = "removed"
+
+# Команды супервизор → воркер (свой Pipe у каждого)
+ADD = "add"
+REMOVE = "remove"
+STOP = "stop"
+
+COMMAND_POLL = 0.1      # Как часто воркер проверяет команды, с
+HEALTHY_AFTER = 60.0    # Проработал столько — счётчик рестартов сбрасывается
+
+
+@dataclass
+class WorkerLoad:
+    """Нагрузка воркера за интервал отчёта."""
+    worker: int
+    pid: int
+    ts: float                   # Когда снят (unix)
+    ticks_per_sec: float
+    lag_avg: float              # С от времени тика на бирже до обработки
+    lag_max: float
+    busy: float                 # Доля времени в on_price (0..1)
+    symbols: dict[str, float] = field(default_factory=dict)  # Символ → доля времени в его on_price
+
+
+@dataclass
+class _WorkerHandle:
+    """Воркер со стороны супервизора."""
+    worker: int
+    configs: dict[str, StrategyConfig]
+    process: mp.process.BaseProcess | None = None
+    commands: Connection | None = None
+    started_at: float = 0.0
+    restarts: int = 0
+    restart_at: float | None = None     # Когда поднять упавший
+    load: WorkerLoad | None = None
+
+
+class ShardWorker:
+    """
+    Воркер: цикл событий стратегий своей доли символов.
+
+    Потоки WebSocket только кладут цены в очередь; все стратегии
+    крутятся в одном потоке воркера, по тику за раз. Раз в report_interval
+    супервизору уходит WorkerLoad; команды add/remove/stop — через Pipe.
+    """
+
+    def __init__(
+        self,
+        worker: int,
+        client: ExchangeClient,
+        reports: mp.Queue,
+        commands: Connection,
+        report_interval: float = 5.0,
+        state_dir: str | Path = "data/state",
+    ):
+        self.worker = worker
+        self.client = client
+        self.reports = reports
+        self.commands = commands
+        self.report_interval = report_interval
+        self.state_dir = Path(state_dir)
+
+        instruments = InstrumentCache(client)
+        instruments.load()
+        self.positions = PositionCache(client).start()
+        self.books = OrderBookCache(client)
+        self.trader = Trader(client, instruments, self.positions, self.books)
+        self.fetcher = Fetcher(client, store=CandleStore(client, "data/candles"))
+
+        self.strategies: dict[str, Strategy] = {}
+        self._parent = os.getppid()
+        self._subscribed: set[str] = set()
+        self._subscriptions: list[Subscription] = []
+        self._ticks: queue.SimpleQueue = queue.SimpleQueue()
+        self._running = False
+        self._reset_stats()
+
+    def run(self, configs: list[StrategyConfig]) -> None:
+        """Поднять стратегии и крутить цикл до команды stop."""
+        for config in configs:
+            self.add(config, subscribe=False)
+        self._subscribe([config.symbol for config in configs])
+
+        self._running = True
+        next_poll = next_report = time.monotonic()
+        get = self._ticks.get
+        try:
+            while self._running:
+                try:
+                    symbol, price, ts_ms = get(timeout=COMMAND_POLL)
+                except queue.Empty:
+                    pass
+                else:
+                    self._process(symbol, price, ts_ms)
+
+                now = time.monotonic()
+                if now >= next_poll:
+                    self._poll_commands()
+                    next_poll = now + COMMAND_POLL
+                if now >= next_report:
+                    self._report()
+                    next_report = now + self.report_interval
+        finally:
+            for subscription in self._subscriptions:
+                subscription.stop()
+            self.positions.stop()
+            self.books.stop()
+
+    def add(self, config: StrategyConfig, subscribe: bool = True) -> None:
+        """Взять символ: стратегия поднимается из снимка (warm_start)."""
+        symbol = config.symbol
+        store = StateStore(self.state_dir / f"{symbol}.json")
+        strategy = Strategy(self.trader, self.fetcher, config, store)
+        strategy.warm_start()
+        self.strategies[symbol] = strategy
+        if subscribe:
+            self._subscribe([symbol])
+        logger.info(f"{symbol}: запущен ({len(self.strategies)} символов)")
+
+    def remove(self, symbol: str) -> None:
+        """Отдать символ: снимок пишется до подтверждения — из него поднимется другой воркер."""
+        strategy = self.strategies.pop(symbol, None)
+        if strategy is not None:
+            strategy.persist()
+        self._symbols.pop(symbol, None)
+        logger.info(f"{symbol}: передан ({len(self.strategies)} символов)")
+
+    # === Внутреннее ===
+
+    def _subscribe(self, symbols: list[str]) -> None:
+        # Цены символа, который ушёл и вернулся, уже идут — второй раз не подписываемся
+        new = [symbol for symbol in symbols if symbol not in self._subscribed]
+        if not new:
+            return
+        self._subscriptions.append(self.client.subscribe_prices(new, self._enqueue))
+        self._subscribed.update(new)
+        self.books.add([symbol for symbol in new if self.strategies[symbol].config.max_slippage_percent])
+
+    def _enqueue(self, symbol: str, price: float, ts_ms: int) -> None:
+        self._ticks.put((symbol, price, ts_ms))
+
+    def _process(self, symbol: str, price: float, ts_ms: int) -> None:
+        strategy = self.strategies.get(symbol)
+        if strategy is None:
+            return
+
+        start = perf_counter()
+        try:
+            strategy.on_price(price, ts_ms / 1000)
+        except Exception as e:
+            logger.error(f"{symbol}: {e}")
+        spent = perf_counter() - start
+
+        lag = time.time() - ts_ms / 1000
+        self._ticks_count += 1
+        self._lag_sum += lag
+        if lag > self._lag_max:
+            self._lag_max = lag
+        self._symbols[symbol] = self._symbols.get(symbol, 0.0) + spent
+
+    def _poll_commands(self) -> None:
+        if os.getppid() != self._parent:
+            logger.error("Супервизор пропал — останавливаемся")
+            self._running = False
+            return
+        while self.commands.poll():
+            command, payload = self.commands.recv()
+            if command == ADD:
+                self.add(payload)
+            elif command == REMOVE:
+                self.remove(payload)
+                self.reports.put((REMOVED, self.worker, payload))
+            elif command == STOP:
+                self._running = False
+
+    def _report(self) -> None:
+        now = time.monotonic()
+        elapsed = max(now - self._since, 1e-9)
+        ticks = self._ticks_count
+        self.reports.put((LOAD, WorkerLoad(
+            worker=self.worker,
+            pid=os.getpid(),
+            ts=time.time(),
+            ticks_per_sec=ticks / elapsed,
+            lag_avg=self._lag_sum / ticks if ticks else 0.0,
+            lag_max=self._lag_max,
+            busy=sum(self._symbols.values()) / elapsed,
+            symbols={
+                symbol: self._symbols.get(symbol, 0.0) / elapsed
+                for symbol in self.strategies
+            },
+        )))
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
+        self._since = time.monotonic()
+        self._ticks_count = 0
+        self._lag_sum = 0.0
+        self._lag_max = 0.0
+        self._symbols: dict[str, float] = {}
+
+
+def run_worker(
+    worker: int,
+    workers: int,
+    configs: list[StrategyConfig],
+    factory: ClientFactory,
+    reports: mp.Queue,
+    commands: Connection,
+    report_interval: float,
+    state_dir: str,
+) -> None:
+    """Точка входа процесса-воркера."""
+    # Ctrl+C ловит супервизор и останавливает воркеры командой
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    setup_logging(f"worker{worker}")
+
+    client = factory(worker, workers)
+    ShardWorker(worker, client, reports, commands, report_interval, state_dir).run(configs)
+
+
+class Supervisor:
+    """
+    Супервизор: символы поделены между процессами-воркерами.
+
+    - стартовое разбиение — поровну (по числу символов)
+    - упавший воркер поднимается заново с теми же символами
+      (экспоненциальная задержка; стратегии — из снимков StateStore)
+    - воркеры присылают WorkerLoad; раз в rebalance_interval, если самый
+      загруженный занят больше самого свободного на tolerance и более,
+      один символ переезжает: старый воркер отдаёт его и подтверждает,
+      только потом новый поднимает стратегию из снимка
+
+    Каждый воркер — свой процесс (свой GIL) со своим клиентом:
+    factory получает номер воркера и их число (например, чтобы поделить
+    лимиты запросов одного API-ключа).
+    """
+
+    def __init__(
+        self,
+        configs: list[StrategyConfig],
+        factory: ClientFactory,
+        workers: int | None = None,
+        report_interval: float = 5.0,
+        rebalance_interval: float = 60.0,
+        tolerance: float = 0.1,
+        max_restart_delay: float = 60.0,
+        state_dir: str | Path = "data/state",
+    ):
+        symbols = [config.symbol for config in configs]
+        if len(set(symbols)) != len(symbols):
+            raise ValueError("Символы в конфигах повторяются")
+
+        self.factory = factory
+        self.workers = max(1, min(workers or os.cpu_count() or 1, len(configs)))
+        self.report_interval = report_interval
+        self.rebalance_interval = rebalance_interval
+        self.tolerance = tolerance              # Разница загрузки (доля CPU) для переноса
+        self.max_restart_delay = max_restart_delay
+        self.state_dir = str(state_dir)
+
+        self._context = mp.get_context("spawn")
+        self._reports = self._context.Queue()
+        self._handles = [
+            _WorkerHandle(i, {config.symbol: config for config in configs[i::self.workers]})
+            for i in range(self.workers)
+        ]
+        self._moves: dict[str, int] = {}        # Символ в пути → воркер-получатель
+        self._last_move = 0.0
+        self._stop = threading.Event()
+
+    @property
+    def loads(self) -> list[WorkerLoad | None]:
+        """Последние отчёты воркеров."""
+        return [handle.load for handle in self._handles]
+
+    @property
+    def assignment(self) -> dict[int, list[str]]:
+        """Воркер → его символы."""
+        return {handle.worker: list(handle.configs) for handle in self._handles}
+
+    def start(self) -> None:
+        """Запустить все воркеры."""
+        for handle in self._handles:
+            self._spawn(handle)
+
+    def run(self) -> None:
+        """Запустить и следить до stop() или Ctrl+C."""
+        self.start()
+        next_rebalance = time.monotonic() + self.rebalance_interval
+        try:
+            while not self._stop.is_set():
+                self._drain_reports(timeout=0.5)
+                self._check_workers()
+                if time.monotonic() >= next_rebalance:
+                    self.rebalance()
+                    next_rebalance = time.monotonic() + self.rebalance_interval
+        except KeyboardInterrupt:
+            logger.info("Supervisor stopped by user")
+        finally:
+            self.shutdown()
+
+    def stop(self) -> None:
+        """Остановить run() (можно из другого потока)."""
+        self._stop.set()
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Остановить воркеры командой; не успевшие — terminate."""
+        for handle in self._handles:
+            if handle.process is not None and handle.process.is_alive():
+                try:
+                    handle.commands.send((STOP, None))
+                except (BrokenPipeError, OSError):
+                    pass
+
+        deadline = time.monotonic() + timeout
+        for handle in self._handles:
+            if handle.process is None:
+                continue
+            handle.process.join(max(0.0, deadline - time.monotonic()))
+            if handle.process.is_alive():
+                logger.warning(f"worker{handle.worker} не остановился — terminate")
+                handle.process.terminate()
+                handle.process.join(1.0)
+
+    def rebalance(self) -> bool:
+        """
+        Перенести один символ с самого загруженного воркера на самый свободный.
+
+        Returns:
+            True, если перенос начат
+        """
+        if self._moves:
+            return False
+        # Нужны отчёты всех воркеров, снятые после прошлого переноса
+        if any(h.load is None or h.load.ts < self._last_move for h in self._handles):
+            return False
+
+        loads = {
+            h.worker: {symbol: h.load.symbols.get(symbol, 0.0) for symbol in h.configs}
+            for h in self._handles
+        }
+        move = plan_rebalance(loads, self.tolerance)
+        if move is None:
+            return False
+
+        symbol, source, target = move
+        logger.info(f"Ребаланс: {symbol} worker{source} → worker{target}")
+        self._moves[symbol] = target
+        self._last_move = time.time()
+        self._send(self._handles[source], REMOVE, symbol)
+        return True
+
+    # === Внутреннее ===
+
+    def _spawn(self, handle: _WorkerHandle) -> None:
+        receiver, sender = self._context.Pipe(duplex=False)
+        handle.commands = sender
+        handle.process = self._context.Process(
+            target=run_worker,
+            args=(
+                handle.worker, self.workers, list(handle.configs.values()), self.factory,
+                self._reports, receiver, self.report_interval, self.state_dir,
+            ),
+            name=f"worker{handle.worker}",
+            daemon=True,
+        )
+        handle.process.start()
+        receiver.close()
+        handle.started_at = time.monotonic()
+        handle.restart_at = None
+        handle.load = None
+        logger.info(f"worker{handle.worker} (pid {handle.process.pid}): {', '.join(handle.configs)}")
+
+    def _check_workers(self) -> None:
+        now = time.monotonic()
+        for handle in self._handles:
+            process = handle.process
+            if handle.restart_at is not None:
+                if now >= handle.restart_at:
+                    self._spawn(handle)
+                continue
+            if process is None or process.exitcode is None:
+                if handle.restarts and now - handle.started_at >= HEALTHY_AFTER:
+                    handle.restarts = 0
+                continue
+
+            # Воркер упал: символы, которые он отдавал, достаются получателям сразу
+            for symbol in list(self._moves):
+                if symbol in handle.configs:
+                    self._complete_move(handle.worker, symbol)
+
+            delay = min(self.max_restart_delay, 2 ** handle.restarts)
+            handle.restarts += 1
+            handle.restart_at = now + delay
+            logger.error(
+                f"worker{handle.worker} упал (код {process.exitcode}) — "
+                f"рестарт через {delay:.0f}с ({handle.restarts}-й)"
+            )
+
+    def _drain_reports(self, timeout: float) -> None:
+        try:
+            message = self._reports.get(timeout=timeout)
+        except queue.Empty:
+            return
+        while True:
+            self._on_message(message)
+            try:
+                message = self._reports.get_nowait()
+            except queue.Empty:
+                return
+
+    def _on_message(self, message: tuple) -> None:
+        if message[0] == LOAD:
+            load: WorkerLoad = message[1]
+            self._handles[load.worker].load = load
+            logger.debug(
+                f"worker{load.worker}: {load.ticks_per_sec:.1f} тиков/с, busy {load.busy:.1%}, "
+                f"lag {load.lag_avg * 1000:.0f}/{load.lag_max * 1000:.0f} ms"
+            )
+        elif message[0] == REMOVED:
+            _, worker, symbol = message
+            if symbol in self._moves:
+                self._complete_move(worker, symbol)
+
+    def _complete_move(self, source: int, symbol: str) -> None:
+        """Символ отдан: передать конфиг получателю."""
+        target = self._moves.pop(symbol)
+        config = self._handles[source].configs.pop(symbol)
+        self._handles[target].configs[symbol] = config
+        self._send(self._handles[target], ADD, config)
+
+    def _send(self, handle: _WorkerHandle, command: str, payload) -> None:
+        # Упавший воркер получит символ при рестарте (configs уже обновлены)
+        if handle.process is None or not handle.process.is_alive():
+            return
+        try:
+            handle.commands.send((command, payload))
+        except (BrokenPipeError, OSError) as e:
+            logger.warning(f"worker{handle.worker}: команда {command} не доставлена ({e})")
+
+
+def plan_rebalance(
+    loads: dict[int, dict[str, float]],
+    tolerance: float,
+) -> tuple[str, int, int] | None:
+    """
+    Какой символ перенести, чтобы выровнять загрузку.
+
+    Args:
+        loads: Воркер → {символ: доля CPU}
+        tolerance: Минимальная разница загрузки самого занятого и самого свободного
+
+    Returns:
+        (символ, откуда, куда) или None, если переносить нечего
+    """
+    if len(loads) < 2:
+        return None
+
+    totals = {worker: sum(symbols.values()) for worker, symbols in loads.items()}
+    source = max(totals, key=totals.get)
+    target = min(totals, key=totals.get)
+    gap = totals[source] - totals[target]
+    if gap < tolerance:
+        return None
+
+    # Символ, перенос которого ближе всего делит разницу пополам
+    # (и строго её уменьшает — иначе воркеры поменяются ролями)
+    candidates = [(abs(gap / 2 - load), symbol) for symbol, load in loads[source].items() if 0 < load < gap]
+    if not candidates:
+        return None
+    _, symbol = min(candidates)
+    return symbol, source, target
@@ -1,5 +1,12 @@
-from core.exchange import ExchangeClient
-from core.models import Order, Position
+import asyncio
+from decimal import Decimal
+
+from core.exchange import AsyncExchangeClient, ExchangeClient
+from core.logger import logger
+from core.models import Instrument, Order, Position
+from .instruments import InstrumentCache
+from .orderbook import OrderBookCache
+from .positions import PositionCache
 
 
 class Trader:
@@ -9,22 +16,89 @@ class Trader:
     ТОЛЬКО исполняет команды: купить, продать, закрыть.
     Конвертирует USDT в qty.
     Никакой логики принятия решений.
+    
+    Быстрый вход — один запрос к бирже:
+    - плечо запоминается по символу, повторно не выставляется
+    - qty считается от переданной цены (без get_ticker)
+    - начальный SL уходит вместе с ордером
+    
+    qty и цены округляются по параметрам инструмента (InstrumentCache).
+    
+    С PositionCache позиция читается из памяти, а закрытие — один ордер
+    без запроса списка позиций. С OrderBookCache сумму входа можно урезать
+    по стакану (entry_amount).
     """
     
-    def __init__(self, client: ExchangeClient):
+    def __init__(
+        self,
+        client: ExchangeClient,
+        instruments: InstrumentCache | None = None,
+        positions: PositionCache | None = None,
+        books: OrderBookCache | None = None,
+    ):
         self.client = client
+        self.instruments = instruments or InstrumentCache(client)
+        self.positions = positions
+        self.books = books
+        self._leverage: dict[str, int] = {}   # Последнее запрошенное плечо по символу
     
-    def _usdt_to_qty(self, symbol: str, amount_usdt: float) -> str:
-        """Конвертировать USDT в количество монет."""
-        ticker = self.client.get_ticker(symbol)
-        qty = amount_usdt / ticker.last_price
-        return f"{qty:.3f}"
+    def _usdt_to_qty(self, symbol: str, amount_usdt: float, price: float | None = None) -> str:
+        """Конвертировать USDT в количество монет (price=None — запросить тикер)."""
+        if price is None:
+            price = self.client.get_ticker(symbol).last_price
+        return _qty(self.instruments.get(symbol), amount_usdt, price)
+    
+    def _price(self, symbol: str, price: float | None) -> str | None:
+        """Цена, округлённая до шага цены."""
+        if price is None:
+            return None
+        return self.instruments.get(symbol).round_price(price)
+    
+    def _stop(self, symbol: str, price: float | None, side: str | None) -> str | None:
+        """SL, округлённый в сторону позиции side (без side — до ближайшего шага)."""
+        if price is None or side is None:
+            return self._price(symbol, price)
+        return self.instruments.get(symbol).round_stop(price, side)
+    
+    def ensure_leverage(self, symbol: str, leverage: int) -> None:
+        """Выставить плечо, если оно ещё не такое."""
+        if leverage <= 1 or self._leverage.get(symbol) == leverage:
+            return
+        self.client.set_leverage(symbol, _clamp_leverage(self.instruments.get(symbol), leverage))
+        self._leverage[symbol] = leverage
+    
+    def entry_amount(self, symbol: str, side: str, amount_usdt: float, price: float, max_slippage: float) -> float:
+        """
+        Сумма входа, урезанная так, чтобы ожидаемое проскальзывание по стакану не превысило max_slippage.
+        
+        Args:
+            side: "Buy" или "Sell"
+            price: Текущая цена (для проверки минимального объёма)
+            max_slippage: Допустимое проскальзывание, %
+        
+        Returns:
+            amount_usdt без изменений, если стакана нет; 0 — стакан
+            не пропускает даже минимальный объём
+        """
+        if self.books is None:
+            return amount_usdt
+        capacity = self.books.max_notional(symbol, side, max_slippage)
+        if capacity is None or capacity >= amount_usdt:
+            return amount_usdt
+        
+        instrument = self.instruments.get(symbol)
+        qty = Decimal(instrument.round_qty(capacity / price))
+        if qty == 0 or qty < instrument.min_qty:
+            return 0.0
+        return capacity
     
     def enter_long(
         self,
         symbol: str,
         amount_usdt: float,
         leverage: int = 1,
+        price: float | None = None,
+        stop_loss: float | None = None,
     ) -> Order:
         """
         Войти в long.
@@ -33,18 +107,22 @@ class Trader:
             symbol: Торговая пара
             amount_usdt: Сумма в USDT
             leverage: Плечо
+            price: Текущая цена для расчёта qty (None — запросить тикер)
+            stop_loss: Начальный SL (ставится вместе с ордером)
         """
-        if leverage > 1:
-            self.client.set_leverage(symbol, leverage)
-        
-        qty = self._usdt_to_qty(symbol, amount_usdt)
-        return self.client.buy(symbol, qty)
+        self.ensure_leverage(symbol, leverage)
+        qty = self._usdt_to_qty(symbol, amount_usdt, price)
+        if self.positions is not None:
+            self.positions.forget(symbol)
+        return self.client.buy(symbol, qty, self._stop(symbol, stop_loss, "Buy"))
     
     def enter_short(
         self,
         symbol: str,
         amount_usdt: float,
         leverage: int = 1,
+        price: float | None = None,
+        stop_loss: float | None = None,
     ) -> Order:
         """
         Войти в short.
@@ -53,22 +131,193 @@ class Trader:
             symbol: Торговая пара
             amount_usdt: Сумма в USDT
             leverage: Плечо
+            price: Текущая цена для расчёта qty (None — запросить тикер)
+            stop_loss: Начальный SL (ставится вместе с ордером)
         """
-        if leverage > 1:
-            self.client.set_leverage(symbol, leverage)
-        
-        qty = self._usdt_to_qty(symbol, amount_usdt)
-        return self.client.sell(symbol, qty)
+        self.ensure_leverage(symbol, leverage)
+        qty = self._usdt_to_qty(symbol, amount_usdt, price)
+        if self.positions is not None:
+            self.positions.forget(symbol)
+        return self.client.sell(symbol, qty, self._stop(symbol, stop_loss, "Sell"))
     
     def close(self, symbol: str) -> Order | None:
-        """Закрыть позицию."""
-        return self.client.close_position(symbol)
+        """Закрыть позицию (с кэшем позиций — одним запросом или без запросов, если её нет)."""
+        if self.positions is None:
+            return self.client.close_position(symbol)
+        position = self.positions.get(symbol)
+        if position is None:
+            return None
+        self.positions.forget(symbol)
+        return self.client.close_position(symbol, side=position.side)
+    
+    def set_stop_loss(self, symbol: str, price: float, side: str | None = None) -> None:
+        """
+        Установить stop loss.
+        
+        Args:
+            side: Сторона позиции ("Buy" / "Sell") — SL округляется к ней,
+                  чтобы не оказаться слабее price
+        """
+        self.client.set_stop_loss(symbol, self._stop(symbol, price, side))
     
-    def set_stop_loss(self, symbol: str, price: float) -> None:
-        """Установить stop loss."""
-        self.client.set_stop_loss(symbol, price)
+    def set_trailing_stop(
+        self,
+        symbol: str,
+        distance: float,
+        active_price: float | None = None,
+        stop_loss: float | None = None,
+        side: str | None = None,
+    ) -> float:
+        """
+        Трейлинг-стоп на бирже (distance=0 — снять).
+        
+        Args:
+            side: Сторона позиции — для округления stop_loss (см. set_stop_loss)
+        
+        Returns:
+            Расстояние, округлённое вниз до шага цены, — с ним биржа и работает
+        """
+        distance = self.instruments.get(symbol).round_distance(distance)
+        self.client.set_trailing_stop(
+            symbol, distance, self._price(symbol, active_price), self._stop(symbol, stop_loss, side),
+        )
+        return float(distance)
+    
+    def set_take_profit(self, symbol: str, price: float) -> None:
+        """Установить take profit."""
+        self.client.set_take_profit(symbol, self._price(symbol, price))
     
     def get_position(self, symbol: str) -> Position | None:
         """Получить текущую позицию."""
+        if self.positions is not None:
+            return self.positions.get(symbol)
         positions = self.client.get_positions(symbol)
         return positions[0] if positions else None
+
+
+class AsyncTrader:
+    """
+    Исполнитель сделок поверх AsyncExchangeClient.
+    
+    То же, что Trader, но независимые запросы идут одновременно:
+    если нужны и плечо, и цена — они запрашиваются параллельно.
+    """
+    
+    def __init__(self, client: AsyncExchangeClient, instruments: InstrumentCache | None = None):
+        self.client = client
+        self.instruments = instruments or InstrumentCache(client)
+        self._leverage: dict[str, int] = {}
+    
+    async def _instrument(self, symbol: str) -> Instrument:
+        return await self.instruments.get_async(symbol)
+    
+    async def _prepare(
+        self,
+        symbol: str,
+        amount_usdt: float,
+        leverage: int,
+        price: float | None,
+    ) -> str:
+        """Плечо + qty за один параллельный шаг."""
+        instrument = await self._instrument(symbol)
+        
+        steps = []
+        if leverage > 1 and self._leverage.get(symbol) != leverage:
+            steps.append(self._set_leverage(symbol, leverage))
+        if price is None:
+            steps.append(self.client.get_ticker(symbol))
+        
+        results = await asyncio.gather(*steps)
+        if price is None:
+            price = results[-1].last_price
+        
+        return _qty(instrument, amount_usdt, price)
+    
+    async def _price(self, symbol: str, price: float | None) -> str | None:
+        if price is None:
+            return None
+        return (await self._instrument(symbol)).round_price(price)
+    
+    async def _stop(self, symbol: str, price: float | None, side: str | None) -> str | None:
+        if price is None or side is None:
+            return await self._price(symbol, price)
+        return (await self._instrument(symbol)).round_stop(price, side)
+    
+    async def _set_leverage(self, symbol: str, leverage: int) -> None:
+        await self.client.set_leverage(symbol, _clamp_leverage(self.instruments.lookup(symbol), leverage))
+        self._leverage[symbol] = leverage
+    
+    async def enter_long(
+        self,
+        symbol: str,
+        amount_usdt: float,
+        leverage: int = 1,
+        price: float | None = None,
+        stop_loss: float | None = None,
+    ) -> Order:
+        """Войти в long."""
+        qty = await self._prepare(symbol, amount_usdt, leverage, price)
+        return await self.client.buy(symbol, qty, await self._stop(symbol, stop_loss, "Buy"))
+    
+    async def enter_short(
+        self,
+        symbol: str,
+        amount_usdt: float,
+        leverage: int = 1,
+        price: float | None = None,
+        stop_loss: float | None = None,
+    ) -> Order:
+        """Войти в short."""
+        qty = await self._prepare(symbol, amount_usdt, leverage, price)
+        return await self.client.sell(symbol, qty, await self._stop(symbol, stop_loss, "Sell"))
+    
+    async def close(self, symbol: str) -> Order | None:
+        """Закрыть позицию."""
+        return await self.client.close_position(symbol)
+    
+    async def set_stop_loss(self, symbol: str, price: float, side: str | None = None) -> None:
+        """Установить stop loss (side — см. Trader.set_stop_loss)."""
+        await self.client.set_stop_loss(symbol, await self._stop(symbol, price, side))
+    
+    async def set_trailing_stop(
+        self,
+        symbol: str,
+        distance: float,
+        active_price: float | None = None,
+        stop_loss: float | None = None,
+        side: str | None = None,
+    ) -> float:
+        """Трейлинг-стоп на бирже; возвращает округлённое расстояние."""
+        distance = (await self._instrument(symbol)).round_distance(distance)
+        await self.client.set_trailing_stop(
+            symbol, distance, await self._price(symbol, active_price), await self._stop(symbol, stop_loss, side),
+        )
+        return float(distance)
+    
+    async def set_take_profit(self, symbol: str, price: float) -> None:
+        """Установить take profit."""
+        await self.client.set_take_profit(symbol, await self._price(symbol, price))
+    
+    async def get_position(self, symbol: str) -> Position | None:
+        """Получить текущую позицию."""
+        positions = await self.client.get_positions(symbol)
+        return positions[0] if positions else None
+
+
+def _qty(instrument: Instrument, amount_usdt: float, price: float) -> str:
+    """qty на amount_usdt, округлённое вниз до шага лота."""
+    qty = instrument.round_qty(amount_usdt / price)
+    if Decimal(qty) < instrument.min_qty or Decimal(qty) == 0:
+        raise ValueError(
+            f"{instrument.symbol}: {amount_usdt} USDT меньше минимального объёма "
+            f"({instrument.min_qty} при цене {price})"
+        )
+    return qty
+
+
+def _clamp_leverage(instrument: Instrument, leverage: int) -> int:
+    """Плечо, не превышающее максимум инструмента."""
+    if leverage > instrument.max_leverage:
+        logger.warning(f"{instrument.symbol}: плечо {leverage} > {instrument.max_leverage:g}, используем максимум")
+        return int(instrument.max_leverage)
+    return leverage
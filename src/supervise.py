@@ -0,0 +1,52 @@
+import sys
+from dataclasses import replace
+sys.path.insert(0, str(__file__).rsplit("/", 1)[0])
+
+from core import settings, BybitClient, InstrumentedClient, RateLimitedClient, logger
+from core.exchange import RateLimiter
+from services import StrategyConfig, Supervisor
+
+
+# Пары для торговли — делятся между процессами-воркерами
+SYMBOLS = [
+    "BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT", "DOGEUSDT",
+    "BNBUSDT", "ADAUSDT", "AVAXUSDT", "LINKUSDT", "DOTUSDT",
+]
+
+
+def bybit_client(worker: int, workers: int) -> RateLimitedClient:
+    """
+    Клиент воркера (вызывается в его процессе).
+
+    Лимиты запросов — на API-ключ, а ключ у всех воркеров один:
+    каждому достаётся своя доля (и от лимитов из заголовков ответов тоже).
+    """
+    limiter = RateLimiter(share=1 / workers)
+    return RateLimitedClient(InstrumentedClient(BybitClient(
+        api_key=settings.api_key,
+        api_secret=settings.api_secret,
+        testnet=settings.testnet,
+    )), limiter)
+
+
+def main():
+    if not settings.api_key or not settings.api_secret:
+        logger.error("Установи BYBIT_API_KEY и BYBIT_API_SECRET в .env")
+        return
+
+    base = StrategyConfig(
+        amount_usdt=100.0,
+        entry_spike_percent=0.3,
+        spikes_to_enter=2,
+        # ⚠️ DRY RUN MODE - БЕЗ РЕАЛЬНЫХ СДЕЛОК
+        dry_run=True,
+    )
+    configs = [replace(base, symbol=symbol) for symbol in SYMBOLS]
+
+    supervisor = Supervisor(configs, bybit_client)
+    logger.info(f"🤖 SUPERVISOR: {len(configs)} пар на {supervisor.workers} воркерах")
+    supervisor.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Фейковые клиенты биржи для тестов: запоминают каждый вызов.
+"""
+from decimal import Decimal
+
+from core.models import Instrument, Order
+
+
+INSTRUMENT = Instrument("BTCUSDT", Decimal("0.001"), Decimal("0.001"), Decimal("0.1"), 100.0)
+
+
+class RecordingClient:
+    """
+    Клиент, который записывает вызовы в calls: (метод, args, kwargs).
+
+    Ордеры «создаются» сразу, позиций нет; любой другой метод
+    возвращает None — но тоже записывается.
+    """
+
+    def __init__(self, instruments: list[Instrument] | None = None):
+        self.calls: list[tuple[str, tuple, dict]] = []
+        self.instruments = instruments or [INSTRUMENT]
+
+    def names(self) -> list[str]:
+        return [name for name, _, _ in self.calls]
+
+    def get_instruments(self) -> list[Instrument]:
+        self.calls.append(("get_instruments", (), {}))
+        return self.instruments
+
+    def buy(self, symbol: str, qty: str, stop_loss=None) -> Order:
+        self.calls.append(("buy", (symbol, qty, stop_loss), {}))
+        return Order("1", symbol, "Buy", qty, "created")
+
+    def sell(self, symbol: str, qty: str, stop_loss=None) -> Order:
+        self.calls.append(("sell", (symbol, qty, stop_loss), {}))
+        return Order("2", symbol, "Sell", qty, "created")
+
+    def get_positions(self, symbol: str) -> list:
+        self.calls.append(("get_positions", (symbol,), {}))
+        return []
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+        return record
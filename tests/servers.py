@@ -0,0 +1,204 @@
+"""
+Локальные заглушки биржи для тестов: WebSocket и HTTP/1.1 на стандартной
+библиотеке, каждое соединение — в своём потоке.
+"""
+import base64
+import hashlib
+import json
+import queue
+import socket
+import struct
+import threading
+from typing import Callable
+
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class _Server:
+    """Слушает 127.0.0.1 на свободном порту, соединения — в handler."""
+
+    def __init__(self, handler: Callable):
+        self.handler = handler
+        self.connections = 0
+        self._sock = socket.socket()
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen()
+        self.port = self._sock.getsockname()[1]
+        self._closed = False
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self) -> None:
+        while not self._closed:
+            try:
+                sock, _ = self._sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._serve, args=(sock,), daemon=True).start()
+
+    def _serve(self, sock: socket.socket) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        self._closed = True
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class WSConnection:
+    """Серверная сторона одного WebSocket-соединения."""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.file = sock.makefile("rb")
+
+    def recv_json(self) -> dict | None:
+        """Следующее текстовое сообщение (ping-фреймы пропускаются); None — клиент закрыл."""
+        while True:
+            header = self.file.read(2)
+            if len(header) < 2:
+                return None
+            opcode = header[0] & 0x0F
+            length = header[1] & 0x7F
+            if length == 126:
+                length = struct.unpack(">H", self.file.read(2))[0]
+            elif length == 127:
+                length = struct.unpack(">Q", self.file.read(8))[0]
+            mask = self.file.read(4) if header[1] & 0x80 else b"\0\0\0\0"
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(self.file.read(length)))
+            if opcode == 0x8:
+                # Ответный close, как у настоящего сервера
+                self.sock.sendall(b"\x88\x00")
+                return None
+            if opcode == 0x1:
+                return json.loads(payload)
+
+    def send_json(self, message: dict) -> None:
+        data = json.dumps(message).encode()
+        if len(data) < 126:
+            header = struct.pack(">BB", 0x81, len(data))
+        elif len(data) < 1 << 16:
+            header = struct.pack(">BBH", 0x81, 126, len(data))
+        else:
+            header = struct.pack(">BBQ", 0x81, 127, len(data))
+        self.sock.sendall(header + data)
+
+    def close(self) -> None:
+        """Закрыть соединение со стороны сервера."""
+        try:
+            self.sock.sendall(b"\x88\x00")
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class WSServer(_Server):
+    """
+    WebSocket-сервер: handler(conn: WSConnection) на каждое соединение.
+
+    Все сообщения клиентов дублируются в очередь messages:
+    (номер соединения, сообщение).
+    """
+
+    def __init__(self, handler: Callable[[WSConnection], None]):
+        self.messages: queue.Queue = queue.Queue()
+        super().__init__(handler)
+
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}"
+
+    def _serve(self, sock: socket.socket) -> None:
+        request = b""
+        while b"\r\n\r\n" not in request:
+            chunk = sock.recv(4096)
+            if not chunk:
+                return
+            request += chunk
+        key = next(
+            line.split(":", 1)[1].strip()
+            for line in request.decode().split("\r\n")
+            if line.lower().startswith("sec-websocket-key")
+        )
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        sock.sendall((
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode())
+
+        conn = WSConnection(sock)
+        conn.number = self.connections
+        original = conn.recv_json
+
+        def recv_json():
+            message = original()
+            if message is not None:
+                self.messages.put((conn.number, message))
+            return message
+
+        conn.recv_json = recv_json
+        try:
+            self.handler(conn)
+        except OSError:
+            pass
+        finally:
+            conn.sock.close()
+
+
+class HTTPServer(_Server):
+    """
+    HTTP/1.1 keep-alive сервер: handler(номер соединения, метод, путь, тело) → (dict, keep_alive).
+
+    keep_alive: True — держать соединение, False — ответ с "Connection: close",
+    None — закрыть молча после ответа (как сервер, закрывающий простаивающие).
+    handler может вернуть None — тогда соединение закрывается без ответа
+    (как обрыв после получения запроса). Запросы — в requests:
+    (номер соединения, метод, путь, тело).
+    """
+
+    def __init__(self, handler: Callable[[int, str, str, bytes], tuple[dict, bool | None] | None]):
+        self.requests: list[tuple[int, str, str, bytes]] = []
+        super().__init__(handler)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def _serve(self, sock: socket.socket) -> None:
+        number = self.connections
+        file = sock.makefile("rb")
+        try:
+            while True:
+                line = file.readline()
+                if not line:
+                    return
+                method, path, _ = line.decode().split()
+                headers = {}
+                while (line := file.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = file.read(int(headers.get("content-length", 0)))
+                self.requests.append((number, method, path, body))
+
+                result = self.handler(number, method, path, body)
+                if result is None:
+                    return
+                payload, keep_alive = result
+                data = json.dumps(payload).encode()
+                head = f"HTTP/1.1 200 OK\r\nContent-Length: {len(data)}\r\n"
+                if keep_alive is False:
+                    head += "Connection: close\r\n"
+                sock.sendall(head.encode() + b"\r\n" + data)
+                if not keep_alive:
+                    return
+        except OSError:
+            pass
+        finally:
+            sock.close()
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from core.models import SignalType
+from services.analyzer import SIGNAL_CODES, Analyzer, AnalyzerConfig
+
+
+FIXED = [
+    AnalyzerConfig(spike_percent=spike, spikes_to_enter=k)
+    for spike in (0.1, 0.3, 0.5)
+    for k in (1, 2, 3)
+]
+VOLATILITY = [
+    AnalyzerConfig(spike_volatility=sigma, volatility_window=window, spikes_to_enter=k)
+    for sigma, window in ((1.0, 5), (2.0, 20), (3.0, 50))
+    for k in (1, 2, 3)
+]
+
+
+def config_id(config: AnalyzerConfig) -> str:
+    if config.spike_volatility:
+        return f"{config.spike_volatility:g}σ/{config.volatility_window}x{config.spikes_to_enter}"
+    return f"{config.spike_percent}%x{config.spikes_to_enter}"
+
+
+def random_histories(rng: np.random.Generator, config: AnalyzerConfig, rows: int) -> np.ndarray:
+    """
+    Истории цен вокруг порога: обычные, плоские участки (σ = 0),
+    NaN в случайных местах (нет цены).
+    """
+    window = config.history + int(rng.integers(0, 5))
+    scale = config.spike_percent / 100 if not config.spike_volatility else 0.002
+    steps = rng.normal(0, scale, (rows, window))
+    # Серии скачков в одну сторону в конце окна — чтобы сигналы были
+    tail = rng.random(rows) < 0.4
+    steps[tail, -config.spikes_to_enter:] = (
+        np.sign(rng.normal(size=(tail.sum(), 1))) * rng.choice([0.99, 1.0, 1.5, 4.0]) * scale * 3
+    )
+    prices = 100 * np.cumprod(1 + steps, axis=1)
+
+    flat = rng.random(rows) < 0.1
+    prices[flat, :-config.spikes_to_enter] = 100.0
+    holes = rng.random(rows) < 0.1
+    prices[holes, rng.integers(0, window, holes.sum())] = np.nan
+    return prices
+
+
+@pytest.mark.parametrize("config", FIXED + VOLATILITY, ids=config_id)
+@pytest.mark.parametrize("seed", range(5))
+def test_detect_batch_matches_detect(config, seed):
+    rng = np.random.default_rng(seed)
+    analyzer = Analyzer(config)
+    prices = random_histories(rng, config, 200)
+
+    types, spikes = analyzer.detect_batch(prices)
+    expected = [analyzer.detect(list(row)) for row in prices]
+
+    assert [SIGNAL_CODES[int(t)] for t in types] == [signal for signal, _ in expected]
+    assert list(spikes) == [count for _, count in expected]
+    assert (types != 0).any() and (types == 0).any()
+
+
+@pytest.mark.parametrize("config", [FIXED[4], VOLATILITY[4]], ids=config_id)
+def test_check_entry_batch_matches_check_entry(config):
+    rng = np.random.default_rng(7)
+    analyzer = Analyzer(config)
+    prices = random_histories(rng, config, 100)
+    symbols = [f"S{i}USDT" for i in range(len(prices))]
+
+    batch = analyzer.check_entry_batch(prices, symbols)
+    for i, row in enumerate(prices):
+        signal = analyzer.check_entry(list(row), symbols[i])
+        assert batch.signal_type(i) == signal.type
+        assert batch.prices[i] == signal.price or (np.isnan(batch.prices[i]) and np.isnan(signal.price))
+    assert set(batch.hits()) == {i for i in range(len(prices)) if batch.signal_type(i) != SignalType.NONE}
+
+
+@pytest.mark.parametrize("config", [FIXED[4], VOLATILITY[4]], ids=config_id)
+def test_short_and_nan_rows(config):
+    analyzer = Analyzer(config)
+    short = np.full((3, config.history - 1), 100.0)
+    types, spikes = analyzer.detect_batch(short)
+    assert not types.any() and not spikes.any()
+    assert analyzer.detect(list(short[0])) == (SignalType.NONE, 0)
+
+    nan = np.full((2, config.history), np.nan)
+    types, _ = analyzer.detect_batch(nan)
+    assert not types.any()
+    assert analyzer.detect(list(nan[0])) == (SignalType.NONE, 0)
+
+    with pytest.raises(ValueError):
+        analyzer.check_entry_batch(short, ["A"])
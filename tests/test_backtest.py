@@ -0,0 +1,79 @@
+import random
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from services import Action, Backtester, Strategy, StrategyConfig
+
+
+@pytest.fixture(params=["UTC", "America/New_York", "Asia/Kolkata"])
+def timezone(request, monkeypatch):
+    """Локальная зона процесса: день лимита убытков — до локальной полуночи."""
+    monkeypatch.setenv("TZ", request.param)
+    time.tzset()
+    yield request.param
+    monkeypatch.undo()
+    time.tzset()
+
+
+def replay(config: StrategyConfig, ts: np.ndarray, close: np.ndarray) -> list[tuple[int, int, str, float]]:
+    """Прогнать цены через Strategy (dry_run) тик за тиком: сделки как в Backtester."""
+    strategy = Strategy(SimpleNamespace(positions=None), None, config)
+    trades = []
+    entry = None
+    for t, price in zip(ts, close):
+        result = strategy.on_price(float(price), t / 1000)
+        if result.action in (Action.ENTER_LONG, Action.ENTER_SHORT):
+            entry = (int(t), strategy.state.side)
+        elif result.action is Action.CLOSE:
+            trades.append((entry[0], int(t), entry[1], round(result.profit, 9)))
+    return trades
+
+
+def random_config(rnd: random.Random) -> StrategyConfig:
+    return StrategyConfig(
+        entry_spike_percent=rnd.choice([0.2, 0.3, 0.5]),
+        spikes_to_enter=rnd.choice([1, 2, 3]),
+        cooldown_minutes=rnd.choice([0, 15, 120]),
+        max_losses_per_day=rnd.choice([1, 2, 100]),
+        guaranteed_trigger=rnd.choice([1.0, 2.0, 10.0]),
+        guaranteed_min=0.5,
+        breakeven_trigger=rnd.choice([0.1, 0.3]),
+        trailing_tight=rnd.choice([0.3, 0.5]),
+        spike_volatility=rnd.choice([0.0, 0.0, 1.5]),
+        volatility_window=rnd.choice([20, 100]),
+    )
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_trades_match_strategy(seed, timezone):
+    rnd = np.random.default_rng(seed)
+    n = 15_000       # ~10 дней минуток: несколько смен дня для лимита убытков
+    close = 100 * np.exp(np.cumsum(rnd.normal(0, 0.004, n)))
+    ts = 1_700_000_000_000 + np.arange(n, dtype=np.int64) * 60_000
+    config = random_config(random.Random(seed))
+
+    result = Backtester(config).run(ts, close)
+    got = [(t.entry_ts, t.exit_ts, t.side, round(t.profit_percent, 9)) for t in result.trades]
+    assert got == replay(config, ts, close)
+    assert len(got) > 0
+
+
+def test_daily_limit_resets_at_local_midnight(timezone):
+    # Каждые 30 минут — убыточная сделка; лимит 1 в день: по сделке на локальные сутки
+    config = StrategyConfig(
+        entry_spike_percent=0.5, spikes_to_enter=1, cooldown_minutes=0,
+        max_losses_per_day=1, breakeven_trigger=100,
+    )
+    pattern = [100.0, 100.0, 101.0, 100.0] + [100.0] * 26
+    close = np.array(pattern * 48 * 3)
+    ts = 1_700_000_000_000 + np.arange(len(close), dtype=np.int64) * 60_000
+
+    result = Backtester(config).run(ts, close)
+    assert [(t.entry_ts, t.exit_ts) for t in result.trades] == [
+        (entry, exit) for entry, exit, _, _ in replay(config, ts, close)
+    ]
+    days = {time.localtime(t.entry_ts / 1000)[:3] for t in result.trades}
+    assert len(days) == len(result.trades) == 4
@@ -0,0 +1,153 @@
+import random
+
+import numpy as np
+import pytest
+
+from core.exchange.bybit import BybitClient
+from core.models import CandleFrame
+from services import CandleAggregator, Fetcher
+from services.candle_aggregator import BUCKET_OFFSET_MS
+from services.candle_store import INTERVAL_MS
+
+
+DAY_MS = 86_400_000
+T0 = 1_700_000_000_000 - 1_700_000_000_000 % DAY_MS      # Полночь UTC
+INTERVALS = ("1", "5", "15", "60", "240", "D", "W")
+
+
+@pytest.fixture(scope="module")
+def trades() -> list[tuple[int, float, float]]:
+    """Сделки за ~3 недели: пачки и тихие промежутки на часы."""
+    rnd = random.Random(7)
+    result = []
+    ts, price = T0, 100.0
+    while ts < T0 + 22 * DAY_MS:
+        ts += int(rnd.expovariate(1 / (15_000 if rnd.random() < 0.998 else 5_000_000)))
+        price *= 1 + rnd.gauss(0, 0.0005)
+        result.append((ts, price, rnd.uniform(0.001, 2)))
+    return result
+
+
+@pytest.fixture(scope="module")
+def aggregator(trades) -> CandleAggregator:
+    aggregator = CandleAggregator(INTERVALS, capacity=40_000)
+    for ts, price, qty in trades:
+        aggregator.on_trade("X", price, ts, qty)
+    return aggregator
+
+
+def resample(trades, step: int, offset: int = 0) -> np.ndarray:
+    """Эталон: свечи [ts, o, h, l, c, v], пустые бакеты — плоские по прошлому close."""
+    rows: dict[int, list] = {}
+    for ts, price, qty in trades:
+        bucket = ts - (ts - offset) % step
+        row = rows.get(bucket)
+        if row is None:
+            rows[bucket] = [bucket, price, price, price, price, qty]
+        else:
+            row[2] = max(row[2], price)
+            row[3] = min(row[3], price)
+            row[4] = price
+            row[5] += qty
+
+    result = []
+    for bucket in sorted(rows):
+        while result and result[-1][0] + step < bucket:
+            close = result[-1][4]
+            result.append([result[-1][0] + step, close, close, close, close, 0.0])
+        result.append(rows[bucket])
+    return np.array(result)
+
+
+def to_frame(rows: np.ndarray) -> CandleFrame:
+    return CandleFrame(rows[:, 0].astype(np.int64), *(rows[:, j].copy() for j in range(1, 6)))
+
+
+@pytest.mark.parametrize("interval", INTERVALS)
+def test_matches_resample(trades, aggregator, interval):
+    expected = resample(trades, INTERVAL_MS[interval], BUCKET_OFFSET_MS.get(interval, 0))
+    got = aggregator.candles("X", interval, partial=True)
+
+    assert len(got) == len(expected)
+    assert (got.timestamp == expected[:, 0].astype(np.int64)).all()
+    for j, name in enumerate(("open", "high", "low", "close", "volume"), 1):
+        assert np.allclose(getattr(got, name), expected[:, j], rtol=0, atol=1e-9), name
+
+    assert len(aggregator.candles("X", interval)) == len(expected) - 1
+    assert aggregator.closed_count("X", interval) == len(expected) - 1
+    current = aggregator.current("X", interval)
+    assert current.close == expected[-1, 4] and current.high == expected[-1, 2]
+    tail = aggregator.candles("X", interval, limit=5, partial=True)
+    assert len(tail) == min(5, len(expected)) and tail.timestamp[-1] == expected[-1, 0]
+
+
+def test_weekly_buckets_start_on_monday(aggregator):
+    weekly = aggregator.candles("X", "W", partial=True)
+    # 1970-01-01 — четверг: понедельник = 4-й день недели от эпохи
+    assert ((weekly.timestamp // DAY_MS) % 7 == 4).all()
+
+
+def test_ring_keeps_last_capacity(trades, aggregator):
+    small = CandleAggregator(("1",), capacity=50)
+    for ts, price, qty in trades:
+        small.on_trade("X", price, ts, qty)
+
+    full = aggregator.candles("X", "1")
+    tail = small.candles("X", "1")
+    assert len(tail) == 50
+    assert (tail.timestamp == full.timestamp[-50:]).all()
+    assert np.allclose(tail.close, full.close[-50:])
+
+
+def test_seed_then_stream(trades, aggregator):
+    split = len(trades) // 2
+    seeded = CandleAggregator(("1",))
+    seeded.seed("X", "1", to_frame(resample(trades[:split], 60_000)), now_ms=trades[split][0])
+    for ts, price, qty in trades[split:]:
+        seeded.on_trade("X", price, ts, qty)
+
+    got = seeded.candles("X", "1", partial=True)
+    expected = aggregator.candles("X", "1", limit=len(got), partial=True)
+    assert (got.timestamp == expected.timestamp).all()
+    assert np.allclose(got.volume, expected.volume)
+    assert np.allclose(got.high, expected.high)
+
+
+def test_late_trade_ignored():
+    aggregator = CandleAggregator(("1",))
+    aggregator.on_trade("X", 100, T0 + 61_000)
+    aggregator.on_trade("X", 105, T0 + 59_000)    # Свеча уже закрыта
+    aggregator.on_trade("X", 101, T0 + 62_000)
+    assert aggregator.current("X", "1").high == 101
+
+
+def test_fetcher_serves_candles_from_memory(trades, aggregator):
+    class Client:
+        calls = 0
+
+        def get_klines(self, symbol, interval, limit=100, start=None, end=None):
+            Client.calls += 1
+            return aggregator.candles("X", interval, limit=limit)
+
+        def subscribe_prices(self, symbols, callback, channel="tickers"):
+            self.callback = callback
+            return self
+
+    fetcher = Fetcher(Client(), aggregator=CandleAggregator(("1", "5", "D")))
+    subscription = fetcher.track(["X"])
+    assert Client.calls == 3                      # REST только для seed
+
+    assert len(fetcher.get_candles("X", "5", limit=100)) == 100
+    assert Client.calls == 3
+    fetcher.get_candles("X", "D", limit=100)      # Столько дней в памяти нет
+    assert Client.calls == 4
+
+    subscription.callback("X", 123.0, trades[-1][0] + 3_600_000)
+    assert fetcher.aggregator.current("X", "1").close == 123.0
+
+
+def test_bybit_trade_handler():
+    seen = []
+    handler = BybitClient._trade_qty_handler(lambda *args: seen.append(args))
+    handler({"data": [{"s": "BTCUSDT", "p": "100.5", "v": "0.3", "T": 1700000000000}]})
+    assert seen == [("BTCUSDT", 100.5, 1700000000000, 0.3)]
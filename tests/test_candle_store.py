@@ -0,0 +1,120 @@
+import json
+import time
+
+import numpy as np
+import pytest
+
+from core.models import CandleFrame
+from services import CandleStore
+from services import candle_store as candle_store_module
+
+
+STEP = 60_000
+
+
+class FakeKlines:
+    """get_klines как у Bybit: до limit самых новых свечей диапазона, цены — функция времени."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_klines(self, symbol, interval, limit=100, start=None, end=None):
+        self.calls += 1
+        first = max(start, end - (limit - 1) * STEP)
+        ts = np.arange(-(-first // STEP) * STEP, end + 1, STEP, dtype=np.int64)
+        return candles_at(ts)
+
+
+def candles_at(ts: np.ndarray) -> CandleFrame:
+    minute = ts / STEP
+    return CandleFrame(ts, minute, minute + 0.5, minute - 0.5, minute + 0.25, np.full(len(ts), 2.0))
+
+
+def assert_aligned(frame: CandleFrame) -> None:
+    """Каждая строка — одна и та же свеча во всех колонках, без дыр."""
+    expected = candles_at(frame.timestamp)
+    for name in CandleFrame.COLUMNS:
+        assert np.array_equal(getattr(frame, name), getattr(expected, name)), name
+    assert (np.diff(frame.timestamp) == STEP).all()
+
+
+@pytest.fixture
+def now_closed() -> int:
+    return (int(time.time() * 1000) // STEP) * STEP - STEP
+
+
+def test_sync_append_and_prepend(tmp_path, now_closed):
+    client = FakeKlines()
+    store = CandleStore(client, tmp_path)
+    store.sync("BTCUSDT", "1", start=now_closed - 1500 * STEP)
+    assert_aligned(store.read("BTCUSDT", "1"))
+
+    store.sync("BTCUSDT", "1", start=now_closed - 4000 * STEP)
+    frame = store.read("BTCUSDT", "1")
+    assert_aligned(frame)
+    assert frame.timestamp[0] == now_closed - 4000 * STEP
+    assert store.coverage("BTCUSDT", "1")[0] == now_closed - 4000 * STEP
+
+    # Файлы прошлого поколения удалены
+    path = tmp_path / "BTCUSDT" / "1"
+    assert sorted(p.name for p in path.glob("timestamp.*")) == ["timestamp.g1.i8"]
+
+
+def test_crash_during_prepend_keeps_columns_aligned(tmp_path, now_closed, monkeypatch):
+    store = CandleStore(FakeKlines(), tmp_path)
+    store.sync("BTCUSDT", "1", start=now_closed - 500 * STEP)
+    before = store.read("BTCUSDT", "1")
+    before = CandleFrame(*(np.array(getattr(before, name)) for name in CandleFrame.COLUMNS))
+
+    real_write = candle_store_module._atomic_write
+    written = []
+
+    def crash_on_third(file, data):
+        written.append(file.name)
+        if len(written) == 3:
+            raise OSError("сбой диска")
+        real_write(file, data)
+
+    monkeypatch.setattr(candle_store_module, "_atomic_write", crash_on_third)
+    with pytest.raises(OSError):
+        store.sync("BTCUSDT", "1", start=now_closed - 2000 * STEP)
+    monkeypatch.setattr(candle_store_module, "_atomic_write", real_write)
+    assert written[:2] == ["timestamp.g1.i8", "open.g1.f8"]
+
+    # После «рестарта» — прежние данные, колонки не разъехались
+    reopened = CandleStore(FakeKlines(), tmp_path)
+    frame = reopened.read("BTCUSDT", "1")
+    assert_aligned(frame)
+    assert np.array_equal(frame.timestamp[:len(before)], before.timestamp)
+
+    # Повтор докачивает начало
+    reopened.sync("BTCUSDT", "1", start=now_closed - 2000 * STEP)
+    frame = reopened.read("BTCUSDT", "1")
+    assert_aligned(frame)
+    assert frame.timestamp[0] == now_closed - 2000 * STEP
+
+
+def test_reads_store_without_generation(tmp_path, now_closed):
+    store = CandleStore(FakeKlines(), tmp_path)
+    store.sync("BTCUSDT", "1", start=now_closed - 100 * STEP)
+    meta_file = tmp_path / "BTCUSDT" / "1" / "meta.json"
+    meta = json.loads(meta_file.read_text())
+    del meta["generation"]
+    meta_file.write_text(json.dumps(meta))
+
+    assert_aligned(store.read("BTCUSDT", "1"))
+    store.sync("BTCUSDT", "1", start=now_closed - 300 * STEP)
+    assert_aligned(store.read("BTCUSDT", "1"))
+
+
+def test_reads_do_not_create_directories(tmp_path, now_closed):
+    store = CandleStore(FakeKlines(), tmp_path / "store")
+
+    assert len(store.read("ETHUSDT", "1")) == 0
+    assert len(store.tail("ETHUSDT", "1", 10)) == 0
+    assert store.coverage("ETHUSDT", "1") is None
+    assert not (tmp_path / "store").exists()
+
+    store.sync("ETHUSDT", "1", start=now_closed - 10 * STEP)
+    assert len(store.read("ETHUSDT", "1")) == 11
+    assert [p.name for p in (tmp_path / "store").iterdir()] == ["ETHUSDT"]
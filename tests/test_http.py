@@ -0,0 +1,178 @@
+import asyncio
+import json
+
+import pytest
+from pybit.exceptions import InvalidRequestError
+
+from core.exchange import AsyncBybitClient, BybitClient
+from core.exchange.bybit import DUPLICATE_ORDER
+from core.exchange.http import AsyncHTTPPool
+
+from .servers import HTTPServer
+
+
+OK = {"retCode": 0, "retMsg": "OK", "result": {"orderId": "abc"}}
+
+
+def ok(number, method, path, body):
+    return OK, True
+
+
+def test_keep_alive_reuses_connection():
+    async def main(url):
+        pool = AsyncHTTPPool(url)
+        for _ in range(5):
+            response = await pool.request("GET", "/v5/market/time")
+            assert response.status == 200 and json.loads(response.body) == OK
+        await pool.close()
+        return pool.opened
+
+    with HTTPServer(ok) as server:
+        assert asyncio.run(main(server.url)) == 1
+        assert server.connections == 1 and len(server.requests) == 5
+
+
+def test_connection_close_header():
+    def handler(number, method, path, body):
+        return OK, False
+
+    async def main(url):
+        pool = AsyncHTTPPool(url)
+        for _ in range(3):
+            await pool.request("POST", "/v5/order/create", b"{}")
+        await pool.close()
+        return pool.opened
+
+    with HTTPServer(handler) as server:
+        assert asyncio.run(main(server.url)) == 3
+        assert [n for n, *_ in server.requests] == [1, 2, 3]
+
+
+def test_idle_connection_closed_by_server_is_dropped():
+    # Сервер молча закрывает соединение после ответа (таймаут keep-alive)
+    def handler(number, method, path, body):
+        return OK, None
+
+    async def main(url):
+        pool = AsyncHTTPPool(url)
+        await pool.request("GET", "/a")
+        await asyncio.sleep(0.05)       # FIN доходит до простаивающего соединения
+        await pool.request("POST", "/v5/order/create", b"{}")
+        await pool.close()
+        return pool.opened
+
+    with HTTPServer(handler) as server:
+        assert asyncio.run(main(server.url)) == 2
+        # POST ушёл один раз — сразу на новое соединение
+        assert [(n, method) for n, method, *_ in server.requests] == [(1, "GET"), (2, "POST")]
+
+
+def drop_second_on_first(number, method, path, body):
+    """Второй запрос на первом соединении: сервер принял его и оборвал соединение."""
+    drop_second_on_first.seen.setdefault(number, 0)
+    drop_second_on_first.seen[number] += 1
+    if number == 1 and drop_second_on_first.seen[number] == 2:
+        return None
+    return OK, True
+
+
+@pytest.fixture
+def dropping_server():
+    drop_second_on_first.seen = {}
+    with HTTPServer(drop_second_on_first) as server:
+        yield server
+
+
+def test_get_is_retried_on_new_connection(dropping_server):
+    async def main(url):
+        pool = AsyncHTTPPool(url)
+        await pool.request("GET", "/a")
+        response = await pool.request("GET", "/b")
+        await pool.close()
+        return response, pool.opened
+
+    response, opened = asyncio.run(main(dropping_server.url))
+    assert response.status == 200 and opened == 2
+    assert [(n, path) for n, _, path, _ in dropping_server.requests] == [(1, "/a"), (1, "/b"), (2, "/b")]
+
+
+def test_post_is_not_resent(dropping_server):
+    async def main(url):
+        pool = AsyncHTTPPool(url)
+        await pool.request("GET", "/a")
+        try:
+            with pytest.raises((ConnectionError, asyncio.IncompleteReadError)):
+                await pool.request("POST", "/v5/order/create", b"{}")
+        finally:
+            await pool.close()
+
+    asyncio.run(main(dropping_server.url))
+    assert [(n, method) for n, method, _, _ in dropping_server.requests] == [(1, "GET"), (1, "POST")]
+
+
+def test_async_client_sends_order_link_id():
+    with HTTPServer(ok) as server:
+        async def main():
+            async with AsyncBybitClient("key", "secret", base_url=server.url) as client:
+                first = await client.buy("BTCUSDT", "0.01", stop_loss=99.5)
+                second = await client.sell("BTCUSDT", "0.01")
+            return first, second
+
+        first, second = asyncio.run(main())
+
+    bodies = [json.loads(body) for _, method, _, body in server.requests if method == "POST"]
+    assert [body["orderLinkId"] for body in bodies] == [first.link_id, second.link_id]
+    assert first.link_id and first.link_id != second.link_id
+    assert bodies[0]["stopLoss"] == "99.5" and first.order_id == "abc"
+
+
+class DuplicateSession:
+    """Первая попытка дошла до биржи, pybit повторил её после обрыва."""
+
+    def __init__(self, open_orders=(), history=()):
+        self.link_ids = []
+        self.lookups = []
+        self.orders = {"get_open_orders": list(open_orders), "get_order_history": list(history)}
+
+    def place_order(self, **params):
+        self.link_ids.append(params["orderLinkId"])
+        raise InvalidRequestError("POST /v5/order/create", "OrderLinkedID is duplicate", DUPLICATE_ORDER, "", {})
+
+    def __getattr__(self, name):
+        def query(**params):
+            self.lookups.append((name, params["orderLinkId"]))
+            return {"result": {"list": [
+                {**order, "orderLinkId": params["orderLinkId"]} for order in self.orders[name]
+            ]}}
+        return query
+
+
+FILLED = {"orderId": "abc", "symbol": "BTCUSDT", "side": "Buy", "qty": "0.01",
+          "orderStatus": "Filled", "avgPrice": "50000", "cumExecQty": "0.01"}
+
+
+@pytest.mark.parametrize("where", ["open_orders", "history"])
+def test_sync_client_returns_order_placed_by_retry(where):
+    client = BybitClient("key", "secret")
+    client._session = session = DuplicateSession(**{where: [FILLED]})
+
+    order = client.buy("BTCUSDT", "0.01")
+    link_id = session.link_ids[0]
+    assert (order.order_id, order.status, order.avg_price, order.link_id) == ("abc", "Filled", 50000, link_id)
+    assert session.lookups[0] == ("get_open_orders", link_id)
+
+
+def test_sync_client_marks_unresolved_duplicate():
+    client = BybitClient("key", "secret")
+    client._session = session = DuplicateSession()
+
+    order = client.buy("BTCUSDT", "0.01")
+    assert (order.order_id, order.status, order.link_id) == ("", "duplicate", session.link_ids[0])
+    assert [name for name, _ in session.lookups] == ["get_open_orders", "get_order_history"]
+
+    def reject(**params):
+        raise InvalidRequestError("POST /v5/order/create", "insufficient balance", 110007, "", {})
+
+    client._session.place_order = reject
+    with pytest.raises(InvalidRequestError):
+        client.sell("BTCUSDT", "0.01")
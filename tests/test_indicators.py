@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+import core.indicators as indicators
+from core import ATR, EMA, VWAP, RollingStd
+
+
+def assert_same(stream, batch):
+    """Одинаковые NaN и совпадающие числа."""
+    stream, batch = np.asarray(stream, dtype=np.float64), np.asarray(batch)
+    assert stream.shape == batch.shape
+    assert (np.isnan(stream) == np.isnan(batch)).all()
+    valid = ~np.isnan(batch)
+    assert np.allclose(stream[valid], batch[valid], rtol=1e-9, atol=1e-9)
+
+
+@pytest.fixture(scope="module")
+def candles():
+    rng = np.random.default_rng(3)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, 3000)))
+    high = close * (1 + rng.uniform(0, 0.003, len(close)))
+    low = close * (1 - rng.uniform(0, 0.003, len(close)))
+    return high, low, close
+
+
+def flat_changes(seed: int, count: int = 2000) -> np.ndarray:
+    """Изменения цены (%) со скачками и плоскими участками (ровно 0)."""
+    rng = np.random.default_rng(seed)
+    change = rng.normal(0, 0.2, count)
+    change[rng.integers(0, count, 40)] *= 50
+    for start in rng.integers(0, count - 300, 8):
+        change[start:start + rng.integers(5, 300)] = 0.0
+    return change
+
+
+@pytest.mark.parametrize("period", [1, 5, 20, 300])
+def test_ema_atr(candles, period):
+    high, low, close = candles
+    ema = EMA(period)
+    assert_same([ema.update(x) for x in close], indicators.ema(close, period))
+    atr = ATR(period)
+    assert_same([atr.update(*bar) for bar in zip(high, low, close)], indicators.atr(high, low, close, period))
+
+
+@pytest.mark.parametrize("window", [2, 3, 10, 100])
+def test_rolling_std(candles, window):
+    close = candles[2]
+    std = RollingStd(window)
+    assert_same([std.update(x) for x in close], indicators.rolling_std(close, window))
+
+    for seed in range(5):
+        change = flat_changes(seed)
+        std = RollingStd(window)
+        stream = np.array([std.update(x) for x in change])
+        batch = indicators.rolling_std(change, window)
+        assert_same(stream, batch)
+        # Плоское окно — ровно 0, а не остаток округления
+        assert ((stream == 0) == (batch == 0)).all()
+
+
+def test_rolling_std_flat_window_is_zero():
+    prices = [100, 100.6, 100.4, 100.4, 100.4, 100.4]
+    change = [(b - a) / a * 100 for a, b in zip(prices, prices[1:])]
+    std = RollingStd(3)
+    assert [std.update(x) for x in change][-1] == 0.0
+
+
+def test_rolling_std_batch_chunks(candles, monkeypatch):
+    close = candles[2]
+    monkeypatch.setattr(indicators, "ROLLING_CHUNK", 37)
+    for window in (2, 10, 100):
+        expected = [np.nan] * (window - 1) + [close[i - window + 1:i + 1].std(ddof=1) for i in range(window - 1, len(close))]
+        assert_same(indicators.rolling_std(close, window), expected)
+
+    rows = np.random.default_rng(0).normal(size=(4, 300))
+    assert_same(indicators.rolling_std(rows, 10), np.stack([indicators.rolling_std(row, 10) for row in rows]))
+
+
+def test_vwap(candles):
+    close = candles[2]
+    rng = np.random.default_rng(5)
+    ts = np.cumsum(rng.integers(0, 3_000_000, len(close)))
+    qty = rng.uniform(0, 2, len(close))
+    qty[::50] = 0
+    vwap = VWAP(3_600_000)
+    assert_same([vwap.update(*trade) for trade in zip(close, qty, ts)], indicators.vwap(close, qty, ts, 3_600_000))
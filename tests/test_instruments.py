@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+
+from core.models import Instrument
+from services import InstrumentCache
+
+
+def instrument(tick: str) -> Instrument:
+    return Instrument("BTCUSDT", Decimal("0.001"), Decimal("0.001"), Decimal(tick), 100.0)
+
+
+class SlowClient:
+    """get_instruments ждёт release — как постраничная загрузка по сети."""
+
+    def __init__(self):
+        self.tick = "0.1"
+        self.calls = 0
+        self.fail = False
+        self.release = threading.Event()
+        self.release.set()
+
+    def get_instruments(self):
+        self.calls += 1
+        self.release.wait(5)
+        if self.fail:
+            raise ConnectionError("биржа недоступна")
+        return [instrument(self.tick)]
+
+
+def wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "не дождались"
+        time.sleep(0.01)
+
+
+def expire(cache: InstrumentCache) -> None:
+    cache._loaded_at -= cache.ttl + 1
+
+
+def test_cold_cache_loads_inline():
+    client = SlowClient()
+    cache = InstrumentCache(client)
+    assert cache.get("BTCUSDT").tick_size == Decimal("0.1")
+    assert client.calls == 1
+    with pytest.raises(ValueError):
+        cache.get("ETHUSDT")
+
+
+def test_stale_cache_is_served_while_refreshing_in_background():
+    client = SlowClient()
+    cache = InstrumentCache(client)
+    cache.load()
+    expire(cache)
+
+    client.tick = "0.5"
+    client.release.clear()          # Обновление «висит» на сети
+    started = time.monotonic()
+    for _ in range(100):
+        assert cache.get("BTCUSDT").tick_size == Decimal("0.1")
+    assert time.monotonic() - started < 0.5
+    wait_for(lambda: client.calls == 2)
+    cache.get("BTCUSDT")
+    assert client.calls == 2        # Одно фоновое обновление на все вызовы
+
+    client.release.set()
+    wait_for(lambda: cache.get("BTCUSDT").tick_size == Decimal("0.5"))
+    assert not cache.stale and client.calls == 2
+
+
+def test_failed_refresh_keeps_old_list_and_backs_off():
+    client = SlowClient()
+    cache = InstrumentCache(client)
+    cache.load()
+    expire(cache)
+
+    client.fail = True
+    cache.get("BTCUSDT")
+    wait_for(lambda: client.calls == 2 and not cache._refreshing)
+    assert cache.get("BTCUSDT").tick_size == Decimal("0.1")
+    assert client.calls == 2        # Повтор — не раньше RETRY_DELAY
+
+    cache._retry_at = 0.0
+    client.fail = False
+    client.tick = "0.5"
+    cache.get("BTCUSDT")
+    wait_for(lambda: cache.lookup("BTCUSDT").tick_size == Decimal("0.5"))
+
+
+def test_async_refresh_does_not_block():
+    class AsyncClient:
+        calls = 0
+
+        async def get_instruments(self):
+            AsyncClient.calls += 1
+            await asyncio.sleep(0.2 if AsyncClient.calls > 1 else 0)
+            return [instrument("0.1" if AsyncClient.calls == 1 else "0.5")]
+
+    async def main():
+        cache = InstrumentCache(AsyncClient())
+        assert (await cache.get_async("BTCUSDT")).tick_size == Decimal("0.1")
+        expire(cache)
+
+        started = time.monotonic()
+        assert (await cache.get_async("BTCUSDT")).tick_size == Decimal("0.1")
+        assert time.monotonic() - started < 0.1
+        await cache._task
+        assert (await cache.get_async("BTCUSDT")).tick_size == Decimal("0.5")
+        assert AsyncClient.calls == 2
+
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+import json
+import urllib.request
+
+import pytest
+
+from core.metrics import Histogram, MetricsRegistry
+
+
+def test_histogram_render():
+    registry = MetricsRegistry()
+    hist = registry.histogram("latency_seconds", "Задержка", buckets=(0.1, 1.0), endpoint="order")
+    for value in (0.05, 0.1, 0.5, 3.0):                 # 0.1 — ровно на границе, попадает в le="0.1"
+        hist.observe(value)
+
+    assert registry.render().splitlines() == [
+        "# HELP latency_seconds Задержка",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{endpoint="order",le="0.1"} 2',
+        'latency_seconds_bucket{endpoint="order",le="1.0"} 3',
+        'latency_seconds_bucket{endpoint="order",le="+Inf"} 4',
+        'latency_seconds_sum{endpoint="order"} 3.65',
+        'latency_seconds_count{endpoint="order"} 4',
+    ]
+
+
+def test_counters_sorted_and_escaped():
+    registry = MetricsRegistry()
+    registry.counter("errors_total", "Ошибки", code="b").inc()
+    registry.counter("errors_total", code='a"\\\n').inc(2)
+    registry.counter("errors_total", code="b").inc()       # Тот же объект
+
+    assert registry.render().splitlines() == [
+        "# HELP errors_total Ошибки",
+        "# TYPE errors_total counter",
+        'errors_total{code="a\\"\\\\\\n"} 2',
+        'errors_total{code="b"} 2',
+    ]
+
+
+def test_same_name_other_kind_rejected():
+    registry = MetricsRegistry()
+    registry.counter("requests")
+    with pytest.raises(ValueError):
+        registry.histogram("requests")
+
+
+def test_quantile_and_snapshot(tmp_path):
+    hist = Histogram((1.0, 2.0, 4.0))
+    assert hist.quantile(0.5) == 0.0
+    for value in (0.5, 1.5, 1.5, 3.0, 10.0):
+        hist.observe(value)
+    assert (hist.quantile(0.5), hist.quantile(0.8), hist.quantile(0.99)) == (2.0, 4.0, float("inf"))
+
+    registry = MetricsRegistry()
+    registry.histogram("x", buckets=(1.0,), side="Buy").observe(0.5)
+    registry.counter("n").inc(3)
+    registry.dump(tmp_path / "m.json")
+    assert json.loads((tmp_path / "m.json").read_text()) == {
+        'x{side="Buy"}': {"count": 1, "sum": 0.5, "p50": 1.0, "p99": 1.0},
+        "n": 3,
+    }
+    registry.dump(tmp_path / "sub" / "m.prom")
+    assert (tmp_path / "sub" / "m.prom").read_text() == registry.render()
+
+
+def test_serve_and_stop():
+    registry = MetricsRegistry()
+    registry.counter("ticks_total").inc(5)
+    server = registry.serve(port=0)
+    url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.headers["Content-Type"] == "text/plain; version=0.0.4"
+            assert "ticks_total 5\n" in response.read().decode()
+
+        registry.counter("ticks_total").inc()             # Каждый запрос — свежий render
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert "ticks_total 6\n" in response.read().decode()
+    finally:
+        registry.stop()
+
+    with pytest.raises(OSError):
+        urllib.request.urlopen(url, timeout=1)
+    registry.stop()                                         # Повторный stop — без ошибок
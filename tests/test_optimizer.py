@@ -0,0 +1,110 @@
+import json
+from dataclasses import asdict
+
+import numpy as np
+import pytest
+
+from services import Optimizer, StrategyConfig
+from services import optimizer as optimizer_module
+
+
+def make_prices(n: int = 3000, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rnd = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rnd.normal(0, 0.004, n)))
+    ts = 1_700_000_000_000 + np.arange(n, dtype=np.int64) * 60_000
+    return ts, close
+
+
+SPACE = {"entry_spike_percent": [0.2, 0.3], "spikes_to_enter": [1, 2]}
+
+
+def test_resume_skips_done_variants(tmp_path):
+    ts, close = make_prices()
+    checkpoint = tmp_path / "opt.jsonl"
+    variants = Optimizer.grid(SPACE)
+
+    first = Optimizer(workers=2, checkpoint=checkpoint).run(ts, close, variants)
+    progress = []
+    again = Optimizer(workers=2, checkpoint=checkpoint).run(
+        ts, close, variants, progress=lambda done, total, result: progress.append((done, total)),
+    )
+    assert progress == [(4, 4)]                 # Всё взято из checkpoint, пул не запускался
+    assert [r.params for r in again] == [r.params for r in first]
+    assert [r.stats for r in again] == [r.stats for r in first]
+
+
+@pytest.mark.parametrize("changed", [
+    {"base_config": StrategyConfig(cooldown_minutes=0)},
+    {"fee_percent": 0.055},
+])
+def test_resume_rejects_other_settings(tmp_path, changed):
+    ts, close = make_prices()
+    checkpoint = tmp_path / "opt.jsonl"
+    variants = Optimizer.grid(SPACE)
+    Optimizer(workers=1, checkpoint=checkpoint).run(ts, close, variants)
+
+    with pytest.raises(ValueError):
+        Optimizer(workers=1, checkpoint=checkpoint, **changed).run(ts, close, variants)
+    with pytest.raises(ValueError):
+        Optimizer(workers=1, checkpoint=checkpoint).run(ts, close[::-1].copy(), variants)
+
+
+def test_worker_arrays_are_read_only():
+    ts, close = make_prices(100)
+    shared = [optimizer_module._to_shared(ts), optimizer_module._to_shared(close)]
+    try:
+        optimizer_module._init_worker(shared[0].name, shared[1].name, len(ts), asdict(StrategyConfig()), 0.0)
+        worker = optimizer_module._worker
+        assert not worker["ts"].flags.writeable and not worker["close"].flags.writeable
+        with pytest.raises(ValueError):
+            worker["close"][0] = 0.0
+        params, stats = optimizer_module._run_variant({"spikes_to_enter": 1})
+        assert params == {"spikes_to_enter": 1} and stats.trades >= 0
+    finally:
+        for shm in optimizer_module._worker.pop("shm", ()):
+            shm.close()
+        optimizer_module._worker.clear()
+        for shm in shared:
+            shm.close()
+            shm.unlink()
+
+
+def test_resume_from_empty_checkpoint(tmp_path):
+    ts, close = make_prices()
+    checkpoint = tmp_path / "opt.jsonl"
+    checkpoint.touch()                          # Прервано до записи заголовка
+
+    results = Optimizer(workers=1, checkpoint=checkpoint).run(ts, close, Optimizer.grid(SPACE))
+    assert len(results) == 4
+    assert len(checkpoint.read_text().splitlines()) == 5
+
+
+@pytest.mark.parametrize("header", ['{"fingerpr', "not json\n", "[]\n"])
+def test_unreadable_header_is_a_mismatch(tmp_path, header):
+    ts, close = make_prices()
+    checkpoint = tmp_path / "opt.jsonl"
+    checkpoint.write_text(header)
+
+    with pytest.raises(ValueError):
+        Optimizer(workers=1, checkpoint=checkpoint).run(ts, close, Optimizer.grid(SPACE))
+    assert checkpoint.read_text() == header     # Чужой файл не трогаем
+
+
+def test_truncated_last_line_is_recomputed(tmp_path):
+    ts, close = make_prices()
+    checkpoint = tmp_path / "opt.jsonl"
+    variants = Optimizer.grid(SPACE)
+    first = Optimizer(workers=1, checkpoint=checkpoint).run(ts, close, variants)
+
+    lines = checkpoint.read_text().splitlines(keepends=True)
+    checkpoint.write_text("".join(lines[:-1]) + lines[-1][:len(lines[-1]) // 2])
+
+    progress = []
+    again = Optimizer(workers=1, checkpoint=checkpoint).run(
+        ts, close, variants, progress=lambda done, total, result: progress.append(done),
+    )
+    assert progress == [3, 4]                   # Три из checkpoint, недописанный — заново
+    assert [r.stats for r in again] == [r.stats for r in first]
+
+    lines = checkpoint.read_text().splitlines()
+    assert len(lines) == 5 and all(json.loads(line) for line in lines)
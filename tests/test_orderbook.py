@@ -0,0 +1,153 @@
+import pytest
+
+from core.exchange.bybit import BybitClient, parse_book_update
+from core.models import BookUpdate
+from core.orderbook import OrderBook
+from services import OrderBookCache
+
+
+SYMBOL = "BTCUSDT"
+BIDS = [(99.9, 1.0), (99.8, 2.0), (99.5, 5.0)]
+ASKS = [(100.1, 1.0), (100.2, 2.0), (100.5, 5.0)]
+
+
+def snapshot(update_id: int = 10) -> BookUpdate:
+    return BookUpdate(SYMBOL, list(BIDS), list(ASKS), update_id, snapshot=True)
+
+
+def delta(update_id: int, bids=(), asks=()) -> BookUpdate:
+    return BookUpdate(SYMBOL, list(bids), list(asks), update_id)
+
+
+def test_snapshot_then_deltas():
+    book = OrderBook(SYMBOL)
+    assert book.apply(snapshot())
+    assert (book.best_bid, book.best_ask, book.mid) == (99.9, 100.1, 100.0)
+
+    assert book.apply(delta(11, bids=[(99.9, 0.0), (99.7, 3.0)], asks=[(100.05, 0.5)]))
+    assert book.bids.levels() == [(99.8, 2.0), (99.7, 3.0), (99.5, 5.0)]
+    assert book.asks.levels(2) == [(100.05, 0.5), (100.1, 1.0)]
+    assert book.update_id == 11
+
+    # Новый snapshot заменяет стакан целиком
+    assert book.apply(BookUpdate(SYMBOL, [(50.0, 1.0)], [(51.0, 1.0)], 40, snapshot=True))
+    assert book.bids.levels() == [(50.0, 1.0)] and book.asks.levels() == [(51.0, 1.0)]
+
+
+def test_gap_unsyncs_until_snapshot():
+    book = OrderBook(SYMBOL)
+    assert not book.apply(delta(5, bids=[(99.0, 1.0)]))     # delta до snapshot
+    assert not book.synced
+
+    book.apply(snapshot(10))
+    assert not book.apply(delta(12))                        # Пропущен 11
+    assert not book.synced
+    assert book.mid is None and book.fill_price("Buy", 10) is None
+    assert book.max_notional("Buy", 0.1) is None and book.imbalance() is None
+    assert not book.apply(delta(13))                        # Дальше — тоже нет
+
+    assert book.apply(snapshot(20)) and book.mid == 100.0
+
+
+def test_u1_is_a_snapshot():
+    message = {"type": "delta", "ts": 5, "data": {"s": SYMBOL, "u": 1, "b": [["99", "1"]], "a": [["101", "2"]]}}
+    update = parse_book_update(message)
+    assert update.snapshot and update.update_id == 1 and update.bids == [(99.0, 1.0)]
+
+    book = OrderBook(SYMBOL)
+    book.apply(snapshot(500))
+    assert book.apply(update)                               # Биржа перезапустила стакан
+    assert book.bids.levels() == [(99.0, 1.0)] and book.asks.levels() == [(101.0, 2.0)]
+
+
+@pytest.mark.parametrize("side", ["Buy", "Sell"])
+@pytest.mark.parametrize("max_slippage", [0.11, 0.15, 0.3])
+def test_max_notional_sits_at_slippage_limit(side, max_slippage):
+    book = OrderBook(SYMBOL)
+    book.apply(snapshot())
+    notional = book.max_notional(side, max_slippage)
+
+    assert book.slippage(side, notional) == pytest.approx(max_slippage, rel=1e-9)
+    assert book.slippage(side, notional * 1.001) > max_slippage
+
+
+def test_max_notional_limits():
+    book = OrderBook(SYMBOL)
+    book.apply(snapshot())
+    depth = sum(price * size for price, size in ASKS)
+    assert book.max_notional("Buy", 50.0) == pytest.approx(depth)      # Вся глубина
+    assert book.fill_price("Buy", depth * 1.01) is None                # Её не хватает
+    assert book.max_notional("Buy", 0.05) == 0.0                       # Хуже уже лучшая цена
+    assert book.fill_price("Sell", 99.9) == pytest.approx(99.9)
+
+
+class FakeStream:
+    def __init__(self):
+        self.connected = True
+        self.resubscribed = []
+
+    def resubscribe(self, topic: str) -> None:
+        self.resubscribed.append(topic)
+
+    def stop(self) -> None:
+        self.connected = False
+
+
+class BookClient:
+    def __init__(self):
+        self.stream = FakeStream()
+
+    def subscribe_orderbook(self, symbols, on_update, on_connect=None):
+        self.on_update = on_update
+        self.on_connect = on_connect
+        return self.stream
+
+
+def test_cache_resyncs_on_gap():
+    client = BookClient()
+    cache = OrderBookCache(client).add([SYMBOL])
+    assert cache.max_notional(SYMBOL, "Buy", 0.3) is None              # Snapshot ещё нет
+
+    assert client.on_update(delta(3)) is True                           # Отброшена без ресинка
+    assert cache.resyncs == 0
+
+    client.on_update(snapshot(10))
+    assert client.on_update(delta(11)) is True
+    assert cache.max_notional(SYMBOL, "Buy", 50.0) > 0
+
+    assert client.on_update(delta(13)) is False                        # Пропуск → переподписка
+    assert cache.resyncs == 1
+    assert cache.max_notional(SYMBOL, "Buy", 0.3) is None
+    assert client.on_update(delta(14)) is True and cache.resyncs == 1
+
+    client.on_update(snapshot(30))
+    assert cache.slippage(SYMBOL, "Sell", 10) is not None
+
+
+def test_cache_unsynced_or_disconnected():
+    client = BookClient()
+    cache = OrderBookCache(client).add([SYMBOL])
+    client.on_update(snapshot())
+    assert cache.imbalance(SYMBOL) == pytest.approx((8 - 8) / 16)
+
+    client.stream.connected = False
+    assert cache.max_notional(SYMBOL, "Buy", 0.3) is None
+    client.stream.connected = True
+    client.on_connect()                                                # Переподключение
+    assert cache.max_notional(SYMBOL, "Buy", 0.3) is None
+    assert cache.max_notional("ETHUSDT", "Buy", 0.3) is None           # Не добавлен
+
+
+def test_bybit_handler_resubscribes_on_gap():
+    stream = FakeStream()
+    cache = OrderBookCache(BookClient()).add([SYMBOL])
+    handle = BybitClient._book_handler(stream, f"orderbook.50.{SYMBOL}", cache._on_update)
+
+    def message(kind: str, update_id: int) -> dict:
+        return {"type": kind, "data": {"s": SYMBOL, "u": update_id, "b": [["99", "1"]], "a": [["101", "1"]]}}
+
+    handle(message("snapshot", 10))
+    handle(message("delta", 11))
+    assert stream.resubscribed == []
+    handle(message("delta", 15))
+    assert stream.resubscribed == [f"orderbook.50.{SYMBOL}"]
@@ -0,0 +1,117 @@
+import pytest
+
+from core.exchange import SimulatedMarket, SimulationConfig
+from services import PositionCache
+
+from .fakes import INSTRUMENT
+
+
+SYMBOL = "BTCUSDT"
+
+
+@pytest.fixture
+def market() -> SimulatedMarket:
+    market = SimulatedMarket(SimulationConfig(spread_percent=0.02, fee_percent=0), [INSTRUMENT])
+    market.on_price(SYMBOL, 100.0, 1_000)
+    return market
+
+
+def test_position_from_stream(market):
+    account = market.account()
+    cache = PositionCache(account).start()
+    cache.forget(SYMBOL)
+
+    account.buy(SYMBOL, "1", stop_loss=99.0)
+    position = cache.get(SYMBOL)
+    assert (position.side, position.size, position.stop_loss) == ("Buy", 1.0, 99.0)
+    assert position.entry_price == pytest.approx(100.01)
+
+    market.on_price(SYMBOL, 102.0, 2_000)
+    account.buy(SYMBOL, "1")
+    account.set_stop_loss(SYMBOL, 100.5)
+    position = cache.get(SYMBOL)
+    assert position.size == 2.0 and position.stop_loss == 100.5
+    assert position.entry_price == pytest.approx((100.01 + 102.0102) / 2)
+    assert cache.rest_reads == 0
+
+
+def test_fills_carry_execution_price(market):
+    account = market.account()
+    cache = PositionCache(account).start()
+    fills = []
+    cache.on_fill(fills.append)
+
+    order = account.sell(SYMBOL, "0.5")
+    assert [(fill.order_id, fill.side, fill.qty) for fill in fills] == [(order.order_id, "Sell", 0.5)]
+    assert fills[0].price == pytest.approx(99.99)
+    filled = cache.wait_fill(order.order_id, timeout=0)
+    assert filled.status == "Filled" and filled.avg_price == pytest.approx(99.99)
+
+
+def test_size_zero_closes(market):
+    account = market.account()
+    cache = PositionCache(account).start()
+
+    # Наш ордер закрытия: позиции нет, но закрыла её не биржа
+    cache.forget(SYMBOL)
+    account.buy(SYMBOL, "1")
+    cache.forget(SYMBOL)
+    account.close_position(SYMBOL)
+    assert cache.get(SYMBOL) is None and not cache.closed_on_exchange(SYMBOL)
+    assert cache.rest_reads == 0                # size=0 из потока — позиции точно нет
+
+    # Закрыл SL на бирже
+    cache.forget(SYMBOL)
+    account.buy(SYMBOL, "1", stop_loss=99.0)
+    market.on_price(SYMBOL, 98.0, 2_000)
+    reads = cache.rest_reads
+    assert cache.closed_on_exchange(SYMBOL)
+    assert cache.get(SYMBOL) is None and cache.rest_reads == reads
+
+
+def test_rest_resync_on_reconnect(market):
+    account = market.account()
+    account.buy(SYMBOL, "1")                    # Открыта до подписки
+    cache = PositionCache(account).start()
+
+    assert cache.get(SYMBOL).size == 1.0        # О символе поток не сообщал — REST
+    assert cache.get(SYMBOL).size == 1.0
+    assert cache.rest_reads == 1
+
+    cache._on_connect()                         # Переподключение: всё перечитывается
+    assert cache.get(SYMBOL).size == 1.0
+    assert cache.rest_reads == 2
+
+    account.sell(SYMBOL, "0.4")
+    assert cache.get(SYMBOL).size == pytest.approx(0.6)
+    assert cache.rest_reads == 2
+
+
+class Disconnected:
+    connected = False
+
+    def stop(self) -> None:
+        pass
+
+
+def test_rest_while_disconnected(market):
+    account = market.account()
+    account.buy(SYMBOL, "1")
+
+    class Client:
+        def get_positions(self, symbol):
+            return account.get_positions(symbol)
+
+        def subscribe_account(self, *handlers):
+            return Disconnected()
+
+    cache = PositionCache(Client()).start()
+    assert not cache.live
+    for _ in range(3):
+        assert cache.get(SYMBOL).size == 1.0
+    assert cache.rest_reads == 3
+
+    # Клиент без потока счёта — всегда REST
+    cache = PositionCache(type("Rest", (), {"get_positions": Client.get_positions})()).start()
+    assert cache.get(SYMBOL).size == 1.0 and cache.get(SYMBOL).size == 1.0
+    assert cache.rest_reads == 2
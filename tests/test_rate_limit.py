@@ -0,0 +1,149 @@
+import threading
+import time
+
+import pytest
+from pybit.exceptions import FailedRequestError, InvalidRequestError
+
+from core.exchange import Priority, RateLimitedClient, RateLimiter
+
+
+def headers(limit: int, remaining: int, reset_in: float | None = None) -> dict:
+    result = {"X-Bapi-Limit": str(limit), "X-Bapi-Limit-Status": str(remaining)}
+    if reset_in is not None:
+        result["X-Bapi-Limit-Reset-Timestamp"] = str(int((time.time() + reset_in) * 1000))
+    return result
+
+
+def acquire_times(limiter: RateLimiter, group: str, count: int) -> list[float]:
+    start = time.monotonic()
+    times = []
+    for _ in range(count):
+        limiter.acquire(group)
+        times.append(time.monotonic() - start)
+    return times
+
+
+def test_share_survives_header_sync():
+    # 4 воркера на ключ с лимитом 40/с: каждому — 10/с и после заголовков
+    limiter = RateLimiter({"order": 40.0}, global_limit=1000.0, share=0.25)
+    assert limiter._buckets["order"].rate == 10.0
+
+    limiter.update("order", headers(40, 40))
+    bucket = limiter._buckets["order"]
+    assert bucket.rate == bucket.capacity == 10.0 and bucket.tokens == 10.0
+
+    times = acquire_times(limiter, "order", 15)
+    assert times[9] < 0.05                  # Запас — 10 токенов
+    assert times[-1] == pytest.approx(0.5, abs=0.08)
+
+
+def test_share_scales_remaining():
+    limiter = RateLimiter({"order": 40.0}, global_limit=1000.0, share=0.5)
+    limiter.update("order", headers(40, 4))  # У ключа осталось 4 — у нас 2
+    times = acquire_times(limiter, "order", 3)
+    assert times[1] < 0.05 and times[2] == pytest.approx(1 / 20, abs=0.03)
+
+
+def test_share_must_be_a_fraction():
+    with pytest.raises(ValueError):
+        RateLimiter(share=0)
+    with pytest.raises(ValueError):
+        RateLimiter(share=2)
+
+
+def test_order_overtakes_queued_market_request():
+    limiter = RateLimiter(global_limit=10.0)
+    for _ in range(10):                     # Общий bucket пуст: следующий токен через 0.1 с
+        limiter.acquire("market")
+
+    served = []
+
+    def request(group: str, priority: Priority) -> None:
+        limiter.acquire(group, priority)
+        served.append((group, time.monotonic()))
+
+    market = threading.Thread(target=request, args=("market", Priority.MARKET))
+    market.start()
+    time.sleep(0.03)                        # MARKET уже ждёт в очереди
+    order = threading.Thread(target=request, args=("order", Priority.ORDER))
+    order.start()
+    market.join(2)
+    order.join(2)
+
+    assert [group for group, _ in served] == ["order", "market"]
+    assert served[1][1] - served[0][1] == pytest.approx(0.1, abs=0.04)
+
+
+class FlakyClient:
+    """Первые fail вызовов get_ticker/buy падают с error."""
+
+    def __init__(self, error: Exception, fail: int):
+        self.error = error
+        self.fail = fail
+        self.calls = 0
+        self.listener = None
+
+    def add_response_listener(self, listener) -> None:
+        self.listener = listener
+
+    def get_ticker(self, symbol, *args):
+        self.calls += 1
+        if self.fail:
+            self.fail -= 1
+            raise self.error
+        return symbol
+
+    buy = get_ticker
+
+
+def bybit_error(code: int) -> InvalidRequestError:
+    return InvalidRequestError("req", "too many visits", code, 0, None)
+
+
+@pytest.mark.parametrize("error", [bybit_error(10006), FailedRequestError("req", "rate", 429, 0, None)])
+def test_rate_limit_blocks_only_its_group(error):
+    limiter = RateLimiter(default_backoff=0.3)
+    client = RateLimitedClient(FlakyClient(error, fail=1), limiter)
+
+    done = {}
+
+    def ticker():
+        client.get_ticker("BTCUSDT")
+        done["market"] = time.monotonic()
+
+    start = time.monotonic()
+    thread = threading.Thread(target=ticker)
+    thread.start()
+    time.sleep(0.05)
+    limiter.acquire("order", Priority.ORDER)  # Группа order не на паузе
+    assert time.monotonic() - start < 0.2
+    thread.join(2)
+    assert done["market"] - start == pytest.approx(0.3, abs=0.08)
+    assert client.client.calls == 2
+
+
+def test_retries_then_gives_up():
+    limiter = RateLimiter(default_backoff=0.01)
+    client = RateLimitedClient(FlakyClient(bybit_error(10006), fail=10), limiter, retries=2)
+    with pytest.raises(InvalidRequestError):
+        client.get_ticker("BTCUSDT")
+    assert client.client.calls == 3
+
+    # Не лимит — без повторов
+    client = RateLimitedClient(FlakyClient(bybit_error(10001), fail=10), limiter, retries=2)
+    with pytest.raises(InvalidRequestError):
+        client.buy("BTCUSDT", "0.001")
+    assert client.client.calls == 1
+
+
+def test_exhausted_window_blocks_until_reset():
+    limiter = RateLimiter()
+    client = RateLimitedClient(FlakyClient(bybit_error(10006), fail=0), limiter)
+    # Заголовки приходят через слушатель ответов клиента
+    client.client.listener("/v5/order/create", headers(10, 0, reset_in=0.3))
+
+    start = time.monotonic()
+    limiter.acquire("market")               # Другая группа не ждёт
+    assert time.monotonic() - start < 0.05
+    client.buy("BTCUSDT", "0.001")
+    assert time.monotonic() - start == pytest.approx(0.3, abs=0.08)
@@ -0,0 +1,136 @@
+import pytest
+from pybit.exceptions import InvalidRequestError
+
+import core.exchange.recording as recording
+from core.exchange import RecordingClient, ReplayExchangeClient, ReplayError
+from core.models import Order, Ticker
+
+
+class FakeTime:
+    """Часы модуля recording: sleep() только двигает время."""
+
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+        self.sleeps: list[float] = []
+
+    def time(self) -> float:
+        return self.now
+
+    monotonic = perf_counter = time
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeTime:
+    clock = FakeTime()
+    monkeypatch.setattr(recording, "time", clock)
+    return clock
+
+
+class Exchange:
+    """Клиент биржи: тикер, ордер, отказ и поток цен."""
+
+    def get_ticker(self, symbol):
+        return Ticker(symbol, 100.0, 99.9, 100.1, 1_000.0)
+
+    def buy(self, symbol, qty, stop_loss=None):
+        return Order("42", symbol, "Buy", qty, "Filled")
+
+    def set_leverage(self, symbol, leverage):
+        raise InvalidRequestError("set_leverage", "leverage not modified", 110043, 0, {"X-Bapi-Limit": "10"})
+
+    def subscribe_prices(self, symbols, callback, channel="tickers"):
+        self.callback = callback
+        return None
+
+
+def record(path, clock: FakeTime) -> Exchange:
+    """Запись: тикер, ордер, отказ и цены двух символов с паузами."""
+    exchange = Exchange()
+    client = RecordingClient(exchange, path)
+    client.subscribe_prices(["BTCUSDT", "ETHUSDT"], lambda *args: None)
+
+    client.get_ticker("BTCUSDT")
+    clock.now += 1.0
+    exchange.callback("BTCUSDT", 100.0, 1)
+    clock.now += 2.0
+    exchange.callback("ETHUSDT", 10.0, 2)
+    client.buy("BTCUSDT", "0.001", "99.0")
+    with pytest.raises(InvalidRequestError):
+        client.set_leverage("BTCUSDT", 5)
+    clock.now += 4.0
+    exchange.callback("BTCUSDT", 101.0, 3)
+    client.close()
+    return exchange
+
+
+def test_round_trip(tmp_path, clock):
+    path = tmp_path / "session.rec"
+    record(path, clock)
+
+    replay = ReplayExchangeClient(path)
+    assert replay.get_ticker("BTCUSDT") == Exchange().get_ticker("BTCUSDT")
+    assert replay.buy("BTCUSDT", "0.001", "99.0") == Order("42", "BTCUSDT", "Buy", "0.001", "Filled")
+
+    # Записанная ошибка — тем же типом, с кодом и заголовками
+    with pytest.raises(InvalidRequestError) as error:
+        replay.set_leverage("BTCUSDT", 5)
+    assert error.value.status_code == 110043 and error.value.resp_headers == {"X-Bapi-Limit": "10"}
+
+    assert replay.remaining("get_ticker") == 0
+    with pytest.raises(ReplayError):
+        replay.get_ticker("BTCUSDT")
+
+
+def test_strict_args(tmp_path, clock):
+    path = tmp_path / "session.rec"
+    record(path, clock)
+
+    assert ReplayExchangeClient(path).buy("ETHUSDT", "1", None).order_id == "42"
+    with pytest.raises(ReplayError):
+        ReplayExchangeClient(path, strict=True).buy("ETHUSDT", "1", None)
+
+
+def test_appends_to_existing_recording(tmp_path, clock):
+    path = tmp_path / "session.rec"
+    record(path, clock)
+    client = RecordingClient(Exchange(), path)     # Второй header не пишется
+    client.get_ticker("ETHUSDT")
+    client.close()
+    assert ReplayExchangeClient(path).remaining("get_ticker") == 2
+
+
+def test_truncated_stream_reads_prefix(tmp_path, clock):
+    path = tmp_path / "session.rec"
+    record(path, clock)
+    data = path.read_bytes()
+
+    cut = tmp_path / "cut.rec"
+    seen = []
+    for size in range(1, len(data)):
+        cut.write_bytes(data[:size])
+        replay = ReplayExchangeClient(cut)
+        seen.append((replay.remaining("get_ticker"), replay.remaining("buy"), len(replay.prices)))
+
+    # Записи появляются по одной и только целиком
+    assert seen[0] == (0, 0, 0) and seen[-1] == (1, 1, 2)
+    assert seen == sorted(seen, key=sum)
+
+
+def test_iter_prices_order_and_pacing(tmp_path, clock):
+    path = tmp_path / "session.rec"
+    record(path, clock)
+
+    replay = ReplayExchangeClient(path)
+    assert list(replay.iter_prices()) == [("BTCUSDT", 100.0, 1), ("ETHUSDT", 10.0, 2), ("BTCUSDT", 101.0, 3)]
+    assert clock.sleeps == []                                 # speed=None — без пауз
+
+    replay = ReplayExchangeClient(path, speed=2.0)
+    start = clock.now
+    assert list(replay.iter_prices(["BTCUSDT"])) == [("BTCUSDT", 100.0, 1), ("BTCUSDT", 101.0, 3)]
+    # Время от первой записи (тикер): 1 с и 7 с — вдвое быстрее
+    assert clock.now - start == pytest.approx(3.5)
+    assert clock.sleeps == [pytest.approx(0.5), pytest.approx(3.0)]
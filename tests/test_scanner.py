@@ -0,0 +1,75 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from core.models import SignalType, Ticker
+from services import Scanner
+from services.analyzer import Analyzer, AnalyzerConfig
+
+
+CONFIGS = [
+    AnalyzerConfig(spike_percent=0.3, spikes_to_enter=2),
+    AnalyzerConfig(spike_percent=0.5, spikes_to_enter=1),
+    AnalyzerConfig(spike_volatility=1.5, volatility_window=8, spikes_to_enter=2),
+]
+CODES = {SignalType.LONG: 1, SignalType.SHORT: -1, SignalType.NONE: 0}
+
+
+@pytest.mark.parametrize("config", CONFIGS, ids=["0.3%x2", "0.5%x1", "σ"])
+@pytest.mark.parametrize("seed", range(2))
+def test_signals_match_check_entry(config, seed):
+    rnd = random.Random(seed)
+    analyzer = Analyzer(config)
+    scanner = Scanner(None, config, window=12)
+    history: dict[str, list[float]] = {}
+    prices: dict[str, float] = {}
+    seen: set[str] = set()
+    cycles = 0
+    fired = 0
+
+    for cycle in range(40):
+        # Символы появляются по ходу (строк больше 64 — матрица растёт)
+        for _ in range(rnd.choice([0, 0, 5, 30])):
+            symbol = f"S{len(prices)}USDT"
+            prices[symbol] = 100.0
+            history[symbol] = [math.nan] * cycles
+
+        tickers = [Ticker("BTCUSD", 1.0, 1.0, 1.0, 1.0)]    # Не USDT — не учитывается
+        for symbol in prices:
+            prices[symbol] *= 1 + rnd.choice([0, 0.2, 0.4, 0.6, 1.0]) * rnd.choice([1, -1]) / 100
+            if rnd.random() < 0.1:
+                history[symbol].append(math.nan)             # Пропал из тикеров в этом цикле
+                continue
+            history[symbol].append(prices[symbol])
+            tickers.append(Ticker(symbol, prices[symbol], 0, 0, 1e6))
+        rnd.shuffle(tickers)
+        scanner.update(tickers)
+        cycles += 1
+
+        types, _ = scanner.signals()
+        seen.update(t.symbol for t in tickers if t.symbol in prices)
+        assert set(scanner.symbols) == seen
+        for i, symbol in enumerate(scanner.symbols):
+            window = history[symbol][-scanner.window:]
+            expected = analyzer.check_entry(window, symbol).type if cycles >= config.history else SignalType.NONE
+            assert types[i] == CODES[expected], (cycle, symbol)
+            fired += expected is not SignalType.NONE
+            np.testing.assert_array_equal(scanner.history(symbol), window)
+
+    assert len(scanner.symbols) > 64 and cycles > scanner.window and fired
+
+
+def test_scan_orders_by_change():
+    scanner = Scanner(None, AnalyzerConfig(spike_percent=0.3, spikes_to_enter=1), window=4, min_volume_24h=10)
+    scanner.update([Ticker("AUSDT", 100, 0, 0, 100), Ticker("BUSDT", 100, 0, 0, 100), Ticker("CUSDT", 100, 0, 0, 1)])
+    scanner.update([Ticker("AUSDT", 100.5, 0, 0, 100), Ticker("BUSDT", 99, 0, 0, 100), Ticker("CUSDT", 90, 0, 0, 1)])
+
+    candidates = scanner.scan()
+    assert [(c.symbol, c.type) for c in candidates] == [("BUSDT", SignalType.SHORT), ("AUSDT", SignalType.LONG)]
+    assert candidates[0].change_percent == pytest.approx(-1.0) and candidates[0].price == 99
+    assert len(scanner.scan(limit=1)) == 1
+
+    scanner.update([Ticker("AUSDT", 101.5, 0, 0, 100)])                # BUSDT пропал — NaN
+    assert [c.symbol for c in scanner.scan()] == ["AUSDT"]
@@ -0,0 +1,73 @@
+import pytest
+
+from core.metrics import MetricsRegistry
+from core.scheduler import TickScheduler
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_scheduler(**kwargs) -> tuple[TickScheduler, FakeClock]:
+    clock = FakeClock()
+    return TickScheduler(registry=MetricsRegistry(), clock=clock, **kwargs), clock
+
+
+def test_deadlines_on_grid_and_missed():
+    scheduler, clock = make_scheduler()
+    seen = []
+
+    def tick(deadline):
+        seen.append(deadline)
+        if len(seen) == 2:
+            clock.now += 12         # Затянувшийся тик: пропускает 2 дедлайна
+
+    job = scheduler.add("BTCUSDT", 5, tick, offset=1)
+    for _ in range(4):
+        clock.now = max(clock.now, job.next_run)
+        scheduler.run_pending()
+
+    assert seen == [1001, 1006, 1021, 1026]
+    assert job.missed == 2 and job.overruns == 1
+
+
+def test_backoff_survives_endless_failures():
+    scheduler, clock = make_scheduler(base_backoff=1.0, max_backoff=60.0, jitter=0.0)
+
+    def fail(deadline):
+        raise RuntimeError("api down")
+
+    job = scheduler.add("broken", 1, fail)
+    # ~17 часов ошибок подряд при backoff 60 с
+    for _ in range(1100):
+        clock.now = job.next_run
+        scheduler.run_pending()
+
+    assert job.failures == 1100 and job.errors == 1100
+    assert job.next_run - clock.now == pytest.approx(60.0)
+    assert scheduler._backoff(10**6) == 60.0
+    assert [scheduler._backoff(n) for n in (1, 2, 3, 7)] == [1.0, 2.0, 4.0, 60.0]
+
+
+def test_success_resets_backoff_and_returns_to_grid():
+    scheduler, clock = make_scheduler(base_backoff=1.0, jitter=0.0)
+    results = iter([RuntimeError("1"), RuntimeError("2"), None, None])
+    seen = []
+
+    def flaky(deadline):
+        seen.append(deadline)
+        error = next(results)
+        if error:
+            raise error
+
+    job = scheduler.add("flaky", 10, flaky)
+    for _ in range(4):
+        clock.now = job.next_run
+        scheduler.run_pending()
+
+    assert seen == [1010, 1011, 1013, 1020]
+    assert job.failures == 0
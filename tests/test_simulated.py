@@ -0,0 +1,49 @@
+import pytest
+
+from core.exchange import SimulatedMarket, SimulationConfig, SimulatedOrderError
+
+from .fakes import INSTRUMENT, RecordingClient
+
+
+def make_market(**kwargs) -> SimulatedMarket:
+    config = SimulationConfig(spread_percent=0.02, fee_percent=0.1)
+    return SimulatedMarket(config, [INSTRUMENT], **kwargs)
+
+
+def test_fill_and_stop_loss():
+    market = make_market()
+    account = market.account("a")
+
+    market.on_price("BTCUSDT", 100.0, 1000)
+    order = account.buy("BTCUSDT", "1", stop_loss=99.0)
+    assert order.status == "Filled"
+    position = account.get_positions("BTCUSDT")[0]
+    assert position.entry_price == pytest.approx(100.01) and position.stop_loss == 99.0
+
+    market.on_price("BTCUSDT", 98.5, 2000)      # Гэп сквозь SL
+    assert account.get_positions("BTCUSDT") == []
+    assert account.fills[-1].reason == "stop_loss"
+    assert account.balance == pytest.approx(10000 + account.realized_pnl - account.fees)
+
+
+def test_rejections():
+    market = make_market()
+    account = market.account()
+    with pytest.raises(SimulatedOrderError):
+        account.buy("BTCUSDT", "1")             # Цены ещё нет
+    market.on_price("BTCUSDT", 100.0, 1000)
+    with pytest.raises(SimulatedOrderError):
+        account.buy("BTCUSDT", "0.0001")        # Меньше min_qty
+
+
+def test_klines_need_source():
+    account = make_market().account()
+    with pytest.raises(ValueError):
+        account.get_klines("BTCUSDT", "1", 10)
+    with pytest.raises(ValueError):
+        account.market.follow(["BTCUSDT"])
+
+    source = RecordingClient()
+    account = make_market(source=source).account()
+    account.get_klines("BTCUSDT", "1", 10)
+    assert source.calls == [("get_klines", ("BTCUSDT", "1", 10, None, None), {})]
@@ -0,0 +1,147 @@
+import random
+
+import numpy as np
+import pytest
+
+from core.buffers import RingBuffer
+from core.models import SignalType
+from services.analyzer import SIGNAL_CODES, Analyzer, AnalyzerConfig, SpikeDetector
+from services.backtest import Backtester
+from services.strategy import StrategyConfig
+
+
+def random_prices(rnd: random.Random, count: int, spike: float) -> list[float]:
+    """Цены с изменениями около порога: скачки, почти скачки и тишина."""
+    prices = [100.0]
+    for _ in range(count - 1):
+        change = rnd.choice([0.0, 0.5, 0.99, 1.0, 1.01, 2.0, 5.0]) * spike * rnd.choice([1, -1])
+        prices.append(prices[-1] * (1 + change / 100))
+    return prices
+
+
+CONFIGS = [
+    AnalyzerConfig(spike_percent=spike, spikes_to_enter=k)
+    for spike in (0.1, 0.3, 0.5)
+    for k in (1, 2, 3, 4)
+]
+
+
+@pytest.mark.parametrize("config", CONFIGS, ids=lambda c: f"{c.spike_percent}%x{c.spikes_to_enter}")
+@pytest.mark.parametrize("extra", [0, 1, 7])
+def test_update_matches_detect(config, extra):
+    rnd = random.Random(hash((config.spike_percent, config.spikes_to_enter, extra)))
+    analyzer = Analyzer(config)
+    # Буфер ровно на N+1 (+extra) цен — кольцо переполняется почти сразу
+    detector = SpikeDetector(config, RingBuffer(config.spikes_to_enter + 1 + extra))
+    history = []
+
+    for price in random_prices(rnd, 500, config.spike_percent):
+        history.append(price)
+        assert detector.update(price) == analyzer.detect(history)
+        assert detector.ready == (len(history) >= config.spikes_to_enter + 1)
+        assert detector.prices.to_list() == history[-detector.prices.capacity:]
+
+
+@pytest.mark.parametrize("config", CONFIGS[:6], ids=lambda c: f"{c.spike_percent}%x{c.spikes_to_enter}")
+def test_seed_then_stream(config):
+    rnd = random.Random(config.spikes_to_enter)
+    analyzer = Analyzer(config)
+    prices = random_prices(rnd, 300, config.spike_percent)
+
+    for split in (0, 1, config.spikes_to_enter, 5, 50, 299):
+        detector = SpikeDetector(config, capacity=8)
+        detector.update(123.0)      # seed() заменяет всё, что было
+        detector.seed(prices[:split])
+        assert detector.signal() == analyzer.detect(prices[:split])
+        for i in range(split, len(prices)):
+            assert detector.update(prices[i]) == analyzer.detect(prices[:i + 1])
+
+
+def test_check_matches_check_entry():
+    config = AnalyzerConfig(spike_percent=0.3, spikes_to_enter=2)
+    analyzer = Analyzer(config)
+    detector = SpikeDetector(config)
+    history = []
+    for price in [100, 100.5, 101, 101.1, 100.7, 100.3]:
+        history.append(price)
+        detector.update(price)
+        expected = analyzer.check_entry(history, "ETHUSDT")
+        got = detector.check("ETHUSDT")
+        assert (got.type, got.symbol, got.price) == (expected.type, expected.symbol, expected.price)
+    assert got.type == SignalType.SHORT
+
+
+def test_reset_and_small_buffer():
+    config = AnalyzerConfig(spike_percent=0.3, spikes_to_enter=2)
+    detector = SpikeDetector(config)
+    detector.seed([100, 101, 102])
+    assert detector.signal() == (SignalType.LONG, 2)
+    detector.reset()
+    assert detector.signal() == (SignalType.NONE, 0) and not detector.ready
+
+    with pytest.raises(ValueError):
+        SpikeDetector(config, RingBuffer(2))
+
+
+def flat_prices(seed: int, count: int = 600) -> list[float]:
+    """Случайное блуждание со скачками и плоскими участками (σ = 0)."""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 0.002, count)
+    steps[rng.integers(0, count, 30)] *= 6
+    for start in rng.integers(0, count - 60, 3):
+        steps[start:start + rng.integers(3, 60)] = 0.0
+    return list(100 * np.exp(np.cumsum(steps)))
+
+
+SIGMA_CONFIGS = [
+    AnalyzerConfig(spike_volatility=sigma, volatility_window=window, spikes_to_enter=k)
+    for sigma in (1.0, 2.0)
+    for window in (3, 5, 20, 50)
+    for k in (1, 2, 3)
+]
+
+
+@pytest.mark.parametrize(
+    "config", SIGMA_CONFIGS,
+    ids=lambda c: f"{c.spike_volatility:g}σ/{c.volatility_window}x{c.spikes_to_enter}",
+)
+def test_sigma_mode_matches_detect_and_backtest(config):
+    analyzer = Analyzer(config)
+    strategy_config = StrategyConfig(
+        spikes_to_enter=config.spikes_to_enter,
+        spike_volatility=config.spike_volatility,
+        volatility_window=config.volatility_window,
+    )
+    history = config.history
+
+    for seed in range(4):
+        prices = flat_prices(seed)
+        detector = SpikeDetector(config, RingBuffer(history + 5))
+        stream, expected = [], []
+        for i, price in enumerate(prices):
+            signal = detector.update(price)
+            if i + 1 >= history:
+                stream.append(signal)
+                expected.append(analyzer.detect(prices[:i + 1]))
+        assert stream == expected
+
+        rows = np.array([prices[i - history + 1:i + 1] for i in range(history - 1, len(prices))])
+        codes, _ = analyzer.detect_batch(rows)
+        assert [SIGNAL_CODES[code] for code in codes] == [signal for signal, _ in expected]
+
+        long, short = Backtester(strategy_config).entry_signals(np.array(prices))
+        assert list(np.where(long, 1, np.where(short, -1, 0))[history - 1:]) == list(codes)
+
+        seeded = SpikeDetector(config, RingBuffer(history + 5))
+        seeded.seed(prices)
+        assert (seeded.up_run, seeded.down_run) == (detector.up_run, detector.down_run)
+
+
+def test_sigma_mode_flat_window_has_no_spikes():
+    # σ трёх последних изменений (0.6%, −0.2%, 0, 0, 0) — ровно 0: +0.01% не скачок
+    config = AnalyzerConfig(spike_volatility=1.0, volatility_window=3, spikes_to_enter=1)
+    prices = [100, 100.6, 100.4, 100.4, 100.4, 100.4, 100.41]
+    detector = SpikeDetector(config, RingBuffer(config.history + 2))
+
+    signals = [detector.update(price) for price in prices]
+    assert signals[-1] == Analyzer(config).detect(prices) == (SignalType.NONE, 0)
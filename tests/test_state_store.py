@@ -0,0 +1,121 @@
+import json
+
+import numpy as np
+import pytest
+
+from core.exchange import SimulatedMarket, SimulationConfig
+from core.models import CandleFrame
+from services import InstrumentCache, StateStore, Strategy, StrategyConfig, Trader
+from services.state_store import FORMAT_VERSION
+from services.strategy import PERSISTED_FIELDS
+
+from .fakes import INSTRUMENT
+
+
+SYMBOL = "BTCUSDT"
+
+STATE = {
+    "in_position": True, "side": "long", "entry_price": 100.0, "max_price": 101.2,
+    "current_sl": 100.5, "trail_regime": 0, "trail_distance": 0.3, "trail_peak": 101.2,
+    "last_loss_ts": 1_700_000_000.0, "losses_today": 1, "loss_day_end": 1_700_050_000.0,
+}
+
+
+class Candles:
+    """Fetcher для warm_start: плоские закрытия."""
+
+    def get_candles(self, symbol, interval, limit=100):
+        close = np.full(limit, 100.0)
+        return CandleFrame(np.arange(limit, dtype=np.int64) * 60_000, close, close, close, close, np.ones(limit))
+
+
+def make_strategy(tmp_path, dry_run: bool = False):
+    market = SimulatedMarket(SimulationConfig(spread_percent=0, fee_percent=0), [INSTRUMENT])
+    market.on_price(SYMBOL, 100.8, 1_000)
+    account = market.account()
+    store = StateStore(tmp_path / f"{SYMBOL}.json", fsync=False)
+    strategy = Strategy(
+        Trader(account, InstrumentCache(account)), Candles(),
+        StrategyConfig(symbol=SYMBOL, dry_run=dry_run), store,
+    )
+    return strategy, account, store
+
+
+def test_snapshot_round_trip(tmp_path):
+    strategy, _, store = make_strategy(tmp_path, dry_run=True)
+    strategy.state.restore(STATE)
+    assert set(strategy.state.snapshot()) == set(PERSISTED_FIELDS) == set(STATE)
+    strategy.persist()
+    assert not store.save(strategy.state.snapshot())        # Тот же снимок не пишется
+
+    restored, _, _ = make_strategy(tmp_path, dry_run=True)
+    restored.warm_start()
+    assert restored.state.snapshot() == STATE
+    assert len(restored.state.price_history) == restored.state.price_history.capacity
+
+
+def test_snapshot_in_position_but_exchange_flat(tmp_path):
+    StateStore(tmp_path / f"{SYMBOL}.json").save(dict(STATE, current_sl=99.7))
+    strategy, account, _ = make_strategy(tmp_path)
+    strategy.warm_start()
+
+    # Закрылась по SL ниже входа, пока бота не было: убыток засчитан
+    state = strategy.state
+    assert not state.in_position and state.side == "" and state.trail_regime == -1
+    assert state.losses_today == 2
+    assert account.get_positions(SYMBOL) == []
+
+
+def test_exchange_position_without_snapshot(tmp_path):
+    strategy, account, _ = make_strategy(tmp_path)
+    account.sell(SYMBOL, "1", stop_loss=101.5)
+    strategy.warm_start()
+
+    state = strategy.state
+    assert state.in_position and state.side == "short"
+    assert state.entry_price == 100.8 and state.current_sl == 101.5
+    assert strategy.stops.side == "Sell"
+    saved = json.loads((tmp_path / f"{SYMBOL}.json").read_text())
+    assert saved["state"]["in_position"] and saved["state"]["side"] == "short"
+
+
+def test_exchange_sl_restored_from_snapshot(tmp_path):
+    # SL 100.5 не дошёл до биржи перед падением — выставляется при старте
+    StateStore(tmp_path / f"{SYMBOL}.json").save(STATE)
+    strategy, account, _ = make_strategy(tmp_path)
+    account.buy(SYMBOL, "1", stop_loss=99.7)
+    strategy.warm_start()
+
+    assert strategy.state.current_sl == 100.5
+    assert account.get_positions(SYMBOL)[0].stop_loss == 100.5
+
+
+@pytest.mark.parametrize("content", [
+    "",
+    '{"version":1,"saved_at":1.0,"state":{"in_posi',
+    "\x00\x00\x00",
+    json.dumps({"version": FORMAT_VERSION + 1, "saved_at": 1.0, "state": STATE}),
+])
+def test_unreadable_snapshot_starts_fresh(tmp_path, content):
+    (tmp_path / f"{SYMBOL}.json").write_text(content)
+    assert StateStore(tmp_path / f"{SYMBOL}.json").load() is None
+
+    strategy, _, _ = make_strategy(tmp_path, dry_run=True)
+    strategy.warm_start()
+    assert not strategy.state.in_position and strategy.state.losses_today == 0
+    # Нечитаемый снимок заменён свежим
+    assert StateStore(tmp_path / f"{SYMBOL}.json").load()[0] == strategy.state.snapshot()
+
+
+def test_partial_snapshot_keeps_defaults(tmp_path):
+    StateStore(tmp_path / f"{SYMBOL}.json").save({"losses_today": 2, "unknown": 1})
+    strategy, _, _ = make_strategy(tmp_path, dry_run=True)
+    strategy.warm_start()
+    assert strategy.state.losses_today == 2 and not strategy.state.in_position
+    assert not hasattr(strategy.state, "unknown")
+
+
+def test_atomic_write_leaves_no_tmp(tmp_path):
+    store = StateStore(tmp_path / "deep" / f"{SYMBOL}.json")
+    assert store.save(STATE)
+    assert [p.name for p in (tmp_path / "deep").iterdir()] == [f"{SYMBOL}.json"]
@@ -0,0 +1,196 @@
+import random
+
+import pytest
+
+from core.exchange import SimulatedMarket, SimulationConfig
+from services import InstrumentCache, PositionCache, StopLossCoalescer, Strategy, StrategyConfig, Trader
+
+from .fakes import INSTRUMENT, RecordingClient
+
+
+SYMBOL = "BTCUSDT"
+ENTRY = {"long": [100.0, 100.5, 101.0], "short": [100.0, 99.5, 99.0]}
+
+
+class Session:
+    """Стратегия на счёте SimulatedMarket: биржевой SL проверяется на каждом тике."""
+
+    def __init__(self, **config):
+        self.market = SimulatedMarket(SimulationConfig(spread_percent=0, fee_percent=0), [INSTRUMENT])
+        self.account = self.market.account()
+        positions = PositionCache(self.account).start()
+        trader = Trader(self.account, InstrumentCache(self.account), positions)
+        config = StrategyConfig(
+            symbol=SYMBOL, dry_run=False, amount_usdt=100, entry_spike_percent=0.3,
+            spikes_to_enter=2, breakeven_trigger=0.5, cooldown_minutes=0, **config,
+        )
+        self.strategy = Strategy(trader, None, config)
+        self.ts = 0
+        self.regimes: set[int] = set()
+
+    @property
+    def position(self):
+        return self.account.positions.get(SYMBOL)
+
+    def tick(self, price: float):
+        self.ts += 1
+        self.market.on_price(SYMBOL, price, self.ts * 1000)
+        result = self.strategy.on_price(price, self.ts)
+        self.check()
+        return result
+
+    def check(self) -> None:
+        """SL на бирже не слабее SL стратегии."""
+        state = self.strategy.state
+        position = self.position
+        if not state.in_position or position is None:
+            return
+        self.regimes.add(state.trail_regime)
+        assert position.stop_loss is not None
+        if state.side == "long":
+            assert position.stop_loss >= state.current_sl - 1e-9, (self.ts, position, state)
+        else:
+            assert position.stop_loss <= state.current_sl + 1e-9, (self.ts, position, state)
+
+
+def trend(side: str, start: float, moves: list[float]) -> list[float]:
+    """Цены от start: moves — изменения (%) в сторону профита позиции."""
+    sign = 1 if side == "long" else -1
+    prices = []
+    price = start
+    for move in moves:
+        price *= 1 + sign * move / 100
+        prices.append(price)
+    return prices
+
+
+@pytest.mark.parametrize("side", ["long", "short"])
+@pytest.mark.parametrize("native", [False, True])
+def test_regimes_up_to_guaranteed(side, native):
+    session = Session(native_trailing=native)
+    for price in ENTRY[side]:
+        session.tick(price)
+    assert session.strategy.state.in_position and session.strategy.state.side == side
+
+    # Зигзаг в профит: откаты меньше любого offset (с округлением SL к позиции)
+    for price in trend(side, ENTRY[side][-1], [0.25, -0.05] * 90):
+        session.tick(price)
+
+    state = session.strategy.state
+    assert state.in_position and session.strategy._calc_profit(state.max_price) > 12
+    if native:
+        # Тиры 0–3 и гарантированный минимум — каждая смена режима прошла
+        assert {0, 1, 2, 7} <= session.regimes
+    if native and side == "short":
+        # Последний тир short: distance нет — трейлинг снят, SL ведёт стратегия
+        assert state.trail_regime == 7 and state.trail_distance == 0
+        assert session.position.trailing == 0
+        assert session.strategy.stops.side == "Sell"
+
+
+@pytest.mark.parametrize("side", ["long", "short"])
+@pytest.mark.parametrize("native", [False, True])
+@pytest.mark.parametrize("seed", range(6))
+def test_exchange_stop_never_looser_on_random_paths(side, native, seed):
+    rnd = random.Random(seed)
+    session = Session(native_trailing=native)
+    for _ in range(5):
+        for price in ENTRY[side]:
+            session.tick(price)
+        moves = [rnd.gauss(0.08, 0.25) for _ in range(400)]
+        for price in trend(side, ENTRY[side][-1], moves):
+            if session.tick(price).action.value == "close":
+                break
+        if session.strategy.state.in_position:
+            session.strategy._close_position(ts=session.ts)
+        # Сброс окна цен: следующий вход — снова с ENTRY
+        session.strategy.detector.reset()
+
+
+def test_trailing_armed_with_active_price():
+    session = Session(native_trailing=True)
+    for price in ENTRY["long"]:
+        session.tick(price)
+
+    # Трейлинг выставлен сразу с входом и ждёт breakeven_trigger (+0.5%)
+    state = session.strategy.state
+    position = session.position
+    assert state.trail_regime == 0 and state.trail_peak == 0
+    assert position.trail_active == 101.5 and position.trailing == state.trail_distance == 0.3
+    initial = position.stop_loss
+
+    session.tick(101.4)
+    assert session.position.stop_loss == initial and state.trail_peak == 0
+
+    session.tick(101.6)
+    assert state.trail_peak == 101.6
+    assert session.position.stop_loss == pytest.approx(101.3)
+    assert state.current_sl == pytest.approx(101.3)
+    assert session.position.stop_loss >= state.entry_price
+
+
+class FlakyClient(RecordingClient):
+    """set_stop_loss падает fail раз подряд."""
+
+    def __init__(self, fail: int = 0):
+        super().__init__()
+        self.fail = fail
+
+    def set_stop_loss(self, symbol, price):
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError("timeout")
+        self.calls.append(("set_stop_loss", (symbol, price), {}))
+
+
+def make_coalescer(client: RecordingClient, **kwargs) -> StopLossCoalescer:
+    trader = Trader(client, InstrumentCache(client))
+    coalescer = StopLossCoalescer(trader, SYMBOL, **kwargs)
+    coalescer.reset(100.0, 0.0, "Buy")
+    client.calls.clear()
+    return coalescer
+
+
+def sent(client: RecordingClient) -> list[str]:
+    return [args[1] for name, args, _ in client.calls if name == "set_stop_loss"]
+
+
+def test_coalescer_hold_and_flush():
+    client = FlakyClient()
+    stops = make_coalescer(client, min_ticks=5, min_interval=2.0)
+
+    assert not stops.update(100.04, 1.0)        # Округлено к позиции — 100.1: 1 шаг, держим
+    assert stops.pending == 100.04
+    assert not stops.poll(1.5)                  # 2 с с прошлой отправки ещё не прошли
+    assert stops.update(100.61, 1.6)            # 7 шагов — сразу
+    assert sent(client) == ["100.7"] and stops.pending is None
+
+    assert not stops.update(100.75, 2.0)
+    assert not stops.poll(3.0)
+    assert stops.poll(3.6)                      # Прошло 2 с — досылается
+    assert sent(client) == ["100.7", "100.8"]
+    assert not stops.update(100.71, 9.0)        # Тот же SL после округления
+    assert stops.requests == 2
+
+
+def test_coalescer_rounds_short_down():
+    client = FlakyClient()
+    stops = make_coalescer(client)
+    stops.reset(101.0, 0.0, "Sell")
+    stops.update(100.96, 1.0)
+    assert sent(client) == ["100.9"]
+
+
+def test_coalescer_retries_failed_send():
+    client = FlakyClient(fail=2)
+    stops = make_coalescer(client, min_ticks=5, min_interval=60.0)
+
+    with pytest.raises(ConnectionError):
+        stops.update(101.0, 1.0)
+    assert stops.pending == 101.0 and sent(client) == []
+
+    # Неудача не считается отправкой: повтор — на первом же poll, без ожидания
+    with pytest.raises(ConnectionError):
+        stops.poll(1.1)
+    assert stops.poll(1.2)
+    assert sent(client) == ["101.0"] and stops.pending is None and stops.requests == 1
@@ -0,0 +1,178 @@
+import queue
+import threading
+import time
+
+import pytest
+
+from core.exchange.stream import BybitStream
+
+from .servers import WSConnection, WSServer
+
+
+def ticker(topic: str, price: float) -> dict:
+    return {"topic": topic, "type": "delta", "ts": 1, "data": {"lastPrice": str(price)}}
+
+
+def wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("не дождались")
+        time.sleep(0.01)
+
+
+def next_message(server: WSServer, op: str, timeout: float = 5.0) -> tuple[int, dict]:
+    """Следующее сообщение клиента с данным op (остальные пропускаются)."""
+    deadline = time.monotonic() + timeout
+    while True:
+        number, message = server.messages.get(timeout=max(deadline - time.monotonic(), 0.01))
+        if message.get("op") == op:
+            return number, message
+
+
+@pytest.fixture
+def stream_factory():
+    streams = []
+
+    def make(url: str, **kwargs) -> BybitStream:
+        kwargs.setdefault("reconnect_delay", 0.05)
+        stream = BybitStream(url, **kwargs)
+        streams.append(stream)
+        return stream
+
+    yield make
+    for stream in streams:
+        stream.stop()
+
+
+def test_delivers_messages_by_topic(stream_factory):
+    def handler(conn: WSConnection):
+        conn.recv_json()
+        conn.send_json({"op": "subscribe", "success": True})
+        conn.send_json(ticker("tickers.ETHUSDT", 1))
+        conn.send_json(ticker("tickers.BTCUSDT", 2))
+        while conn.recv_json() is not None:
+            pass
+
+    got = queue.Queue()
+    with WSServer(handler) as server:
+        stream = stream_factory(server.url)
+        stream.subscribe("tickers.BTCUSDT", lambda m: got.put(m["data"]["lastPrice"]))
+        stream.start()
+        assert got.get(timeout=5) == "2"
+        assert got.empty()
+
+
+def test_reconnects_and_resubscribes(stream_factory):
+    def handler(conn: WSConnection):
+        message = conn.recv_json()
+        conn.send_json(ticker(message["args"][0], conn.number))
+        if conn.number == 1:
+            conn.close()
+            return
+        while conn.recv_json() is not None:
+            pass
+
+    got = queue.Queue()
+    connects = []
+    with WSServer(handler) as server:
+        stream = stream_factory(server.url, on_connect=lambda: connects.append(1))
+        stream.subscribe("tickers.BTCUSDT", lambda m: got.put(m["data"]["lastPrice"]))
+        stream.start()
+
+        assert got.get(timeout=5) == "1"
+        assert got.get(timeout=5) == "2"     # Пришло уже по новому соединению
+        assert server.connections == 2
+        first = next_message(server, "subscribe")
+        second = next_message(server, "subscribe")
+        assert first == (1, {"op": "subscribe", "args": ["tickers.BTCUSDT"]})
+        assert second == (2, {"op": "subscribe", "args": ["tickers.BTCUSDT"]})
+        wait_for(lambda: len(connects) == 2)
+
+
+def test_subscribe_after_connect_and_chunking(stream_factory):
+    def handler(conn: WSConnection):
+        while conn.recv_json() is not None:
+            pass
+
+    topics = [f"tickers.S{i}USDT" for i in range(25)]
+    with WSServer(handler) as server:
+        stream = stream_factory(server.url)
+        for topic in topics:
+            stream.subscribe(topic, lambda m: None)
+        stream.start()
+        assert stream.wait_connected(5)
+
+        chunks = [next_message(server, "subscribe")[1]["args"] for _ in range(3)]
+        assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+        assert sum(chunks, []) == topics
+
+        # Новая подписка на живом соединении уходит сразу
+        stream.subscribe("tickers.NEWUSDT", lambda m: None)
+        assert next_message(server, "subscribe")[1]["args"] == ["tickers.NEWUSDT"]
+
+        stream.resubscribe("tickers.S0USDT")
+        assert next_message(server, "unsubscribe")[1]["args"] == ["tickers.S0USDT"]
+        assert next_message(server, "subscribe")[1]["args"] == ["tickers.S0USDT"]
+
+
+def test_heartbeat_and_silent_server(stream_factory):
+    # Сервер не отвечает на ping — после 2 интервалов тишины клиент переподключается
+    def handler(conn: WSConnection):
+        while conn.recv_json() is not None:
+            pass
+
+    with WSServer(handler) as server:
+        stream = stream_factory(server.url, ping_interval=0.1)
+        stream.subscribe("tickers.BTCUSDT", lambda m: None)
+        stream.start()
+        assert next_message(server, "ping")[0] == 1
+        wait_for(lambda: server.connections >= 2)
+
+
+def test_handler_error_keeps_connection(stream_factory):
+    def handler(conn: WSConnection):
+        conn.recv_json()
+        conn.send_json(ticker("tickers.BTCUSDT", 1))
+        conn.send_json(ticker("tickers.BTCUSDT", 2))
+        while conn.recv_json() is not None:
+            pass
+
+    got = queue.Queue()
+
+    def on_message(message):
+        if message["data"]["lastPrice"] == "1":
+            raise ValueError("сломанный обработчик")
+        got.put(message["data"]["lastPrice"])
+
+    with WSServer(handler) as server:
+        stream = stream_factory(server.url)
+        stream.subscribe("tickers.BTCUSDT", on_message)
+        stream.start()
+        assert got.get(timeout=5) == "2"
+        assert server.connections == 1
+
+
+def test_auth_before_subscribe(stream_factory):
+    accepted = threading.Event()
+
+    def handler(conn: WSConnection):
+        auth = conn.recv_json()
+        ok = conn.number > 1            # Первый auth отклоняем
+        conn.send_json({"op": "auth", "success": ok, "ret_msg": "" if ok else "expired"})
+        if not ok:
+            conn.recv_json()
+            return
+        assert auth["op"] == "auth"
+        assert conn.recv_json()["op"] == "subscribe"
+        accepted.set()
+        while conn.recv_json() is not None:
+            pass
+
+    with WSServer(handler) as server:
+        stream = stream_factory(server.url, auth=lambda: {"op": "auth", "args": ["key", 1, "sign"]})
+        stream.subscribe("position", lambda m: None)
+        stream.start()
+        assert accepted.wait(5)
+        assert server.connections == 2
+        assert stream.connected
@@ -0,0 +1,173 @@
+import json
+import multiprocessing as mp
+import queue
+
+import numpy as np
+import pytest
+
+from core.exchange import SimulatedMarket
+from core.models import CandleFrame
+from services import StrategyConfig, Supervisor
+from services.supervisor import ADD, LOAD, REMOVE, REMOVED, ShardWorker, WorkerLoad, plan_rebalance
+
+from .fakes import INSTRUMENT
+
+
+# === plan_rebalance ===
+
+def test_plan_below_tolerance():
+    assert plan_rebalance({0: {"A": 0.3}, 1: {"B": 0.25}}, tolerance=0.1) is None
+    assert plan_rebalance({0: {"A": 0.9, "B": 0.1}}, tolerance=0.1) is None
+
+
+def test_plan_halves_the_gap():
+    loads = {0: {"A": 0.4, "B": 0.15, "C": 0.05}, 1: {"D": 0.1}, 2: {"E": 0.3}}
+    # gap 0.6 − 0.1 = 0.5: ближе всего к половине — B (0.15)
+    assert plan_rebalance(loads, tolerance=0.1) == ("B", 0, 1)
+
+
+def test_plan_move_strictly_reduces_gap():
+    # Единственный символ ≥ gap: перенос только поменял бы воркеры ролями
+    assert plan_rebalance({0: {"A": 0.6}, 1: {"B": 0.1}}, tolerance=0.1) is None
+    # Символы без нагрузки не переносятся
+    assert plan_rebalance({0: {"A": 0.6, "B": 0.0}, 1: {}}, tolerance=0.1) is None
+    assert plan_rebalance({0: {"A": 0.6, "B": 0.2}, 1: {"C": 0.05}}, tolerance=0.1) == ("B", 0, 1)
+
+
+# === Supervisor: поддельные процессы и каналы ===
+
+class FakeProcess:
+    def __init__(self):
+        self.exitcode = None
+        self.pid = 1
+
+    def is_alive(self) -> bool:
+        return self.exitcode is None
+
+
+class FakeCommands:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message) -> None:
+        self.sent.append(message)
+
+
+def make_supervisor(monkeypatch, symbols=("A", "B", "C", "D"), workers=2) -> Supervisor:
+    supervisor = Supervisor([StrategyConfig(symbol=s) for s in symbols], factory=None, workers=workers)
+    spawned = []
+
+    def spawn(handle):
+        handle.process = FakeProcess()
+        handle.commands = FakeCommands()
+        handle.restart_at = None
+        handle.load = None
+        spawned.append((handle.worker, sorted(handle.configs)))
+
+    monkeypatch.setattr(supervisor, "_spawn", spawn)
+    supervisor.spawned = spawned
+    supervisor.start()
+    return supervisor
+
+
+def report(supervisor: Supervisor, worker: int, ts: float, **symbols: float) -> None:
+    supervisor._on_message((LOAD, WorkerLoad(
+        worker=worker, pid=1, ts=ts, ticks_per_sec=0, lag_avg=0, lag_max=0,
+        busy=sum(symbols.values()), symbols=symbols,
+    )))
+
+
+def start_move(supervisor: Supervisor) -> None:
+    """A (0.3 из разницы 0.7) переезжает с worker0 на worker1."""
+    handles = supervisor._handles
+    report(supervisor, 0, ts=1e12, A=0.3, C=0.6)
+    report(supervisor, 1, ts=1e12, B=0.1, D=0.1)
+    assert supervisor.rebalance()
+    assert handles[0].commands.sent == [(REMOVE, "A")]
+    assert supervisor._moves == {"A": 1}
+
+
+def test_move_handshake(monkeypatch):
+    supervisor = make_supervisor(monkeypatch)
+    handles = supervisor._handles
+    start_move(supervisor)
+
+    # Пока символ в пути и нет свежих отчётов — второго переноса нет
+    assert not supervisor.rebalance()
+    assert supervisor.assignment == {0: ["A", "C"], 1: ["B", "D"]}
+    assert handles[1].commands.sent == []
+
+    supervisor._on_message((REMOVED, 0, "A"))
+    assert supervisor.assignment == {0: ["C"], 1: ["B", "D", "A"]}
+    assert handles[1].commands.sent == [(ADD, handles[1].configs["A"])]
+    assert supervisor._moves == {}
+
+    # Отчёты до переноса устарели
+    report(supervisor, 0, ts=1.0, C=0.6)
+    report(supervisor, 1, ts=1.0, A=0.3, B=0.1, D=0.1)
+    assert not supervisor.rebalance()
+
+
+def test_source_crash_mid_move(monkeypatch):
+    supervisor = make_supervisor(monkeypatch)
+    handles = supervisor._handles
+    start_move(supervisor)
+
+    # Источник упал, не подтвердив: символ сразу у получателя, источник — без него
+    handles[0].process.exitcode = 1
+    supervisor._check_workers()
+    assert supervisor._moves == {}
+    assert [command for command, _ in handles[1].commands.sent] == [ADD]
+    assert handles[0].restart_at is not None and handles[0].restarts == 1
+
+    handles[0].restart_at = 0.0
+    supervisor._check_workers()
+    assert supervisor.spawned[-1] == (0, ["C"])
+
+    # Запоздавший REMOVED от старого процесса ничего не ломает
+    supervisor._on_message((REMOVED, 0, "A"))
+    assert supervisor.assignment == {0: ["C"], 1: ["B", "D", "A"]}
+
+
+def test_dead_target_gets_symbol_on_restart(monkeypatch):
+    supervisor = make_supervisor(monkeypatch)
+    handles = supervisor._handles
+    start_move(supervisor)
+
+    handles[1].process.exitcode = -9
+    supervisor._check_workers()
+    assert handles[1].restart_at is not None
+
+    supervisor._on_message((REMOVED, 0, "A"))
+    assert handles[1].commands.sent == []           # Команду некому отдать...
+    handles[1].restart_at = 0.0
+    supervisor._check_workers()
+    assert supervisor.spawned[-1] == (1, ["A", "B", "D"])   # ...символ придёт с рестартом
+
+
+# === ShardWorker ===
+
+class KlinesSource:
+    def get_klines(self, symbol, interval, limit=100, start=None, end=None):
+        ts = np.arange(limit, dtype=np.int64) * 60_000
+        close = np.full(limit, 100.0)
+        return CandleFrame(ts, close, close, close, close, np.ones(limit))
+
+
+def test_worker_persists_state_before_removed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    client = SimulatedMarket(instruments=[INSTRUMENT], source=KlinesSource()).account()
+    reports = queue.Queue()
+    receiver, sender = mp.Pipe(duplex=False)
+    worker = ShardWorker(0, client, reports, receiver, state_dir=tmp_path / "state")
+
+    worker.add(StrategyConfig(symbol="BTCUSDT"), subscribe=False)
+    strategy = worker.strategies["BTCUSDT"]
+    strategy.state.losses_today = 2                 # Изменилось без снимка
+
+    sender.send((REMOVE, "BTCUSDT"))
+    worker._poll_commands()
+    assert reports.get_nowait() == (REMOVED, 0, "BTCUSDT")
+    assert worker.strategies == {}
+    saved = json.loads((tmp_path / "state" / "BTCUSDT.json").read_text())
+    assert saved["state"]["losses_today"] == 2
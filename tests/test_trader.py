@@ -0,0 +1,65 @@
+from services import InstrumentCache, Strategy, StrategyConfig, Trader
+from services.strategy import Action
+
+from .fakes import RecordingClient
+
+
+def make_trader() -> tuple[Trader, RecordingClient]:
+    client = RecordingClient()
+    instruments = InstrumentCache(client)
+    instruments.load()
+    client.calls.clear()
+    return Trader(client, instruments), client
+
+
+def test_entry_is_one_request_with_stop_loss():
+    trader, client = make_trader()
+
+    trader.enter_long("BTCUSDT", 100, leverage=5, price=50_000.0, stop_loss=49_850.04)
+    assert client.calls == [
+        ("set_leverage", ("BTCUSDT", 5), {}),
+        ("buy", ("BTCUSDT", "0.002", "49850.1"), {}),      # SL long — вверх
+    ]
+
+    # Плечо уже выставлено: следующие входы — ровно один запрос
+    client.calls.clear()
+    trader.enter_short("BTCUSDT", 100, leverage=5, price=50_000.0, stop_loss=50_150.06)
+    trader.enter_long("BTCUSDT", 100, leverage=5, price=50_000.0, stop_loss=49_850.0)
+    assert client.calls == [
+        ("sell", ("BTCUSDT", "0.002", "50150.0"), {}),     # SL short — вниз
+        ("buy", ("BTCUSDT", "0.002", "49850.0"), {}),
+    ]
+
+
+def test_stop_loss_rounds_toward_position():
+    trader, client = make_trader()
+    trader.set_stop_loss("BTCUSDT", 100.01, side="Buy")
+    trader.set_stop_loss("BTCUSDT", 100.09, side="Sell")
+    trader.set_trailing_stop("BTCUSDT", 0.57, stop_loss=100.01, side="Buy")
+    assert client.calls == [
+        ("set_stop_loss", ("BTCUSDT", "100.1"), {}),
+        ("set_stop_loss", ("BTCUSDT", "100.0"), {}),
+        ("set_trailing_stop", ("BTCUSDT", "0.5", None, "100.1"), {}),
+    ]
+
+
+def test_strategy_entry_sends_single_order():
+    trader, client = make_trader()
+    config = StrategyConfig(
+        symbol="BTCUSDT", dry_run=False, leverage=1, amount_usdt=100,
+        entry_spike_percent=0.3, spikes_to_enter=2, initial_sl_percent=0.3,
+    )
+    strategy = Strategy(trader, None, config)
+
+    results = [strategy.on_price(price, i) for i, price in enumerate([100.0, 100.5, 101.0])]
+    assert results[-1].action is Action.ENTER_LONG
+    assert client.names() == ["buy"]
+    _, (symbol, qty, stop_loss), _ = client.calls[0]
+    assert (symbol, qty) == ("BTCUSDT", "0.990")
+    assert float(stop_loss) == round(strategy.state.current_sl, 1) == 100.7
+
+    # Удержание позиции без сдвига SL — ни одного запроса
+    client.calls.clear()
+    assert strategy.on_price(100.9, 3).action is Action.NONE
+    assert client.calls == []
+    assert "get_positions" not in client.names() and "set_stop_loss" not in client.names()